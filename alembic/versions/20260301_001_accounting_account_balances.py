@@ -0,0 +1,85 @@
+"""MODULE ACCOUNTING - Soldes matérialisés par compte et période
+
+Revision ID: accounting_balances_001
+Revises: social_publications_001
+Create Date: 2026-03-01
+
+Tables:
+- accounting_account_balances: cumul débit/crédit par tenant, exercice,
+  période et compte (écritures POSTED et VALIDATED)
+
+La table est alimentée à partir des lignes existantes lors de la migration
+(y compris si elle a déjà été créée vide au démarrage de l'application),
+puis maintenue incrémentalement par AccountingService.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'accounting_balances_001'
+down_revision = 'social_publications_001'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    from sqlalchemy import inspect
+    return inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    """Create accounting_account_balances and backfill it."""
+    if _has_table('accounting_account_balances'):
+        print("  [INFO] Table 'accounting_account_balances' already exists - backfill only if empty")
+    else:
+        _create_table()
+
+    if not _has_table('accounting_journal_entry_lines'):
+        return
+
+    # Alimentation initiale depuis les écritures comptabilisées (table vide seulement)
+    op.execute("""
+        INSERT INTO accounting_account_balances
+            (id, tenant_id, fiscal_year_id, period, account_number, debit, credit, line_count, updated_at)
+        SELECT
+            gen_random_uuid(), l.tenant_id, e.fiscal_year_id, e.period, l.account_number,
+            COALESCE(SUM(l.debit), 0), COALESCE(SUM(l.credit), 0), COUNT(l.id), CURRENT_TIMESTAMP
+        FROM accounting_journal_entry_lines l
+        JOIN accounting_journal_entries e ON e.id = l.entry_id AND e.tenant_id = l.tenant_id
+        WHERE e.status IN ('POSTED', 'VALIDATED')
+          AND NOT EXISTS (SELECT 1 FROM accounting_account_balances)
+        GROUP BY l.tenant_id, e.fiscal_year_id, e.period, l.account_number
+    """)
+
+
+def _create_table() -> None:
+    op.create_table(
+        'accounting_account_balances',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+
+        # Clé d'agrégation
+        sa.Column('fiscal_year_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('period', sa.String(7), nullable=False),
+        sa.Column('account_number', sa.String(20), nullable=False),
+
+        # Cumuls
+        sa.Column('debit', sa.Numeric(15, 2), nullable=False, server_default='0.00'),
+        sa.Column('credit', sa.Numeric(15, 2), nullable=False, server_default='0.00'),
+        sa.Column('line_count', sa.Integer(), nullable=False, server_default='0'),
+
+        # Métadonnées
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['fiscal_year_id'], ['accounting_fiscal_years.id']),
+        sa.Index('idx_accounting_balances_key', 'tenant_id', 'fiscal_year_id', 'period', 'account_number',
+                 unique=True),
+        sa.Index('idx_accounting_balances_account', 'tenant_id', 'account_number'),
+    )
+
+
+def downgrade() -> None:
+    """Drop accounting_account_balances."""
+    op.drop_table('accounting_account_balances')
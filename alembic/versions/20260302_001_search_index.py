@@ -0,0 +1,85 @@
+"""MODULE SEARCH - Index inversé persistant
+
+Revision ID: search_index_001
+Revises: accounting_balances_001
+Create Date: 2026-03-02
+
+Tables:
+- search_indexes: définitions d'index et statistiques BM25
+- search_documents: documents indexés (entity_id -> doc_num)
+- search_postings: postings compactes par (index, terme, shard)
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'search_index_001'
+down_revision = 'accounting_balances_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create search_indexes, search_documents, search_postings."""
+    op.create_table(
+        'search_indexes',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('entity_type', sa.String(50), nullable=False),
+        sa.Column('definition', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='active'),
+
+        # Statistiques BM25
+        sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_length', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('next_doc_num', sa.Integer(), nullable=False, server_default='0'),
+
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.Column('last_reindex_at', sa.DateTime()),
+
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('idx_search_indexes_name', 'tenant_id', 'name', unique=True),
+        sa.Index('idx_search_indexes_entity', 'tenant_id', 'entity_type'),
+    )
+
+    op.create_table(
+        'search_documents',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+        sa.Column('index_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('doc_num', sa.Integer(), nullable=False),
+        sa.Column('entity_id', sa.String(100), nullable=False),
+        sa.Column('fields', sa.JSON(), nullable=False),
+        sa.Column('all_text', sa.Text(), nullable=False, server_default=''),
+        sa.Column('tokens', sa.JSON(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('indexed_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime()),
+
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('idx_search_documents_entity', 'index_id', 'entity_id', unique=True),
+        sa.Index('idx_search_documents_num', 'index_id', 'doc_num', unique=True),
+    )
+
+    # Clé primaire (index_id, term, shard): dictionnaire des termes trié
+    op.create_table(
+        'search_postings',
+        sa.Column('index_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('term', sa.String(100), nullable=False),
+        sa.Column('shard', sa.Integer(), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+        sa.Column('doc_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('postings', sa.LargeBinary(), nullable=False),
+
+        sa.PrimaryKeyConstraint('index_id', 'term', 'shard'),
+    )
+
+
+def downgrade() -> None:
+    """Drop search tables."""
+    op.drop_table('search_postings')
+    op.drop_table('search_documents')
+    op.drop_table('search_indexes')
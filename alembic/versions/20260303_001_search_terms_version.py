@@ -0,0 +1,30 @@
+"""MODULE SEARCH - Version du dictionnaire des termes
+
+Revision ID: search_terms_version_001
+Revises: search_index_001
+Create Date: 2026-03-03
+
+search_indexes.terms_version est incrémenté à chaque ajout / retrait de
+terme; il valide les vocabulaires gardés en cache pour la recherche floue.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'search_terms_version_001'
+down_revision = 'search_index_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Add search_indexes.terms_version."""
+    op.add_column(
+        'search_indexes',
+        sa.Column('terms_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Drop search_indexes.terms_version."""
+    op.drop_column('search_indexes', 'terms_version')
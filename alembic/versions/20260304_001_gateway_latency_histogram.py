@@ -0,0 +1,37 @@
+"""MODULE GATEWAY - Histogramme des temps de réponse
+
+Revision ID: gateway_latency_histogram_001
+Revises: search_terms_version_001
+Create Date: 2026-03-04
+
+gateway_metrics.latency_histogram (JSON) conserve l'histogramme des temps
+de réponse de la période; p50 / p95 / p99 en sont dérivés à chaque report
+du tampon de métriques.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'gateway_latency_histogram_001'
+down_revision = 'search_terms_version_001'
+branch_labels = None
+depends_on = None
+
+
+def _has_table() -> bool:
+    from sqlalchemy import inspect
+    return 'gateway_metrics' in inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    """Add gateway_metrics.latency_histogram."""
+    if not _has_table():
+        print("  [INFO] Table 'gateway_metrics' not found - skipping latency_histogram migration")
+        return
+    op.add_column('gateway_metrics', sa.Column('latency_histogram', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop gateway_metrics.latency_histogram."""
+    if _has_table():
+        op.drop_column('gateway_metrics', 'latency_histogram')
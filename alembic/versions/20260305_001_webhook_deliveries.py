@@ -0,0 +1,96 @@
+"""MODULE WEBHOOKS - Endpoints et file de livraison persistants
+
+Revision ID: webhook_deliveries_001
+Revises: gateway_latency_histogram_001
+Create Date: 2026-03-05
+
+Tables:
+- webhook_endpoints: configuration et statistiques des endpoints
+- webhook_deliveries: file de livraison durable (une ligne par endpoint
+  et payload), lue par les workers de livraison
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'webhook_deliveries_001'
+down_revision = 'gateway_latency_histogram_001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Create webhook_endpoints, webhook_deliveries."""
+    op.create_table(
+        'webhook_endpoints',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+        sa.Column('name', sa.String(200), nullable=False),
+        sa.Column('url', sa.Text(), nullable=False),
+        sa.Column('events', sa.JSON(), nullable=False),
+
+        # Sécurité
+        sa.Column('secret', sa.String(200), nullable=False, server_default=''),
+        sa.Column('signature_version', sa.String(10), nullable=False, server_default='v1'),
+        sa.Column('verify_ssl', sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column('custom_headers', sa.JSON(), nullable=False),
+
+        sa.Column('status', sa.String(20), nullable=False, server_default='active'),
+
+        # Livraison
+        sa.Column('max_retries', sa.Integer(), nullable=False, server_default='5'),
+        sa.Column('retry_delay_seconds', sa.Integer(), nullable=False, server_default='60'),
+        sa.Column('timeout_seconds', sa.Integer(), nullable=False, server_default='30'),
+        sa.Column('max_concurrency', sa.Integer(), nullable=False, server_default='4'),
+        sa.Column('batch_max_size', sa.Integer(), nullable=False, server_default='1'),
+
+        # Statistiques
+        sa.Column('total_deliveries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('successful_deliveries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed_deliveries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('consecutive_failures', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_delivery_at', sa.DateTime()),
+        sa.Column('last_success_at', sa.DateTime()),
+        sa.Column('last_failure_at', sa.DateTime()),
+
+        sa.Column('description', sa.Text()),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime()),
+
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('idx_webhook_endpoints_tenant', 'tenant_id', 'status'),
+    )
+
+    op.create_table(
+        'webhook_deliveries',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', sa.String(50), nullable=False),
+        sa.Column('endpoint_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payload_id', sa.String(36), nullable=False),
+        sa.Column('event', sa.String(100), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempt_number', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('locked_until', sa.DateTime()),
+
+        # Dernière tentative
+        sa.Column('response_status_code', sa.Integer()),
+        sa.Column('response_time_ms', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error_message', sa.Text()),
+
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('completed_at', sa.DateTime()),
+
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('idx_webhook_deliveries_due', 'status', 'next_attempt_at'),
+        sa.Index('idx_webhook_deliveries_payload', 'tenant_id', 'payload_id'),
+        sa.Index('idx_webhook_deliveries_endpoint', 'endpoint_id', 'status'),
+    )
+
+
+def downgrade() -> None:
+    """Drop webhook tables."""
+    op.drop_table('webhook_deliveries')
+    op.drop_table('webhook_endpoints')
@@ -0,0 +1,50 @@
+"""MODULE BACKUP - Sauvegardes incrémentales et différentielles
+
+Revision ID: backup_incremental_001
+Revises: webhook_deliveries_001
+Create Date: 2026-03-06
+
+backups:
+- base_backup_id / parent_backup_id: chaîne d'une sauvegarde incrémentale
+  ou différentielle jusqu'à sa sauvegarde complète
+- watermarks (JSON): marqueur de progression par table (updated_at ou
+  created_at maximal sauvegardé)
+- deleted_count: lignes supprimées depuis la sauvegarde précédente
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'backup_incremental_001'
+down_revision = 'webhook_deliveries_001'
+branch_labels = None
+depends_on = None
+
+
+def _has_table() -> bool:
+    from sqlalchemy import inspect
+    return 'backups' in inspect(op.get_bind()).get_table_names()
+
+
+def upgrade() -> None:
+    """Add backup chain columns."""
+    if not _has_table():
+        print("  [INFO] Table 'backups' not found - skipping incremental backup migration")
+        return
+    op.add_column('backups', sa.Column('base_backup_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('backups', sa.Column('parent_backup_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column('backups', sa.Column('watermarks', sa.JSON(), nullable=True))
+    op.add_column('backups', sa.Column('deleted_count', sa.Integer(), nullable=True, server_default='0'))
+    op.create_index('ix_backups_base_backup_id', 'backups', ['base_backup_id'])
+
+
+def downgrade() -> None:
+    """Drop backup chain columns."""
+    if not _has_table():
+        return
+    op.drop_index('ix_backups_base_backup_id', table_name='backups')
+    op.drop_column('backups', 'deleted_count')
+    op.drop_column('backups', 'watermarks')
+    op.drop_column('backups', 'parent_backup_id')
+    op.drop_column('backups', 'base_backup_id')
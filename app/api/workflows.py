@@ -11,7 +11,7 @@ from __future__ import annotations
 import logging
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import json
 from pathlib import Path
 
@@ -89,6 +89,8 @@ class WorkflowExecutionResponse(BaseModel):
     steps: Dict[str, Any]
     context: Dict[str, Any]
     error: Optional[str] = None
+    critical_path: List[str] = []
+    critical_path_ms: Optional[int] = None
 
 
 @router.post("/execute", response_model=WorkflowExecutionResponse)
@@ -217,7 +219,9 @@ async def execute_workflow(
                 for step_id, step_result in result.steps.items()
             },
             context=result.context,
-            error=result.error
+            error=result.error,
+            critical_path=result.critical_path,
+            critical_path_ms=result.critical_path_ms
         )
 
     except Exception as e:
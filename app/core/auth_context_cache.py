@@ -0,0 +1,407 @@
+"""
+AZALS - Cache du contexte d'authentification
+=============================================
+Évite de ré-authentifier chaque requête contre la base de données.
+
+CoreAuthMiddleware appelle SaaSCore.authenticate() (décodage JWT + lecture
+User + lecture Tenant) puis relit User pour alimenter request.state.user.
+Ce cache conserve, par token, le SaaSContext résolu et un instantané léger
+de l'utilisateur pour une durée bornée (TTL + taille maximale LRU).
+
+SÉCURITÉ:
+- Clé = SHA-256 du token complet + tenant_id (jamais le jti seul, qui n'est
+  pas authentifié avant vérification de la signature)
+- Expiration au plus tard à l'expiration du JWT
+- Invalidation immédiate sur révocation (token_blacklist), désactivation
+  utilisateur, changement de rôle et changement de statut tenant
+- Cache local au processus : entre workers, la fraîcheur est bornée par le TTL
+"""
+from __future__ import annotations
+
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import event
+
+from app.core.logging_config import get_logger
+from app.core.models import User, UserRole
+from app.core.saas_context import SaaSContext
+from app.modules.tenants.models import Tenant
+
+logger = get_logger(__name__)
+
+CACHE_TYPE = "auth_context"
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Instantané en lecture seule d'un User.
+
+    Expose les attributs consultés par RBACMiddleware et les dépendances
+    (id, tenant_id, email, role...) sans garder d'objet ORM détaché en cache.
+    """
+
+    id: UUID
+    tenant_id: str
+    email: str
+    role: UserRole
+    is_active: int = 1
+    totp_enabled: int = 0
+    must_change_password: int = 0
+    default_view: str | None = None
+
+    @classmethod
+    def from_model(cls, user: User) -> CachedUser:
+        """Construit l'instantané depuis le modèle ORM."""
+        return cls(
+            id=user.id,
+            tenant_id=user.tenant_id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            totp_enabled=user.totp_enabled or 0,
+            must_change_password=user.must_change_password or 0,
+            default_view=user.default_view,
+        )
+
+
+@dataclass(frozen=True)
+class AuthCacheEntry:
+    """Entrée du cache: contexte résolu + instantané utilisateur."""
+
+    context: SaaSContext
+    user: CachedUser | None
+    jti: str | None
+    expires_at: float
+
+    def bind(self, ip_address: str, user_agent: str, correlation_id: str) -> SaaSContext:
+        """Retourne le contexte avec les informations d'audit de la requête courante."""
+        return replace(
+            self.context,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            correlation_id=correlation_id,
+            timestamp=datetime.utcnow(),
+        )
+
+
+class AuthContextCache:
+    """
+    Cache LRU borné avec TTL des contextes d'authentification.
+
+    Usage:
+        cache = AuthContextCache.get_instance()
+        entry = cache.get(token, tenant_id)
+        if entry is None:
+            ...  # SaaSCore.authenticate()
+            cache.put(token, tenant_id, context, user, claims)
+    """
+
+    _instance: Optional['AuthContextCache'] = None
+    _lock = threading.Lock()
+
+    DEFAULT_TTL = 30
+    DEFAULT_MAX_SIZE = 10_000
+
+    def __init__(self, ttl: int = DEFAULT_TTL, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        Args:
+            ttl: Durée de vie maximale d'une entrée en secondes (0 = cache désactivé)
+            max_size: Nombre maximal d'entrées (éviction LRU au-delà)
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._store: OrderedDict[str, AuthCacheEntry] = OrderedDict()
+        self._by_jti: dict[str, str] = {}
+        self._by_user: dict[str, set[str]] = {}
+        self._by_tenant: dict[str, set[str]] = {}
+        self._store_lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def get_instance(cls) -> 'AuthContextCache':
+        """Singleton thread-safe configuré depuis les settings."""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    from app.core.config import get_settings
+                    settings = get_settings()
+                    cls._instance = cls(
+                        ttl=settings.auth_context_cache_ttl,
+                        max_size=settings.auth_context_cache_size,
+                    )
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        """Reset le singleton (utile pour les tests)."""
+        with cls._lock:
+            cls._instance = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(token: str, tenant_id: str) -> str:
+        """Clé de cache: empreinte du token complet, scopée par tenant."""
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        return f"{tenant_id}:{digest}"
+
+    # ------------------------------------------------------------------
+    # Lecture / écriture
+    # ------------------------------------------------------------------
+
+    def get(self, token: str, tenant_id: str) -> AuthCacheEntry | None:
+        """
+        Retourne l'entrée en cache si présente, non expirée et non révoquée.
+
+        Enregistre un hit ou un miss dans les métriques Prometheus.
+        """
+        if not self.enabled:
+            return None
+
+        key = self.make_key(token, tenant_id)
+        with self._store_lock:
+            entry = self._store.get(key)
+            if entry is not None and entry.expires_at <= time.time():
+                self._remove_key(key)
+                entry = None
+            if entry is not None:
+                self._store.move_to_end(key)
+
+        # La blacklist peut être partagée (Redis) entre workers: une révocation
+        # faite ailleurs doit être vue avant de servir le cache.
+        if entry is not None and entry.jti:
+            from app.core.token_blacklist import is_token_blacklisted
+            if is_token_blacklisted(entry.jti):
+                self.invalidate_jti(entry.jti)
+                entry = None
+
+        self._record(entry is not None)
+        return entry
+
+    def put(
+        self,
+        token: str,
+        tenant_id: str,
+        context: SaaSContext,
+        user: CachedUser | None,
+        claims: dict[str, Any] | None = None,
+    ) -> AuthCacheEntry | None:
+        """
+        Met en cache un contexte authentifié.
+
+        Args:
+            token: JWT brut (déjà vérifié par SaaSCore.authenticate)
+            tenant_id: Tenant de la requête
+            context: SaaSContext résolu
+            user: Instantané utilisateur
+            claims: Claims du JWT (jti, exp) pour l'invalidation et l'expiration
+
+        Returns:
+            L'entrée créée, ou None si le token ne doit pas être mis en cache
+        """
+        if not self.enabled:
+            return None
+
+        claims = claims or {}
+        jti = claims.get("jti")
+        expires_at = time.time() + self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return None
+
+        if jti:
+            from app.core.token_blacklist import is_token_blacklisted
+            if is_token_blacklisted(jti):
+                return None
+
+        key = self.make_key(token, tenant_id)
+        entry = AuthCacheEntry(context=context, user=user, jti=jti, expires_at=expires_at)
+
+        with self._store_lock:
+            if key in self._store:
+                self._remove_key(key)
+            while len(self._store) >= self.max_size:
+                oldest_key = next(iter(self._store))
+                self._remove_key(oldest_key)
+
+            self._store[key] = entry
+            if jti:
+                self._by_jti[jti] = key
+            self._by_user.setdefault(str(context.user_id), set()).add(key)
+            self._by_tenant.setdefault(context.tenant_id, set()).add(key)
+
+        return entry
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate_jti(self, jti: str) -> int:
+        """Invalide l'entrée d'un token révoqué."""
+        with self._store_lock:
+            key = self._by_jti.get(jti)
+            removed = self._remove_key(key) if key else 0
+        self._record_invalidation("token_revoked", removed)
+        return removed
+
+    def invalidate_user(self, user_id: UUID | str) -> int:
+        """Invalide toutes les entrées d'un utilisateur."""
+        with self._store_lock:
+            keys = list(self._by_user.get(str(user_id), ()))
+            removed = sum(self._remove_key(key) for key in keys)
+        self._record_invalidation("user_changed", removed)
+        return removed
+
+    def invalidate_tenant(self, tenant_id: str) -> int:
+        """Invalide toutes les entrées d'un tenant."""
+        with self._store_lock:
+            keys = list(self._by_tenant.get(tenant_id, ()))
+            removed = sum(self._remove_key(key) for key in keys)
+        self._record_invalidation("tenant_changed", removed)
+        return removed
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._store_lock:
+            self._store.clear()
+            self._by_jti.clear()
+            self._by_user.clear()
+            self._by_tenant.clear()
+        self._update_size_metric()
+
+    def stats(self) -> dict[str, Any]:
+        """Statistiques du cache (taille, hits, misses, ratio)."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._store),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    # ------------------------------------------------------------------
+    # Interne
+    # ------------------------------------------------------------------
+
+    def _remove_key(self, key: str) -> int:
+        """Retire une clé et ses index secondaires (appelant détient le verrou)."""
+        entry = self._store.pop(key, None)
+        if entry is None:
+            return 0
+
+        if entry.jti and self._by_jti.get(entry.jti) == key:
+            del self._by_jti[entry.jti]
+        for index, index_key in (
+            (self._by_user, str(entry.context.user_id)),
+            (self._by_tenant, entry.context.tenant_id),
+        ):
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[index_key]
+        return 1
+
+    def _record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        try:
+            from app.core.metrics import record_cache_access
+            record_cache_access(CACHE_TYPE, hit)
+        except Exception as e:
+            logger.debug("[AUTH_CACHE] Métriques indisponibles: %s", e)
+
+    def _record_invalidation(self, reason: str, count: int) -> None:
+        if count:
+            logger.debug("[AUTH_CACHE] %s entrée(s) invalidée(s) (%s)", count, reason)
+        try:
+            from app.core.metrics import record_auth_context_invalidation
+            record_auth_context_invalidation(reason, count)
+        except Exception as e:
+            logger.debug("[AUTH_CACHE] Métriques indisponibles: %s", e)
+        self._update_size_metric()
+
+    def _update_size_metric(self) -> None:
+        try:
+            from app.core.metrics import AUTH_CONTEXT_CACHE_SIZE
+            AUTH_CONTEXT_CACHE_SIZE.set(len(self._store))
+        except Exception as e:
+            logger.debug("[AUTH_CACHE] Métriques indisponibles: %s", e)
+
+
+def get_auth_context_cache() -> AuthContextCache:
+    """Retourne le cache de contextes d'authentification (singleton)."""
+    return AuthContextCache.get_instance()
+
+
+def invalidate_token(jti: str) -> int:
+    """Invalide le contexte en cache d'un token révoqué."""
+    if AuthContextCache._instance is None:
+        return 0
+    return AuthContextCache._instance.invalidate_jti(jti)
+
+
+def invalidate_user(user_id: UUID | str) -> int:
+    """Invalide les contextes en cache d'un utilisateur."""
+    if AuthContextCache._instance is None:
+        return 0
+    return AuthContextCache._instance.invalidate_user(user_id)
+
+
+def invalidate_tenant(tenant_id: str) -> int:
+    """Invalide les contextes en cache d'un tenant."""
+    if AuthContextCache._instance is None:
+        return 0
+    return AuthContextCache._instance.invalidate_tenant(tenant_id)
+
+
+# ============================================================================
+# INVALIDATION AUTOMATIQUE SUR MODIFICATION ORM
+# ============================================================================
+# Les changements d'is_active/role (User) et de status (Tenant) sont faits à
+# de nombreux endroits (IAM, tenants, Stripe, tenant_status_guard...).
+# Écouter les attributs ORM couvre tous ces chemins sans les modifier.
+
+@event.listens_for(User.is_active, "set")
+@event.listens_for(User.role, "set")
+def _on_user_auth_change(target: User, value, oldvalue, initiator) -> None:
+    if target.id is not None and value != oldvalue:
+        invalidate_user(target.id)
+
+
+@event.listens_for(Tenant.status, "set")
+def _on_tenant_status_change(target: Tenant, value, oldvalue, initiator) -> None:
+    if target.tenant_id and value != oldvalue:
+        invalidate_tenant(target.tenant_id)
+
+
+__all__ = [
+    'AuthCacheEntry',
+    'AuthContextCache',
+    'CachedUser',
+    'get_auth_context_cache',
+    'invalidate_tenant',
+    'invalidate_token',
+    'invalidate_user',
+]
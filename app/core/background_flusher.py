@@ -0,0 +1,118 @@
+"""
+AZALSCORE - Report periodique en arriere-plan
+=============================================
+
+Boucle commune des tampons en memoire reportes en base par un thread de
+fond (logs et metriques de la gateway, quotas, erreurs GUARDIAN...):
+- drain() est appele toutes les `interval` secondes, ou plus tot des que
+  le FlushTrigger du tampon est leve (seuil de taille atteint)
+- une erreur de drain() est journalisee: le thread continue, nouvel
+  essai au cycle suivant
+- stop() arrete le thread puis fait un dernier report
+
+Usage:
+    class MyBuffer:
+        def __init__(self, max_pending):
+            self.flush_requested = FlushTrigger(max_pending)
+
+        def record(self, item):
+            ...
+            self.flush_requested.notify(pending)
+
+    flusher = BackgroundFlusher(
+        lambda: flush_my_buffer(buffer, SessionLocal), interval=5,
+        trigger=buffer.flush_requested, name="my-flusher",
+    )
+    flusher.start()   # lifespan: demarrage
+    flusher.stop()    # lifespan: arret (dernier report inclus)
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FlushTrigger(threading.Event):
+    """Reveil anticipe d'un BackgroundFlusher, leve des que `threshold` elements sont en attente."""
+
+    def __init__(self, threshold: int):
+        super().__init__()
+        self.threshold = threshold
+
+    def notify(self, pending: int) -> None:
+        """Signale pending elements en attente."""
+        if pending >= self.threshold:
+            self.set()
+
+
+class BackgroundFlusher:
+    """Thread de fond qui appelle drain() par intervalle ou sur FlushTrigger."""
+
+    def __init__(
+        self,
+        drain: Callable[[], Any],
+        interval: float,
+        trigger: Optional[threading.Event] = None,
+        name: str = "background-flusher",
+        failure_result: Any = 0,
+        log: logging.Logger = logger,
+        error_message: str = "Report en echec, nouvel essai au prochain cycle: %s",
+    ):
+        """
+        Args:
+            drain: Reporte le tampon; son resultat est retourne par flush()
+            interval: Secondes entre deux reports
+            trigger: Evenement levant un report anticipe (defaut: intervalle seul)
+            name: Nom du thread
+            failure_result: Resultat de flush() quand drain() echoue
+            log / error_message: Journalisation des echecs de drain()
+        """
+        self.drain = drain
+        self.interval = interval
+        self.trigger = trigger if trigger is not None else threading.Event()
+        self.name = name
+        self.failure_result = failure_result
+        self._log = log
+        self._error_message = error_message
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrete le thread apres un dernier report."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self.trigger.set()
+        self._thread.join(timeout=self.interval + 5)
+        self._thread = None
+        self.flush()
+
+    def flush(self) -> Any:
+        """Reporte immediatement (erreurs journalisees, failure_result retourne)."""
+        try:
+            return self.drain()
+        except Exception as e:
+            self._log.error(self._error_message, e)
+            return self.failure_result
+
+    def _run(self) -> None:
+        while True:
+            self.trigger.wait(self.interval)
+            self.trigger.clear()
+            if self._stop.is_set():
+                return
+            self.flush()
@@ -1,29 +1,79 @@
 """
 AZALS - Compression HTTP ÉLITE
 ==============================
-Compression gzip/deflate pour réduire bande passante.
+Compression brotli/gzip/deflate pour réduire bande passante.
 Seuil minimal pour éviter surcharge sur petites réponses.
+
+Compression en flux: chaque bloc du body est compressé dès réception par un
+compresseur incrémental (zlib/brotli), y compris pour les StreamingResponse
+(exports CSV/Excel, FEC). La mémoire reste bornée quelle que soit la taille
+de la réponse.
 """
 
-import gzip
 import logging
 import zlib
-from collections.abc import Callable
 
-from starlette.datastructures import MutableHeaders
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi as brotli
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        brotli = None
+        BROTLI_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
-class CompressionMiddleware(BaseHTTPMiddleware):
+class StreamCompressor:
+    """
+    Compresseur incrémental pour un encodage HTTP donné.
+
+    - gzip / deflate: zlib.compressobj (wbits 31 = gzip, 15 = zlib)
+    - br: brotli.Compressor (si le package brotli est installé)
+    """
+
+    def __init__(self, encoding: str, level: int = 6, brotli_quality: int = 4):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            wbits = 31 if encoding == "gzip" else 15
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, wbits)
+            self._brotli = None
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresse un bloc; peut ne rien renvoyer tant que le tampon interne n'est pas plein."""
+        if self._zlib is not None:
+            return self._zlib.compress(data)
+        return self._brotli.process(data)
+
+    def flush(self) -> bytes:
+        """Vide le tampon interne sans terminer le flux."""
+        if self._zlib is not None:
+            return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        return self._brotli.flush()
+
+    def finish(self) -> bytes:
+        """Termine le flux compressé."""
+        if self._zlib is not None:
+            return self._zlib.flush(zlib.Z_FINISH)
+        return self._brotli.finish()
+
+
+class CompressionMiddleware:
     """
     Middleware de compression HTTP.
 
     Supporte:
-    - gzip (prioritaire, meilleure compatibilité)
+    - br (prioritaire si le client l'accepte et que brotli est installé)
+    - gzip (meilleure compatibilité)
     - deflate (fallback)
 
     Caractéristiques:
@@ -31,6 +81,9 @@ class CompressionMiddleware(BaseHTTPMiddleware):
     - Ignore les réponses déjà compressées
     - Ignore les types non compressibles (images, vidéos)
     - Niveau de compression configurable
+    - Middleware ASGI pur, compression en flux: seuls les premiers octets
+      (jusqu'à minimum_size) sont retenus pour décider de compresser, puis
+      chaque bloc est compressé et envoyé immédiatement
     """
 
     # Types MIME à NE PAS compresser (déjà compressés ou binaires)
@@ -48,6 +101,7 @@ class CompressionMiddleware(BaseHTTPMiddleware):
         "application/gzip",
         "application/x-gzip",
         "application/pdf",
+        "text/event-stream",  # SSE: chaque événement doit partir immédiatement
     }
 
     # Types MIME à compresser
@@ -64,99 +118,207 @@ class CompressionMiddleware(BaseHTTPMiddleware):
 
     def __init__(
         self,
-        app,
+        app: ASGIApp,
         minimum_size: int = 1024,  # 1KB minimum
         compress_level: int = 6,   # Niveau gzip (1-9)
+        brotli_quality: int = 4,   # Qualité brotli (0-11), 4 = bon compromis pour contenu dynamique
+        flush_size: int = 64 * 1024,  # Flush du compresseur tous les N octets non compressés
     ):
-        super().__init__(app)
+        self.app = app
         self.minimum_size = minimum_size
         self.compress_level = compress_level
+        self.brotli_quality = brotli_quality
+        self.flush_size = flush_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """ASGI middleware interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Vérifier si le client supporte la compression
-        accept_encoding = request.headers.get("Accept-Encoding", "")
-        supports_gzip = "gzip" in accept_encoding
-        supports_deflate = "deflate" in accept_encoding
+        encoding = self._negotiate(Headers(scope=scope).get("Accept-Encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
 
-        if not supports_gzip and not supports_deflate:
-            return await call_next(request)
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+        await responder.close()
 
-        # Exécuter la requête
-        response = await call_next(request)
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> str | None:
+        """Choisit l'encodage: br > gzip > deflate (q=0 = refusé)."""
+        accepted = set()
+        for item in accept_encoding.lower().split(","):
+            coding, _, params = item.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip())
 
-        # Ne pas compresser les réponses streaming
-        if isinstance(response, StreamingResponse):
-            return response
+        if BROTLI_AVAILABLE and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        if "deflate" in accepted:
+            return "deflate"
+        return None
 
+    def _should_compress(self, headers: Headers) -> bool:
+        """Vérifie l'encodage et le type de contenu de la réponse."""
         # Vérifier si déjà compressé
-        if response.headers.get("Content-Encoding"):
-            return response
+        if headers.get("Content-Encoding"):
+            return False
 
         # Vérifier le type de contenu
-        content_type = response.headers.get("Content-Type", "")
+        content_type = headers.get("Content-Type", "")
         base_content_type = content_type.split(";")[0].strip()
 
         if base_content_type in self.SKIP_CONTENT_TYPES:
-            return response
+            return False
 
         # Vérifier si c'est un type compressible
-        should_compress = (
+        return (
             base_content_type in self.COMPRESS_CONTENT_TYPES or
             base_content_type.startswith("text/") or
             base_content_type.endswith("+json") or
             base_content_type.endswith("+xml")
         )
 
-        if not should_compress:
-            return response
-
-        # Récupérer le body
-        body = b""
-        async for chunk in response.body_iterator:
-            body += chunk
-
-        # Vérifier la taille minimale
-        if len(body) < self.minimum_size:
-            return Response(
-                content=body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
-
-        # Compresser
-        if supports_gzip:
-            compressed_body = gzip.compress(body, compresslevel=self.compress_level)
-            encoding = "gzip"
-        else:
-            compressed_body = zlib.compress(body, level=self.compress_level)
-            encoding = "deflate"
 
-        # Ne compresser que si ça vaut le coup (réduction > 10%)
-        if len(compressed_body) >= len(body) * 0.9:
-            return Response(
-                content=body,
-                status_code=response.status_code,
-                headers=dict(response.headers),
-                media_type=response.media_type
-            )
-
-        # Construire la réponse compressée
-        headers = MutableHeaders(raw=list(response.headers.raw))
-        headers["Content-Encoding"] = encoding
-        headers["Content-Length"] = str(len(compressed_body))
+class _CompressionResponder:
+    """
+    État de compression d'une réponse.
+
+    Étapes:
+    1. http.response.start est retenu
+    2. Les blocs du body sont accumulés jusqu'à minimum_size (ou fin du body)
+    3. Sous le seuil ou type non compressible: envoi tel quel
+       Au-dessus: en-têtes ajustés, puis compression bloc par bloc
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Message | None = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self.compressor: StreamCompressor | None = None
+        self.passthrough = False
+        self.unflushed = 0
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            headers = Headers(raw=message.get("headers", []))
+            if not self.middleware._should_compress(headers):
+                self.passthrough = True
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            await self._send_compressed(body, more_body)
+            return
+
+        # Phase de décision: ne retenir que minimum_size octets au plus
+        if body:
+            self.pending.append(body)
+            self.pending_size += len(body)
+
+        if self.pending_size < self.middleware.minimum_size:
+            if more_body:
+                return
+            await self._send_uncompressed()
+            return
+
+        buffered = b"".join(self.pending)
+        self.pending = []
+        if not more_body:
+            await self._send_single(buffered)
+            return
+
+        self._start_compression(content_length=None)
+        await self._send(self.start_message)
+        await self._send_compressed(buffered, more_body=True)
+
+    async def close(self) -> None:
+        """Libère les en-têtes retenus si l'application n'a envoyé aucun body."""
+        if self.start_message is not None and not self.passthrough and self.compressor is None and self.pending_size == 0:
+            await self._send(self.start_message)
+            self.start_message = None
+
+    def _start_compression(self, content_length: int | None) -> None:
+        headers = MutableHeaders(raw=list(self.start_message.get("headers", [])))
+        headers["Content-Encoding"] = self.encoding
+        if content_length is None:
+            if "Content-Length" in headers:
+                del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
         # Indiquer que la réponse varie selon Accept-Encoding
         vary = headers.get("Vary", "")
         if "Accept-Encoding" not in vary:
             headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
 
-        return Response(
-            content=compressed_body,
-            status_code=response.status_code,
-            headers=dict(headers),
-            media_type=response.media_type
+        self.start_message = {**self.start_message, "headers": headers.raw}
+        self.compressor = StreamCompressor(
+            self.encoding,
+            level=self.middleware.compress_level,
+            brotli_quality=self.middleware.brotli_quality,
         )
 
+    async def _send_compressed(self, body: bytes, more_body: bool) -> None:
+        chunk = self.compressor.compress(body) if body else b""
+        self.unflushed += len(body)
+
+        if not more_body:
+            chunk += self.compressor.finish()
+        elif self.unflushed >= self.middleware.flush_size:
+            chunk += self.compressor.flush()
+            self.unflushed = 0
+
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _send_uncompressed(self) -> None:
+        body = b"".join(self.pending)
+        self.pending = []
+        self.start_message, start = None, self.start_message
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body, "more_body": False})
+
+    async def _send_single(self, body: bytes) -> None:
+        """Réponse complète connue: ne compresser que si ça vaut le coup."""
+        compressor = StreamCompressor(
+            self.encoding,
+            level=self.middleware.compress_level,
+            brotli_quality=self.middleware.brotli_quality,
+        )
+        compressed_body = compressor.compress(body) + compressor.finish()
+
+        # Ne compresser que si ça vaut le coup (réduction > 10%)
+        if len(compressed_body) >= len(body) * 0.9:
+            self.pending = [body]
+            await self._send_uncompressed()
+            return
+
+        self._start_compression(content_length=len(compressed_body))
+        self.start_message, start = None, self.start_message
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed_body, "more_body": False})
+
 
 def get_compression_stats(original_size: int, compressed_size: int) -> dict:
     """Calcule les statistiques de compression."""
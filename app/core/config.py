@@ -58,6 +58,11 @@ class Settings(BaseSettings):
     # Configuration pool de connexions DB
     db_pool_size: int = Field(default=5, ge=1, le=100)
     db_max_overflow: int = Field(default=10, ge=0, le=100)
+    schema_startup_mode: str = Field(
+        default="fingerprint",
+        pattern="^(fingerprint|full)$",
+        description="Vérification du schéma au démarrage: fingerprint (sautée si Base.metadata inchangé) ou full"
+    )
 
     # CORS (optionnel)
     cors_origins: str | None = Field(default=None, description="Origins CORS séparées par des virgules")
@@ -65,12 +70,17 @@ class Settings(BaseSettings):
     # Rate Limiting
     rate_limit_per_minute: int = Field(default=100, ge=10, le=1000, description="Limite globale de requêtes par minute")
     auth_rate_limit_per_minute: int = Field(default=5, ge=1, le=20, description="Rate limit strict pour auth")
+    platform_rate_limit_sync_every: int = Field(default=0, ge=0, le=1000, description="Pré-filtre local du rate limiting plateforme: synchronisation Redis toutes les N requêtes (0 = désactivé)")
 
     # Redis (pour rate limiting distribué)
     redis_url: str | None = Field(default=None, description="URL Redis pour cache et rate limiting")
     redis_timeout: int = Field(default=5, ge=1, le=30, description="Timeout connexion Redis en secondes")
     redis_health_timeout: int = Field(default=2, ge=1, le=10, description="Timeout health check Redis en secondes")
 
+    # Cache du contexte d'authentification (CoreAuthMiddleware)
+    auth_context_cache_ttl: int = Field(default=30, ge=0, le=900, description="TTL du cache SaaSContext par token en secondes (0 = désactivé)")
+    auth_context_cache_size: int = Field(default=10000, ge=100, le=1000000, description="Nombre maximal de contextes d'authentification en cache")
+
     # CORS
     cors_max_age: int = Field(default=3600, ge=60, le=86400, description="Durée cache CORS en secondes")
 
@@ -13,6 +13,10 @@ WORKFLOW:
 3. Appelle CORE.authenticate(token, tenant_id) pour créer SaaSContext
 4. Injecte SaaSContext dans request.state pour les endpoints
 
+CACHE:
+Le contexte résolu est mis en cache par token (voir auth_context_cache):
+les requêtes suivantes du même token ne touchent plus la base.
+
 AVANTAGES:
 - Point d'entrée unique pour l'authentification (CORE)
 - Aucune duplication de logique
@@ -23,9 +27,11 @@ AVANTAGES:
 
 import uuid
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from jose import jwt
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.core.auth_context_cache import CachedUser, get_auth_context_cache
 from app.core.database import SessionLocal
 from app.core.logging_config import get_logger
 from app.core.saas_core import SaaSCore
@@ -33,7 +39,7 @@ from app.core.saas_core import SaaSCore
 logger = get_logger(__name__)
 
 
-class CoreAuthMiddleware(BaseHTTPMiddleware):
+class CoreAuthMiddleware:
     """
     Middleware d'authentification utilisant CORE SaaS.
 
@@ -41,11 +47,23 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
 
     Ne bloque PAS les requêtes sans token - laisse les endpoints
     gérer l'autorisation via get_saas_context().
+
+    Middleware ASGI pur: request.state est porté par le scope et reste
+    visible des couches suivantes.
     """
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """ASGI middleware interface."""
+        if scope["type"] == "http":
+            self._authenticate(Request(scope))
+        await self.app(scope, receive, send)
+
+    def _authenticate(self, request: Request) -> None:
         """
-        Traite chaque requête.
+        Authentifie la requête et alimente request.state.
 
         Si un token valide est présent:
         - Crée SaaSContext via CORE.authenticate()
@@ -59,14 +77,14 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
 
         # Ignorer les OPTIONS (CORS preflight)
         if request.method == "OPTIONS":
-            return await call_next(request)
+            return
 
         # Extraire le token de l'header Authorization
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             # Pas de token - continuer sans authentification
             logger.debug("[CoreAuthMiddleware] No token for %s", path)
-            return await call_next(request)
+            return
 
         token = auth_header.split(" ", 1)[1]
 
@@ -76,13 +94,25 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
             # Pas de tenant_id - impossible d'authentifier
             # (TenantMiddleware devrait avoir injecté tenant_id)
             logger.warning("[CoreAuthMiddleware] Missing tenant_id for %s", path)
-            return await call_next(request)
+            return
 
         # Extraire informations de requête pour audit trail
         ip_address = request.client.host if request.client else "unknown"
         user_agent = request.headers.get("User-Agent", "")
         correlation_id = request.headers.get("X-Correlation-ID", str(uuid.uuid4()))
 
+        # Contexte déjà résolu pour ce token (évite 3 requêtes DB + checkout pool)
+        auth_cache = get_auth_context_cache()
+        cached = auth_cache.get(token, tenant_id)
+        if cached is not None:
+            saas_context = cached.bind(ip_address, user_agent, correlation_id)
+            request.state.saas_context = saas_context
+            request.state.user_id = saas_context.user_id
+            request.state.role = saas_context.role
+            if cached.user is not None:
+                request.state.user = cached.user
+            return
+
         # Authentifier via CORE
         db = SessionLocal()
         try:
@@ -105,12 +135,13 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
                 request.state.user_id = saas_context.user_id
                 request.state.role = saas_context.role
 
-                # IMPORTANT: Charger l'objet User complet pour RBACMiddleware
+                # IMPORTANT: Charger l'utilisateur pour RBACMiddleware
                 # RBACMiddleware vérifie request.state.user
                 from app.core.models import User
                 user = db.query(User).filter(User.id == saas_context.user_id).first()
-                if user:
-                    request.state.user = user
+                user_snapshot = CachedUser.from_model(user) if user else None
+                if user_snapshot:
+                    request.state.user = user_snapshot
                     logger.debug(
                         "[CoreAuthMiddleware] Authenticated user %s "
                         "for tenant %s (role: %s)",
@@ -121,6 +152,15 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
                         "[CoreAuthMiddleware] User %s not found in DB",
                         saas_context.user_id
                     )
+
+                # Token déjà vérifié par authenticate(): claims fiables
+                auth_cache.put(
+                    token,
+                    tenant_id,
+                    saas_context,
+                    user_snapshot,
+                    claims=jwt.get_unverified_claims(token),
+                )
             else:
                 # Authentification échouée - continuer sans contexte
                 logger.warning(
@@ -133,5 +173,3 @@ class CoreAuthMiddleware(BaseHTTPMiddleware):
             logger.error("[CoreAuthMiddleware] Error during authentication: %s", e, exc_info=True)
         finally:
             db.close()
-
-        return await call_next(request)
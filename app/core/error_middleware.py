@@ -12,13 +12,12 @@ Utilise StandardError pour des reponses uniformes (compatible frontend StandardH
 
 import logging
 import uuid
-from typing import Callable
 from fastapi import Request, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError, OperationalError, DataError
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.errors import StandardError, ErrorCode, create_standard_error
 from app.core.logging_config import get_correlation_id
@@ -47,7 +46,7 @@ def _serialize_pydantic_errors(errors: list) -> list:
         return [{"msg": str(e)} for e in errors]
 
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
+class ErrorHandlingMiddleware:
     """
     Middleware de gestion centralisée des erreurs
 
@@ -60,23 +59,50 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
     - Code métier PUR
     """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Intercepte toutes les requêtes et gère les exceptions
 
+        Une exception levée avant le début de la réponse est convertie en
+        réponse JSON. Si la réponse a déjà commencé (streaming), elle est
+        propagée: les en-têtes sont partis, aucune réponse d'erreur n'est possible.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            # Exécution normale
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if response_started:
+                raise
+            response = self.handle_exception(Request(scope), e)
+            await response(scope, receive, send)
+
+    def handle_exception(self, request: Request, e: Exception) -> Response:
+        """
+        Convertit une exception en réponse HTTP d'erreur
+
         Args:
             request: Requête HTTP
-            call_next: Handler suivant dans la chaîne
+            e: Exception levée par la chaîne applicative
 
         Returns:
-            Response HTTP (normale ou d'erreur)
+            Response HTTP d'erreur standardisée
         """
-        try:
-            # Exécution normale
-            response = await call_next(request)
-            return response
-
-        except RequestValidationError as e:
+        if isinstance(e, RequestValidationError):
             # Erreurs de validation Pydantic (requêtes malformées)
             logger.warning(
                 "[ERROR_MW] Erreur de validation requête — données malformées",
@@ -97,7 +123,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except ValidationError as e:
+        if isinstance(e, ValidationError):
             # Erreurs de validation Pydantic (modèles internes)
             logger.warning(
                 "[ERROR_MW] Erreur de validation Pydantic — modèle interne invalide",
@@ -118,7 +144,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except ValueError as e:
+        if isinstance(e, ValueError):
             # Erreurs de valeur (business logic validation)
             # C'est le type d'erreur principal leve par le code metier pur
             correlation_id = get_correlation_id() or str(uuid.uuid4())
@@ -147,7 +173,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 content=error.model_dump(mode="json")
             )
 
-        except IntegrityError as e:
+        if isinstance(e, IntegrityError):
             # Erreurs d'integrite base de donnees (contraintes)
             correlation_id = get_correlation_id() or str(uuid.uuid4())
             error_detail = str(e.orig)[:500] if hasattr(e, 'orig') else str(e)[:500]
@@ -177,7 +203,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 content=error.model_dump(mode="json")
             )
 
-        except OperationalError as e:
+        if isinstance(e, OperationalError):
             # Erreurs opérationnelles base de données (connexion, etc.)
             logger.error(
                 "[ERROR_MW] Erreur opérationnelle DB — connexion ou infrastructure",
@@ -197,7 +223,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except DataError as e:
+        if isinstance(e, DataError):
             # Erreurs de données base de données (type mismatch, etc.)
             logger.error(
                 "[ERROR_MW] Erreur de données DB — type mismatch ou format invalide",
@@ -217,7 +243,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except PermissionError as e:
+        if isinstance(e, PermissionError):
             # Erreurs de permission
             correlation_id = get_correlation_id() or str(uuid.uuid4())
 
@@ -244,7 +270,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 content=error.model_dump(mode="json")
             )
 
-        except FileNotFoundError as e:
+        if isinstance(e, FileNotFoundError):
             # Erreurs de fichier non trouve
             correlation_id = get_correlation_id() or str(uuid.uuid4())
 
@@ -271,7 +297,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 content=error.model_dump(mode="json")
             )
 
-        except NotImplementedError as e:
+        if isinstance(e, NotImplementedError):
             # Fonctionnalités non implémentées
             logger.warning(
                 "[ERROR_MW] Fonctionnalité non implémentée",
@@ -291,7 +317,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except TimeoutError as e:
+        if isinstance(e, TimeoutError):
             # Erreurs de timeout
             logger.error(
                 "[ERROR_MW] Timeout — opération trop longue",
@@ -311,35 +337,34 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 }
             )
 
-        except Exception as e:
-            # Erreur generique inattendue
-            correlation_id = get_correlation_id() or str(uuid.uuid4())
-
-            error = create_standard_error(
-                error_code=ErrorCode.INTERNAL_SERVER_ERROR,
-                message="Une erreur inattendue s'est produite",
-                http_status=500,
-                request_id=correlation_id,
-                path=request.url.path,
-                details={"exception_type": type(e).__name__}
-            )
-
-            logger.exception(
-                "internal_server_error",
-                extra={
-                    "error_code": error.error_code,
-                    "path": request.url.path,
-                    "method": request.method,
-                    "exception_type": type(e).__name__,
-                    "exception_message": str(e)[:500],
-                    "correlation_id": correlation_id
-                }
-            )
-
-            return JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content=error.model_dump(mode="json")
-            )
+        # Erreur generique inattendue
+        correlation_id = get_correlation_id() or str(uuid.uuid4())
+
+        error = create_standard_error(
+            error_code=ErrorCode.INTERNAL_SERVER_ERROR,
+            message="Une erreur inattendue s'est produite",
+            http_status=500,
+            request_id=correlation_id,
+            path=request.url.path,
+            details={"exception_type": type(e).__name__}
+        )
+
+        logger.exception(
+            "internal_server_error",
+            extra={
+                "error_code": error.error_code,
+                "path": request.url.path,
+                "method": request.method,
+                "exception_type": type(e).__name__,
+                "exception_message": str(e)[:500],
+                "correlation_id": correlation_id
+            }
+        )
+
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content=error.model_dump(mode="json")
+        )
 
 
 def setup_error_handling(app):
@@ -15,7 +15,7 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, Info, generate_latest
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import get_settings
 from app.core.database import get_db
@@ -89,6 +89,17 @@ AUTH_RATE_LIMIT_HITS = Counter(
     ['tenant_id', 'ip']
 )
 
+AUTH_CONTEXT_CACHE_SIZE = Gauge(
+    'azals_auth_context_cache_size',
+    'Cached authentication contexts (per worker)'
+)
+
+AUTH_CONTEXT_CACHE_INVALIDATIONS = Counter(
+    'azals_auth_context_cache_invalidations_total',
+    'Authentication context cache invalidations',
+    ['reason']
+)
+
 # Business metrics
 TENANTS_ACTIVE = Gauge(
     'azals_tenants_active',
@@ -280,18 +291,32 @@ MARKETING_OVERALL_ROI = Gauge('azals_marketing_roi', 'ROI marketing global (%)')
 # MIDDLEWARE DE MÉTRIQUES
 # ============================================================================
 
-class MetricsMiddleware(BaseHTTPMiddleware):
+class MetricsMiddleware:
     """
     Middleware pour collecter les métriques HTTP automatiquement.
+
+    Middleware ASGI pur: le code de statut est lu sur le message
+    http.response.start, la durée couvre l'envoi complet de la réponse.
     """
 
     # Endpoints à exclure des métriques détaillées (préfixes)
     EXCLUDED_PATH_PREFIXES = ('/metrics', '/health', '/favicon.ico')
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """ASGI middleware interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+
         # Skip pour certains endpoints (utilise startswith pour inclure les sous-chemins)
         if request.url.path.startswith(self.EXCLUDED_PATH_PREFIXES):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         method = request.method
         # Normaliser le path pour éviter la cardinalité explosive
@@ -301,11 +326,17 @@ class MetricsMiddleware(BaseHTTPMiddleware):
         # Incrémenter les requêtes en cours
         HTTP_REQUESTS_IN_PROGRESS.labels(method=method, endpoint=endpoint).inc()
 
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
         start_time = time.perf_counter()
         try:
-            response = await call_next(request)
-            status_code = response.status_code
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             logger.error(
                 "[METRICS_MIDDLEWARE] Exception non capturée dans le traitement requête",
@@ -993,6 +1024,12 @@ def record_cache_access(cache_type: str, hit: bool):
         CACHE_MISSES.labels(cache_type=cache_type).inc()
 
 
+def record_auth_context_invalidation(reason: str, count: int = 1):
+    """Enregistre une invalidation du cache de contextes d'authentification."""
+    if count:
+        AUTH_CONTEXT_CACHE_INVALIDATIONS.labels(reason=reason).inc(count)
+
+
 # ============================================================================
 # HELPERS IA
 # ============================================================================
@@ -8,8 +8,8 @@ SÉCURITÉ: Utilise build_error_response du module Guardian pour garantir
 """
 
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 # Import de la fonction SAFE de gestion des erreurs
 # Note: Utilise error_response.py au lieu de middleware.py pour éviter les imports circulaires
@@ -19,11 +19,14 @@ from app.modules.guardian.error_response import (
 )
 
 
-class TenantMiddleware(BaseHTTPMiddleware):
+class TenantMiddleware:
     """
     Middleware de validation du tenant.
     Refuse toute requête sans X-Tenant-ID valide (hors endpoints publics).
     Injecte le tenant_id dans request.state pour usage par les endpoints.
+
+    Middleware ASGI pur: pas de tâche ni de wrapper de flux par requête,
+    compatible avec les réponses streaming.
     """
 
     # Endpoints publics exclus de la validation tenant
@@ -63,18 +66,29 @@ class TenantMiddleware(BaseHTTPMiddleware):
         "/api/v2/public/trial",
     }
 
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
         Intercepte chaque requete HTTP.
         Valide la presence et le format du tenant_id.
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+
         # OPTIONS preflight requests: bypass validation (CORS handles these)
         if request.method == "OPTIONS":
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         # Endpoints publics : bypass validation mais injecter tenant_id si present
-        is_public_path = any(request.url.path == path or request.url.path.startswith(path + "/")
-                            for path in self.PUBLIC_PATHS)
+        path = request.url.path
+        is_public_path = any(path == public or path.startswith(public + "/")
+                            for public in self.PUBLIC_PATHS)
 
         # Extraction du header X-Tenant-ID
         tenant_id: str | None = request.headers.get("X-Tenant-ID")
@@ -83,32 +97,36 @@ class TenantMiddleware(BaseHTTPMiddleware):
             # Pour les paths publics, injecter tenant_id si présent et valide
             if tenant_id and self._is_valid_tenant_id(tenant_id):
                 request.state.tenant_id = tenant_id
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         # Routes protégées : validation obligatoire
         if not tenant_id:
-            return build_error_response(
+            response = build_error_response(
                 status_code=401,
                 error_type=ErrorType.AUTHENTICATION,
                 message="Missing X-Tenant-ID header. Multi-tenant isolation required.",
                 html_path="frontend/errors/401.html"
             )
+            await response(scope, receive, send)
+            return
 
         # Validation : format du tenant_id (alphanumerique + tirets)
         if not self._is_valid_tenant_id(tenant_id):
-            return build_error_response(
+            response = build_error_response(
                 status_code=400,
                 error_type=ErrorType.VALIDATION,
                 message="Invalid X-Tenant-ID format. Alphanumeric and hyphens only.",
                 html_path="frontend/errors/400.html"
             )
+            await response(scope, receive, send)
+            return
 
         # Injection du tenant_id dans request.state
         request.state.tenant_id = tenant_id
 
         # Poursuite de la requête
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
     @staticmethod
     def _is_valid_tenant_id(tenant_id: str) -> bool:
@@ -21,11 +21,13 @@ from __future__ import annotations
 
 
 import logging
+import math
 import time
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 from threading import Lock
-from typing import Optional
+from typing import Optional, Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -400,6 +402,337 @@ class AuthRateLimiter:
 # Instance pour rétrocompatibilité avec auth.py
 auth_rate_limiter = AuthRateLimiter()
 
+# =============================================================================
+# PLATFORM RATE LIMITING - BACKENDS ASYNCHRONES
+# =============================================================================
+#
+# Le middleware plateforme vérifie trois limites (IP, tenant, global) à chaque
+# requête HTTP. Elles sont vérifiées et incrémentées ensemble, en un seul appel
+# non bloquant (un script Lua côté Redis), sur une fenêtre glissante découpée
+# en sous-intervalles d'une seconde (hash Redis slot -> compteur), au lieu de
+# compteurs à fenêtre fixe.
+
+PLATFORM_SLOT_MS = 1000
+
+
+@dataclass
+class PlatformRateDecision:
+    """Résultat d'une vérification des limites plateforme."""
+    allowed: bool
+    rejected: int = -1  # Index de la première limite dépassée
+    counts: tuple[int, ...] = ()
+    retry_after_ms: int = 0
+
+
+def _sliding_window_hit(
+    windows: dict[str, dict[int, int]],
+    keys: Sequence[str],
+    limits: Sequence[int],
+    costs: Sequence[int],
+    now_ms: int,
+    window_ms: int,
+    strict: bool
+) -> PlatformRateDecision:
+    """
+    Vérifie et incrémente plusieurs fenêtres glissantes (miroir du script Lua).
+
+    strict: rien n'est compté si une limite serait dépassée (vérification
+    d'une requête); sinon les coûts sont ajoutés et les dépassements signalés
+    (synchronisation du pré-filtre local).
+    """
+    current = now_ms // PLATFORM_SLOT_MS
+    oldest = current - window_ms // PLATFORM_SLOT_MS + 1
+    counts = []
+    rejected, retry_after = -1, 0
+    for i, key in enumerate(keys):
+        slots = windows.get(key, {})
+        for slot in [s for s in slots if s < oldest]:
+            del slots[slot]
+        count = sum(slots.values())
+        counts.append(count)
+        if rejected < 0 and count + costs[i] > limits[i]:
+            rejected = i
+            excess = count + costs[i] - limits[i]
+            retry_after = window_ms
+            for slot in sorted(slots):
+                excess -= slots[slot]
+                if excess <= 0:
+                    retry_after = (slot - oldest + 1) * PLATFORM_SLOT_MS - now_ms % PLATFORM_SLOT_MS
+                    break
+
+    if strict and rejected >= 0:
+        return PlatformRateDecision(False, rejected, tuple(counts), retry_after)
+
+    for i, key in enumerate(keys):
+        if costs[i]:
+            slots = windows.setdefault(key, {})
+            slots[current] = slots.get(current, 0) + costs[i]
+            counts[i] += costs[i]
+    return PlatformRateDecision(rejected < 0, rejected, tuple(counts), retry_after)
+
+
+class AsyncPlatformRateLimiterBackend(ABC):
+    """Interface des backends du rate limiting plateforme (appelés depuis la boucle asyncio)."""
+
+    @abstractmethod
+    async def hit(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[int],
+        costs: Sequence[int],
+        window_seconds: int,
+        strict: bool = True,
+        now_ms: Optional[int] = None
+    ) -> PlatformRateDecision:
+        """Vérifie et incrémente toutes les limites en une opération atomique."""
+        pass
+
+
+class MemoryPlatformRateLimiterBackend(AsyncPlatformRateLimiterBackend):
+    """
+    Backend in-memory (développement, repli si Redis est indisponible).
+
+    ATTENTION: compteurs propres au processus.
+    """
+
+    # Purge des clés inactives toutes les N vérifications
+    SWEEP_EVERY = 4096
+
+    def __init__(self):
+        self._windows: dict[str, dict[int, int]] = {}
+        self._lock = Lock()
+        self._hits = 0
+
+    async def hit(self, keys, limits, costs, window_seconds, strict=True, now_ms=None):
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        window_ms = window_seconds * 1000
+        with self._lock:
+            self._hits += 1
+            if self._hits % self.SWEEP_EVERY == 0:
+                self._sweep(now_ms, window_ms)
+            return _sliding_window_hit(self._windows, keys, limits, costs, now_ms, window_ms, strict)
+
+    def _sweep(self, now_ms: int, window_ms: int) -> None:
+        oldest = now_ms // PLATFORM_SLOT_MS - window_ms // PLATFORM_SLOT_MS + 1
+        for key in [k for k, slots in self._windows.items() if not slots or max(slots) < oldest]:
+            del self._windows[key]
+
+
+# KEYS: limites (IP, tenant, global); ARGV: now_ms, window_ms, slot_ms, strict, puis limit, cost par clé
+_PLATFORM_HIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local slot_ms = tonumber(ARGV[3])
+local strict = ARGV[4] == '1'
+local current = math.floor(now / slot_ms)
+local oldest = current - math.floor(window / slot_ms) + 1
+
+local counts = {}
+local rejected = 0
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[3 + 2 * i])
+    local cost = tonumber(ARGV[4 + 2 * i])
+    local fields = redis.call('HGETALL', key)
+    local count = 0
+    local live = {}
+    for j = 1, #fields, 2 do
+        local slot = tonumber(fields[j])
+        if slot < oldest then
+            redis.call('HDEL', key, fields[j])
+        else
+            count = count + tonumber(fields[j + 1])
+            live[#live + 1] = {slot, tonumber(fields[j + 1])}
+        end
+    end
+    counts[i] = count
+    if rejected == 0 and count + cost > limit then
+        rejected = i
+        local excess = count + cost - limit
+        retry_after = window
+        table.sort(live, function(a, b) return a[1] < b[1] end)
+        for _, entry in ipairs(live) do
+            excess = excess - entry[2]
+            if excess <= 0 then
+                retry_after = (entry[1] - oldest + 1) * slot_ms - now % slot_ms
+                break
+            end
+        end
+    end
+end
+
+if strict and rejected > 0 then
+    local result = {0, rejected, retry_after}
+    for i = 1, #KEYS do result[#result + 1] = counts[i] end
+    return result
+end
+
+for i, key in ipairs(KEYS) do
+    local cost = tonumber(ARGV[4 + 2 * i])
+    if cost > 0 then
+        redis.call('HINCRBY', key, current, cost)
+        redis.call('PEXPIRE', key, window + slot_ms)
+        counts[i] = counts[i] + cost
+    end
+end
+
+local result = {rejected == 0 and 1 or 0, rejected, retry_after}
+for i = 1, #KEYS do result[#result + 1] = counts[i] end
+return result
+"""
+
+
+class RedisPlatformRateLimiterBackend(AsyncPlatformRateLimiterBackend):
+    """
+    Backend Redis asynchrone (redis.asyncio) pour production multi-instance.
+
+    Un seul aller-retour par requête HTTP, sans bloquer la boucle d'événements.
+    """
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._prefix = "azals:ratelimit:"
+        self._script = redis_client.register_script(_PLATFORM_HIT_SCRIPT)
+        logger.info("[RATE_LIMITER] Using async Redis backend for platform rate limiting")
+
+    async def hit(self, keys, limits, costs, window_seconds, strict=True, now_ms=None):
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        args: list[int] = [now_ms, window_seconds * 1000, PLATFORM_SLOT_MS, 1 if strict else 0]
+        for limit, cost in zip(limits, costs):
+            args += [limit, cost]
+        result = await self._script(keys=[f"{self._prefix}{key}" for key in keys], args=args)
+        allowed, rejected, retry_after = (int(v) for v in result[:3])
+        return PlatformRateDecision(
+            allowed=bool(allowed),
+            rejected=rejected - 1,
+            counts=tuple(int(v) for v in result[3:]),
+            retry_after_ms=retry_after
+        )
+
+
+def create_platform_rate_limiter_backend() -> AsyncPlatformRateLimiterBackend:
+    """Crée le backend plateforme (Redis asynchrone si configuré, sinon Memory)."""
+    try:
+        from app.core.config import get_settings
+        settings = get_settings()
+
+        redis_url = getattr(settings, 'redis_url', None)
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+                client = aioredis.from_url(redis_url, socket_timeout=settings.redis_timeout)
+                return RedisPlatformRateLimiterBackend(client)
+            except ImportError:
+                logger.warning(
+                    "[RATE_LIMITER] redis package not installed. "
+                    "pip install redis for production."
+                )
+            except Exception as e:
+                logger.warning("[RATE_LIMITER] Redis client creation failed: %s", e)
+    except Exception as e:
+        logger.warning("[RATE_LIMITER] Settings load failed: %s", e)
+
+    return MemoryPlatformRateLimiterBackend()
+
+
+class _LocalBucket:
+    __slots__ = ("tokens", "updated", "pending", "last_sync", "blocked_until")
+
+    def __init__(self, capacity: int, now: float):
+        self.tokens = float(capacity)
+        self.updated = now
+        self.pending = 0
+        self.last_sync = now
+        self.blocked_until = 0.0
+
+
+class LocalTokenBucketPreFilter:
+    """
+    Pré-filtre local du rate limiting plateforme.
+
+    Chaque clé (IP, tenant, global) a un token bucket propre au processus
+    (capacité = limite, recharge limite / fenêtre): les clés dont le bucket
+    local est vide ou que Redis a signalées en dépassement sont rejetées sans
+    appel réseau. Les requêtes admises sont cumulées et envoyées à Redis en un
+    appel toutes les `sync_every` requêtes (ou `max_staleness` secondes).
+
+    Compromis: chaque instance peut admettre jusqu'à sync_every - 1 requêtes
+    de plus par clé avant que le dépassement global ne soit connu. Utilisé
+    depuis la boucle asyncio uniquement (pas de verrou).
+    """
+
+    def __init__(self, sync_every: int, max_staleness: float = 1.0, max_keys: int = 10000):
+        self.sync_every = sync_every
+        self.max_staleness = max_staleness
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, _LocalBucket] = OrderedDict()
+
+    def _bucket(self, key: str, limit: int, window_seconds: int, now: float) -> _LocalBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _LocalBucket(limit, now)
+            if len(self._buckets) > self.max_keys:
+                # Les requêtes non synchronisées de la clé évincée sont perdues (< sync_every)
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(limit, bucket.tokens + (now - bucket.updated) * limit / window_seconds)
+            bucket.updated = now
+        return bucket
+
+    def check(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[int],
+        window_seconds: int,
+        now: Optional[float] = None
+    ) -> PlatformRateDecision:
+        """Admet ou rejette localement; une requête admise consomme un jeton par clé."""
+        now = now if now is not None else time.monotonic()
+        buckets = [self._bucket(key, limit, window_seconds, now) for key, limit in zip(keys, limits)]
+        for i, bucket in enumerate(buckets):
+            if bucket.blocked_until > now:
+                return PlatformRateDecision(False, i, retry_after_ms=int((bucket.blocked_until - now) * 1000) + 1)
+            if bucket.tokens < 1:
+                refill_ms = (1 - bucket.tokens) * window_seconds * 1000 / limits[i]
+                return PlatformRateDecision(False, i, retry_after_ms=int(refill_ms) + 1)
+        for bucket in buckets:
+            bucket.tokens -= 1
+            bucket.pending += 1
+        return PlatformRateDecision(True)
+
+    def due(self, keys: Sequence[str], now: Optional[float] = None) -> bool:
+        """True si une des clés doit être synchronisée avec le backend."""
+        now = now if now is not None else time.monotonic()
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None and bucket.pending and (
+                bucket.pending >= self.sync_every or now - bucket.last_sync >= self.max_staleness
+            ):
+                return True
+        return False
+
+    def take_pending(self, keys: Sequence[str], now: Optional[float] = None) -> list[int]:
+        """Retire les requêtes à synchroniser (une valeur par clé)."""
+        now = now if now is not None else time.monotonic()
+        costs = []
+        for key in keys:
+            bucket = self._buckets.get(key)
+            costs.append(bucket.pending if bucket else 0)
+            if bucket:
+                bucket.pending = 0
+                bucket.last_sync = now
+        return costs
+
+    def apply(self, keys: Sequence[str], decision: PlatformRateDecision, now: Optional[float] = None) -> None:
+        """Bloque localement la clé que le backend signale en dépassement."""
+        if decision.rejected < 0:
+            return
+        now = now if now is not None else time.monotonic()
+        bucket = self._buckets.get(keys[decision.rejected])
+        if bucket is not None:
+            bucket.blocked_until = now + decision.retry_after_ms / 1000
+
 
 # =============================================================================
 # PLATFORM-WIDE RATE LIMITING MIDDLEWARE
@@ -411,11 +744,15 @@ class PlatformRateLimitMiddleware:
 
     SÉCURITÉ: Protège contre les attaques DDoS et abuse API.
 
-    Limites par défaut:
+    Limites par défaut (fenêtre glissante):
     - Par IP: 1000 requêtes/minute
     - Par Tenant: 5000 requêtes/minute
     - Global plateforme: 50000 requêtes/minute
 
+    Les trois limites sont vérifiées en un seul appel asynchrone au backend.
+    Avec local_sync_every > 0, un pré-filtre local (LocalTokenBucketPreFilter)
+    ne synchronise avec le backend que toutes les N requêtes.
+
     Usage:
         from app.core.rate_limiter import PlatformRateLimitMiddleware
         app.add_middleware(PlatformRateLimitMiddleware)
@@ -427,14 +764,19 @@ class PlatformRateLimitMiddleware:
         ip_limit: int = 1000,
         tenant_limit: int = 5000,
         global_limit: int = 50000,
-        window_seconds: int = 60
+        window_seconds: int = 60,
+        backend: Optional[AsyncPlatformRateLimiterBackend] = None,
+        local_sync_every: int = 0
     ):
         self.app = app
         self.ip_limit = ip_limit
         self.tenant_limit = tenant_limit
         self.global_limit = global_limit
         self.window = window_seconds
-        self._limiter = get_rate_limiter()
+        self._backend = backend or create_platform_rate_limiter_backend()
+        self._fallback = MemoryPlatformRateLimiterBackend()
+        self._prefilter = LocalTokenBucketPreFilter(local_sync_every) if local_sync_every > 0 else None
+        self._backend_error_logged_at = 0.0
 
     async def __call__(self, scope, receive, send):
         """ASGI middleware interface."""
@@ -443,70 +785,78 @@ class PlatformRateLimitMiddleware:
             return
 
         from starlette.requests import Request
-        from starlette.responses import JSONResponse
 
         request = Request(scope, receive)
-
-        # Extraire IP
         client_ip = self._get_client_ip(request)
+        tenant_id = request.headers.get("X-Tenant-ID")
 
-        # Vérifier limite par IP
-        allowed, count = self._limiter.check_rate("platform:ip", client_ip, self.ip_limit, self.window)
-        if not allowed:
-            response = JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "detail": f"IP rate limit: {self.ip_limit}/min exceeded",
-                    "retry_after": self.window
-                },
-                headers={"Retry-After": str(self.window)}
-            )
+        scopes = ["ip"]
+        keys = [f"platform:ip:{client_ip}"]
+        limits = [self.ip_limit]
+        if tenant_id:
+            scopes.append("tenant")
+            keys.append(f"platform:tenant:{tenant_id}")
+            limits.append(self.tenant_limit)
+        scopes.append("global")
+        keys.append("platform:global:all")
+        limits.append(self.global_limit)
+
+        if self._prefilter is not None:
+            decision = self._prefilter.check(keys, limits, self.window)
+            if decision.allowed and self._prefilter.due(keys):
+                costs = self._prefilter.take_pending(keys)
+                self._prefilter.apply(keys, await self._hit(keys, limits, costs, strict=False))
+        else:
+            decision = await self._hit(keys, limits, [1] * len(keys), strict=True)
+
+        if not decision.allowed:
+            response = self._reject(scopes[decision.rejected], decision)
             await response(scope, receive, send)
             return
 
-        # Extraire tenant_id si présent
-        tenant_id = request.headers.get("X-Tenant-ID")
-        if tenant_id:
-            allowed, count = self._limiter.check_rate("platform:tenant", tenant_id, self.tenant_limit, self.window)
-            if not allowed:
-                response = JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "detail": f"Tenant rate limit: {self.tenant_limit}/min exceeded",
-                        "retry_after": self.window
-                    },
-                    headers={"Retry-After": str(self.window)}
-                )
-                await response(scope, receive, send)
-                return
+        await self.app(scope, receive, send)
 
-        # Vérifier limite globale plateforme
-        allowed, count = self._limiter.check_rate("platform:global", "all", self.global_limit, self.window)
-        if not allowed:
+    async def _hit(self, keys, limits, costs, strict: bool) -> PlatformRateDecision:
+        """Appel au backend; repli en mémoire (par processus) si Redis échoue."""
+        try:
+            return await self._backend.hit(keys, limits, costs, self.window, strict=strict)
+        except Exception as e:
+            now = time.monotonic()
+            if now - self._backend_error_logged_at > 60:
+                self._backend_error_logged_at = now
+                logger.error("[RATE_LIMIT] Platform backend failed, using in-memory limits: %s", e)
+            return await self._fallback.hit(keys, limits, costs, self.window, strict=strict)
+
+    def _reject(self, scope_name: str, decision: PlatformRateDecision):
+        from starlette.responses import JSONResponse
+
+        retry_after = max(1, math.ceil(decision.retry_after_ms / 1000))
+        headers = {"Retry-After": str(retry_after)}
+
+        if scope_name == "global":
             logger.critical(
-                "[RATE_LIMIT] Platform global limit reached: %s/%s", count, self.global_limit
+                "[RATE_LIMIT] Platform global limit reached: %s/%s",
+                decision.counts[-1] if decision.counts else "?", self.global_limit
             )
-            response = JSONResponse(
+            return JSONResponse(
                 status_code=503,
                 content={
                     "error": "Service temporarily unavailable",
                     "detail": "Platform capacity exceeded. Please retry later.",
-                    "retry_after": self.window
+                    "retry_after": retry_after
                 },
-                headers={"Retry-After": str(self.window)}
+                headers=headers
             )
-            await response(scope, receive, send)
-            return
 
-        # Enregistrer les requêtes
-        self._limiter.record_attempt("platform:ip", client_ip, self.window)
-        if tenant_id:
-            self._limiter.record_attempt("platform:tenant", tenant_id, self.window)
-        self._limiter.record_attempt("platform:global", "all", self.window)
-
-        await self.app(scope, receive, send)
+        detail = (
+            f"IP rate limit: {self.ip_limit}/min exceeded" if scope_name == "ip"
+            else f"Tenant rate limit: {self.tenant_limit}/min exceeded"
+        )
+        return JSONResponse(
+            status_code=429,
+            content={"error": "Rate limit exceeded", "detail": detail, "retry_after": retry_after},
+            headers=headers
+        )
 
     def _get_client_ip(self, request: "Request") -> str:
         """Extrait l'IP client de manière sécurisée."""
@@ -525,7 +875,8 @@ def setup_platform_rate_limiting(
     app,
     ip_limit: int = 1000,
     tenant_limit: int = 5000,
-    global_limit: int = 50000
+    global_limit: int = 50000,
+    local_sync_every: Optional[int] = None
 ):
     """
     Configure le rate limiting global sur l'application.
@@ -535,16 +886,27 @@ def setup_platform_rate_limiting(
         ip_limit: Requêtes max par IP par minute
         tenant_limit: Requêtes max par tenant par minute
         global_limit: Requêtes max globales par minute
+        local_sync_every: Pré-filtre local, synchronisé toutes les N requêtes
+            (défaut: settings.platform_rate_limit_sync_every, 0 = désactivé)
     """
+    if local_sync_every is None:
+        try:
+            from app.core.config import get_settings
+            local_sync_every = get_settings().platform_rate_limit_sync_every
+        except Exception:
+            local_sync_every = 0
+
     app.add_middleware(
         PlatformRateLimitMiddleware,
         ip_limit=ip_limit,
         tenant_limit=tenant_limit,
-        global_limit=global_limit
+        global_limit=global_limit,
+        local_sync_every=local_sync_every
     )
     logger.info(
         "[RATE_LIMIT] Platform limits configured: "
-        f"IP={ip_limit}/min, Tenant={tenant_limit}/min, Global={global_limit}/min"
+        f"IP={ip_limit}/min, Tenant={tenant_limit}/min, Global={global_limit}/min, "
+        f"local_sync_every={local_sync_every}"
     )
 
 
@@ -557,6 +919,12 @@ __all__ = [
     "rate_limiter",
     "AuthRateLimiter",
     "auth_rate_limiter",
+    "PlatformRateDecision",
+    "AsyncPlatformRateLimiterBackend",
+    "MemoryPlatformRateLimiterBackend",
+    "RedisPlatformRateLimiterBackend",
+    "create_platform_rate_limiter_backend",
+    "LocalTokenBucketPreFilter",
     "PlatformRateLimitMiddleware",
     "setup_platform_rate_limiting",
 ]
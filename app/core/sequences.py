@@ -11,13 +11,28 @@ Usage:
     generator = SequenceGenerator(db, tenant_id)
     ref = generator.next_reference("CLIENT")  # -> CLI-0001
     ref = generator.next_reference("FACTURE_VENTE")  # -> FV-2026-0001
+    refs = generator.next_references("TICKET", 500)  # import en masse
+
+Deux modes d'allocation:
+- verrouille: SELECT FOR UPDATE dans la transaction de l'appelant, numeros
+  strictement continus. Obligatoire pour les types a numerotation legale
+  sans trou (GAPLESS_SEQUENCES); le verrou n'est pris qu'une fois par lot.
+- par blocs: chaque processus reserve des blocs de numeros par un UPDATE
+  atomique commite aussitot sur sa propre connexion, puis les distribue
+  localement. Aucun verrou n'est garde pendant la transaction metier; un
+  bloc non consomme (arret, rollback) laisse des trous et l'ordre n'est
+  garanti qu'a l'interieur d'un processus.
 """
 from __future__ import annotations
 
 
+import os
+import threading
 import uuid
+import weakref
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Boolean, UniqueConstraint, Index
+from sqlalchemy import Column, String, Integer, Boolean, UniqueConstraint, Index, and_, case, func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.db.base import Base
@@ -113,6 +128,87 @@ DEFAULT_SEQUENCES = {
 }
 
 
+# Numerotation legale continue (factures, avoirs, pieces comptables):
+# jamais allouee par blocs
+GAPLESS_SEQUENCES = frozenset({"FACTURE_VENTE", "AVOIR_CLIENT", "PIECE_COMPTABLE"})
+
+# Taille des blocs reserves par processus pour les autres types (0 = desactive)
+SEQUENCE_BLOCK_SIZE = int(os.environ.get("SEQUENCE_BLOCK_SIZE", "50"))
+
+
+def _default_sequence(entity_type: str) -> dict:
+    """Configuration par defaut d'un type d'entite."""
+    return DEFAULT_SEQUENCES.get(entity_type, {
+        "prefix": entity_type[:3].upper(),
+        "include_year": True,
+        "padding": 4,
+        "reset_yearly": True
+    })
+
+
+def _format_reference(prefix: str, separator: str, padding: int, include_year: bool, year: int, number: int) -> str:
+    """Formate une reference (ex: CLI-0001, FV-2026-00001)."""
+    separator = separator or "-"
+    if include_year:
+        return f"{prefix}{separator}{year}{separator}{number:0{padding}d}"
+    return f"{prefix}{separator}{number:0{padding}d}"
+
+
+class _SequenceBlock:
+    """Plage de numeros reservee par ce processus."""
+
+    __slots__ = ("next_number", "last_number", "prefix", "separator", "padding", "include_year")
+
+    def __init__(self, first: int, last: int, prefix: str, separator: str, padding: int, include_year: bool):
+        self.next_number = first
+        self.last_number = last
+        self.prefix = prefix
+        self.separator = separator
+        self.padding = padding
+        self.include_year = include_year
+
+    @property
+    def remaining(self) -> int:
+        return self.last_number - self.next_number + 1
+
+
+class _BlockSlot:
+    """Bloc courant d'une sequence (tenant, type, annee) et son verrou."""
+
+    __slots__ = ("lock", "block")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.block: _SequenceBlock | None = None
+
+
+# Emplacements de blocs, par engine puis (tenant, type, annee). Le verrou
+# global ne protege que ces dictionnaires: la reservation en base se fait
+# sous le verrou de l'emplacement, sans bloquer les autres sequences.
+_blocks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_blocks_lock = threading.Lock()
+
+
+def _block_slot(engine, key: tuple) -> _BlockSlot:
+    with _blocks_lock:
+        engine_blocks = _blocks.setdefault(engine, {})
+        slot = engine_blocks.get(key)
+        if slot is None:
+            slot = engine_blocks[key] = _BlockSlot()
+        return slot
+
+
+def _invalidate_blocks(engine, tenant_id: str, entity_type: str) -> None:
+    """Abandonne les blocs locaux d'une sequence (ex: format modifie)."""
+    with _blocks_lock:
+        engine_blocks = _blocks.get(engine) or {}
+        slots = [slot for k, slot in engine_blocks.items() if k[0] == tenant_id and k[1] == entity_type]
+    for slot in slots:
+        # Attend une reservation en cours: le bloc reserve avec l'ancien format est abandonne
+        with slot.lock:
+            slot.block = None
+
+
 # ============================================================================
 # GENERATEUR DE SEQUENCES
 # ============================================================================
@@ -121,12 +217,22 @@ class SequenceGenerator:
     """
     Generateur de references automatiques.
 
-    Utilise SELECT FOR UPDATE pour eviter les conflits en environnement concurrent.
+    Types sans trou (GAPLESS_SEQUENCES): SELECT FOR UPDATE dans la transaction
+    de l'appelant. Autres types: blocs reserves par processus si block_size > 0.
+
+    Args:
+        db: Session de l'appelant
+        tenant_id: Tenant
+        block_size: Taille des blocs (defaut SEQUENCE_BLOCK_SIZE). Par defaut
+            les blocs sont desactives sur SQLite (un seul ecrivain: la
+            reservation sur une autre connexion attendrait la transaction
+            de l'appelant).
     """
 
-    def __init__(self, db: Session, tenant_id: str):
+    def __init__(self, db: Session, tenant_id: str, block_size: int | None = None):
         self.db = db
         self.tenant_id = tenant_id
+        self.block_size = block_size
 
     def next_reference(self, entity_type: str) -> str:
         """
@@ -138,22 +244,58 @@ class SequenceGenerator:
         Returns:
             Reference formatee (ex: CLI-0001, FV-2026-0001)
         """
+        return self.next_references(entity_type, 1)[0]
+
+    def next_references(self, entity_type: str, count: int) -> list[str]:
+        """
+        Genere `count` references consecutives pour un type d'entite.
+
+        Un seul aller-retour verrouille (ou une reservation de bloc) par lot,
+        au lieu d'un par reference.
+
+        Args:
+            entity_type: Type d'entite (CLIENT, FACTURE_VENTE, etc.)
+            count: Nombre de references (>= 1)
+
+        Returns:
+            Liste des references, dans l'ordre d'attribution
+        """
+        if count < 1:
+            raise ValueError("count doit etre >= 1")
+
+        block_size = self._block_size(entity_type)
+        if block_size > 0:
+            return self._next_from_blocks(entity_type, count, block_size)
+        return self._next_locked(entity_type, count)
+
+    def _block_size(self, entity_type: str) -> int:
+        """Taille de bloc effective pour ce type (0 = mode verrouille)."""
+        if entity_type in GAPLESS_SEQUENCES:
+            return 0
+        if self.block_size is not None:
+            return self.block_size
+        if self.db.get_bind().dialect.name == "sqlite":
+            return 0
+        return SEQUENCE_BLOCK_SIZE
+
+    # ------------------------------------------------------------------------
+    # Mode verrouille (transaction de l'appelant)
+    # ------------------------------------------------------------------------
+
+    def _next_locked(self, entity_type: str, count: int) -> list[str]:
+        """Numeros continus sous SELECT FOR UPDATE, verrou pris une fois par lot."""
         current_year = datetime.utcnow().year
 
         # Recuperer ou creer la config avec verrouillage
-        config = self.db.query(SequenceConfig).filter(
+        locked_query = self.db.query(SequenceConfig).filter(
             SequenceConfig.tenant_id == self.tenant_id,
             SequenceConfig.entity_type == entity_type
-        ).with_for_update().first()
+        ).with_for_update()
+        config = locked_query.first()
 
         if not config:
             # Creer avec les valeurs par defaut
-            defaults = DEFAULT_SEQUENCES.get(entity_type, {
-                "prefix": entity_type[:3].upper(),
-                "include_year": True,
-                "padding": 4,
-                "reset_yearly": True
-            })
+            defaults = _default_sequence(entity_type)
 
             config = SequenceConfig(
                 tenant_id=self.tenant_id,
@@ -165,8 +307,12 @@ class SequenceGenerator:
                 current_year=current_year,
                 current_number=0
             )
-            self.db.add(config)
-            self.db.flush()
+            try:
+                with self.db.begin_nested():
+                    self.db.add(config)
+            except IntegrityError:
+                # Creee en concurrence: verrouiller la ligne existante
+                config = locked_query.one()
 
         # Verifier si on doit reset le compteur (nouvelle annee)
         if config.reset_yearly and config.current_year != current_year:
@@ -174,15 +320,94 @@ class SequenceGenerator:
             config.current_number = 0
 
         # Incrementer
-        config.current_number += 1
+        first = (config.current_number or 0) + 1
+        config.current_number = first + count - 1
+
+        # Formater les references
+        return [
+            _format_reference(
+                config.prefix, config.separator, config.padding, config.include_year, current_year, number
+            )
+            for number in range(first, first + count)
+        ]
 
-        # Formater la reference
-        if config.include_year:
-            reference = f"{config.prefix}{config.separator}{current_year}{config.separator}{config.current_number:0{config.padding}d}"
-        else:
-            reference = f"{config.prefix}{config.separator}{config.current_number:0{config.padding}d}"
+    # ------------------------------------------------------------------------
+    # Mode par blocs (reservation hors transaction de l'appelant)
+    # ------------------------------------------------------------------------
 
-        return reference
+    def _next_from_blocks(self, entity_type: str, count: int, block_size: int) -> list[str]:
+        """Distribue les numeros depuis le bloc local, en reservant un nouveau bloc si besoin."""
+        current_year = datetime.utcnow().year
+        engine = self.db.get_bind().engine
+        key = (self.tenant_id, entity_type, current_year)
+
+        references: list[str] = []
+        slot = _block_slot(engine, key)
+        with slot.lock:
+            while len(references) < count:
+                block = slot.block
+                if block is None or block.remaining <= 0:
+                    block = slot.block = self._reserve_block(engine, entity_type, current_year,
+                                                             max(block_size, count - len(references)))
+
+                take = min(block.remaining, count - len(references))
+                references.extend(
+                    _format_reference(
+                        block.prefix, block.separator, block.padding, block.include_year, current_year, number
+                    )
+                    for number in range(block.next_number, block.next_number + take)
+                )
+                block.next_number += take
+
+        return references
+
+    def _reserve_block(self, engine, entity_type: str, year: int, size: int) -> _SequenceBlock:
+        """
+        Reserve `size` numeros par un UPDATE ... RETURNING atomique, commite
+        immediatement sur une connexion dediee (le verrou de ligne ne dure que
+        le temps de l'UPDATE).
+        """
+        table = SequenceConfig.__table__
+        reset = and_(table.c.reset_yearly.is_(True), table.c.current_year != year)
+        update = table.update().where(
+            table.c.tenant_id == self.tenant_id,
+            table.c.entity_type == entity_type
+        ).values(
+            current_number=case((reset, size), else_=func.coalesce(table.c.current_number, 0) + size),
+            current_year=case((reset, year), else_=table.c.current_year),
+        ).returning(
+            table.c.current_number, table.c.prefix, table.c.separator, table.c.padding, table.c.include_year
+        )
+
+        for _ in range(2):
+            with engine.begin() as conn:
+                row = conn.execute(update).first()
+            if row is not None:
+                last, prefix, separator, padding, include_year = row
+                return _SequenceBlock(last - size + 1, last, prefix, separator, padding, include_year)
+
+            # Premiere utilisation: creer la config avec le premier bloc
+            defaults = _default_sequence(entity_type)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(table.insert().values(
+                        id=str(uuid.uuid4()),
+                        tenant_id=self.tenant_id,
+                        entity_type=entity_type,
+                        prefix=defaults["prefix"],
+                        include_year=defaults["include_year"],
+                        padding=defaults["padding"],
+                        separator="-",
+                        reset_yearly=defaults["reset_yearly"],
+                        current_year=year,
+                        current_number=size,
+                    ))
+            except IntegrityError:
+                # Creee en concurrence par un autre processus: refaire l'UPDATE
+                continue
+            return _SequenceBlock(1, size, defaults["prefix"], "-", defaults["padding"], defaults["include_year"])
+
+        raise RuntimeError(f"Reservation de sequence impossible: {self.tenant_id}/{entity_type}")
 
     def get_config(self, entity_type: str) -> dict:
         """Recupere la configuration d'une sequence."""
@@ -226,12 +451,7 @@ class SequenceGenerator:
 
         if not config:
             # Creer avec les valeurs par defaut puis appliquer les modifications
-            defaults = DEFAULT_SEQUENCES.get(entity_type, {
-                "prefix": entity_type[:3].upper(),
-                "include_year": True,
-                "padding": 4,
-                "reset_yearly": True
-            })
+            defaults = _default_sequence(entity_type)
 
             config = SequenceConfig(
                 tenant_id=self.tenant_id,
@@ -259,6 +479,10 @@ class SequenceGenerator:
 
         self.db.commit()
         self.db.refresh(config)
+
+        # Les blocs deja reserves par ce processus portent l'ancien format
+        # (les autres processus l'appliquent au bloc suivant)
+        _invalidate_blocks(self.db.get_bind().engine, self.tenant_id, entity_type)
         return config
 
     def list_configs(self) -> list[dict]:
@@ -0,0 +1,79 @@
+"""
+Tests du report periodique en arriere-plan (BackgroundFlusher).
+"""
+
+import threading
+import time
+
+from app.core.background_flusher import BackgroundFlusher, FlushTrigger
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class TestFlushTrigger:
+    """Seuil de report anticipe."""
+
+    def test_set_at_threshold(self):
+        trigger = FlushTrigger(3)
+        trigger.notify(2)
+        assert not trigger.is_set()
+        trigger.notify(3)
+        assert trigger.is_set()
+
+
+class TestBackgroundFlusher:
+    """Cycle de vie du thread de report."""
+
+    def test_interval_flush(self):
+        calls = []
+        flusher = BackgroundFlusher(lambda: calls.append(1), interval=0.01)
+        flusher.start()
+        try:
+            assert wait_for(lambda: len(calls) >= 2)
+        finally:
+            flusher.stop()
+        assert not flusher.running
+
+    def test_trigger_wakes_before_interval(self):
+        flushed = threading.Event()
+        trigger = FlushTrigger(1)
+        flusher = BackgroundFlusher(flushed.set, interval=60, trigger=trigger)
+        flusher.start()
+        try:
+            trigger.notify(1)
+            assert flushed.wait(5)
+        finally:
+            flusher.stop()
+
+    def test_stop_flushes_once_more(self):
+        calls = []
+        flusher = BackgroundFlusher(lambda: calls.append(1), interval=60)
+        flusher.start()
+        flusher.stop()
+        assert calls == [1]
+        flusher.stop()
+        assert calls == [1]
+
+    def test_drain_error_logged_and_retried(self):
+        calls = []
+
+        def drain():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("db down")
+            return 7
+
+        flusher = BackgroundFlusher(drain, interval=0.01, failure_result=-1)
+        assert flusher.flush() == -1
+        flusher.start()
+        try:
+            assert wait_for(lambda: len(calls) >= 3)
+            assert flusher.running
+        finally:
+            flusher.stop()
+        assert flusher.flush() == 7
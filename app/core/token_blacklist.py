@@ -109,6 +109,10 @@ class TokenBlacklist:
         if not jti:
             return False
 
+        # Le contexte d'authentification en cache ne doit plus être servi
+        from app.core.auth_context_cache import invalidate_token
+        invalidate_token(jti)
+
         # Calculer TTL (garder jusqu'à expiration + marge de 60s)
         ttl = max(1, int(exp_timestamp - time.time()) + 60)
 
@@ -0,0 +1,131 @@
+"""
+AZALS - Validation des URLs sortantes (protection SSRF)
+=======================================================
+Vérifie qu'une URL fournie par un tenant (webhook, action HTTP de
+workflow...) ne vise pas l'infrastructure interne:
+- schéma http/https uniquement
+- hôtes bloqués (localhost, metadata cloud)
+- adresses IP de boucle locale, privées (RFC1918), lien local
+  (169.254.0.0/16, fe80::/10), réservées, multicast ou non spécifiées
+
+check_url() ne lit que l'URL (adresses IP littérales). check_resolved_url()
+vérifie en plus toutes les adresses auxquelles l'hôte se résout: à appeler
+juste avant l'envoi, un nom DNS pouvant changer de cible après validation.
+
+Usage:
+    is_safe, error = check_url(url)
+    is_safe, error = await check_resolved_url_async(url)
+"""
+
+import asyncio
+import ipaddress
+import socket
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+# nosec B104 - Ce sont des hôtes BLOQUÉS, pas des bindings
+BLOCKED_HOSTS = {
+    "localhost", "127.0.0.1", "0.0.0.0", "::1",  # nosec B104
+    "metadata.google.internal", "169.254.169.254",  # Cloud metadata
+}
+
+# Préfixes des réseaux privés IPv4 (hôtes écrits sous forme d'adresse)
+BLOCKED_NETWORKS = [
+    "10.", "172.16.", "172.17.", "172.18.", "172.19.",
+    "172.20.", "172.21.", "172.22.", "172.23.", "172.24.",
+    "172.25.", "172.26.", "172.27.", "172.28.", "172.29.",
+    "172.30.", "172.31.", "192.168.",
+]
+
+ALLOWED_SCHEMES = ("http", "https")
+
+
+class UnresolvableHostError(Exception):
+    """L'hôte de l'URL ne se résout vers aucune adresse."""
+    pass
+
+
+def _address_error(address: str) -> Optional[str]:
+    """Motif de refus d'une adresse IP, None si elle est publique."""
+    try:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+    except ValueError:
+        return None
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    if ip.is_loopback or ip.is_unspecified:
+        return f"Adresse locale non autorisée: {address}"
+    if ip.is_link_local:
+        return f"Adresse lien local non autorisée: {address}"
+    if ip.is_private or ip.is_reserved or ip.is_multicast:
+        return f"Réseau privé non autorisé: {address}"
+    return None
+
+
+def check_url(url: str) -> Tuple[bool, str]:
+    """Vérifie l'URL sans résolution DNS; retourne (sûre, motif du refus)."""
+    try:
+        parsed = urlparse(url)
+
+        # Vérifier le schéma
+        if parsed.scheme not in ALLOWED_SCHEMES:
+            return False, f"Schéma non autorisé: {parsed.scheme}"
+
+        # Vérifier l'hôte
+        host = parsed.hostname or ""
+        if not host:
+            return False, "Hôte manquant"
+        host_lower = host.lower().rstrip(".")
+
+        if host_lower in BLOCKED_HOSTS:
+            return False, f"Hôte bloqué: {host}"
+
+        # Vérifier les réseaux privés
+        for network in BLOCKED_NETWORKS:
+            if host_lower.startswith(network):
+                return False, f"Réseau privé non autorisé: {host}"
+
+        error = _address_error(host_lower)
+        if error:
+            return False, error
+
+        return True, ""
+    except Exception as e:
+        return False, f"URL invalide: {str(e)}"
+
+
+def resolve_host(host: str, port: Optional[int] = None) -> List[str]:
+    """Adresses IP de l'hôte (UnresolvableHostError si aucune)."""
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, UnicodeError) as e:
+        raise UnresolvableHostError(f"Hôte introuvable: {host}") from e
+    addresses = [info[4][0] for info in infos]
+    if not addresses:
+        raise UnresolvableHostError(f"Hôte introuvable: {host}")
+    return addresses
+
+
+def check_resolved_url(url: str) -> Tuple[bool, str]:
+    """
+    Vérifie l'URL puis chaque adresse de son hôte.
+
+    Raises:
+        UnresolvableHostError: l'hôte ne se résout pas (l'appelant décide
+            s'il s'agit d'un refus ou d'un échec temporaire)
+    """
+    is_safe, error = check_url(url)
+    if not is_safe:
+        return is_safe, error
+
+    parsed = urlparse(url)
+    for address in resolve_host(parsed.hostname, parsed.port):
+        error = _address_error(address)
+        if error:
+            return False, f"{parsed.hostname} -> {error}"
+    return True, ""
+
+
+async def check_resolved_url_async(url: str) -> Tuple[bool, str]:
+    """check_resolved_url() sans bloquer la boucle (résolution dans un thread)."""
+    return await asyncio.to_thread(check_resolved_url, url)
@@ -0,0 +1,297 @@
+"""
+AZALS - Vérification du schéma au démarrage
+===========================================
+
+Le lifespan créait les ~830 tables une à une (table.create(checkfirst=True),
+avec plusieurs passes de retry) puis introspectait toute la base
+(validate_schema_on_startup) à chaque démarrage de worker: des milliers
+d'allers-retours sur le catalogue par worker.
+
+Mode "fingerprint" (défaut, SCHEMA_STARTUP_MODE):
+- empreinte déterministe de Base.metadata (tables, colonnes, types compilés
+  pour le dialecte, contraintes, index)
+- comparée à l'empreinte enregistrée dans azals_schema_state après la
+  dernière vérification complète réussie
+- identiques: ni DDL ni introspection
+- verrou consultatif PostgreSQL autour de la comparaison et de la
+  vérification: un seul worker par déploiement fait la vérification
+  complète, les autres attendent puis trouvent l'empreinte à jour
+
+Mode "full": vérification complète à chaque démarrage (empreinte
+enregistrée si elle réussit).
+
+USAGE INTERNE (depuis main.py):
+    from app.db.schema_startup import StartupTimings, ensure_schema
+
+    result = ensure_schema(engine, Base, strict=..., mode=..., timings=timings)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, text
+from sqlalchemy.engine import Connection, Dialect, Engine
+from sqlalchemy.orm import DeclarativeBase
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_STARTUP_MODES = ("fingerprint", "full")
+
+# Clé du verrou consultatif PostgreSQL ("AZAL")
+SCHEMA_LOCK_KEY = 0x415A414C
+
+# Passes de création des tables (dépendances FK entre modules)
+MAX_CREATE_PASSES = 10
+
+# Table hors Base.metadata: n'entre pas dans l'empreinte
+_state_metadata = MetaData()
+schema_state = Table(
+    "azals_schema_state",
+    _state_metadata,
+    Column("name", String(50), primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("table_count", Integer, nullable=False),
+    Column("app_version", String(50), nullable=True),
+    Column("validated_at", DateTime, nullable=False),
+)
+SCHEMA_STATE_NAME = "orm"
+
+
+# ============================================================================
+# DURÉES DE DÉMARRAGE
+# ============================================================================
+
+class StartupTimings:
+    """Durées du démarrage par phase (ms), mesurées entre deux jalons."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Impute à phase le temps écoulé depuis le jalon précédent (cumulé)."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def as_dict(self) -> dict[str, float]:
+        phases = {name: round(ms, 1) for name, ms in self.phases.items()}
+        phases["total"] = round((self._last - self.started) * 1000, 1)
+        return phases
+
+
+# ============================================================================
+# EMPREINTE
+# ============================================================================
+
+def _type_signature(column, dialect: Dialect) -> str:
+    try:
+        return column.type.compile(dialect=dialect)
+    except Exception:
+        return type(column.type).__name__
+
+
+def _default_signature(column) -> str | None:
+    if column.server_default is None:
+        return None
+    return str(getattr(column.server_default, "arg", column.server_default))
+
+
+def compute_metadata_fingerprint(metadata: MetaData, dialect: Dialect) -> str:
+    """
+    Empreinte SHA-256 de la définition ORM, indépendante de l'ordre de
+    chargement des modèles.
+    """
+    tables = []
+    for table in sorted(metadata.tables.values(), key=lambda t: t.fullname):
+        tables.append({
+            "name": table.fullname,
+            "columns": [
+                [c.name, _type_signature(c, dialect), c.nullable, c.primary_key, _default_signature(c)]
+                for c in table.columns
+            ],
+            "foreign_keys": sorted(
+                [fk.parent.name, fk.target_fullname, fk.ondelete or ""] for fk in table.foreign_keys
+            ),
+            "constraints": sorted(
+                [type(c).__name__, sorted(col.name for col in getattr(c, "columns", []))]
+                for c in table.constraints
+            ),
+            "indexes": sorted(
+                [i.name or "", sorted(col.name for col in i.columns), bool(i.unique)]
+                for i in table.indexes
+            ),
+        })
+    payload = json.dumps({"dialect": dialect.name, "tables": tables}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def read_fingerprint(conn: Connection) -> str | None:
+    """Empreinte enregistrée, None si absente (première vérification)."""
+    schema_state.create(bind=conn, checkfirst=True)
+    conn.commit()
+    return conn.execute(
+        schema_state.select().with_only_columns(schema_state.c.fingerprint)
+        .where(schema_state.c.name == SCHEMA_STATE_NAME)
+    ).scalar()
+
+
+def store_fingerprint(conn: Connection, fingerprint: str, table_count: int,
+                      app_version: str | None = None) -> None:
+    conn.execute(schema_state.delete().where(schema_state.c.name == SCHEMA_STATE_NAME))
+    conn.execute(schema_state.insert().values(
+        name=SCHEMA_STATE_NAME,
+        fingerprint=fingerprint,
+        table_count=table_count,
+        app_version=app_version,
+        validated_at=datetime.utcnow(),
+    ))
+    conn.commit()
+
+
+@contextmanager
+def schema_check_lock(engine: Engine) -> Iterator[Connection]:
+    """
+    Connexion détenant le verrou consultatif de vérification du schéma
+    (PostgreSQL; les autres dialectes n'ont pas de verrou).
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name != "postgresql":
+            yield conn
+            return
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            conn.commit()
+
+
+# ============================================================================
+# VÉRIFICATION COMPLÈTE
+# ============================================================================
+
+@dataclass
+class SchemaStartupResult:
+    fingerprint: str
+    skipped: bool = False
+    tables_created: int = 0
+    tables_existed: int = 0
+    failed_tables: dict[str, str] = field(default_factory=dict)
+    schema_valid: bool | None = None
+
+
+def create_missing_tables(engine: Engine, metadata: MetaData, result: SchemaStartupResult) -> None:
+    """
+    Crée les tables manquantes, avec plusieurs passes pour les dépendances
+    FK entre modules (sorted_tables respecte l'ordre FK d'un même metadata).
+    """
+    pending_tables = list(metadata.sorted_tables)
+    last_errors = {}
+
+    for pass_num in range(1, MAX_CREATE_PASSES + 1):
+        if not pending_tables:
+            break
+
+        still_pending = []
+        pass_created = 0
+
+        for table in pending_tables:
+            try:
+                table.create(bind=engine, checkfirst=True)
+                result.tables_created += 1
+                pass_created += 1
+                last_errors.pop(table.name, None)
+            except Exception as table_error:
+                error_str = str(table_error).lower()
+                if "already exists" in error_str or "duplicate" in error_str:
+                    result.tables_existed += 1
+                    pass_created += 1
+                    last_errors.pop(table.name, None)
+                else:
+                    # Dépendance FK ou autre erreur - nouvel essai à la passe suivante
+                    still_pending.append(table)
+                    last_errors[table.name] = str(table_error)[:200]
+
+        pending_tables = still_pending
+
+        # Arrêt anticipé si aucune progression
+        if pass_created == 0 and pass_num >= 3:
+            break
+
+    result.failed_tables = {t.name: last_errors.get(t.name, "Unknown error") for t in pending_tables}
+    if result.failed_tables:
+        logger.error(
+            "[DB] Tables non créées après retries",
+            extra={
+                "failed_count": len(result.failed_tables),
+                "failed_tables": result.failed_tables,
+                "consequence": "partial_schema"
+            }
+        )
+
+
+def ensure_schema(engine: Engine, base: DeclarativeBase, strict: bool = False,
+                  mode: str = "fingerprint", timings: StartupTimings | None = None,
+                  app_version: str | None = None) -> SchemaStartupResult:
+    """
+    Crée les tables manquantes et valide le schéma, sauf si l'empreinte de
+    Base.metadata est celle de la dernière vérification réussie (mode
+    "fingerprint").
+
+    L'empreinte n'est enregistrée que si toutes les tables existent et que
+    la validation est sans erreur.
+    """
+    from app.core.schema_validator import validate_schema_on_startup
+
+    timings = timings if timings is not None else StartupTimings()
+    result = SchemaStartupResult(compute_metadata_fingerprint(base.metadata, engine.dialect))
+    timings.mark("schema_fingerprint")
+
+    with schema_check_lock(engine) as conn:
+        stored = read_fingerprint(conn)
+        timings.mark("schema_lock")
+
+        if mode == "fingerprint" and stored == result.fingerprint:
+            result.skipped = True
+            logger.info(
+                "[SCHEMA] Empreinte inchangée — création des tables et validation ignorées",
+                extra={"fingerprint": result.fingerprint[:12], "tables": len(base.metadata.tables)}
+            )
+            return result
+
+        create_missing_tables(engine, base.metadata, result)
+        timings.mark("create_tables")
+
+        # VERROU ANTI-RÉGRESSION: Valider le schéma UUID
+        try:
+            # strict=False en dev, strict=True en prod pour bloquer les démarrages
+            result.schema_valid = validate_schema_on_startup(engine, base, strict=strict)
+            if result.schema_valid:
+                logger.info("[SCHEMA] Validé — toutes les PK/FK utilisent UUID")
+            else:
+                logger.warning("[SCHEMA] Avertissements détectés — consulter les logs détaillés")
+        except Exception as schema_err:
+            logger.warning(
+                "[SCHEMA] Validation ignorée",
+                extra={"error": str(schema_err), "consequence": "schema_not_validated"}
+            )
+        timings.mark("validate_schema")
+
+        if result.schema_valid and not result.failed_tables:
+            store_fingerprint(conn, result.fingerprint, len(base.metadata.tables), app_version)
+            logger.info(
+                "[SCHEMA] Empreinte enregistrée",
+                extra={"fingerprint": result.fingerprint[:12], "previous": (stored or "")[:12]}
+            )
+
+    return result
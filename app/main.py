@@ -65,6 +65,7 @@ from app.core.version import AZALS_VERSION
 # IMPORTANT: Importer Base depuis app.db (avec UUIDMixin), PAS depuis app.core.database
 from app.db import Base
 from app.db.model_loader import load_all_models, verify_models_loaded
+from app.db.schema_startup import StartupTimings, ensure_schema
 
 # ===========================================================================
 # ROUTERS UNIFIÉS - Migration CORE SaaS v2 (Wave 8 Complete)
@@ -158,6 +159,9 @@ from app.modules.expenses.router import router as expenses_router
 # GAP-086: Integrations - Connecteurs externes (Sage, Odoo, Stripe...)
 from app.modules.integrations.router import router as integrations_router
 
+# GAP-052: Search - Recherche full-text dans les index du tenant
+from app.modules.search.router import router as search_router
+
 # ===========================================================================
 # MODULES V3 - CRUDRouter (Migration complète)
 # ===========================================================================
@@ -190,6 +194,16 @@ except ImportError as e:
         ) from e
 
 from app.services.scheduler import scheduler_service
+from app.modules.gateway.counters import start_quota_flusher, stop_quota_flusher
+from app.modules.gateway.metrics_buffer import start_metrics_flusher, stop_metrics_flusher
+from app.modules.guardian.ingestion import start_error_ingestion, stop_error_ingestion
+from app.modules.search.entities import register_default_search_entities
+from app.modules.search.events import start_search_indexing, stop_search_indexing
+from app.modules.webhooks.delivery import (
+    WEBHOOK_DELIVERY_ENABLED,
+    start_delivery_engine,
+    stop_delivery_engine,
+)
 
 # Logger module-level pour observabilité production
 logger = get_logger(__name__)
@@ -208,6 +222,7 @@ async def lifespan(app: FastAPI):
     )
     logger = get_logger(__name__)
     logger.info("AZALS démarrage", extra={"environment": _settings.environment})
+    startup_timings = StartupTimings()
 
     # =========================================================================
     # GARDE-FOUS DE SECURITE - EXECUTION AVANT TOUTE OPERATION
@@ -235,6 +250,7 @@ async def lifespan(app: FastAPI):
 
     # Initialiser les métriques Prometheus
     init_metrics()
+    startup_timings.mark("security")
 
     # =========================================================================
     # CHARGEMENT OBLIGATOIRE DES MODELES ORM
@@ -261,6 +277,7 @@ async def lifespan(app: FastAPI):
             extra={"error": str(model_err), "consequence": "startup_aborted"}
         )
         raise  # Arret immediat - pas de demarrage sans modeles
+    startup_timings.mark("load_models")
 
     max_retries = 5
     # Variable pour tracker l'etat reel de la conformite UUID
@@ -284,6 +301,8 @@ async def lifespan(app: FastAPI):
                         extra={"error": str(e)}
                     )
 
+            startup_timings.mark("db_connect")
+
             # =========================================================================
             # GESTION CONFORMITE UUID - DETECTION ET RESET AUTOMATIQUE
             # =========================================================================
@@ -390,79 +409,29 @@ async def lifespan(app: FastAPI):
                 )
                 raise RuntimeError(str(reset_err))
 
-            # Create tables with multi-pass retry for FK dependencies
-            # sorted_tables respects FK order, but cross-module deps may need retries
-            tables_created = 0
-            tables_existed = 0
-            pending_tables = list(Base.metadata.sorted_tables)
-            max_passes = 10
-            last_errors = {}
-
-            for pass_num in range(1, max_passes + 1):
-                if not pending_tables:
-                    break
-
-                still_pending = []
-                pass_created = 0
-
-                for table in pending_tables:
-                    try:
-                        table.create(bind=engine, checkfirst=True)
-                        tables_created += 1
-                        pass_created += 1
-                        last_errors.pop(table.name, None)
-                    except Exception as table_error:
-                        error_str = str(table_error).lower()
-                        if "already exists" in error_str or "duplicate" in error_str:
-                            tables_existed += 1
-                            pass_created += 1
-                            last_errors.pop(table.name, None)
-                        else:
-                            # FK dependency or other error - retry in next pass
-                            still_pending.append(table)
-                            last_errors[table.name] = str(table_error)[:200]
-
-                pending_tables = still_pending
+            startup_timings.mark("uuid_compliance")
 
-                # Stop early if no progress (same tables failing repeatedly)
-                if pass_created == 0 and pass_num >= 3:
-                    break
-
-            # Report final errors
-            if pending_tables:
-                failed_tables = {t.name: last_errors.get(t.name, "Unknown error") for t in pending_tables}
-                logger.error(
-                    "[DB] Tables non créées après retries",
-                    extra={
-                        "failed_count": len(pending_tables),
-                        "failed_tables": failed_tables,
-                        "consequence": "partial_schema"
-                    }
-                )
+            # Tables manquantes + validation du schéma, sautées si l'empreinte
+            # de Base.metadata est celle de la dernière vérification réussie
+            schema_result = ensure_schema(
+                engine, Base,
+                strict=_settings.is_production,
+                mode=_settings.schema_startup_mode,
+                timings=startup_timings,
+                app_version=AZALS_VERSION,
+            )
+            tables_created = schema_result.tables_created
+            tables_existed = schema_result.tables_existed
 
             logger.info(
                 "[DB] Connexion base de données établie",
-                extra={"tables_created": tables_created, "tables_existed": tables_existed}
+                extra={
+                    "tables_created": tables_created,
+                    "tables_existed": tables_existed,
+                    "schema_check": "skipped" if schema_result.skipped else "full"
+                }
             )
 
-            # VERROU ANTI-RÉGRESSION: Valider le schéma UUID
-            try:
-                from app.core.schema_validator import validate_schema_on_startup
-                # strict=False en dev, strict=True en prod pour bloquer les démarrages
-                schema_valid = validate_schema_on_startup(
-                    engine, Base,
-                    strict=_settings.is_production
-                )
-                if schema_valid:
-                    logger.info("[SCHEMA] Validé — toutes les PK/FK utilisent UUID")
-                else:
-                    logger.warning("[SCHEMA] Avertissements détectés — consulter les logs détaillés")
-            except Exception as schema_err:
-                logger.warning(
-                    "[SCHEMA] Validation ignorée",
-                    extra={"error": str(schema_err), "consequence": "schema_not_validated"}
-                )
-
             break
 
         except Exception as e:
@@ -487,6 +456,25 @@ async def lifespan(app: FastAPI):
     scheduler_service.start()
     logger.info("[SCHEDULER] Service de planification démarré")
 
+    # Report périodique des quotas du gateway (compteurs Redis / mémoire -> base)
+    start_quota_flusher()
+
+    # Report par lots des logs de requêtes et métriques horaires du gateway
+    start_metrics_flusher()
+
+    # Report par lots des erreurs interceptées par le middleware GUARDIAN
+    start_error_ingestion()
+
+    # Index de recherche tenus à jour aux commits des entités métier
+    # (changements appliqués en arrière-plan)
+    register_default_search_entities()
+    start_search_indexing()
+
+    # Livraison des webhooks sortants mis en file par WebhookService.trigger()
+    if WEBHOOK_DELIVERY_ENABLED:
+        await start_delivery_engine()
+    startup_timings.mark("services")
+
     # =========================================================================
     # DEMARRAGE TERMINE - AFFICHAGE ETAT REEL
     # =========================================================================
@@ -504,7 +492,8 @@ async def lifespan(app: FastAPI):
         "uuid_lock": "active",
         "database": db_uuid_status,
         "violations": db_violation_count,
-        "tables": len(Base.metadata.tables)
+        "tables": len(Base.metadata.tables),
+        "startup_ms": startup_timings.as_dict()
     }
 
     if db_violation_count == 0 and db_uuid_status == "UUID-native":
@@ -528,6 +517,11 @@ async def lifespan(app: FastAPI):
     # Arrêter le scheduler à l'arrêt
     logger.info("[SHUTDOWN] Arrêt du scheduler en cours")
     scheduler_service.shutdown()
+    stop_quota_flusher()
+    stop_metrics_flusher()
+    stop_error_ingestion()
+    stop_search_indexing()
+    await stop_delivery_engine()
     logger.info("[SHUTDOWN] Application arrêtée proprement")
 
 # SÉCURITÉ: Configuration dynamique selon environnement
@@ -738,6 +732,9 @@ api_v1.include_router(expenses_router)
 # GAP-086: Integrations - Connecteurs externes (Sage, Odoo, Stripe, QuickBooks...)
 api_v1.include_router(integrations_router)
 
+# GAP-052: Search - Recherche full-text, autocomplétion
+api_v1.include_router(search_router)
+
 
 # ==================== UTILITY ENDPOINTS ====================
 # Endpoints utilitaires pour le cockpit frontend
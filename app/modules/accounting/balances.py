@@ -0,0 +1,325 @@
+"""
+AZALS MODULE - ACCOUNTING: Soldes matérialisés
+===============================================
+
+Maintenance de la table accounting_account_balances (cumul débit/crédit par
+tenant, exercice, période et compte).
+
+- apply_entry(): mise à jour incrémentale dans la transaction de l'appelant
+  (comptabilisation +1, annulation -1), par UPSERT atomique
+- rebuild(): reconstruction complète depuis les lignes d'écritures
+- ensure_initialized(): reconstruction d'un tenant sans soldes mais avec des
+  écritures comptabilisées (table créée sans l'alimentation initiale de la
+  migration), vérifiée une fois par processus et tenant
+- check_consistency(): comparaison table / agrégat des lignes
+- movements_subquery(): source des lectures (balance, grand livre, résumé)
+"""
+from __future__ import annotations
+
+import logging
+import uuid
+import weakref
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import (
+    AccountingAccountBalance,
+    AccountingJournalEntry,
+    AccountingJournalEntryLine,
+    EntryStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuts dont les lignes sont agrégées dans les soldes
+BALANCE_STATUSES = (EntryStatus.POSTED, EntryStatus.VALIDATED)
+
+# Tenants dont les soldes sont vérifiés, par engine
+_initialized_tenants: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+@dataclass(frozen=True)
+class BalanceDiscrepancy:
+    """Écart entre la table des soldes et l'agrégat des lignes."""
+    fiscal_year_id: UUID
+    period: str
+    account_number: str
+    stored_debit: Decimal
+    stored_credit: Decimal
+    actual_debit: Decimal
+    actual_credit: Decimal
+
+
+class AccountBalanceService:
+    """Service de maintenance des soldes par compte et période."""
+
+    def __init__(self, db: Session, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # ========================================================================
+    # MISE À JOUR INCRÉMENTALE
+    # ========================================================================
+
+    def apply_entry(self, entry: AccountingJournalEntry, sign: int = 1) -> None:
+        """
+        Ajoute (sign=1) ou retire (sign=-1) les lignes d'une écriture des soldes.
+
+        Ne commite pas: l'appelant inclut la mise à jour dans sa transaction.
+        """
+        self.ensure_initialized()
+        totals = defaultdict(lambda: [Decimal("0.00"), Decimal("0.00"), 0])
+        for line in entry.lines:
+            total = totals[line.account_number]
+            total[0] += line.debit or Decimal("0.00")
+            total[1] += line.credit or Decimal("0.00")
+            total[2] += 1
+
+        if not totals:
+            return
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": self.tenant_id,
+                "fiscal_year_id": entry.fiscal_year_id,
+                "period": entry.period,
+                "account_number": account_number,
+                "debit": sign * debit,
+                "credit": sign * credit,
+                "line_count": sign * count,
+                "updated_at": now,
+            }
+            for account_number, (debit, credit, count) in sorted(totals.items())
+        ]
+        self._upsert(rows)
+
+    def _upsert(self, rows: list[dict]) -> None:
+        """INSERT ... ON CONFLICT DO UPDATE SET cumul = cumul + delta."""
+        table = AccountingAccountBalance.__table__
+        dialect = self.db.get_bind().dialect.name
+
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = dialect_insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["tenant_id", "fiscal_year_id", "period", "account_number"],
+                set_={
+                    "debit": table.c.debit + stmt.excluded.debit,
+                    "credit": table.c.credit + stmt.excluded.credit,
+                    "line_count": table.c.line_count + stmt.excluded.line_count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            self.db.execute(stmt)
+            return
+
+        # Autres SGBD: UPDATE puis INSERT si la ligne n'existe pas
+        for row in rows:
+            result = self.db.execute(
+                table.update().where(
+                    table.c.tenant_id == row["tenant_id"],
+                    table.c.fiscal_year_id == row["fiscal_year_id"],
+                    table.c.period == row["period"],
+                    table.c.account_number == row["account_number"],
+                ).values(
+                    debit=table.c.debit + row["debit"],
+                    credit=table.c.credit + row["credit"],
+                    line_count=table.c.line_count + row["line_count"],
+                    updated_at=row["updated_at"],
+                )
+            )
+            if result.rowcount == 0:
+                self.db.execute(table.insert().values(**row))
+
+    # ========================================================================
+    # RECONSTRUCTION / CONTRÔLE
+    # ========================================================================
+
+    def _line_aggregate(self, fiscal_year_id: Optional[UUID] = None):
+        """Agrégat des lignes comptabilisées par exercice, période et compte."""
+        query = select(
+            AccountingJournalEntry.fiscal_year_id,
+            AccountingJournalEntry.period,
+            AccountingJournalEntryLine.account_number,
+            func.sum(AccountingJournalEntryLine.debit).label("debit"),
+            func.sum(AccountingJournalEntryLine.credit).label("credit"),
+            func.count(AccountingJournalEntryLine.id).label("line_count"),
+        ).join(
+            AccountingJournalEntry,
+            AccountingJournalEntryLine.entry_id == AccountingJournalEntry.id
+        ).where(
+            AccountingJournalEntryLine.tenant_id == self.tenant_id,
+            AccountingJournalEntry.tenant_id == self.tenant_id,
+            AccountingJournalEntry.status.in_(BALANCE_STATUSES)
+        )
+
+        if fiscal_year_id:
+            query = query.where(AccountingJournalEntry.fiscal_year_id == fiscal_year_id)
+
+        return query.group_by(
+            AccountingJournalEntry.fiscal_year_id,
+            AccountingJournalEntry.period,
+            AccountingJournalEntryLine.account_number,
+        )
+
+    def _write_rebuild(self, executor, fiscal_year_id: Optional[UUID] = None) -> int:
+        """Remplace les soldes du tenant par l'agrégat des lignes (session ou connexion, sans commit)."""
+        table = AccountingAccountBalance.__table__
+        delete = table.delete().where(table.c.tenant_id == self.tenant_id)
+        if fiscal_year_id:
+            delete = delete.where(table.c.fiscal_year_id == fiscal_year_id)
+        executor.execute(delete)
+
+        aggregate = self._line_aggregate(fiscal_year_id).subquery()
+        rows = executor.execute(select(aggregate)).all()
+        if rows:
+            now = datetime.utcnow()
+            executor.execute(
+                insert(table),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "tenant_id": self.tenant_id,
+                        "fiscal_year_id": row.fiscal_year_id,
+                        "period": row.period,
+                        "account_number": row.account_number,
+                        "debit": row.debit or Decimal("0.00"),
+                        "credit": row.credit or Decimal("0.00"),
+                        "line_count": row.line_count,
+                        "updated_at": now,
+                    }
+                    for row in rows
+                ],
+            )
+        return len(rows)
+
+    def rebuild(self, fiscal_year_id: Optional[UUID] = None) -> int:
+        """
+        Reconstruit les soldes depuis les lignes d'écritures (INSERT ... SELECT).
+
+        Returns:
+            Nombre de lignes de soldes écrites
+        """
+        count = self._write_rebuild(self.db, fiscal_year_id)
+        self.db.commit()
+        _initialized_tenants.setdefault(self.db.get_bind().engine, set()).add(self.tenant_id)
+        logger.info(
+            "Account balances rebuilt | tenant=%s fiscal_year=%s rows=%s",
+            self.tenant_id, fiscal_year_id, count
+        )
+        return count
+
+    def ensure_initialized(self) -> bool:
+        """
+        Reconstruit les soldes du tenant s'il n'en a aucun alors que des
+        écritures sont comptabilisées (table créée au démarrage, hors
+        migration). Vérifié une fois par processus et tenant.
+
+        La reconstruction est commitée sur une connexion dédiée: la
+        transaction de l'appelant n'est pas validée.
+
+        Returns:
+            True si les soldes ont été reconstruits
+        """
+        engine = self.db.get_bind().engine
+        checked = _initialized_tenants.setdefault(engine, set())
+        if self.tenant_id in checked:
+            return False
+
+        table = AccountingAccountBalance.__table__
+        has_balances = self.db.execute(
+            select(table.c.id).where(table.c.tenant_id == self.tenant_id).limit(1)
+        ).first() is not None
+        rebuilt = False
+        if not has_balances and self.db.execute(self._line_aggregate().limit(1)).first() is not None:
+            logger.warning("Account balances missing, rebuilding | tenant=%s", self.tenant_id)
+            with engine.begin() as conn:
+                self._write_rebuild(conn)
+            rebuilt = True
+
+        checked.add(self.tenant_id)
+        return rebuilt
+
+    def check_consistency(self, fiscal_year_id: Optional[UUID] = None) -> List[BalanceDiscrepancy]:
+        """Compare la table des soldes à l'agrégat des lignes; retourne les écarts."""
+        actual = {
+            (row.fiscal_year_id, row.period, row.account_number): (
+                row.debit or Decimal("0.00"), row.credit or Decimal("0.00")
+            )
+            for row in self.db.execute(self._line_aggregate(fiscal_year_id)).all()
+        }
+
+        stored_query = self.db.query(AccountingAccountBalance).filter(
+            AccountingAccountBalance.tenant_id == self.tenant_id
+        )
+        if fiscal_year_id:
+            stored_query = stored_query.filter(AccountingAccountBalance.fiscal_year_id == fiscal_year_id)
+
+        stored = {
+            (row.fiscal_year_id, row.period, row.account_number): (row.debit, row.credit)
+            for row in stored_query.all()
+        }
+
+        zero = (Decimal("0.00"), Decimal("0.00"))
+        discrepancies = []
+        for key in sorted(actual.keys() | stored.keys(), key=lambda k: (str(k[0]), k[1], k[2])):
+            stored_values = stored.get(key, zero)
+            actual_values = actual.get(key, zero)
+            if stored_values != actual_values:
+                discrepancies.append(BalanceDiscrepancy(
+                    fiscal_year_id=key[0],
+                    period=key[1],
+                    account_number=key[2],
+                    stored_debit=stored_values[0],
+                    stored_credit=stored_values[1],
+                    actual_debit=actual_values[0],
+                    actual_credit=actual_values[1],
+                ))
+
+        if discrepancies:
+            logger.warning(
+                "Account balances inconsistent | tenant=%s fiscal_year=%s discrepancies=%s",
+                self.tenant_id, fiscal_year_id, len(discrepancies)
+            )
+        return discrepancies
+
+    # ========================================================================
+    # LECTURE
+    # ========================================================================
+
+    def movements_subquery(
+        self,
+        fiscal_year_id: Optional[UUID] = None,
+        period: Optional[str] = None,
+        account_number: Optional[str] = None
+    ):
+        """Mouvements par compte (account_number, period_debit, period_credit)."""
+        self.ensure_initialized()
+        query = select(
+            AccountingAccountBalance.account_number.label("account_number"),
+            func.sum(AccountingAccountBalance.debit).label("period_debit"),
+            func.sum(AccountingAccountBalance.credit).label("period_credit"),
+        ).where(
+            AccountingAccountBalance.tenant_id == self.tenant_id
+        )
+
+        if fiscal_year_id:
+            query = query.where(AccountingAccountBalance.fiscal_year_id == fiscal_year_id)
+
+        if period:
+            query = query.where(AccountingAccountBalance.period == period)
+
+        if account_number:
+            query = query.where(AccountingAccountBalance.account_number == account_number)
+
+        return query.group_by(AccountingAccountBalance.account_number).subquery()
@@ -280,3 +280,37 @@ class AccountingJournalEntryLine(Base):
         CheckConstraint('credit >= 0', name='check_credit_positive'),
         CheckConstraint('NOT (debit > 0 AND credit > 0)', name='check_debit_or_credit_only'),
     )
+
+
+class AccountingAccountBalance(Base):
+    """
+    Solde agrégé par compte et par période (table matérialisée).
+
+    Maintenu incrémentalement à la comptabilisation / annulation des écritures
+    (voir balances.AccountBalanceService), reconstructible à partir des lignes.
+    Seules les écritures POSTED et VALIDATED y sont agrégées.
+    """
+    __tablename__ = "accounting_account_balances"
+
+    # Clé primaire + tenant
+    id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(50), nullable=False)
+
+    # Clé d'agrégation
+    fiscal_year_id = Column(UniversalUUID(), ForeignKey("accounting_fiscal_years.id"), nullable=False)
+    period = Column(String(7), nullable=False)          # Période (YYYY-MM)
+    account_number = Column(String(20), nullable=False)
+
+    # Cumuls de la période
+    debit = Column(Numeric(15, 2), default=Decimal("0.00"), nullable=False)
+    credit = Column(Numeric(15, 2), default=Decimal("0.00"), nullable=False)
+    line_count = Column(Integer, default=0, nullable=False)
+
+    # Métadonnées
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    # Index
+    __table_args__ = (
+        Index('idx_accounting_balances_key', 'tenant_id', 'fiscal_year_id', 'period', 'account_number', unique=True),
+        Index('idx_accounting_balances_account', 'tenant_id', 'account_number'),
+    )
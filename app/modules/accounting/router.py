@@ -418,11 +418,11 @@ async def get_balance(
     fiscal_year_id: Optional[UUID] = Query(None, description="ID exercice comptable"),
     period: Optional[str] = Query(None, description="Période (YYYY-MM)"),
     page: int = Query(1, ge=1),
-    per_page: int = Query(100, ge=1, le=500, alias="page_size"),
+    per_page: int = Query(100, ge=1, le=5000, alias="page_size"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Obtenir la balance générale."""
+    """Obtenir la balance générale (page_size jusqu'à 5000: plan comptable complet en une requête)."""
     service = get_accounting_service(db, current_user.tenant_id)
     items, total = service.get_balance(fiscal_year_id, period, page, per_page)
 
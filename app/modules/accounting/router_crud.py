@@ -464,13 +464,15 @@ async def get_balance(
     fiscal_year_id: Optional[UUID] = Query(None),
     period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
     page: int = Query(1, ge=1),
-    page_size: int = Query(100, ge=1, le=500),
+    page_size: int = Query(100, ge=1, le=5000),
     context: SaaSContext = Depends(get_context),
     db: Session = Depends(get_db)
 ):
     """
     Obtenir la balance generale.
 
+    page_size va jusqu'a 5000 pour obtenir un plan comptable complet en une requete.
+
     Retourne pour chaque compte:
     - Solde d'ouverture
     - Mouvements de la periode
@@ -415,11 +415,11 @@ async def get_balance(
     fiscal_year_id: Optional[UUID] = Query(None, description="ID exercice comptable"),
     period: Optional[str] = Query(None, description="Période (YYYY-MM)"),
     page: int = Query(1, ge=1),
-    per_page: int = Query(100, ge=1, le=500, alias="page_size"),
+    per_page: int = Query(100, ge=1, le=5000, alias="page_size"),
     context: SaaSContext = Depends(get_saas_context),
     db: Session = Depends(get_db)
 ):
-    """Obtenir la balance générale."""
+    """Obtenir la balance générale (page_size jusqu'à 5000: plan comptable complet en une requête)."""
     service = get_accounting_service(db, context.tenant_id, context.user_id)
     items, total = service.get_balance(fiscal_year_id, period, page, per_page)
 
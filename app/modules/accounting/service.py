@@ -13,13 +13,14 @@ from decimal import Decimal
 from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, desc, extract, func, or_
+from sqlalchemy import desc, extract, func, or_
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.query_optimizer import QueryOptimizer
 
 logger = logging.getLogger(__name__)
 
+from .balances import AccountBalanceService
 from .models import (
     AccountingFiscalYear,
     AccountType,
@@ -52,6 +53,7 @@ class AccountingService:
         self.tenant_id = tenant_id
         self.user_id = user_id  # Pour CORE SaaS v2
         self._optimizer = QueryOptimizer(db)
+        self._balances = AccountBalanceService(db, tenant_id)
 
     # ========================================================================
     # FISCAL YEARS
@@ -466,6 +468,9 @@ class AccountingService:
         entry.posted_by = user_id
         entry.posted_at = datetime.datetime.utcnow()
 
+        # Soldes matérialisés mis à jour dans la même transaction
+        self._balances.apply_entry(entry, sign=1)
+
         self.db.commit()
         self.db.refresh(entry)
         logger.info(
@@ -483,6 +488,7 @@ class AccountingService:
         if entry.status != EntryStatus.POSTED:
             raise ValueError("Seules les écritures comptabilisées peuvent être validées")
 
+        # POSTED et VALIDATED sont tous deux agrégés: soldes inchangés
         entry.status = EntryStatus.VALIDATED
         entry.validated_at = datetime.datetime.utcnow()
         entry.validated_by = user_id
@@ -500,6 +506,9 @@ class AccountingService:
         if entry.status == EntryStatus.VALIDATED:
             raise ValueError("Les écritures validées ne peuvent pas être annulées")
 
+        if entry.status == EntryStatus.POSTED:
+            self._balances.apply_entry(entry, sign=-1)
+
         entry.status = EntryStatus.CANCELLED
 
         self.db.commit()
@@ -518,29 +527,18 @@ class AccountingService:
             if fiscal_year:
                 fiscal_year_id = fiscal_year.id
 
-        # Calculer les totaux par type de compte
-        query = self.db.query(
+        # Calculer les totaux par type de compte (depuis les soldes matérialisés)
+        movements = self._balances.movements_subquery(fiscal_year_id)
+        results = self.db.query(
             ChartOfAccounts.account_type,
-            func.sum(AccountingJournalEntryLine.debit).label('total_debit'),
-            func.sum(AccountingJournalEntryLine.credit).label('total_credit')
+            func.sum(movements.c.period_debit).label('total_debit'),
+            func.sum(movements.c.period_credit).label('total_credit')
         ).join(
-            AccountingJournalEntryLine,
-            and_(
-                ChartOfAccounts.account_number == AccountingJournalEntryLine.account_number,
-                ChartOfAccounts.tenant_id == AccountingJournalEntryLine.tenant_id
-            )
-        ).join(
-            AccountingJournalEntry,
-            AccountingJournalEntryLine.entry_id == AccountingJournalEntry.id
+            movements,
+            movements.c.account_number == ChartOfAccounts.account_number
         ).filter(
-            ChartOfAccounts.tenant_id == self.tenant_id,
-            AccountingJournalEntry.status.in_([EntryStatus.POSTED, EntryStatus.VALIDATED])
-        )
-
-        if fiscal_year_id:
-            query = query.filter(AccountingJournalEntry.fiscal_year_id == fiscal_year_id)
-
-        results = query.group_by(ChartOfAccounts.account_type).all()
+            ChartOfAccounts.tenant_id == self.tenant_id
+        ).group_by(ChartOfAccounts.account_type).all()
 
         # Initialiser les totaux
         totals = {
@@ -623,20 +621,17 @@ class AccountingService:
         per_page: int = 100
     ) -> Tuple[List[LedgerAccount], int]:
         """Obtenir le grand livre (par compte ou tous les comptes)."""
+        # Mouvements depuis les soldes matérialisés (écritures POSTED/VALIDATED)
+        movements = self._balances.movements_subquery(fiscal_year_id, account_number=account_number)
+
         query = self.db.query(
             ChartOfAccounts.account_number,
             ChartOfAccounts.account_label,
-            func.sum(AccountingJournalEntryLine.debit).label('debit_total'),
-            func.sum(AccountingJournalEntryLine.credit).label('credit_total')
-        ).outerjoin(
-            AccountingJournalEntryLine,
-            and_(
-                ChartOfAccounts.account_number == AccountingJournalEntryLine.account_number,
-                ChartOfAccounts.tenant_id == AccountingJournalEntryLine.tenant_id
-            )
+            movements.c.period_debit.label('debit_total'),
+            movements.c.period_credit.label('credit_total')
         ).outerjoin(
-            AccountingJournalEntry,
-            AccountingJournalEntryLine.entry_id == AccountingJournalEntry.id
+            movements,
+            movements.c.account_number == ChartOfAccounts.account_number
         ).filter(
             ChartOfAccounts.tenant_id == self.tenant_id,
             ChartOfAccounts.is_active == True
@@ -645,22 +640,6 @@ class AccountingService:
         if account_number:
             query = query.filter(ChartOfAccounts.account_number == account_number)
 
-        if fiscal_year_id:
-            query = query.filter(AccountingJournalEntry.fiscal_year_id == fiscal_year_id)
-
-        # Filtrer seulement les écritures validées
-        query = query.filter(
-            or_(
-                AccountingJournalEntry.id.is_(None),  # Comptes sans mouvements
-                AccountingJournalEntry.status.in_([EntryStatus.POSTED, EntryStatus.VALIDATED])
-            )
-        )
-
-        query = query.group_by(
-            ChartOfAccounts.account_number,
-            ChartOfAccounts.account_label
-        )
-
         total = query.count()
 
         results = query.order_by(ChartOfAccounts.account_number).offset(
@@ -690,68 +669,71 @@ class AccountingService:
         fiscal_year_id: Optional[UUID] = None,
         period: Optional[str] = None,
         page: int = 1,
-        per_page: int = 100
+        per_page: Optional[int] = 100
     ) -> Tuple[List[BalanceEntry], int]:
-        """Obtenir la balance (avec ouverture, mouvements, clôture)."""
-        # Pour chaque compte, calculer :
-        # - Solde d'ouverture (depuis ChartOfAccounts)
-        # - Mouvements de la période
-        # - Solde de clôture
+        """
+        Obtenir la balance (avec ouverture, mouvements, clôture).
 
-        query = self.db.query(ChartOfAccounts).filter(
+        Les mouvements proviennent des soldes matérialisés par période
+        (accounting_account_balances), joints au plan comptable en une seule
+        requête. per_page=None retourne la balance complète.
+        """
+        movements = self._balances.movements_subquery(fiscal_year_id, period)
+
+        # Plan comptable + mouvements, total calculé dans la même requête
+        query = self.db.query(
+            ChartOfAccounts.account_number,
+            ChartOfAccounts.account_label,
+            ChartOfAccounts.opening_balance_debit,
+            ChartOfAccounts.opening_balance_credit,
+            movements.c.period_debit,
+            movements.c.period_credit,
+            func.count().over().label('total')
+        ).outerjoin(
+            movements,
+            movements.c.account_number == ChartOfAccounts.account_number
+        ).filter(
             ChartOfAccounts.tenant_id == self.tenant_id,
             ChartOfAccounts.is_active == True
-        )
+        ).order_by(ChartOfAccounts.account_number)
 
-        total = query.count()
+        if per_page:
+            query = query.offset((page - 1) * per_page).limit(per_page)
 
-        accounts = query.order_by(ChartOfAccounts.account_number).offset(
-            (page - 1) * per_page
-        ).limit(per_page).all()
+        rows = query.all()
+
+        if rows:
+            total = rows[0].total
+        elif per_page and page > 1:
+            # Page au-delà de la fin: le total n'est pas porté par les lignes
+            total = self.db.query(func.count(ChartOfAccounts.id)).filter(
+                ChartOfAccounts.tenant_id == self.tenant_id,
+                ChartOfAccounts.is_active == True
+            ).scalar() or 0
+        else:
+            total = 0
 
         balance_entries = []
 
-        for account in accounts:
+        for row in rows:
             # Solde d'ouverture
-            opening_debit = account.opening_balance_debit
-            opening_credit = account.opening_balance_credit
+            opening_debit = row.opening_balance_debit or Decimal("0.00")
+            opening_credit = row.opening_balance_credit or Decimal("0.00")
 
             # Mouvements de la période
-            movements_query = self.db.query(
-                func.sum(AccountingJournalEntryLine.debit).label('period_debit'),
-                func.sum(AccountingJournalEntryLine.credit).label('period_credit')
-            ).join(
-                AccountingJournalEntry,
-                AccountingJournalEntryLine.entry_id == AccountingJournalEntry.id
-            ).filter(
-                AccountingJournalEntryLine.tenant_id == self.tenant_id,
-                AccountingJournalEntryLine.account_number == account.account_number,
-                AccountingJournalEntry.status.in_([EntryStatus.POSTED, EntryStatus.VALIDATED])
-            )
-
-            if fiscal_year_id:
-                movements_query = movements_query.filter(AccountingJournalEntry.fiscal_year_id == fiscal_year_id)
-
-            if period:
-                movements_query = movements_query.filter(AccountingJournalEntry.period == period)
-
-            result = movements_query.first()
-            period_debit = result.period_debit or Decimal("0.00")
-            period_credit = result.period_credit or Decimal("0.00")
-
-            # Solde de clôture
-            closing_debit = opening_debit + period_debit
-            closing_credit = opening_credit + period_credit
+            period_debit = row.period_debit or Decimal("0.00")
+            period_credit = row.period_credit or Decimal("0.00")
 
             balance_entries.append(BalanceEntry(
-                account_number=account.account_number,
-                account_label=account.account_label,
+                account_number=row.account_number,
+                account_label=row.account_label,
                 opening_debit=opening_debit,
                 opening_credit=opening_credit,
                 period_debit=period_debit,
                 period_credit=period_credit,
-                closing_debit=closing_debit,
-                closing_credit=closing_credit
+                # Solde de clôture
+                closing_debit=opening_debit + period_debit,
+                closing_credit=opening_credit + period_credit
             ))
 
         return balance_entries, total
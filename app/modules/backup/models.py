@@ -112,6 +112,13 @@ class Backup(Base):
     records_count = Column(Integer, default=0)
     include_attachments = Column(Boolean, default=True)
     is_compressed = Column(Boolean, default=True)
+    deleted_count = Column(Integer, default=0)  # Suppressions (incrémentales)
+
+    # Chaîne incrémentale: sauvegarde complète d'origine et sauvegarde précédente
+    base_backup_id = Column(UniversalUUID(), nullable=True, index=True)
+    parent_backup_id = Column(UniversalUUID(), nullable=True)
+    # Marqueurs de progression par table: {table: {"column": ..., "value": ...}}
+    watermarks = Column(JSON, nullable=True)
 
     # Timestamps
     started_at = Column(DateTime, nullable=True)
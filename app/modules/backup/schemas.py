@@ -7,6 +7,7 @@ from __future__ import annotations
 
 
 from datetime import datetime
+from typing import Any
 
 from uuid import UUID
 from pydantic import BaseModel, Field
@@ -99,6 +100,9 @@ class BackupResponse(BaseModel):
     records_count: int
     include_attachments: bool
     is_compressed: bool
+    deleted_count: int | None = 0
+    base_backup_id: UUID | None = None
+    parent_backup_id: UUID | None = None
     started_at: datetime | None
     completed_at: datetime | None
     duration_seconds: int | None
@@ -118,6 +122,7 @@ class BackupDetail(BackupResponse):
     file_path: str | None
     encryption_iv: str | None
     tables_included: list[str]
+    watermarks: dict[str, Any] | None = None
 
 
 # ============================================================================
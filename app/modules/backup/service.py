@@ -14,16 +14,17 @@ import json
 import logging
 import os
 import secrets
+from collections.abc import Iterator
 from datetime import datetime, timedelta
 from typing import Any
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from sqlalchemy import text
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 
 from app.core.encryption import decrypt_value, encrypt_value
 
-from .models import Backup, BackupConfig, BackupFrequency, BackupStatus, RestoreLog
+from .models import Backup, BackupConfig, BackupFrequency, BackupStatus, BackupType, RestoreLog
 from .schemas import (
     BackupConfigCreate,
     BackupConfigUpdate,
@@ -34,6 +35,14 @@ from .schemas import (
     RestoreRequest,
     RestoreResponse,
 )
+from .stream import (
+    BackupStreamReader,
+    BackupStreamWriter,
+    RemovedKeys,
+    is_stream_backup,
+    pack_keys,
+    unpack_keys,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -212,49 +221,45 @@ class BackupService:
         return backup
 
     def _execute_backup(self, backup: Backup, config: BackupConfig):
-        """Exécute le backup."""
+        """Exécute le backup (complet, incrémental ou différentiel)."""
         backup.status = BackupStatus.IN_PROGRESS
         backup.started_at = datetime.utcnow()
         self.db.commit()
 
         try:
-            # Collecter les données
-            backup_data = self._collect_tenant_data(backup.include_attachments)
-
-            # Sérialiser en JSON
-            json_data = json.dumps(backup_data, default=str, ensure_ascii=False)
-            data_bytes = json_data.encode('utf-8')
-
-            # Compresser si configuré
-            if config.compress:
-                data_bytes = gzip.compress(data_bytes)
-
-            # Calculer checksum avant chiffrement
-            original_checksum = hashlib.sha256(data_bytes).hexdigest()
-
-            # Chiffrer
-            ciphertext, nonce = self._encrypt_data(data_bytes)
+            parent = self._resolve_parent(backup)
 
             # Générer nom de fichier
             timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-            file_name = f"{self.tenant_id}_{timestamp}.azals.bak"
+            # L'identifiant distingue les sauvegardes d'une même seconde (incrémentales)
+            file_name = f"{self.tenant_id}_{timestamp}_{str(backup.id)[:8]}.azals.bak"
             file_path = os.path.join(config.storage_path, file_name)
-
-            # Écrire le fichier
             os.makedirs(config.storage_path, exist_ok=True)
-            with open(file_path, 'wb') as f:
-                # Header: nonce (12 bytes) + ciphertext
-                f.write(nonce)
-                f.write(ciphertext)
+
+            # Écriture en flux: chaque bloc de lignes est compressé, chiffré
+            # et ajouté au checksum dès sa lecture, sans charger le tenant en mémoire
+            key = self._get_encryption_key()
+            watermarks: dict[str, dict[str, Any]] = {}
+            deleted = 0
+            with BackupStreamWriter(file_path, key, compress=config.compress) as writer, \
+                    self._open_backup(parent, key) as parent_reader:
+                for table, columns in self._iter_backup_tables():
+                    watermarks[table], table_deleted = self._write_table(
+                        writer, table, columns, parent, parent_reader
+                    )
+                    deleted += table_deleted
 
             # Mettre à jour le backup
             backup.file_path = file_path
             backup.file_name = file_name
-            backup.file_size = os.path.getsize(file_path)
-            backup.file_checksum = original_checksum
-            backup.encryption_iv = base64.b64encode(nonce).decode()
-            backup.tables_included = list(backup_data.keys())
-            backup.records_count = sum(len(v) if isinstance(v, list) else 1 for v in backup_data.values())
+            backup.file_size = writer.size
+            backup.file_checksum = writer.checksum
+            # Chaque bloc a son propre nonce: on conserve l'identifiant du flux
+            backup.encryption_iv = base64.b64encode(writer.file_id).decode()
+            backup.tables_included = list(watermarks)
+            backup.records_count = sum(writer.tables[table].rows for table in watermarks)
+            backup.deleted_count = deleted
+            backup.watermarks = watermarks
             backup.status = BackupStatus.COMPLETED
             backup.completed_at = datetime.utcnow()
             backup.duration_seconds = int((backup.completed_at - backup.started_at).total_seconds())
@@ -295,11 +300,64 @@ class BackupService:
         "audit_logs"
     ])
 
-    def _collect_tenant_data(self, include_attachments: bool) -> dict[str, Any]:
-        """Collecte toutes les données du tenant."""
-        data = {}
+    # Nombre de lignes par bloc de sauvegarde (et par lot du curseur serveur)
+    BACKUP_CHUNK_ROWS = 5000
+
+    # Colonne de suivi des modifications
+    CHANGE_TRACKING_COLUMN = "updated_at"
+
+    # Tables en insertion seule, suivies par created_at; les autres tables
+    # sans updated_at sont recopiées en entier à chaque sauvegarde
+    APPEND_ONLY_TABLES = frozenset(["audit_logs"])
+
+    # Recouvrement sous le marqueur: une transaction ouverte avant la
+    # sauvegarde précédente et commitée après peut avoir écrit des valeurs
+    # antérieures au marqueur. Les lignes relues en double sont remplacées
+    # par clé à la restauration.
+    WATERMARK_OVERLAP = timedelta(minutes=15)
+
+    # Blocs annexes d'une table dans le fichier: clés présentes, clés supprimées
+    KEYS_SUFFIX = "/keys"
+    DELETED_SUFFIX = "/deleted"
+
+    def _resolve_parent(self, backup: Backup) -> Backup | None:
+        """
+        Sauvegarde de référence d'une incrémentale (la dernière terminée) ou
+        d'une différentielle (la dernière complète). Sans référence
+        exploitable, la sauvegarde devient complète.
+        """
+        if backup.backup_type == BackupType.FULL:
+            return None
+
+        query = self.db.query(Backup).filter(
+            Backup.tenant_id == self.tenant_id,
+            Backup.status == BackupStatus.COMPLETED,
+            Backup.id != backup.id
+        )
+        if backup.backup_type == BackupType.DIFFERENTIAL:
+            query = query.filter(Backup.backup_type == BackupType.FULL)
+        parent = query.order_by(Backup.created_at.desc()).first()
+
+        # Les sauvegardes au format historique n'ont pas de marqueurs
+        if not parent or not parent.watermarks or not parent.file_path or not os.path.exists(parent.file_path):
+            logger.info("Aucune sauvegarde de référence pour %s: sauvegarde complète", backup.reference)
+            backup.backup_type = BackupType.FULL
+            return None
+
+        backup.parent_backup_id = parent.id
+        backup.base_backup_id = parent.base_backup_id or parent.id
+        return parent
 
-        for table in self.ALLOWED_BACKUP_TABLES:
+    def _open_backup(self, backup: Backup | None, key: bytes):
+        """Lecteur d'une sauvegarde au format découpé (contexte vide si None)."""
+        if backup is None:
+            return contextlib.nullcontext()
+        return BackupStreamReader(backup.file_path, key)
+
+    def _iter_backup_tables(self) -> Iterator[tuple[str, list[str]]]:
+        """Tables sauvegardables présentes en base, avec leurs colonnes."""
+        inspector = inspect(self.db.connection())
+        for table in sorted(self.ALLOWED_BACKUP_TABLES):
             # SÉCURITÉ: Validation défensive - table doit être dans la whitelist
             # et ne contenir que des caractères alphanumériques/underscore
             if table not in self.ALLOWED_BACKUP_TABLES:
@@ -310,51 +368,157 @@ class BackupService:
                 continue
 
             try:
-                # SÉCURITÉ: Table vient de whitelist hardcodée, pas d'injection possible
-                result = self.db.execute(text(f"""
-                    SELECT * FROM {table}
-                    WHERE tenant_id = :tenant_id
-                """), {"tenant_id": self.tenant_id})  # nosec B608 - table from hardcoded whitelist
-                columns = result.keys()
-                rows = [dict(zip(columns, row, strict=False)) for row in result.fetchall()]
-                data[table] = rows
+                columns = [column["name"] for column in inspector.get_columns(table)]
             except Exception as e:
                 logger.warning("Table %s non trouvée ou erreur: %s", table, e)
+                continue
+            if "tenant_id" not in columns:
+                logger.warning("Table %s sans colonne tenant_id ignorée", table)
+                continue
+            yield table, columns
+
+    def _write_table(
+        self,
+        writer: BackupStreamWriter,
+        table: str,
+        columns: list[str],
+        parent: Backup | None,
+        parent_reader: BackupStreamReader | None,
+    ) -> tuple[dict[str, Any], int]:
+        """
+        Écrit une table et retourne (marqueur, nombre de suppressions).
+
+        En mode delta (référence avec marqueur sur la même colonne, clé "id"),
+        seules les lignes modifiées depuis le marqueur sont écrites, suivies
+        des clés supprimées depuis la référence. Sinon la table est écrite en
+        entier (snapshot) et remplace la table à la restauration.
+        """
+        column = self._change_tracking_column(table, columns)
+        previous = (parent.watermarks or {}).get(table) if parent else None
+        delta = (
+            previous is not None and column is not None
+            and previous.get("column") == column and "id" in columns
+        )
+        since = previous.get("value") if delta else None
+
+        # SÉCURITÉ: table et colonne viennent de listes hardcodées
+        condition = f" AND {column} >= :since" if since is not None else ""
+        params = {"since": self._watermark_since(since)} if since is not None else {}
+        mark_index = columns.index(column) if column else None
+        mark = since
+        empty = True
+        for rows in self._iter_rows(table, "*", condition, params):
+            empty = False
+            if mark_index is not None:
+                values = [row[mark_index] for row in rows if row[mark_index] is not None]
+                if values:
+                    mark = max(filter(None, (mark, self._watermark_value(max(values)))))
+            writer.write_chunk(table, columns, rows)
+        if empty:
+            writer.write_chunk(table, columns, [])
+
+        deleted = 0
+        if "id" in columns:
+            keys_table = f"{table}{self.KEYS_SUFFIX}"
+            previous_keys = (
+                unpack_keys(row for _, rows in parent_reader.iter_table(keys_table) for row in rows)
+                if delta and keys_table in parent_reader.index else iter(())
+            )
+            removed = RemovedKeys(previous_keys)
+            for rows in self._iter_rows(table, "id", " ORDER BY id", {}):
+                keys = [self._backup_key(row[0]) for row in rows]
+                for key in keys:
+                    removed.seen(key)
+                writer.write_chunk(keys_table, ["id"], pack_keys(keys))
+            removed_keys = removed.finish()
+            for start in range(0, len(removed_keys), self.BACKUP_CHUNK_ROWS):
+                chunk = removed_keys[start:start + self.BACKUP_CHUNK_ROWS]
+                writer.write_chunk(f"{table}{self.DELETED_SUFFIX}", ["id"], pack_keys(chunk))
+            deleted = len(removed_keys)
+
+        return {"column": column, "value": mark, "snapshot": not delta}, deleted
+
+    def _iter_rows(self, table: str, select: str, condition: str, params: dict[str, Any]) -> Iterator[list[tuple]]:
+        """
+        Lignes du tenant par lots, via un curseur serveur (yield_per): au plus
+        BACKUP_CHUNK_ROWS lignes sont en mémoire à la fois.
+        """
+        # SÉCURITÉ: Table vient de whitelist hardcodée, pas d'injection possible
+        result = self.db.execute(
+            text(f"""
+            SELECT {select} FROM {table}
+            WHERE tenant_id = :tenant_id{condition}
+        """),  # nosec B608 - table from hardcoded whitelist
+            {"tenant_id": self.tenant_id, **params},
+            execution_options={"yield_per": self.BACKUP_CHUNK_ROWS},
+        )
+        yield from result.partitions(self.BACKUP_CHUNK_ROWS)
+
+    @staticmethod
+    def _watermark_value(value: Any) -> str:
+        """Valeur de marqueur sérialisable (ISO 8601 pour les dates)."""
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else str(value)
+
+    def _change_tracking_column(self, table: str, columns: list[str]) -> str | None:
+        """Colonne de suivi d'une table (None: snapshot à chaque sauvegarde)."""
+        if self.CHANGE_TRACKING_COLUMN in columns:
+            return self.CHANGE_TRACKING_COLUMN
+        if table in self.APPEND_ONLY_TABLES and "created_at" in columns:
+            return "created_at"
+        return None
+
+    def _watermark_since(self, value: str) -> Any:
+        """Borne basse d'une incrémentale: marqueur moins WATERMARK_OVERLAP pour une date."""
+        since = self._watermark_param(value)
+        return since - self.WATERMARK_OVERLAP if isinstance(since, datetime) else since
+
+    @staticmethod
+    def _watermark_param(value: str) -> Any:
+        """Paramètre SQL d'un marqueur: date si la valeur en est une."""
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
 
-        return data
+    @staticmethod
+    def _backup_key(value: Any) -> Any:
+        """Clé primaire telle que relue depuis le JSON de la sauvegarde."""
+        return value if isinstance(value, (int, str)) else str(value)
 
     def _cleanup_old_backups(self, config: BackupConfig):
-        """Nettoie les anciens backups selon la politique de rétention."""
+        """
+        Nettoie les anciens backups selon la politique de rétention.
+
+        Les sauvegardes dont dépend une incrémentale conservée ne sont pas
+        supprimées.
+        """
         cutoff_date = datetime.utcnow() - timedelta(days=config.retention_days)
 
-        # Supprimer les backups expirés
-        old_backups = self.db.query(Backup).filter(
+        all_backups = self.db.query(Backup).filter(
             Backup.tenant_id == self.tenant_id,
-            Backup.status == BackupStatus.COMPLETED,
-            Backup.created_at < cutoff_date
-        ).all()
+            Backup.status == BackupStatus.COMPLETED
+        ).order_by(Backup.created_at.desc()).all()
 
-        for backup in old_backups:
+        kept = [
+            backup for position, backup in enumerate(all_backups)
+            if position < config.max_backups and backup.created_at >= cutoff_date
+        ]
+        by_id = {backup.id: backup for backup in all_backups}
+        required = set()
+        for backup in kept:
+            while backup is not None and backup.id not in required:
+                required.add(backup.id)
+                backup = by_id.get(backup.parent_backup_id)
+
+        expired = [backup for backup in all_backups if backup.id not in required]
+        for backup in expired:
             if backup.file_path and os.path.exists(backup.file_path):
                 try:
                     os.remove(backup.file_path)
                 except Exception as e:
                     logger.warning("Impossible de supprimer %s: %s", backup.file_path, e)
             backup.status = BackupStatus.DELETED
-            self.db.commit()
-
-        # Garder seulement max_backups
-        all_backups = self.db.query(Backup).filter(
-            Backup.tenant_id == self.tenant_id,
-            Backup.status == BackupStatus.COMPLETED
-        ).order_by(Backup.created_at.desc()).all()
-
-        if len(all_backups) > config.max_backups:
-            for backup in all_backups[config.max_backups:]:
-                if backup.file_path and os.path.exists(backup.file_path):
-                    with contextlib.suppress(Exception):
-                        os.remove(backup.file_path)
-                backup.status = BackupStatus.DELETED
+        if expired:
             self.db.commit()
 
     # =========================================================================
@@ -399,31 +563,15 @@ class BackupService:
         self.db.commit()
 
         try:
-            # Lire et déchiffrer le fichier
-            with open(backup.file_path, 'rb') as f:
-                nonce = f.read(12)
-                ciphertext = f.read()
-
-            data_bytes = self._decrypt_data(ciphertext, nonce)
-
-            # Décompresser si nécessaire
-            if backup.is_compressed:
-                data_bytes = gzip.decompress(data_bytes)
-
-            # Vérifier le checksum
-            checksum = hashlib.sha256(data_bytes).hexdigest()
-            if checksum != backup.file_checksum:
-                raise ValueError("Checksum invalide - fichier corrompu")
-
-            # Parser JSON
-            backup_data = json.loads(data_bytes.decode('utf-8'))
-
-            # Restaurer les tables
+            if is_stream_backup(backup.file_path):
+                tables, records = self._restore_stream(backup, tables_to_restore)
+            else:
+                tables, records = self._restore_legacy(backup, tables_to_restore)
 
             # Note: la restauration complète nécessiterait plus de logique
             # pour gérer les contraintes FK, etc.
-            restore_log.tables_restored = list(backup_data.keys())
-            restore_log.records_restored = sum(len(v) if isinstance(v, list) else 1 for v in backup_data.values())
+            restore_log.tables_restored = tables
+            restore_log.records_restored = records
 
             restore_log.status = BackupStatus.COMPLETED
             restore_log.completed_at = datetime.utcnow()
@@ -443,6 +591,114 @@ class BackupService:
             self.db.commit()
             raise
 
+    def _restore_stream(self, backup: Backup, tables_to_restore: list[str] | None) -> tuple[list[str], int]:
+        """
+        Restauration en flux, bloc par bloc, en rejouant la chaîne de la
+        sauvegarde complète jusqu'à la sauvegarde demandée.
+
+        Pour chaque table, la relecture part de la dernière sauvegarde de la
+        chaîne qui la contient en entier (snapshot), puis applique les lignes
+        modifiées et les suppressions des sauvegardes suivantes.
+
+        Sans sélection, chaque fichier est lu dans l'ordre et son checksum
+        vérifié; avec une sélection, seuls les blocs des tables demandées
+        sont lus et déchiffrés (chacun authentifié par son tag GCM).
+        """
+        chain = self._backup_chain(backup)
+        key = self._get_encryption_key()
+        tables: list[str] = []
+        records = 0
+
+        with contextlib.ExitStack() as stack:
+            readers = [stack.enter_context(BackupStreamReader(item.file_path, key)) for item in chain]
+            marks = [self._backup_watermarks(item, reader) for item, reader in zip(chain, readers, strict=True)]
+            requested = list(marks[-1]) if tables_to_restore is None else tables_to_restore
+            missing = [table for table in requested if table not in marks[-1]]
+            if missing:
+                raise ValueError(f"Table absente de la sauvegarde: {', '.join(missing)}")
+            # Position du dernier snapshot de chaque table dans la chaîne
+            start = {
+                table: max(
+                    (i for i, item_marks in enumerate(marks)
+                     if item_marks.get(table, {}).get("snapshot", True)),
+                    default=0,
+                )
+                for table in requested
+            }
+
+            for position, (item, reader) in enumerate(zip(chain, readers, strict=True)):
+                if tables_to_restore is None:
+                    chunks = (
+                        (table, rows)
+                        for table, _columns, rows in reader.iter_all(expected_checksum=item.file_checksum)
+                    )
+                else:
+                    chunks = (
+                        (name, rows)
+                        for table in requested if position >= start[table]
+                        for name in (table, f"{table}{self.DELETED_SUFFIX}") if name in reader.index
+                        for _columns, rows in reader.iter_table(name)
+                    )
+
+                for name, rows in chunks:
+                    table, _, kind = name.partition("/")
+                    if kind == "keys" or table not in start or position < start[table]:
+                        continue
+                    # Note: l'application en base (remplacement du snapshot,
+                    # upsert des lignes, suppression des clés) nécessiterait
+                    # plus de logique pour gérer les contraintes FK, etc.
+                    if not kind:
+                        records += len(rows)
+                    if table not in tables:
+                        tables.append(table)
+
+        return tables, records
+
+    def _backup_chain(self, backup: Backup) -> list[Backup]:
+        """Chaîne de sauvegardes, de la complète d'origine à backup."""
+        chain = [backup]
+        while chain[0].parent_backup_id:
+            parent = self.get_backup(str(chain[0].parent_backup_id))
+            if (
+                not parent or parent.status != BackupStatus.COMPLETED
+                or not parent.file_path or not os.path.exists(parent.file_path)
+            ):
+                raise ValueError(f"Chaîne de sauvegarde incomplète: {chain[0].reference} sans sauvegarde parente")
+            chain.insert(0, parent)
+        return chain
+
+    def _backup_watermarks(self, backup: Backup, reader: BackupStreamReader) -> dict[str, dict[str, Any]]:
+        """Marqueurs d'une sauvegarde (tables complètes si elle n'en a pas)."""
+        if backup.watermarks:
+            return backup.watermarks
+        return {table: {"snapshot": True} for table in reader.index if "/" not in table}
+
+    def _restore_legacy(self, backup: Backup, tables_to_restore: list[str] | None) -> tuple[list[str], int]:
+        """Restauration des sauvegardes historiques (un seul bloc nonce + ciphertext)."""
+        with open(backup.file_path, 'rb') as f:
+            nonce = f.read(12)
+            ciphertext = f.read()
+
+        data_bytes = self._decrypt_data(ciphertext, nonce)
+
+        # Vérifier le checksum (calculé après compression à l'écriture)
+        checksum = hashlib.sha256(data_bytes).hexdigest()
+        if checksum != backup.file_checksum:
+            raise ValueError("Checksum invalide - fichier corrompu")
+
+        # Décompresser si nécessaire
+        if backup.is_compressed:
+            data_bytes = gzip.decompress(data_bytes)
+
+        backup_data = json.loads(data_bytes.decode('utf-8'))
+        if tables_to_restore is not None:
+            missing = set(tables_to_restore) - backup_data.keys()
+            if missing:
+                raise ValueError(f"Table absente de la sauvegarde: {', '.join(sorted(missing))}")
+            backup_data = {table: backup_data[table] for table in tables_to_restore}
+
+        return list(backup_data.keys()), sum(len(v) if isinstance(v, list) else 1 for v in backup_data.values())
+
     # =========================================================================
     # QUERIES
     # =========================================================================
@@ -0,0 +1,392 @@
+"""
+AZALS - Module Backup - Format de flux
+======================================
+Format de sauvegarde découpé en blocs chiffrés indépendamment.
+
+Structure du fichier (entiers big-endian):
+
+    en-tête   : MAGIC (4) | version (1) | flags (1) | file_id (16)
+    bloc      : kind (1) | seq (4) | len(table) (2) | len(ciphertext) (4)
+                | nonce (12) | table (utf-8) | ciphertext
+    ...
+    index     : bloc kind=INDEX (table vide) contenant la position,
+                le nombre de blocs et de lignes de chaque table
+    trailer   : position de l'index (8) | MAGIC (4)
+
+Chaque bloc est chiffré en AES-256-GCM avec un nonce aléatoire; l'en-tête
+du fichier et l'en-tête du bloc (type, numéro, table, taille, nonce) sont
+authentifiés comme données associées: un bloc ne peut être ni déplacé,
+ni rattaché à une autre table, ni recopié depuis une autre sauvegarde.
+L'index donne le nombre de blocs attendus par table, ce qui détecte les
+blocs supprimés. Le checksum SHA-256 porte sur les octets du fichier et
+est calculé pendant l'écriture.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import secrets
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b"AZBK"
+FORMAT_VERSION = 2
+
+FLAG_COMPRESSED = 0x01
+
+KIND_CHUNK = 1
+KIND_INDEX = 2
+
+_HEADER = struct.Struct(">4sBB16s")
+_FRAME = struct.Struct(">BIHI12s")
+_TRAILER = struct.Struct(">Q4s")
+
+# Borne de sécurité à la lecture: un bloc corrompu ne doit pas provoquer
+# d'allocation démesurée
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+
+class BackupFormatError(ValueError):
+    """Fichier de sauvegarde illisible, tronqué ou altéré."""
+
+
+@dataclass
+class TableEntry:
+    """Entrée de l'index: position du premier bloc et volumes d'une table."""
+
+    offset: int
+    chunks: int = 0
+    rows: int = 0
+
+
+@dataclass
+class _Header:
+    file_id: bytes
+    flags: int
+    raw: bytes = field(repr=False)
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self.flags & FLAG_COMPRESSED)
+
+
+def is_stream_backup(path: str) -> bool:
+    """Indique si le fichier est au format découpé (sinon format historique)."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class _ChecksumFile:
+    """Enveloppe d'un fichier binaire: SHA-256 et position des octets lus/écrits."""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.position = 0
+
+    def write(self, data: bytes) -> None:
+        self.raw.write(data)
+        self.sha256.update(data)
+        self.position += len(data)
+
+    def read(self, size: int) -> bytes:
+        data = self.raw.read(size)
+        if len(data) != size:
+            raise BackupFormatError("Fichier de sauvegarde tronqué")
+        self.sha256.update(data)
+        self.position += size
+        return data
+
+
+class BackupStreamWriter:
+    """
+    Écrit une sauvegarde bloc par bloc.
+
+    Usage:
+        with BackupStreamWriter(path, key) as writer:
+            for table, columns, rows in ...:
+                writer.write_chunk(table, columns, rows)
+        writer.checksum, writer.size, writer.tables
+    """
+
+    def __init__(self, path: str, key: bytes, compress: bool = True, compress_level: int = 6):
+        self.path = path
+        self.compress = compress
+        self.compress_level = compress_level
+        self.file_id = secrets.token_bytes(16)
+        self.tables: dict[str, TableEntry] = {}
+        self.checksum: str | None = None
+        self.size = 0
+        self._aesgcm = AESGCM(key)
+        self._tmp_path = f"{path}.part"
+        self._file: _ChecksumFile | None = None
+        self._header = _HEADER.pack(MAGIC, FORMAT_VERSION, FLAG_COMPRESSED if compress else 0, self.file_id)
+        self._current: str | None = None
+
+    def __enter__(self) -> BackupStreamWriter:
+        self._file = _ChecksumFile(open(self._tmp_path, "wb"))  # noqa: SIM115 - fermé dans close()/abort()
+        self._file.write(self._header)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def records_count(self) -> int:
+        return sum(entry.rows for entry in self.tables.values())
+
+    def write_chunk(self, table: str, columns: list[str], rows: list[Iterable[Any]]) -> None:
+        """Ajoute un bloc de lignes. Les blocs d'une table doivent être consécutifs."""
+        entry = self.tables.get(table)
+        if entry is None:
+            entry = self.tables[table] = TableEntry(offset=self._file.position)
+            self._current = table
+        elif self._current != table:
+            raise ValueError(f"Blocs de la table {table} non consécutifs")
+
+        payload = json.dumps(
+            {"columns": list(columns), "rows": [list(row) for row in rows]},
+            default=str, ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        if self.compress:
+            payload = zlib.compress(payload, self.compress_level)
+
+        self._write_frame(KIND_CHUNK, entry.chunks, table, payload)
+        entry.chunks += 1
+        entry.rows += len(rows)
+
+    def close(self) -> None:
+        """Écrit l'index et le trailer puis publie le fichier."""
+        index_offset = self._file.position
+        index = {
+            table: {"offset": e.offset, "chunks": e.chunks, "rows": e.rows}
+            for table, e in self.tables.items()
+        }
+        self._write_frame(KIND_INDEX, 0, "", json.dumps(index).encode("utf-8"))
+        self._file.write(_TRAILER.pack(index_offset, MAGIC))
+        self._file.raw.close()
+        os.replace(self._tmp_path, self.path)
+        self.checksum = self._file.sha256.hexdigest()
+        self.size = self._file.position
+
+    def abort(self) -> None:
+        """Abandonne l'écriture et supprime le fichier partiel."""
+        if self._file is not None:
+            self._file.raw.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _write_frame(self, kind: int, seq: int, table: str, payload: bytes) -> None:
+        name = table.encode("utf-8")
+        nonce = secrets.token_bytes(12)
+        # GCM ajoute un tag de 16 octets: la taille est connue avant chiffrement
+        frame = _FRAME.pack(kind, seq, len(name), len(payload) + 16, nonce) + name
+        ciphertext = self._aesgcm.encrypt(nonce, payload, self._header + frame)
+        self._file.write(frame)
+        self._file.write(ciphertext)
+
+
+class BackupStreamReader:
+    """
+    Lit une sauvegarde au format découpé.
+
+    - iter_all(): parcourt le fichier dans l'ordre et vérifie le checksum
+      global à la fin
+    - iter_table(table): se positionne via l'index et ne déchiffre que les
+      blocs de cette table
+    """
+
+    def __init__(self, path: str, key: bytes):
+        self.path = path
+        self._aesgcm = AESGCM(key)
+        self._raw: BinaryIO = open(path, "rb")  # noqa: SIM115 - fermé dans close()
+        self._file = _ChecksumFile(self._raw)
+        self._header = self._read_header()
+        self._index: dict[str, TableEntry] | None = None
+
+    def __enter__(self) -> BackupStreamReader:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._raw.close()
+
+    @property
+    def index(self) -> dict[str, TableEntry]:
+        """Index des tables (lu depuis la fin du fichier)."""
+        if self._index is None:
+            self._raw.seek(-_TRAILER.size, os.SEEK_END)
+            index_offset, magic = _TRAILER.unpack(self._raw.read(_TRAILER.size))
+            if magic != MAGIC:
+                raise BackupFormatError("Trailer de sauvegarde invalide")
+            self._seek(index_offset)
+            kind, _, table, payload = self._read_frame()
+            if kind != KIND_INDEX:
+                raise BackupFormatError("Index de sauvegarde introuvable")
+            self._index = self._parse_index(payload)
+        return self._index
+
+    def iter_table(self, table: str) -> Iterator[tuple[list[str], list[list[Any]]]]:
+        """Blocs (colonnes, lignes) d'une table, sans lire les autres tables."""
+        entry = self.index.get(table)
+        if entry is None:
+            raise BackupFormatError(f"Table absente de la sauvegarde: {table}")
+
+        self._seek(entry.offset)
+        for expected_seq in range(entry.chunks):
+            kind, seq, frame_table, payload = self._read_frame()
+            if kind != KIND_CHUNK or frame_table != table or seq != expected_seq:
+                raise BackupFormatError(f"Bloc inattendu dans la table {table}")
+            yield self._decode_chunk(payload)
+
+    def iter_all(self, expected_checksum: str | None = None) -> Iterator[tuple[str, list[str], list[list[Any]]]]:
+        """Tous les blocs dans l'ordre du fichier: (table, colonnes, lignes)."""
+        self._raw.seek(0)
+        self._file = _ChecksumFile(self._raw)
+        self._file.read(_HEADER.size)
+
+        seen: dict[str, TableEntry] = {}
+        while True:
+            kind, seq, table, payload = self._read_frame()
+            if kind == KIND_INDEX:
+                break
+            entry = seen.setdefault(table, TableEntry(offset=0))
+            if kind != KIND_CHUNK or seq != entry.chunks:
+                raise BackupFormatError(f"Bloc inattendu dans la table {table}")
+            columns, rows = self._decode_chunk(payload)
+            entry.chunks += 1
+            entry.rows += len(rows)
+            yield table, columns, rows
+
+        index = self._parse_index(payload)
+        self._file.read(_TRAILER.size)
+        if self._raw.read(1):
+            raise BackupFormatError("Données après la fin de la sauvegarde")
+        if {t: (e.chunks, e.rows) for t, e in seen.items()} != {t: (e.chunks, e.rows) for t, e in index.items()}:
+            raise BackupFormatError("Index incohérent avec les blocs de la sauvegarde")
+        if expected_checksum is not None and self._file.sha256.hexdigest() != expected_checksum:
+            raise BackupFormatError("Checksum invalide - fichier corrompu")
+        self._index = index
+
+    def _seek(self, offset: int) -> None:
+        self._raw.seek(offset)
+        self._file.position = offset
+
+    def _read_header(self) -> _Header:
+        raw = self._file.read(_HEADER.size)
+        magic, version, flags, file_id = _HEADER.unpack(raw)
+        if magic != MAGIC:
+            raise BackupFormatError("Format de sauvegarde non reconnu")
+        if version != FORMAT_VERSION:
+            raise BackupFormatError(f"Version de format non supportée: {version}")
+        return _Header(file_id=file_id, flags=flags, raw=raw)
+
+    def _read_frame(self) -> tuple[int, int, str, bytes]:
+        head = self._file.read(_FRAME.size)
+        kind, seq, name_len, size, nonce = _FRAME.unpack(head)
+        if size > MAX_FRAME_SIZE:
+            raise BackupFormatError("Bloc de sauvegarde trop volumineux")
+        name = self._file.read(name_len)
+        ciphertext = self._file.read(size)
+        try:
+            payload = self._aesgcm.decrypt(nonce, ciphertext, self._header.raw + head + name)
+        except Exception as e:
+            raise BackupFormatError("Bloc de sauvegarde altéré ou clé invalide") from e
+        return kind, seq, name.decode("utf-8"), payload
+
+    def _decode_chunk(self, payload: bytes) -> tuple[list[str], list[list[Any]]]:
+        if self._header.compressed:
+            payload = zlib.decompress(payload)
+        chunk = json.loads(payload)
+        return chunk["columns"], chunk["rows"]
+
+    @staticmethod
+    def _parse_index(payload: bytes) -> dict[str, TableEntry]:
+        return {table: TableEntry(**entry) for table, entry in json.loads(payload).items()}
+
+
+# =============================================================================
+# CLÉS PRIMAIRES
+# =============================================================================
+# Les clés d'une table sont écrites triées; les entiers consécutifs sont
+# regroupés en plages [premier, dernier], les autres clés en [clé].
+
+def pack_keys(keys: Iterable[Any]) -> list[list[Any]]:
+    """Regroupe des clés triées en plages d'entiers consécutifs."""
+    packed: list[list[Any]] = []
+    for key in keys:
+        last = packed[-1] if packed else None
+        if (
+            isinstance(key, int) and last is not None and len(last) == 2
+            and key == last[1] + 1
+        ):
+            last[1] = key
+        elif isinstance(key, int):
+            packed.append([key, key])
+        else:
+            packed.append([key])
+    return packed
+
+
+def unpack_keys(rows: Iterable[list[Any]]) -> Iterator[Any]:
+    """Clés individuelles à partir des plages de pack_keys."""
+    for row in rows:
+        if len(row) == 2:
+            yield from range(row[0], row[1] + 1)
+        else:
+            yield row[0]
+
+
+_END = object()
+
+
+class RemovedKeys:
+    """
+    Clés de la sauvegarde de référence absentes de la table.
+
+    Les deux flux sont triés par la base: pour des clés entières, une fusion
+    suffit (mémoire constante). Pour les autres (ordre de collation de la
+    base), les clés de référence restantes sont chargées dans un ensemble.
+    """
+
+    def __init__(self, previous: Iterator[Any]):
+        self._previous = previous
+        self._next = next(previous, _END)
+        self._remaining: set | None = None
+        self.removed: list[Any] = []
+
+    def seen(self, key: Any) -> None:
+        if self._remaining is None and not (isinstance(key, int) and isinstance(self._next, int)):
+            if self._next is _END:
+                return
+            self._remaining = {self._next, *self._previous}
+            self._next = _END
+        if self._remaining is not None:
+            self._remaining.discard(key)
+            return
+        while isinstance(self._next, int) and self._next < key:
+            self.removed.append(self._next)
+            self._next = next(self._previous, _END)
+        if self._next == key:
+            self._next = next(self._previous, _END)
+
+    def finish(self) -> list[Any]:
+        if self._remaining is not None:
+            self.removed.extend(self._remaining)
+            self._remaining = set()
+        while self._next is not _END:
+            self.removed.append(self._next)
+            self._next = next(self._previous, _END)
+        return self.removed
@@ -5,6 +5,10 @@ AZALS MODULE - FEC: Service Synchrone
 Service de génération et validation du FEC conforme à l'Article A.47 A-1 du LPF.
 Version synchrone compatible avec SQLAlchemy Session.
 
+Génération en flux (voir streaming.py): lecture par curseur serveur, écriture
+encodée dans le fichier d'export, hash, statistiques et validation calculés
+dans la même passe.
+
 Conformité DGFiP:
 - 18 colonnes obligatoires
 - Format YYYYMMDD pour les dates
@@ -16,25 +20,17 @@ Conformité DGFiP:
 from __future__ import annotations
 
 
-import hashlib
 import logging
+import os
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from io import StringIO
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select, func, and_
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, and_
+from sqlalchemy.orm import Session
 
-from app.modules.finance.models import (
-    JournalEntry,
-    JournalEntryLine,
-    Journal,
-    Account,
-    FiscalYear,
-    EntryStatus,
-)
+from app.modules.finance.models import FiscalYear
 from .models import (
     FECExport,
     FECValidationResult,
@@ -57,6 +53,13 @@ from .schemas import (
     FECValidationLevelEnum,
     FECExportStatusEnum,
 )
+from .streaming import (
+    FECStreamBuilder,
+    FECStreamValidator,
+    FECStreamWriter,
+    fec_export_path,
+    fec_rows_query,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -123,45 +126,47 @@ class FECServiceSync:
         self.db.add(export)
         self.db.flush()
 
+        builder = None
         try:
-            # 3. Récupérer les écritures comptables
-            entries = self._get_journal_entries(
+            # 3. Fichier de sortie (nom DGFiP)
+            filename = self._generate_filename(request.siren, export.end_date, export.format)
+            file_path = fec_export_path(self.tenant_id, export.id, filename)
+            writer = FECStreamWriter(file_path, self._get_encoding_name(export.encoding))
+
+            # 4. Lire les écritures par curseur serveur et générer le FEC en une passe
+            builder = FECStreamBuilder(
+                writer,
+                separator=self._get_separator_char(export.separator),
+                validate_header=self._validate_header,
+                validate_line=self._validate_line,
+                format_date=self._format_date,
+            )
+            rows = self.db.execute(fec_rows_query(
+                tenant_id=self.tenant_id,
                 fiscal_year_id=fiscal_year.id,
                 start_date=export.start_date,
                 end_date=export.end_date,
                 journal_codes=request.journal_codes,
                 include_draft=request.include_draft,
-            )
-
-            if not entries:
-                raise ValueError("Aucune écriture comptable trouvée pour cette période")
-
-            # 4. Générer le contenu FEC
-            fec_content, statistics = self._generate_fec_content(
-                entries=entries,
-                separator=self._get_separator_char(export.separator),
-            )
+            ))
+            for row in rows:
+                builder.add_row(row)
 
-            # 5. Encoder le fichier
-            encoded_content = self._encode_content(fec_content, export.encoding)
+            statistics, validation_result = builder.finish()
 
-            # 6. Calculer le hash et générer le nom de fichier
-            file_hash = hashlib.sha256(encoded_content).hexdigest()
-            filename = self._generate_filename(request.siren, export.end_date, export.format)
+            if not statistics.total_lines:
+                raise ValueError("Aucune écriture comptable trouvée pour cette période")
 
-            # 7. Mettre à jour l'export
+            # 5. Mettre à jour l'export (hash et taille calculés à l'écriture)
             export.filename = filename
-            export.file_size = len(encoded_content)
-            export.file_hash = file_hash
+            export.file_size = writer.file_size
+            export.file_hash = writer.file_hash
             export.total_entries = statistics.total_entries
             export.total_lines = statistics.total_lines
             export.total_debit = statistics.total_debit
             export.total_credit = statistics.total_credit
-            export.status = FECExportStatus.VALIDATING
-
-            # 8. Valider le FEC généré
-            validation_result = self._validate_fec_content(fec_content, export)
 
+            # 6. Résultat de la validation faite pendant la génération
             export.is_valid = validation_result.is_valid
             export.validation_errors = validation_result.errors_count
             export.validation_warnings = validation_result.warnings_count
@@ -169,9 +174,9 @@ class FECServiceSync:
 
             if validation_result.is_valid:
                 export.status = FECExportStatus.COMPLETED
-                # Stocker le fichier (à implémenter selon le storage backend)
-                export.file_path = f"/fec/{self.tenant_id}/{filename}"
+                export.file_path = file_path
             else:
+                writer.discard()
                 export.status = FECExportStatus.FAILED
                 export.error_message = f"{validation_result.errors_count} erreurs de validation"
 
@@ -183,6 +188,8 @@ class FECServiceSync:
 
         except Exception as e:
             logger.error(f"[FEC] Erreur génération: {e}")
+            if builder is not None:
+                builder.writer.discard()
             export.status = FECExportStatus.FAILED
             export.error_message = str(e)
             export.completed_at = datetime.utcnow()
@@ -198,148 +205,6 @@ class FECServiceSync:
             )
         ).first()
 
-    def _get_journal_entries(
-        self,
-        fiscal_year_id: UUID,
-        start_date: date,
-        end_date: date,
-        journal_codes: Optional[list[str]] = None,
-        include_draft: bool = False,
-    ) -> list[JournalEntry]:
-        """
-        Récupère les écritures comptables pour l'export FEC.
-
-        Tri obligatoire: JournalCode, EcritureDate, EcritureNum
-        """
-        query = self.db.query(JournalEntry).options(
-            joinedload(JournalEntry.lines).joinedload(JournalEntryLine.account),
-            joinedload(JournalEntry.journal),
-        ).filter(
-            and_(
-                JournalEntry.tenant_id == self.tenant_id,
-                JournalEntry.fiscal_year_id == fiscal_year_id,
-                JournalEntry.date >= start_date,
-                JournalEntry.date <= end_date,
-            )
-        )
-
-        # Filtrer les brouillons si non inclus
-        if not include_draft:
-            query = query.filter(
-                JournalEntry.status.in_([
-                    EntryStatus.VALIDATED,
-                    EntryStatus.POSTED,
-                ])
-            )
-
-        # Filtrer par journaux si spécifié
-        if journal_codes:
-            query = query.join(JournalEntry.journal).filter(
-                Journal.code.in_(journal_codes)
-            )
-
-        # Tri obligatoire FEC: Journal, Date, Numéro
-        query = query.join(JournalEntry.journal).order_by(
-            Journal.code,
-            JournalEntry.date,
-            JournalEntry.number,
-        )
-
-        return query.all()
-
-    def _generate_fec_content(
-        self,
-        entries: list[JournalEntry],
-        separator: str,
-    ) -> tuple[str, FECStatistics]:
-        """
-        Génère le contenu du fichier FEC.
-
-        Returns:
-            tuple: (contenu_fec, statistiques)
-        """
-        output = StringIO()
-
-        # En-tête (noms des colonnes)
-        output.write(separator.join(self.FEC_HEADERS) + "\n")
-
-        # Statistiques
-        total_debit = Decimal("0")
-        total_credit = Decimal("0")
-        total_lines = 0
-        journals_used = set()
-        accounts_used = set()
-        first_date = None
-        last_date = None
-
-        # Générer les lignes
-        for entry in entries:
-            journal_code = entry.journal.code if entry.journal else "OD"
-            journal_lib = entry.journal.name if entry.journal else "Opérations Diverses"
-            journals_used.add(journal_code)
-
-            # Dates
-            entry_date = self._format_date(entry.date)
-            piece_date = entry_date  # Même date si pas de pièce séparée
-            valid_date = self._format_date(entry.validated_at or entry.posted_at or entry.date)
-
-            # Suivi dates
-            if first_date is None or entry.date < first_date:
-                first_date = entry.date
-            if last_date is None or entry.date > last_date:
-                last_date = entry.date
-
-            # Générer une ligne par ligne d'écriture
-            for line in entry.lines:
-                account = line.account
-                accounts_used.add(line.account_id)
-
-                # Construire la ligne FEC
-                fec_line = FECLine(
-                    JournalCode=journal_code[:10],
-                    JournalLib=journal_lib[:100],
-                    EcritureNum=entry.number[:50],
-                    EcritureDate=entry_date,
-                    CompteNum=account.code[:20] if account else str(line.account_id)[:20],
-                    CompteLib=account.name[:255] if account else "Compte inconnu",
-                    CompAuxNum=str(line.partner_id)[:50] if line.partner_id else None,
-                    CompAuxLib=line.partner_type[:255] if line.partner_type else None,
-                    PieceRef=entry.reference[:100] if entry.reference else entry.number[:100],
-                    PieceDate=piece_date,
-                    EcritureLib=(line.label or entry.description or "")[:255],
-                    Debit=line.debit or Decimal("0"),
-                    Credit=line.credit or Decimal("0"),
-                    EcritureLet=line.reconcile_ref[:50] if line.reconcile_ref else None,
-                    DateLet=self._format_date(line.reconciled_at) if line.reconciled_at else None,
-                    ValidDate=valid_date,
-                    Montantdevise=None,  # À implémenter si multi-devises
-                    Idevise=None,
-                )
-
-                # Écrire la ligne
-                output.write(fec_line.to_fec_row(separator) + "\n")
-
-                # Statistiques
-                total_debit += fec_line.Debit
-                total_credit += fec_line.Credit
-                total_lines += 1
-
-        # Construire les statistiques
-        statistics = FECStatistics(
-            total_entries=len(entries),
-            total_lines=total_lines,
-            total_debit=total_debit,
-            total_credit=total_credit,
-            balance=total_debit - total_credit,
-            is_balanced=abs(total_debit - total_credit) < Decimal("0.01"),
-            journals_count=len(journals_used),
-            accounts_count=len(accounts_used),
-            first_entry_date=first_date,
-            last_entry_date=last_date,
-        )
-
-        return output.getvalue(), statistics
-
     # ========================================================================
     # VALIDATION FEC
     # ========================================================================
@@ -358,8 +223,9 @@ class FECServiceSync:
         if not export:
             raise ValueError(f"Export FEC non trouvé: {export_id}")
 
-        # NOTE: Phase 2 - Intégration storage_service pour récupération
-        raise NotImplementedError("Validation d'export existant non implémentée")
+        # Relecture du fichier ligne par ligne (mémoire constante)
+        with self._open_export_file(export) as f:
+            return self._validate_fec_lines(line.rstrip("\r\n") for line in f)
 
     def validate_fec_content(self, content: str) -> FECValidationResponse:
         """
@@ -389,113 +255,28 @@ class FECServiceSync:
         - Numérotation continue sans rupture
         - Montants positifs ou nuls
         """
-        issues: list[FECValidationIssue] = []
-        lines = content.strip().split("\n")
+        return self._validate_fec_lines(content.strip("\r\n").split("\n"))
 
-        if len(lines) < 2:
-            issues.append(FECValidationIssue(
-                level=FECValidationLevelEnum.ERROR,
-                code="FEC-001",
-                message="Le fichier FEC doit contenir au moins l'en-tête et une ligne de données",
-            ))
+    def _validate_fec_lines(self, lines) -> FECValidationResponse:
+        """Valide un itérable de lignes FEC (en-tête puis données) en une passe."""
+        iterator = iter(lines)
+        header = next(iterator, None)
+        if header is None:
             return FECValidationResponse(
                 is_valid=False,
                 errors_count=1,
-                issues=issues,
-            )
-
-        # 1. Valider l'en-tête
-        header = lines[0]
-        header_issues = self._validate_header(header)
-        issues.extend(header_issues)
-
-        # Détecter le séparateur
-        separator = "\t" if "\t" in header else "|"
-
-        # 2. Valider les lignes de données
-        total_debit = Decimal("0")
-        total_credit = Decimal("0")
-        entries_balance: dict[str, tuple[Decimal, Decimal]] = {}  # entry_num -> (debit, credit)
-        previous_entry_num = ""
-        seen_entry_nums = set()
-
-        for line_num, line in enumerate(lines[1:], start=2):
-            if not line.strip():
-                continue
-
-            line_issues, debit, credit, entry_num = self._validate_line(
-                line, line_num, separator
-            )
-            issues.extend(line_issues)
-
-            # Statistiques
-            total_debit += debit
-            total_credit += credit
-
-            # Vérifier équilibre par écriture
-            if entry_num:
-                if entry_num not in entries_balance:
-                    entries_balance[entry_num] = (Decimal("0"), Decimal("0"))
-                d, c = entries_balance[entry_num]
-                entries_balance[entry_num] = (d + debit, c + credit)
-
-                # Vérifier numérotation continue
-                if entry_num in seen_entry_nums and entry_num != previous_entry_num:
-                    issues.append(FECValidationIssue(
-                        level=FECValidationLevelEnum.ERROR,
-                        code="FEC-010",
-                        message=f"Rupture de séquence: l'écriture {entry_num} apparaît après d'autres écritures",
-                        line_number=line_num,
-                        entry_number=entry_num,
-                    ))
-                seen_entry_nums.add(entry_num)
-                previous_entry_num = entry_num
-
-        # 3. Vérifier équilibre global
-        if abs(total_debit - total_credit) >= Decimal("0.01"):
-            issues.append(FECValidationIssue(
-                level=FECValidationLevelEnum.ERROR,
-                code="FEC-020",
-                message=f"Déséquilibre global: Débit={total_debit}, Crédit={total_credit}, Différence={total_debit - total_credit}",
-                expected_value="0.00",
-                actual_value=str(total_debit - total_credit),
-            ))
-
-        # 4. Vérifier équilibre par écriture
-        for entry_num, (debit, credit) in entries_balance.items():
-            if abs(debit - credit) >= Decimal("0.01"):
-                issues.append(FECValidationIssue(
+                issues=[FECValidationIssue(
                     level=FECValidationLevelEnum.ERROR,
-                    code="FEC-021",
-                    message=f"Déséquilibre écriture {entry_num}: Débit={debit}, Crédit={credit}",
-                    entry_number=entry_num,
-                    expected_value="0.00",
-                    actual_value=str(debit - credit),
-                ))
-
-        # Compter erreurs et warnings
-        errors_count = sum(1 for i in issues if i.level == FECValidationLevelEnum.ERROR)
-        warnings_count = sum(1 for i in issues if i.level == FECValidationLevelEnum.WARNING)
-
-        # Statistiques
-        statistics = FECStatistics(
-            total_entries=len(entries_balance),
-            total_lines=len(lines) - 1,
-            total_debit=total_debit,
-            total_credit=total_credit,
-            balance=total_debit - total_credit,
-            is_balanced=abs(total_debit - total_credit) < Decimal("0.01"),
-            journals_count=0,  # À calculer si nécessaire
-            accounts_count=0,
-        )
+                    code="FEC-001",
+                    message="Le fichier FEC doit contenir au moins l'en-tête et une ligne de données",
+                )],
+            )
 
-        return FECValidationResponse(
-            is_valid=errors_count == 0,
-            errors_count=errors_count,
-            warnings_count=warnings_count,
-            issues=issues,
-            statistics=statistics,
-        )
+        validator = FECStreamValidator(self._validate_header, self._validate_line)
+        validator.feed_header(header)
+        for line_num, line in enumerate(iterator, start=2):
+            validator.feed_line(line, line_num)
+        return validator.result()
 
     def _validate_header(self, header: str) -> list[FECValidationIssue]:
         """Valide l'en-tête du fichier FEC."""
@@ -723,10 +504,15 @@ class FECServiceSync:
         """Retourne le caractère séparateur."""
         return "\t" if separator == FECSeparator.TAB else "|"
 
-    def _encode_content(self, content: str, encoding: FECEncoding) -> bytes:
-        """Encode le contenu selon l'encodage spécifié."""
-        encoding_name = "utf-8" if encoding == FECEncoding.UTF8 else "iso-8859-15"
-        return content.encode(encoding_name)
+    def _get_encoding_name(self, encoding: FECEncoding) -> str:
+        """Retourne le nom d'encodage Python."""
+        return "utf-8" if encoding == FECEncoding.UTF8 else "iso-8859-15"
+
+    def _open_export_file(self, export: FECExport):
+        """Ouvre le fichier d'un export en lecture texte."""
+        if not export.file_path or not os.path.exists(export.file_path):
+            raise ValueError(f"Fichier FEC introuvable pour l'export {export.id}")
+        return open(export.file_path, encoding=self._get_encoding_name(export.encoding), newline="")
 
     def _generate_filename(
         self,
@@ -799,8 +585,11 @@ class FECServiceSync:
         if export.status != FECExportStatus.COMPLETED:
             raise ValueError(f"Export non terminé: {export.status}")
 
-        # NOTE: Phase 2 - Intégration storage_service
-        raise NotImplementedError("Téléchargement depuis storage non implémenté")
+        if not export.file_path or not os.path.exists(export.file_path):
+            raise ValueError(f"Fichier FEC introuvable pour l'export {export_id}")
+
+        with open(export.file_path, "rb") as f:
+            return export.filename, f.read()
 
     # ========================================================================
     # ARCHIVAGE
@@ -0,0 +1,383 @@
+"""
+AZALS MODULE - FEC: Génération en flux
+======================================
+
+Briques communes à FECService (async) et FECServiceSync pour produire un FEC
+en une seule passe, à mémoire constante quelle que soit la taille de l'exercice:
+
+- fec_rows_query(): une ligne SQL par ligne FEC (écriture + ligne + journal +
+  compte), triée selon l'ordre DGFiP, lue par curseur serveur (yield_per)
+- FECStreamWriter: écrit les lignes encodées dans un fichier et calcule
+  SHA-256 / taille au fil de l'eau
+- FECStreamValidator: validation incrémentale (en-tête, lignes, équilibre)
+- FECStreamBuilder: orchestre les trois pour chaque ligne reçue
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from sqlalchemy import Select, and_, select
+
+from app.modules.finance.models import (
+    Account,
+    EntryStatus,
+    Journal,
+    JournalEntry,
+    JournalEntryLine,
+)
+from .schemas import (
+    FEC_COLUMNS,
+    FECLine,
+    FECStatistics,
+    FECValidationIssue,
+    FECValidationLevelEnum,
+    FECValidationResponse,
+)
+
+# Lignes lues par aller-retour avec le curseur serveur
+FEC_STREAM_BATCH_SIZE = 2000
+
+# SÉCURITÉ: fichiers FEC hors de /tmp (données fiscales)
+FEC_EXPORT_DIR = os.environ.get(
+    "FEC_EXPORT_DIR",
+    os.path.join(os.environ.get("AZALS_DATA_DIR", "/var/lib/azalscore"), "fec_exports"),
+)
+
+FEC_HEADERS = [col.name for col in FEC_COLUMNS]
+
+
+def fec_export_path(tenant_id: str, export_id: UUID, filename: str) -> str:
+    """Chemin du fichier d'un export (un répertoire par export, le nom DGFiP peut se répéter)."""
+    directory = os.path.join(FEC_EXPORT_DIR, tenant_id, str(export_id))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, filename)
+
+
+def fec_rows_query(
+    tenant_id: str,
+    fiscal_year_id: UUID,
+    start_date: date,
+    end_date: date,
+    journal_codes: Optional[list[str]] = None,
+    include_draft: bool = False,
+) -> Select:
+    """
+    Requête à plat des lignes FEC.
+
+    Tri obligatoire: JournalCode, EcritureDate, EcritureNum (puis écriture et
+    numéro de ligne pour garder les lignes d'une écriture contiguës).
+    """
+    query = select(
+        Journal.code.label("journal_code"),
+        Journal.name.label("journal_name"),
+        JournalEntry.id.label("entry_id"),
+        JournalEntry.number.label("entry_number"),
+        JournalEntry.date.label("entry_date"),
+        JournalEntry.reference.label("entry_reference"),
+        JournalEntry.description.label("entry_description"),
+        JournalEntry.validated_at.label("validated_at"),
+        JournalEntry.posted_at.label("posted_at"),
+        JournalEntryLine.account_id.label("account_id"),
+        Account.code.label("account_code"),
+        Account.name.label("account_name"),
+        JournalEntryLine.partner_id.label("partner_id"),
+        JournalEntryLine.partner_type.label("partner_type"),
+        JournalEntryLine.label.label("line_label"),
+        JournalEntryLine.debit.label("debit"),
+        JournalEntryLine.credit.label("credit"),
+        JournalEntryLine.reconcile_ref.label("reconcile_ref"),
+        JournalEntryLine.reconciled_at.label("reconciled_at"),
+    ).select_from(JournalEntryLine).join(
+        JournalEntry, JournalEntryLine.entry_id == JournalEntry.id
+    ).join(
+        Journal, JournalEntry.journal_id == Journal.id
+    ).outerjoin(
+        Account, JournalEntryLine.account_id == Account.id
+    ).where(
+        and_(
+            JournalEntry.tenant_id == tenant_id,
+            JournalEntryLine.tenant_id == tenant_id,
+            JournalEntry.fiscal_year_id == fiscal_year_id,
+            JournalEntry.date >= start_date,
+            JournalEntry.date <= end_date,
+        )
+    )
+
+    # Filtrer les brouillons si non inclus
+    if not include_draft:
+        query = query.where(JournalEntry.status.in_([EntryStatus.VALIDATED, EntryStatus.POSTED]))
+
+    # Filtrer par journaux si spécifié
+    if journal_codes:
+        query = query.where(Journal.code.in_(journal_codes))
+
+    return query.order_by(
+        Journal.code,
+        JournalEntry.date,
+        JournalEntry.number,
+        JournalEntry.id,
+        JournalEntryLine.line_number,
+    ).execution_options(yield_per=FEC_STREAM_BATCH_SIZE)
+
+
+class FECStreamWriter:
+    """Écrit des lignes FEC encodées; hash SHA-256 et taille calculés à l'écriture."""
+
+    def __init__(self, path: str, encoding_name: str):
+        self.path = path
+        self.encoding_name = encoding_name
+        self.file_size = 0
+        self._hash = hashlib.sha256()
+        self._file = open(path, "wb")
+
+    def write_line(self, text: str) -> None:
+        data = (text + "\n").encode(self.encoding_name)
+        self._file.write(data)
+        self._hash.update(data)
+        self.file_size += len(data)
+
+    @property
+    def file_hash(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self) -> None:
+        """Ferme et supprime le fichier (export en échec)."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class FECStreamValidator:
+    """
+    Validation FEC incrémentale, ligne par ligne.
+
+    L'équilibre d'une écriture est contrôlé à la fin de chaque bloc de lignes
+    contiguës (le FEC est trié par écriture); une écriture qui réapparaît plus
+    loin est signalée en rupture de séquence (FEC-010). Seuls les numéros
+    d'écriture déjà vus sont conservés, jamais les lignes.
+    """
+
+    def __init__(
+        self,
+        validate_header: Callable[[str], list[FECValidationIssue]],
+        validate_line: Callable[[str, int, str], tuple[list[FECValidationIssue], Decimal, Decimal, str]],
+    ):
+        self._validate_header = validate_header
+        self._validate_line = validate_line
+        self.issues: list[FECValidationIssue] = []
+        self.separator = "\t"
+        self.total_debit = Decimal("0")
+        self.total_credit = Decimal("0")
+        self.total_lines = 0
+        self._seen_entry_nums: set[str] = set()
+        self._current_entry = ""
+        self._current_debit = Decimal("0")
+        self._current_credit = Decimal("0")
+
+    def feed_header(self, header: str) -> None:
+        self.issues.extend(self._validate_header(header))
+        # Détecter le séparateur
+        self.separator = "\t" if "\t" in header else "|"
+
+    def feed_line(self, line: str, line_num: int) -> None:
+        self.total_lines += 1
+        if not line.strip():
+            return
+
+        line_issues, debit, credit, entry_num = self._validate_line(line, line_num, self.separator)
+        self.issues.extend(line_issues)
+
+        # Statistiques
+        self.total_debit += debit
+        self.total_credit += credit
+
+        if not entry_num:
+            return
+
+        if entry_num != self._current_entry:
+            self._close_entry()
+            # Vérifier numérotation continue
+            if entry_num in self._seen_entry_nums:
+                self.issues.append(FECValidationIssue(
+                    level=FECValidationLevelEnum.ERROR,
+                    code="FEC-010",
+                    message=f"Rupture de séquence: l'écriture {entry_num} apparaît après d'autres écritures",
+                    line_number=line_num,
+                    entry_number=entry_num,
+                ))
+            self._seen_entry_nums.add(entry_num)
+            self._current_entry = entry_num
+
+        self._current_debit += debit
+        self._current_credit += credit
+
+    def _close_entry(self) -> None:
+        """Vérifier l'équilibre de l'écriture en cours."""
+        if self._current_entry and abs(self._current_debit - self._current_credit) >= Decimal("0.01"):
+            self.issues.append(FECValidationIssue(
+                level=FECValidationLevelEnum.ERROR,
+                code="FEC-021",
+                message=f"Déséquilibre écriture {self._current_entry}: Débit={self._current_debit}, Crédit={self._current_credit}",
+                entry_number=self._current_entry,
+                expected_value="0.00",
+                actual_value=str(self._current_debit - self._current_credit),
+            ))
+        self._current_entry = ""
+        self._current_debit = Decimal("0")
+        self._current_credit = Decimal("0")
+
+    def result(self) -> FECValidationResponse:
+        """Clôture la validation et retourne le résultat."""
+        self._close_entry()
+
+        if self.total_lines == 0:
+            self.issues.append(FECValidationIssue(
+                level=FECValidationLevelEnum.ERROR,
+                code="FEC-001",
+                message="Le fichier FEC doit contenir au moins l'en-tête et une ligne de données",
+            ))
+
+        # Vérifier équilibre global
+        if abs(self.total_debit - self.total_credit) >= Decimal("0.01"):
+            self.issues.append(FECValidationIssue(
+                level=FECValidationLevelEnum.ERROR,
+                code="FEC-020",
+                message=f"Déséquilibre global: Débit={self.total_debit}, Crédit={self.total_credit}, Différence={self.total_debit - self.total_credit}",
+                expected_value="0.00",
+                actual_value=str(self.total_debit - self.total_credit),
+            ))
+
+        # Compter erreurs et warnings
+        errors_count = sum(1 for i in self.issues if i.level == FECValidationLevelEnum.ERROR)
+        warnings_count = sum(1 for i in self.issues if i.level == FECValidationLevelEnum.WARNING)
+
+        return FECValidationResponse(
+            is_valid=errors_count == 0,
+            errors_count=errors_count,
+            warnings_count=warnings_count,
+            issues=self.issues,
+            statistics=FECStatistics(
+                total_entries=len(self._seen_entry_nums),
+                total_lines=self.total_lines,
+                total_debit=self.total_debit,
+                total_credit=self.total_credit,
+                balance=self.total_debit - self.total_credit,
+                is_balanced=abs(self.total_debit - self.total_credit) < Decimal("0.01"),
+                journals_count=0,  # À calculer si nécessaire
+                accounts_count=0,
+            ),
+        )
+
+
+class FECStreamBuilder:
+    """
+    Génération FEC en une passe: chaque ligne SQL est convertie, écrite
+    (encodée + hashée), validée et comptée, puis oubliée.
+    """
+
+    def __init__(
+        self,
+        writer: FECStreamWriter,
+        separator: str,
+        validate_header: Callable[[str], list[FECValidationIssue]],
+        validate_line: Callable[[str, int, str], tuple[list[FECValidationIssue], Decimal, Decimal, str]],
+        format_date: Callable[[Any], str],
+    ):
+        self.writer = writer
+        self.separator = separator
+        self.validator = FECStreamValidator(validate_header, validate_line)
+        self._format_date = format_date
+        self._line_num = 1
+
+        # Statistiques
+        self.total_entries = 0
+        self.total_lines = 0
+        self.total_debit = Decimal("0")
+        self.total_credit = Decimal("0")
+        self.journals_used: set[str] = set()
+        self.accounts_used: set = set()
+        self.first_date = None
+        self.last_date = None
+        self._current_entry_id = None
+
+        # En-tête (noms des colonnes)
+        header = separator.join(FEC_HEADERS)
+        writer.write_line(header)
+        self.validator.feed_header(header)
+
+    def add_row(self, row: Any) -> None:
+        """Ajoute une ligne issue de fec_rows_query()."""
+        fec_line = self._to_fec_line(row)
+        text = fec_line.to_fec_row(self.separator)
+
+        self.writer.write_line(text)
+        self._line_num += 1
+        self.validator.feed_line(text, self._line_num)
+
+        # Statistiques
+        if row.entry_id != self._current_entry_id:
+            self._current_entry_id = row.entry_id
+            self.total_entries += 1
+            if self.first_date is None or row.entry_date < self.first_date:
+                self.first_date = row.entry_date
+            if self.last_date is None or row.entry_date > self.last_date:
+                self.last_date = row.entry_date
+        self.journals_used.add(fec_line.JournalCode)
+        self.accounts_used.add(row.account_id)
+        self.total_debit += fec_line.Debit
+        self.total_credit += fec_line.Credit
+        self.total_lines += 1
+
+    def _to_fec_line(self, row: Any) -> FECLine:
+        journal_code = row.journal_code or "OD"
+        journal_lib = row.journal_name or "Opérations Diverses"
+        entry_date = self._format_date(row.entry_date)
+
+        return FECLine(
+            JournalCode=journal_code[:10],
+            JournalLib=journal_lib[:100],
+            EcritureNum=row.entry_number[:50],
+            EcritureDate=entry_date,
+            CompteNum=row.account_code[:20] if row.account_code else str(row.account_id)[:20],
+            CompteLib=row.account_name[:255] if row.account_name else "Compte inconnu",
+            CompAuxNum=str(row.partner_id)[:50] if row.partner_id else None,
+            CompAuxLib=row.partner_type[:255] if row.partner_type else None,
+            PieceRef=row.entry_reference[:100] if row.entry_reference else row.entry_number[:100],
+            PieceDate=entry_date,  # Même date si pas de pièce séparée
+            EcritureLib=(row.line_label or row.entry_description or "")[:255],
+            Debit=row.debit or Decimal("0"),
+            Credit=row.credit or Decimal("0"),
+            EcritureLet=row.reconcile_ref[:50] if row.reconcile_ref else None,
+            DateLet=self._format_date(row.reconciled_at) if row.reconciled_at else None,
+            ValidDate=self._format_date(row.validated_at or row.posted_at or row.entry_date),
+            Montantdevise=None,  # À implémenter si multi-devises
+            Idevise=None,
+        )
+
+    def finish(self) -> tuple[FECStatistics, FECValidationResponse]:
+        """Ferme le fichier et retourne (statistiques, validation)."""
+        self.writer.close()
+        statistics = FECStatistics(
+            total_entries=self.total_entries,
+            total_lines=self.total_lines,
+            total_debit=self.total_debit,
+            total_credit=self.total_credit,
+            balance=self.total_debit - self.total_credit,
+            is_balanced=abs(self.total_debit - self.total_credit) < Decimal("0.01"),
+            journals_count=len(self.journals_used),
+            accounts_count=len(self.accounts_used),
+            first_entry_date=self.first_date,
+            last_entry_date=self.last_date,
+        )
+        return statistics, self.validator.result()
@@ -279,3 +279,103 @@ class TestFECEquilibrium:
 
         assert total_debit == total_credit
         assert total_debit == Decimal("1500")
+
+
+def _row(entry_number, debit, credit, account_code="411000", entry_id=None):
+    """Ligne telle que retournée par fec_rows_query()."""
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        journal_code="VT", journal_name="Ventes",
+        entry_id=entry_id or entry_number, entry_number=entry_number,
+        entry_date=date(2026, 1, 15), entry_reference=None, entry_description="Facture",
+        validated_at=None, posted_at=None,
+        account_id=account_code, account_code=account_code, account_name="Compte",
+        partner_id=None, partner_type=None, line_label=None,
+        debit=Decimal(debit), credit=Decimal(credit),
+        reconcile_ref=None, reconciled_at=None,
+    )
+
+
+class TestFECStreaming:
+    """Tests for single-pass FEC generation and validation."""
+
+    @pytest.fixture
+    def service(self):
+        from ..service_sync import FECServiceSync
+        return FECServiceSync(db=None, tenant_id="tenant-fec")
+
+    def _builder(self, service, path):
+        from ..streaming import FECStreamBuilder, FECStreamWriter
+
+        writer = FECStreamWriter(str(path), "utf-8")
+        return FECStreamBuilder(
+            writer,
+            separator="\t",
+            validate_header=service._validate_header,
+            validate_line=service._validate_line,
+            format_date=service._format_date,
+        )
+
+    def test_builder_writes_hashes_and_validates(self, service, tmp_path):
+        """File, hash, statistics and validation come out of one pass."""
+        import hashlib
+
+        builder = self._builder(service, tmp_path / "fec.txt")
+        builder.add_row(_row("VT-001", "1200.00", "0", "411000"))
+        builder.add_row(_row("VT-001", "0", "1200.00", "706000"))
+        builder.add_row(_row("VT-002", "50.00", "0", "411000"))
+        builder.add_row(_row("VT-002", "0", "50.00", "706000"))
+        statistics, validation = builder.finish()
+
+        content = (tmp_path / "fec.txt").read_bytes()
+        assert builder.writer.file_hash == hashlib.sha256(content).hexdigest()
+        assert builder.writer.file_size == len(content)
+        assert len(content.decode().splitlines()) == 5
+        assert statistics.total_entries == 2
+        assert statistics.total_debit == Decimal("1250.00")
+        assert statistics.accounts_count == 2
+        assert validation.is_valid, validation.issues
+
+    def test_streamed_validation_matches_file_revalidation(self, service, tmp_path):
+        """Revalidating the written file gives the same verdict."""
+        builder = self._builder(service, tmp_path / "fec.txt")
+        builder.add_row(_row("VT-001", "100.00", "0"))
+        builder.add_row(_row("VT-001", "0", "90.00", "706000"))
+        _, streamed = builder.finish()
+
+        revalidated = service._validate_fec_content((tmp_path / "fec.txt").read_text(), None)
+
+        assert not streamed.is_valid
+        assert {i.code for i in streamed.issues} == {i.code for i in revalidated.issues}
+        assert "FEC-021" in {i.code for i in streamed.issues}
+
+    def test_sequence_break_detected(self, service, tmp_path):
+        """An entry reappearing after another one is a sequence break."""
+        builder = self._builder(service, tmp_path / "fec.txt")
+        builder.add_row(_row("VT-001", "10.00", "0", entry_id="a"))
+        builder.add_row(_row("VT-002", "10.00", "0", entry_id="b"))
+        builder.add_row(_row("VT-001", "0", "10.00", entry_id="c"))
+        builder.add_row(_row("VT-002", "0", "10.00", entry_id="d"))
+        _, validation = builder.finish()
+
+        assert "FEC-010" in {i.code for i in validation.issues}
+
+    def test_header_only_is_invalid(self, service):
+        """A FEC without data lines is rejected."""
+        from ..streaming import FEC_HEADERS
+
+        result = service._validate_fec_content("\t".join(FEC_HEADERS), None)
+
+        assert not result.is_valid
+        assert result.issues[0].code == "FEC-001"
+
+    def test_discard_removes_file(self, tmp_path):
+        """A failed export leaves no file behind."""
+        from ..streaming import FECStreamWriter
+
+        writer = FECStreamWriter(str(tmp_path / "fec.txt"), "iso-8859-15")
+        writer.write_line("Opérations Diverses")
+        writer.discard()
+
+        assert not (tmp_path / "fec.txt").exists()
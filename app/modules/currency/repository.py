@@ -13,8 +13,8 @@ from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, Any, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import and_, or_, func, desc, asc, text
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, desc, asc, text, select
+from sqlalchemy.orm import Session, aliased, joinedload
 
 from .models import (
     Currency, ExchangeRate, CurrencyConfig, ExchangeGainLoss,
@@ -251,6 +251,34 @@ class ExchangeRateRepository:
 
         return rate
 
+    def get_rates_between(
+        self,
+        start_date: date,
+        end_date: date = None
+    ) -> List[ExchangeRate]:
+        """
+        Recupere en une requete tous les taux applicables sur une periode.
+
+        Pour chaque paire: le dernier taux <= start_date et les taux
+        publies jusqu'a end_date.
+        """
+        end_date = end_date or start_date
+        previous = aliased(ExchangeRate)
+        conditions = [
+            previous.tenant_id == ExchangeRate.tenant_id,
+            previous.base_currency_code == ExchangeRate.base_currency_code,
+            previous.quote_currency_code == ExchangeRate.quote_currency_code,
+            previous.rate_date <= start_date
+        ]
+        if not self.include_deleted:
+            conditions.append(previous.is_deleted == False)
+        last_before_start = select(func.max(previous.rate_date)).where(*conditions).scalar_subquery()
+
+        return self._base_query().filter(
+            ExchangeRate.rate_date <= end_date,
+            ExchangeRate.rate_date >= func.coalesce(last_before_start, start_date)
+        ).order_by(ExchangeRate.rate_date).all()
+
     def get_rate_exact_date(
         self,
         base_code: str,
@@ -25,6 +25,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from datetime import datetime, date, timedelta
 from decimal import Decimal, ROUND_HALF_UP, ROUND_DOWN, ROUND_UP
@@ -115,6 +116,45 @@ ISO_4217_CURRENCIES = {
 MAJOR_CURRENCIES = ["EUR", "USD", "GBP", "CHF", "JPY", "CAD", "AUD", "CNY"]
 
 
+# ============================================================================
+# MATRICE DE TAUX
+# ============================================================================
+
+class ExchangeRateMatrix:
+    """
+    Taux de change precharges pour une date ou une periode.
+
+    Contient, par paire, le dernier taux anterieur au debut de la periode
+    et les taux publies pendant celle-ci: le taux applicable a une date
+    de la periode (dernier taux <= date) se resout en memoire.
+    """
+
+    def __init__(self, start_date: date, end_date: date, rates: List[ExchangeRate]):
+        self.start_date = start_date
+        self.end_date = end_date
+        self._dates: Dict[Tuple[str, str], List[date]] = {}
+        self._rates: Dict[Tuple[str, str], List[ExchangeRate]] = {}
+        for rate in sorted(rates, key=lambda r: r.rate_date):
+            pair = (rate.base_currency_code, rate.quote_currency_code)
+            self._dates.setdefault(pair, []).append(rate.rate_date)
+            self._rates.setdefault(pair, []).append(rate)
+
+    def __len__(self) -> int:
+        return sum(len(rates) for rates in self._rates.values())
+
+    def covers(self, rate_date: date) -> bool:
+        """Indique si la date est dans la periode prechargee."""
+        return self.start_date <= rate_date <= self.end_date
+
+    def get_rate(self, base: str, quote: str, rate_date: date) -> Optional[ExchangeRate]:
+        """Dernier taux direct base/quote a la date, ou None."""
+        dates = self._dates.get((base, quote))
+        if not dates:
+            return None
+        index = bisect_right(dates, rate_date)
+        return self._rates[(base, quote)][index - 1] if index else None
+
+
 # ============================================================================
 # SERVICE PRINCIPAL
 # ============================================================================
@@ -147,6 +187,9 @@ class CurrencyService:
 
         # Cache local
         self._config_cache: Optional[CurrencyConfig] = None
+        # Taux precharges (duree de vie du service, soit une requete HTTP)
+        self._rate_matrix: Optional[ExchangeRateMatrix] = None
+        self._resolved_rates: Dict[Tuple[str, str, date, bool, bool], Optional[ExchangeRate]] = {}
 
     # ========================================================================
     # CONFIGURATION
@@ -290,6 +333,32 @@ class CurrencyService:
     # TAUX DE CHANGE
     # ========================================================================
 
+    def preload_rates(self, start_date: date, end_date: date = None) -> ExchangeRateMatrix:
+        """
+        Precharge en une requete les taux d'une date ou d'une periode.
+
+        Tant que la matrice est active, get_rate et les conversions dans
+        la periode (taux directs, inverses et triangules) sont resolus
+        en memoire.
+        """
+        end_date = end_date or start_date
+        self._rate_matrix = ExchangeRateMatrix(
+            start_date, end_date, self.rate_repo.get_rates_between(start_date, end_date)
+        )
+        self._resolved_rates = {}
+        return self._rate_matrix
+
+    def clear_rate_cache(self) -> None:
+        """Invalide les taux precharges (apres ecriture de taux)."""
+        self._rate_matrix = None
+        self._resolved_rates = {}
+
+    def _lookup_rate(self, base: str, quote: str, rate_date: date) -> Optional[ExchangeRate]:
+        """Taux direct: matrice prechargee si elle couvre la date, sinon base."""
+        if self._rate_matrix and self._rate_matrix.covers(rate_date):
+            return self._rate_matrix.get_rate(base, quote, rate_date)
+        return self.rate_repo.get_rate(base, quote, rate_date)
+
     def get_rate(
         self,
         base: str,
@@ -314,14 +383,34 @@ class CurrencyService:
         if base == quote:
             return self._create_unity_rate(base, rate_date)
 
+        if not (self._rate_matrix and self._rate_matrix.covers(rate_date)):
+            return self._resolve_rate(base, quote, rate_date, allow_inverse, allow_triangulation)
+
+        # Paires resolues une seule fois par date tant que la matrice est active
+        key = (base, quote, rate_date, allow_inverse, allow_triangulation)
+        if key not in self._resolved_rates:
+            self._resolved_rates[key] = self._resolve_rate(
+                base, quote, rate_date, allow_inverse, allow_triangulation
+            )
+        return self._resolved_rates[key]
+
+    def _resolve_rate(
+        self,
+        base: str,
+        quote: str,
+        rate_date: date,
+        allow_inverse: bool,
+        allow_triangulation: bool
+    ) -> Optional[ExchangeRate]:
+        """Taux direct, puis inverse, puis triangule."""
         # Taux direct
-        rate = self.rate_repo.get_rate(base, quote, rate_date)
+        rate = self._lookup_rate(base, quote, rate_date)
         if rate:
             return rate
 
         # Taux inverse
         if allow_inverse:
-            inverse = self.rate_repo.get_rate(quote, base, rate_date)
+            inverse = self._lookup_rate(quote, base, rate_date)
             if inverse:
                 return self._invert_rate(inverse)
 
@@ -441,6 +530,7 @@ class CurrencyService:
         base_currency = self.get_currency(base)
         quote_currency = self.get_currency(quote)
 
+        self.clear_rate_cache()
         return self.rate_repo.upsert(
             base, quote, rate_date, rate, source, rate_type, created_by
         )
@@ -635,7 +725,14 @@ class CurrencyService:
         """
         Convertit plusieurs montants vers une devise cible.
         Retourne les conversions individuelles et le total.
+
+        Les taux de la date sont precharges en une requete: chaque paire
+        est resolue une fois, quel que soit le nombre de montants.
         """
+        rate_date = rate_date or date.today()
+        if not (self._rate_matrix and self._rate_matrix.covers(rate_date)):
+            self.preload_rates(rate_date)
+
         conversions = []
         total = Decimal("0")
 
@@ -821,6 +918,7 @@ class CurrencyService:
             ns = {'gesmes': 'http://www.gesmes.org/xml/2002-08-01',
                   'eurofxref': 'http://www.ecb.int/vocabulary/2002-08-01/eurofxref'}
 
+            self.clear_rate_cache()
             rates_saved = 0
             for cube in root.findall('.//eurofxref:Cube[@currency]', ns):
                 currency = cube.get('currency')
@@ -869,6 +967,7 @@ class CurrencyService:
             data = response.json()
             rates = data.get("rates", {})
 
+            self.clear_rate_cache()
             rates_saved = 0
             for currency, rate_value in rates.items():
                 if currency != base:
@@ -913,6 +1012,7 @@ class CurrencyService:
 
             rates = data.get("rates", {})
 
+            self.clear_rate_cache()
             rates_saved = 0
             for currency, rate_value in rates.items():
                 if currency != base:
@@ -0,0 +1,151 @@
+"""
+Tests de la matrice de taux prechargee (SQLite en memoire).
+"""
+
+import pytest
+from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.currency.models import ConversionMethod, CurrencyConfig, ExchangeRate
+from app.modules.currency.service import CurrencyService
+
+
+TENANT = "tenant-fx"
+
+
+def add_rate(db, base, quote, rate, rate_date):
+    entity = ExchangeRate(
+        tenant_id=TENANT, base_currency_id=uuid4(), quote_currency_id=uuid4(),
+        base_currency_code=base, quote_currency_code=quote,
+        rate=Decimal(rate), inverse_rate=(1 / Decimal(rate)).quantize(Decimal("0.000000000001")),
+        rate_date=rate_date,
+    )
+    db.add(entity)
+    db.commit()
+    return entity
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (ExchangeRate, CurrencyConfig):
+        model.__table__.create(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def queries(engine):
+    """Compteur des SELECT executes."""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return statements
+
+
+@pytest.fixture
+def service(engine):
+    db = sessionmaker(bind=engine)()
+    svc = CurrencyService(db=db, tenant_id=TENANT)
+    for base, quote, rate, rate_date in (
+        ("EUR", "USD", "1.10", date(2026, 1, 2)),
+        ("EUR", "USD", "1.20", date(2026, 1, 10)),
+        ("EUR", "GBP", "0.85", date(2026, 1, 2)),
+        ("EUR", "CHF", "0.95", date(2025, 12, 1)),
+        ("USD", "JPY", "150", date(2026, 1, 2)),
+    ):
+        add_rate(db, base, quote, rate, rate_date)
+    svc.get_config()
+    yield svc
+    db.close()
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+class TestRatesBetween:
+
+    def test_single_date_keeps_last_rate_per_pair(self, service):
+        rates = service.rate_repo.get_rates_between(date(2026, 1, 5))
+
+        assert sorted((r.base_currency_code, r.quote_currency_code, r.rate_date) for r in rates) == [
+            ("EUR", "CHF", date(2025, 12, 1)),
+            ("EUR", "GBP", date(2026, 1, 2)),
+            ("EUR", "USD", date(2026, 1, 2)),
+            ("USD", "JPY", date(2026, 1, 2)),
+        ]
+
+    def test_range_includes_rates_of_period(self, service):
+        rates = service.rate_repo.get_rates_between(date(2026, 1, 5), date(2026, 1, 31))
+
+        assert len(rates) == 5
+
+
+class TestRateMatrix:
+
+    def test_resolves_direct_inverse_and_triangulated_in_memory(self, service, queries):
+        service.preload_rates(date(2026, 1, 5))
+        queries.clear()
+
+        direct = service.get_rate("EUR", "USD", date(2026, 1, 5))
+        inverse = service.get_rate("GBP", "EUR", date(2026, 1, 5))
+        triangulated = service.get_rate("GBP", "CHF", date(2026, 1, 5))
+
+        assert queries == []
+        assert direct.rate == Decimal("1.10")
+        assert inverse.quote_currency_code == "EUR"
+        assert triangulated.is_interpolated
+        assert triangulated.rate == (inverse.rate * Decimal("0.95")).quantize(Decimal("0.000000000001"))
+
+    def test_matches_database_resolution(self, service):
+        pairs = [("EUR", "USD"), ("USD", "EUR"), ("GBP", "USD"), ("JPY", "USD"), ("GBP", "JPY"), ("EUR", "XXX")]
+        rate_date = date(2026, 1, 12)
+        expected = [service.get_rate(b, q, rate_date) for b, q in pairs]
+
+        service.preload_rates(date(2026, 1, 1), date(2026, 1, 31))
+        cached = [service.get_rate(b, q, rate_date) for b, q in pairs]
+
+        assert [r and r.rate for r in cached] == [r and r.rate for r in expected]
+
+    def test_convert_multiple_uses_one_query(self, service, queries):
+        amounts = [{"amount": i, "currency": c} for i in range(1, 200) for c in ("USD", "GBP", "CHF", "EUR")]
+        queries.clear()
+
+        conversions, total = service.convert_multiple(amounts, "EUR", date(2026, 1, 12))
+
+        assert len(queries) == 1
+        assert len(conversions) == len(amounts)
+        assert conversions[0].converted_amount == (Decimal(1) / Decimal("1.20")).quantize(Decimal("0.01"))
+        assert conversions[2].conversion_method == ConversionMethod.DIRECT
+        assert total == sum(c.converted_amount for c in conversions)
+
+    def test_set_rate_invalidates_matrix(self, service):
+        service.preload_rates(date(2026, 1, 12))
+        assert service.get_rate("EUR", "USD", date(2026, 1, 12)).rate == Decimal("1.20")
+
+        service.rate_repo.get_latest_rate = lambda base, quote: None
+        service.get_currency = lambda code: None
+        service.rate_repo.upsert = lambda base, quote, rate_date, rate, *args: add_rate(
+            service.db, base, quote, str(rate), rate_date
+        )
+        service.set_rate("EUR", "USD", Decimal("1.30"), date(2026, 1, 11))
+
+        assert service.get_rate("EUR", "USD", date(2026, 1, 12)).rate == Decimal("1.30")
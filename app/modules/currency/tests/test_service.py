@@ -537,16 +537,14 @@ class TestMultiCurrencyIntegration:
         gbp_rate.source = RateSource.ECB.value
         gbp_rate.is_interpolated = False
 
-        def get_rate_mock(from_curr, to_curr, rate_date=None):
-            if from_curr == "USD" and to_curr == "EUR":
-                return usd_rate
-            if from_curr == "GBP" and to_curr == "EUR":
-                return gbp_rate
-            if from_curr == "EUR" and to_curr == "EUR":
-                return None  # Sera gere comme meme devise
-            return None
+        usd_rate.base_currency_code = "USD"
+        usd_rate.quote_currency_code = "EUR"
+        gbp_rate.base_currency_code = "GBP"
+        gbp_rate.quote_currency_code = "EUR"
 
-        service.rate_repo.get_rate = Mock(side_effect=get_rate_mock)
+        # Taux precharges en une requete, aucune requete par montant
+        service.rate_repo.get_rates_between = Mock(return_value=[usd_rate, gbp_rate])
+        service.rate_repo.get_rate = Mock(return_value=None)
 
         amounts = [
             {"amount": 100, "currency": "USD"},
@@ -561,6 +559,9 @@ class TestMultiCurrencyIntegration:
         # GBP: 100 * 1.17 = 117 EUR
         # EUR: 100 EUR
         # Total: 92 + 117 + 100 = 309 EUR
+        assert total == Decimal("309.00")
+        service.rate_repo.get_rates_between.assert_called_once()
+        service.rate_repo.get_rate.assert_not_called()
 
 
 # ============================================================================
@@ -0,0 +1,582 @@
+"""
+AZALS MODULE GATEWAY - Compteurs de rate limiting et de quotas
+===============================================================
+
+Les compteurs du chemin chaud (une verification par appel API) ne sont plus
+des lignes ORM commitees a chaque requete:
+- RedisCounterEngine: verification + increment en un seul script Lua
+  atomique (une aller-retour Redis, aucun verrou de ligne en base)
+- MemoryCounterEngine: meme semantique en memoire (tests, dev sans Redis)
+
+Les totaux de quotas restent en Redis pour la periode courante; les
+increments sont aussi cumules dans un hash "pending" que QuotaFlusher vide
+periodiquement vers gateway_quota_usages (une mise a jour par cle et par
+periode et par lot, au lieu d'une transaction par appel).
+
+Usage:
+    from app.modules.gateway.counters import get_counter_engine
+
+    decision = get_counter_engine().hit(key, "TOKEN_BUCKET", limit=60, burst=10)
+"""
+from __future__ import annotations
+
+import calendar
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.background_flusher import BackgroundFlusher
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de report des quotas en base (secondes)
+QUOTA_FLUSH_INTERVAL = float(os.environ.get("GATEWAY_QUOTA_FLUSH_SECONDS", "5"))
+
+# Fenetre de rate limiting des plans (requests_per_minute)
+RATE_WINDOW_SECONDS = 60
+
+_KEY_PREFIX = "azals:gateway:"
+_PENDING_KEY = _KEY_PREFIX + "quota:pending"
+_QUOTA_FIELDS = ("requests", "bytes_in", "bytes_out", "errors")
+
+
+# ============================================================================
+# DATA CLASSES
+# ============================================================================
+
+@dataclass
+class CounterDecision:
+    """Resultat d'une verification + increment de rate limit."""
+    allowed: bool
+    remaining: int = 0
+    retry_after_ms: int = 0
+    delay_ms: int = 0
+    reset_at_ms: int = 0
+
+
+@dataclass(frozen=True)
+class QuotaWindow:
+    """Compteur de quota d'une cle API pour une periode."""
+    tenant_id: str
+    api_key_id: str
+    period: str
+    start: datetime
+    end: datetime
+    limit: int
+
+    @property
+    def member(self) -> str:
+        """Identifiant serialise (cle Redis et champ du hash pending)."""
+        return "|".join((
+            self.tenant_id, self.api_key_id, self.period,
+            str(calendar.timegm(self.start.timetuple())),
+            str(calendar.timegm(self.end.timetuple())),
+            str(self.limit),
+        ))
+
+    @classmethod
+    def from_member(cls, member: str) -> "QuotaWindow":
+        tenant_id, api_key_id, period, start, end, limit = member.rsplit("|", 5)
+        return cls(tenant_id, api_key_id, period, datetime.utcfromtimestamp(int(start)),
+                   datetime.utcfromtimestamp(int(end)), int(limit))
+
+    def ttl_seconds(self, now: float) -> int:
+        """Duree de vie du total en Redis: fin de periode + marge pour le dernier report."""
+        return max(1, int(calendar.timegm(self.end.timetuple()) - now)) + 300
+
+
+@dataclass
+class QuotaTotals:
+    """Compteurs d'une periode de quota."""
+    requests: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    errors: int = 0
+
+    def add(self, other: "QuotaTotals") -> None:
+        self.requests += other.requests
+        self.bytes_in += other.bytes_in
+        self.bytes_out += other.bytes_out
+        self.errors += other.errors
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# ============================================================================
+# INTERFACE
+# ============================================================================
+
+class CounterEngine(ABC):
+    """Compteurs atomiques partages par les workers du gateway."""
+
+    @abstractmethod
+    def hit(
+        self,
+        key: str,
+        strategy: str,
+        limit: int,
+        burst: int,
+        window_seconds: int = RATE_WINDOW_SECONDS,
+        now_ms: Optional[int] = None,
+    ) -> CounterDecision:
+        """
+        Verifie la limite et consomme une requete en une operation atomique.
+
+        Args:
+            key: Cle du compteur (tenant, cle API, endpoint)
+            strategy: RateLimitStrategy (valeur)
+            limit: Requetes par fenetre
+            burst: Capacite des buckets (token / leaky bucket)
+        """
+
+    @abstractmethod
+    def quota_totals(self, windows: Sequence[QuotaWindow]) -> List[Optional[QuotaTotals]]:
+        """Totaux courants (None si le compteur n'existe pas encore)."""
+
+    @abstractmethod
+    def seed_quota(self, window: QuotaWindow, totals: QuotaTotals) -> None:
+        """Initialise un total absent (reprise depuis la base), sans ecraser un total existant."""
+
+    @abstractmethod
+    def increment_quota(
+        self,
+        windows: Sequence[QuotaWindow],
+        bytes_in: int = 0,
+        bytes_out: int = 0,
+        is_error: bool = False,
+    ) -> List[int]:
+        """Incremente les periodes en une operation; retourne les nouveaux nombres de requetes."""
+
+    @abstractmethod
+    def drain_quota_deltas(self) -> Dict[QuotaWindow, QuotaTotals]:
+        """Retire et retourne les increments non encore reportes en base."""
+
+    @abstractmethod
+    def restore_quota_deltas(self, deltas: Dict[QuotaWindow, QuotaTotals]) -> None:
+        """Remet des increments drainés dont le report a echoue."""
+
+
+# ============================================================================
+# MEMOIRE
+# ============================================================================
+
+def _apply_strategy(
+    state: Dict[str, float],
+    strategy: str,
+    limit: int,
+    burst: int,
+    window_ms: int,
+    now: int,
+) -> CounterDecision:
+    """Strategies de rate limiting sur un etat {a, b, c}; miroir exact du script Lua."""
+    a, b, c = state.get("a"), state.get("b"), state.get("c")
+    decision = CounterDecision(allowed=False)
+
+    if strategy == "FIXED_WINDOW":
+        # a: requetes, b: debut de fenetre
+        if b is None or now >= b + window_ms:
+            a, b = 0, now
+        decision.reset_at_ms = int(b + window_ms)
+        if a >= limit:
+            decision.retry_after_ms = int(b + window_ms - now)
+        else:
+            a += 1
+            decision.allowed = True
+            decision.remaining = int(limit - a)
+
+    elif strategy == "SLIDING_WINDOW":
+        # a: requetes de la fenetre courante, b: debut, c: requetes de la precedente
+        start = now - now % window_ms
+        if b != start:
+            c = a if b == start - window_ms else 0
+            a, b = 0, start
+        c = c or 0
+        estimated = math.floor(c * (1 - (now - start) / window_ms) + a)
+        decision.reset_at_ms = int(start + window_ms)
+        if estimated >= limit:
+            decision.retry_after_ms = 1000
+        else:
+            a += 1
+            decision.allowed = True
+            decision.remaining = int(max(0, limit - estimated - 1))
+
+    elif strategy == "TOKEN_BUCKET":
+        # a: jetons, b: dernier remplissage
+        rate = limit / window_ms
+        a = burst if a is None else min(burst, a + (now - b) * rate)
+        b = now
+        if a < 1:
+            decision.retry_after_ms = int(math.ceil((1 - a) / rate))
+        else:
+            a -= 1
+            decision.allowed = True
+            decision.remaining = int(math.floor(a))
+
+    elif strategy == "LEAKY_BUCKET":
+        # a: niveau, b: derniere fuite
+        rate = limit / window_ms
+        a = 0 if a is None else max(0, a - (now - b) * rate)
+        b = now
+        if a < burst:
+            decision.delay_ms = int(math.floor(a / rate)) if a > 0 else 0
+            a += 1
+            decision.allowed = True
+            decision.remaining = int(math.floor(burst - a))
+
+    else:
+        return CounterDecision(allowed=True)
+
+    state.update(a=a, b=b, c=c)
+    return decision
+
+
+class MemoryCounterEngine(CounterEngine):
+    """
+    Compteurs en memoire du processus.
+
+    ATTENTION: non partages entre workers; utiliser Redis en production.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._totals: Dict[QuotaWindow, QuotaTotals] = {}
+        self._pending: Dict[QuotaWindow, QuotaTotals] = defaultdict(QuotaTotals)
+
+    def hit(self, key, strategy, limit, burst, window_seconds=RATE_WINDOW_SECONDS, now_ms=None) -> CounterDecision:
+        now = _now_ms() if now_ms is None else now_ms
+        with self._lock:
+            return _apply_strategy(self._states[key], strategy, limit, burst, window_seconds * 1000, now)
+
+    def _expire(self) -> None:
+        now = datetime.utcnow()
+        for window in [w for w in self._totals if w.end <= now]:
+            del self._totals[window]
+
+    def quota_totals(self, windows: Sequence[QuotaWindow]) -> List[Optional[QuotaTotals]]:
+        with self._lock:
+            self._expire()
+            return [
+                QuotaTotals(**vars(self._totals[w])) if w in self._totals else None
+                for w in windows
+            ]
+
+    def seed_quota(self, window: QuotaWindow, totals: QuotaTotals) -> None:
+        with self._lock:
+            self._totals.setdefault(window, QuotaTotals(**vars(totals)))
+
+    def increment_quota(self, windows, bytes_in=0, bytes_out=0, is_error=False) -> List[int]:
+        delta = QuotaTotals(1, bytes_in, bytes_out, int(is_error))
+        counts = []
+        with self._lock:
+            for window in windows:
+                total = self._totals.setdefault(window, QuotaTotals())
+                total.add(delta)
+                self._pending[window].add(delta)
+                counts.append(total.requests)
+        return counts
+
+    def drain_quota_deltas(self) -> Dict[QuotaWindow, QuotaTotals]:
+        with self._lock:
+            deltas, self._pending = dict(self._pending), defaultdict(QuotaTotals)
+        return deltas
+
+    def restore_quota_deltas(self, deltas: Dict[QuotaWindow, QuotaTotals]) -> None:
+        with self._lock:
+            for window, delta in deltas.items():
+                self._pending[window].add(delta)
+
+
+# ============================================================================
+# REDIS
+# ============================================================================
+
+# KEYS[1]: etat; ARGV: strategie, limite, burst, fenetre (ms), maintenant (ms)
+# Retour: {autorise, restant, retry_after_ms, delay_ms, reset_at_ms}
+_HIT_SCRIPT = """
+local strategy = ARGV[1]
+local limit = tonumber(ARGV[2])
+local burst = tonumber(ARGV[3])
+local window = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+local state = redis.call('HMGET', KEYS[1], 'a', 'b', 'c')
+local a, b, c = tonumber(state[1]), tonumber(state[2]), tonumber(state[3])
+local allowed, remaining, retry, delay, reset = 0, 0, 0, 0, 0
+local ttl = window * 2
+
+if strategy == 'FIXED_WINDOW' then
+  if b == nil or now >= b + window then a = 0; b = now end
+  reset = b + window
+  if a >= limit then
+    retry = b + window - now
+  else
+    a = a + 1; allowed = 1; remaining = limit - a
+  end
+elseif strategy == 'SLIDING_WINDOW' then
+  local start = now - now % window
+  if b ~= start then
+    if b == start - window then c = a else c = 0 end
+    a = 0; b = start
+  end
+  c = c or 0
+  local estimated = math.floor(c * (1 - (now - start) / window) + a)
+  reset = start + window
+  if estimated >= limit then
+    retry = 1000
+  else
+    a = a + 1; allowed = 1; remaining = math.max(0, limit - estimated - 1)
+  end
+elseif strategy == 'TOKEN_BUCKET' then
+  local rate = limit / window
+  if a == nil then a = burst else a = math.min(burst, a + (now - b) * rate) end
+  b = now
+  if a < 1 then
+    retry = math.ceil((1 - a) / rate)
+  else
+    a = a - 1; allowed = 1; remaining = math.floor(a)
+  end
+  ttl = math.max(ttl, math.ceil(burst / rate))
+elseif strategy == 'LEAKY_BUCKET' then
+  local rate = limit / window
+  if a == nil then a = 0 else a = math.max(0, a - (now - b) * rate) end
+  b = now
+  if a < burst then
+    if a > 0 then delay = math.floor(a / rate) end
+    a = a + 1; allowed = 1; remaining = math.floor(burst - a)
+  end
+  ttl = math.max(ttl, math.ceil(burst / rate))
+else
+  return {1, 0, 0, 0, 0}
+end
+
+redis.call('HSET', KEYS[1], 'a', tostring(a), 'b', tostring(b), 'c', tostring(c or 0))
+redis.call('PEXPIRE', KEYS[1], math.ceil(ttl))
+return {allowed, remaining, math.ceil(retry), delay, reset}
+"""
+
+# KEYS[1..n]: totaux des periodes, KEYS[n+1]: hash pending
+# ARGV: bytes_in, bytes_out, erreur (0/1), puis (membre, ttl) par periode
+_INCREMENT_QUOTA_SCRIPT = """
+local pending = KEYS[#KEYS]
+local deltas = {requests = 1, bytes_in = tonumber(ARGV[1]), bytes_out = tonumber(ARGV[2]), errors = tonumber(ARGV[3])}
+local counts = {}
+for i = 1, #KEYS - 1 do
+  local member = ARGV[2 + i * 2]
+  for field, value in pairs(deltas) do
+    if value > 0 then
+      local total = redis.call('HINCRBY', KEYS[i], field, value)
+      if field == 'requests' then counts[i] = total end
+      redis.call('HINCRBY', pending, member .. '|' .. field, value)
+    end
+  end
+  redis.call('EXPIRE', KEYS[i], tonumber(ARGV[3 + i * 2]))
+end
+return counts
+"""
+
+# KEYS[1]: total; ARGV: ttl, puis (champ, valeur)
+_SEED_QUOTA_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  for i = 2, #ARGV, 2 do redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1]) end
+  redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+end
+return 0
+"""
+
+# KEYS[1]: hash pending, vide atomiquement
+_DRAIN_SCRIPT = """
+local values = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return values
+"""
+
+
+class RedisCounterEngine(CounterEngine):
+    """Compteurs Redis partages par tous les workers (scripts Lua atomiques)."""
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._hit = redis_client.register_script(_HIT_SCRIPT)
+        self._increment = redis_client.register_script(_INCREMENT_QUOTA_SCRIPT)
+        self._seed = redis_client.register_script(_SEED_QUOTA_SCRIPT)
+        self._drain = redis_client.register_script(_DRAIN_SCRIPT)
+
+    @staticmethod
+    def _quota_key(window: QuotaWindow) -> str:
+        return f"{_KEY_PREFIX}quota:{window.member}"
+
+    def hit(self, key, strategy, limit, burst, window_seconds=RATE_WINDOW_SECONDS, now_ms=None) -> CounterDecision:
+        now = _now_ms() if now_ms is None else now_ms
+        allowed, remaining, retry, delay, reset = self._hit(
+            keys=[f"{_KEY_PREFIX}rate:{key}"],
+            args=[strategy, limit, burst, window_seconds * 1000, now],
+        )
+        return CounterDecision(bool(allowed), int(remaining), int(retry), int(delay), int(reset))
+
+    def quota_totals(self, windows: Sequence[QuotaWindow]) -> List[Optional[QuotaTotals]]:
+        pipe = self._redis.pipeline(transaction=False)
+        for window in windows:
+            pipe.hmget(self._quota_key(window), *_QUOTA_FIELDS)
+        totals = []
+        for values in pipe.execute():
+            if all(v is None for v in values):
+                totals.append(None)
+            else:
+                totals.append(QuotaTotals(*(int(v or 0) for v in values)))
+        return totals
+
+    def seed_quota(self, window: QuotaWindow, totals: QuotaTotals) -> None:
+        args: List = [window.ttl_seconds(time.time())]
+        for field in _QUOTA_FIELDS:
+            args += [field, getattr(totals, field)]
+        self._seed(keys=[self._quota_key(window)], args=args)
+
+    def increment_quota(self, windows, bytes_in=0, bytes_out=0, is_error=False) -> List[int]:
+        now = time.time()
+        args: List = [bytes_in, bytes_out, int(is_error)]
+        for window in windows:
+            args += [window.member, window.ttl_seconds(now)]
+        counts = self._increment(keys=[self._quota_key(w) for w in windows] + [_PENDING_KEY], args=args)
+        return [int(c) for c in counts]
+
+    def drain_quota_deltas(self) -> Dict[QuotaWindow, QuotaTotals]:
+        values = self._drain(keys=[_PENDING_KEY])
+        deltas: Dict[QuotaWindow, QuotaTotals] = defaultdict(QuotaTotals)
+        for i in range(0, len(values), 2):
+            field_key = values[i].decode() if isinstance(values[i], bytes) else values[i]
+            member, field = field_key.rsplit("|", 1)
+            window = QuotaWindow.from_member(member)
+            setattr(deltas[window], field, getattr(deltas[window], field) + int(values[i + 1]))
+        return dict(deltas)
+
+    def restore_quota_deltas(self, deltas: Dict[QuotaWindow, QuotaTotals]) -> None:
+        pipe = self._redis.pipeline(transaction=True)
+        for window, delta in deltas.items():
+            for field in _QUOTA_FIELDS:
+                if getattr(delta, field):
+                    pipe.hincrby(_PENDING_KEY, f"{window.member}|{field}", getattr(delta, field))
+        pipe.execute()
+
+
+# ============================================================================
+# REPORT DES QUOTAS EN BASE
+# ============================================================================
+
+def flush_quota_deltas(engine: CounterEngine, session_factory: Callable) -> int:
+    """
+    Reporte les increments de quotas en base (une transaction par lot).
+
+    Les increments sont remis dans le moteur si l'ecriture echoue.
+
+    Returns:
+        Nombre de (cle, periode) mis a jour
+    """
+    from .repository import QuotaUsageRepository
+
+    deltas = engine.drain_quota_deltas()
+    if not deltas:
+        return 0
+
+    by_tenant: Dict[str, List[Tuple[QuotaWindow, QuotaTotals]]] = defaultdict(list)
+    for window, delta in deltas.items():
+        by_tenant[window.tenant_id].append((window, delta))
+
+    db = None
+    try:
+        db = session_factory()
+        for tenant_id, tenant_deltas in by_tenant.items():
+            QuotaUsageRepository(db, tenant_id).apply_deltas(tenant_deltas)
+        db.commit()
+    except Exception:
+        if db is not None:
+            db.rollback()
+        engine.restore_quota_deltas(deltas)
+        raise
+    finally:
+        if db is not None:
+            db.close()
+    return len(deltas)
+
+
+class QuotaFlusher(BackgroundFlusher):
+    """Thread de fond qui reporte les quotas toutes les `interval` secondes."""
+
+    def __init__(self, engine: CounterEngine, session_factory: Callable, interval: float = QUOTA_FLUSH_INTERVAL):
+        self.engine = engine
+        self.session_factory = session_factory
+        super().__init__(
+            lambda: flush_quota_deltas(self.engine, self.session_factory),
+            interval,
+            name="gateway-quota-flusher",
+            log=logger,
+            error_message="[GATEWAY] Report des quotas en echec, nouvel essai au prochain cycle: %s",
+        )
+
+
+# ============================================================================
+# INSTANCES GLOBALES
+# ============================================================================
+
+_engine: Optional[CounterEngine] = None
+_flusher: Optional[QuotaFlusher] = None
+_engine_lock = threading.Lock()
+
+
+def _create_default_engine() -> CounterEngine:
+    """Redis si configure et joignable, sinon memoire."""
+    try:
+        from app.core.config import get_settings
+        redis_url = getattr(get_settings(), "redis_url", None)
+        if redis_url:
+            try:
+                import redis
+                client = redis.from_url(redis_url)
+                client.ping()
+                logger.info("[GATEWAY] Compteurs de rate limiting et quotas sur Redis")
+                return RedisCounterEngine(client)
+            except ImportError:
+                logger.warning("[GATEWAY] redis package not installed, compteurs en memoire")
+            except Exception as e:
+                logger.warning("[GATEWAY] Redis connection failed, compteurs en memoire: %s", e)
+    except Exception as e:
+        logger.warning("[GATEWAY] Settings load failed: %s", e)
+    return MemoryCounterEngine()
+
+
+def get_counter_engine() -> CounterEngine:
+    """Retourne le moteur de compteurs global."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_default_engine()
+    return _engine
+
+
+def start_quota_flusher(session_factory: Optional[Callable] = None) -> QuotaFlusher:
+    """Demarre le report periodique des quotas (lifespan de l'application)."""
+    global _flusher
+    if _flusher is None:
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+        _flusher = QuotaFlusher(get_counter_engine(), session_factory)
+        _flusher.start()
+    return _flusher
+
+
+def stop_quota_flusher() -> None:
+    """Arrete le report periodique (dernier report inclus)."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
@@ -0,0 +1,426 @@
+"""
+AZALS MODULE GATEWAY - Tampon d'agregation des logs et metriques
+=================================================================
+
+log_request ne fait plus, a chaque appel API, un INSERT du log suivi d'une
+lecture / modification / ecriture de la ligne de metriques horaires (avec
+re-parsing des blobs JSON requests_by_*) et de deux commits.
+
+Les requetes sont cumulees en memoire:
+- les lignes de gateway_request_logs en attente
+- un MetricsBucket par (tenant, heure): compteurs, octets, repartitions par
+  status / endpoint / methode, histogramme des temps de reponse
+
+MetricsFlusher vide le tampon toutes les GATEWAY_METRICS_FLUSH_SECONDS ou des
+que GATEWAY_METRICS_BUFFER_SIZE logs sont en attente: un INSERT multi-lignes
+pour les logs, une ecriture par bucket de metriques, une seule transaction.
+
+Les temps de reponse sont gardes en histogramme a bornes fixes (et non plus
+en moyenne glissante): les histogrammes se fusionnent entre lots, processus
+et heures, d'ou p50 / p95 / p99.
+
+Usage:
+    from app.modules.gateway.metrics_buffer import get_metrics_buffer
+
+    get_metrics_buffer().record(row)
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.background_flusher import BackgroundFlusher, FlushTrigger
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de report en base (secondes)
+METRICS_FLUSH_INTERVAL = float(os.environ.get("GATEWAY_METRICS_FLUSH_SECONDS", "5"))
+
+# Nombre de logs en attente declenchant un report anticipe
+METRICS_BUFFER_SIZE = int(os.environ.get("GATEWAY_METRICS_BUFFER_SIZE", "500"))
+
+# Au-dela (base indisponible), les nouveaux logs sont abandonnes; les
+# metriques continuent d'etre cumulees
+METRICS_BUFFER_LIMIT_FACTOR = 20
+
+# Bornes superieures des buckets (ms): 1-1.2-1.5-2-2.5-3-4-5-6-8 par decade
+# (arrondies sous 10 ms), soit au plus ~25% d'erreur sur un percentile;
+# au-dela de 60 s, debordement
+LATENCY_BOUNDS_MS: Tuple[int, ...] = tuple(sorted({
+    round(m * 10 ** e) for e in range(5) for m in (1, 1.2, 1.5, 2, 2.5, 3, 4, 5, 6, 8)
+    if round(m * 10 ** e) <= 60000
+}))
+
+
+# ============================================================================
+# HISTOGRAMME
+# ============================================================================
+
+class LatencyHistogram:
+    """Histogramme des temps de reponse a bornes fixes (LATENCY_BOUNDS_MS)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(LATENCY_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value_ms: int) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BOUNDS_MS, value_ms)] += 1
+        self.min = value_ms if not self.count else min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+        self.count += 1
+        self.total += value_ms
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if not other.count:
+            return
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.min = other.min if not self.count else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> int:
+        """
+        Borne superieure du bucket contenant le q-ieme percentile.
+
+        Bornee par le max observe (exacte pour le debordement et les
+        histogrammes a une seule valeur).
+        """
+        if not self.count:
+            return 0
+        rank = max(math.ceil(self.count * q / 100), 1)
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                if i == len(LATENCY_BOUNDS_MS):
+                    return self.max
+                return max(min(LATENCY_BOUNDS_MS[i], self.max), self.min)
+        return self.max
+
+    def to_json(self) -> str:
+        """Serialisation compacte: buckets non vides indexes par leur borne."""
+        buckets = {
+            str(LATENCY_BOUNDS_MS[i]) if i < len(LATENCY_BOUNDS_MS) else "inf": n
+            for i, n in enumerate(self.counts) if n
+        }
+        return json.dumps({
+            "buckets": buckets, "count": self.count, "sum": self.total, "min": self.min, "max": self.max
+        })
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "LatencyHistogram":
+        histogram = cls()
+        if not data:
+            return histogram
+        payload = json.loads(data)
+        for bound, n in payload.get("buckets", {}).items():
+            index = len(LATENCY_BOUNDS_MS) if bound == "inf" else bisect.bisect_left(LATENCY_BOUNDS_MS, int(bound))
+            histogram.counts[index] += n
+        histogram.count = payload.get("count", 0)
+        histogram.total = payload.get("sum", 0)
+        histogram.min = payload.get("min", 0)
+        histogram.max = payload.get("max", 0)
+        return histogram
+
+
+# ============================================================================
+# BUCKETS DE METRIQUES
+# ============================================================================
+
+@dataclass
+class MetricsBucket:
+    """Cumul des requetes d'un tenant sur une heure, en attente de report."""
+    tenant_id: str
+    period_start: datetime
+    total_requests: int = 0
+    successful_requests: int = 0
+    failed_requests: int = 0
+    throttled_requests: int = 0
+    cached_requests: int = 0
+    error_4xx_count: int = 0
+    error_5xx_count: int = 0
+    total_bytes_in: int = 0
+    total_bytes_out: int = 0
+    by_status: Counter = field(default_factory=Counter)
+    by_endpoint: Counter = field(default_factory=Counter)
+    by_method: Counter = field(default_factory=Counter)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def record(self, row: Dict[str, Any]) -> None:
+        """Ajoute une ligne de gateway_request_logs."""
+        status_code = row["status_code"]
+        self.total_requests += 1
+        if 200 <= status_code < 400:
+            self.successful_requests += 1
+        else:
+            self.failed_requests += 1
+            if 400 <= status_code < 500:
+                self.error_4xx_count += 1
+            else:
+                self.error_5xx_count += 1
+        if row.get("was_throttled"):
+            self.throttled_requests += 1
+        if row.get("was_cached"):
+            self.cached_requests += 1
+        self.total_bytes_in += row.get("request_body_size") or 0
+        self.total_bytes_out += row.get("response_body_size") or 0
+        self.by_status[str(status_code)] += 1
+        self.by_endpoint[row["path"]] += 1
+        method = row["method"]
+        self.by_method[getattr(method, "value", method)] += 1
+        self.latency.record(row["response_time_ms"])
+
+    def merge(self, other: "MetricsBucket") -> None:
+        for name in (
+            "total_requests", "successful_requests", "failed_requests", "throttled_requests",
+            "cached_requests", "error_4xx_count", "error_5xx_count", "total_bytes_in", "total_bytes_out"
+        ):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.by_status.update(other.by_status)
+        self.by_endpoint.update(other.by_endpoint)
+        self.by_method.update(other.by_method)
+        self.latency.merge(other.latency)
+
+
+def hour_start(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+# ============================================================================
+# TAMPON
+# ============================================================================
+
+class RequestMetricsBuffer:
+    """Tampon thread-safe des logs de requetes et des metriques horaires."""
+
+    def __init__(self, max_pending: int = METRICS_BUFFER_SIZE):
+        self.max_pending = max_pending
+        self.flush_requested = FlushTrigger(max_pending)
+        self.dropped_logs = 0
+        self.rejected_logs = 0
+        self._lock = threading.Lock()
+        self._logs: List[Dict[str, Any]] = []
+        self._buckets: Dict[Tuple[str, datetime], MetricsBucket] = {}
+
+    def __len__(self) -> int:
+        return len(self._logs)
+
+    def record(self, row: Dict[str, Any]) -> None:
+        """
+        Ajoute une requete (colonnes de gateway_request_logs, timestamp inclus).
+
+        Demande un report anticipe quand max_pending logs sont en attente.
+        """
+        key = (row["tenant_id"], hour_start(row["timestamp"]))
+        with self._lock:
+            if len(self._logs) < self.max_pending * METRICS_BUFFER_LIMIT_FACTOR:
+                self._logs.append(row)
+            else:
+                self.dropped_logs += 1
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = MetricsBucket(*key)
+            bucket.record(row)
+            pending = len(self._logs)
+
+        self.flush_requested.notify(pending)
+
+    def drain(self) -> Tuple[List[Dict[str, Any]], List[MetricsBucket]]:
+        """Retire et retourne le contenu du tampon."""
+        with self._lock:
+            logs, self._logs = self._logs, []
+            buckets, self._buckets = self._buckets, {}
+        return logs, list(buckets.values())
+
+    def restore(self, logs: List[Dict[str, Any]], buckets: List[MetricsBucket]) -> None:
+        """
+        Remet en tete du tampon un lot dont le report a echoue.
+
+        Le tampon reste borne: les logs les plus recents au-dela de la
+        limite sont abandonnes (comptes dans dropped_logs).
+        """
+        with self._lock:
+            self._logs[:0] = logs
+            limit = self.max_pending * METRICS_BUFFER_LIMIT_FACTOR
+            if len(self._logs) > limit:
+                self.dropped_logs += len(self._logs) - limit
+                del self._logs[limit:]
+            for bucket in buckets:
+                key = (bucket.tenant_id, bucket.period_start)
+                current = self._buckets.get(key)
+                if current is None:
+                    self._buckets[key] = bucket
+                else:
+                    bucket.merge(current)
+                    self._buckets[key] = bucket
+
+
+# ============================================================================
+# REPORT EN BASE
+# ============================================================================
+
+def _insert_logs_isolated(db, logs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Insere les logs un par un (un savepoint chacun) apres l'echec du lot.
+
+    Returns:
+        (logs inseres, logs rejetes)
+    """
+    from sqlalchemy.exc import DataError, IntegrityError
+
+    from .models import GatewayRequestLog
+
+    inserted, rejected = [], 0
+    for row in logs:
+        savepoint = db.begin_nested()
+        try:
+            db.execute(GatewayRequestLog.__table__.insert(), [row])
+            savepoint.commit()
+            inserted.append(row)
+        except (IntegrityError, DataError) as e:
+            savepoint.rollback()
+            rejected += 1
+            logger.warning("[GATEWAY] Log de requete rejete (%s): %s", row.get("path"), e.orig)
+    return inserted, rejected
+
+
+def flush_request_metrics(buffer: RequestMetricsBuffer, session_factory: Callable) -> Tuple[int, int]:
+    """
+    Reporte le tampon en base (une transaction par lot).
+
+    - IntegrityError / DataError: les logs sont reinseres un par un, les
+      lignes invalides (cle API ou endpoint supprime...) sont abandonnees
+      et comptees dans buffer.rejected_logs. Un conflit d'insertion de
+      bucket (cree en parallele par un autre processus) remet seulement
+      les metriques dans le tampon: la ligne existe au cycle suivant.
+    - OperationalError / InterfaceError (base indisponible): le lot est
+      remis dans le tampon.
+    - Autre erreur: le lot est abandonne (compte dans dropped_logs).
+
+    Returns:
+        (logs inseres, buckets de metriques mis a jour)
+    """
+    from sqlalchemy.exc import DataError, IntegrityError, InterfaceError, OperationalError
+
+    from .models import GatewayRequestLog
+    from .repository import MetricsRepository
+
+    logs, buckets = buffer.drain()
+    if not logs and not buckets:
+        return 0, 0
+
+    by_tenant: Dict[str, List[MetricsBucket]] = defaultdict(list)
+    for bucket in buckets:
+        by_tenant[bucket.tenant_id].append(bucket)
+
+    def apply_buckets(db) -> None:
+        for tenant_id, tenant_buckets in by_tenant.items():
+            MetricsRepository(db, tenant_id).apply_buckets(tenant_buckets)
+
+    pending, applied = logs, buckets
+    db = None
+    try:
+        db = session_factory()
+        try:
+            if logs:
+                db.execute(GatewayRequestLog.__table__.insert(), logs)
+            apply_buckets(db)
+            db.commit()
+        except (IntegrityError, DataError):
+            db.rollback()
+            pending, rejected = _insert_logs_isolated(db, logs)
+            buffer.rejected_logs += rejected
+            try:
+                with db.begin_nested():
+                    apply_buckets(db)
+            except IntegrityError:
+                buffer.restore([], buckets)
+                applied = []
+            except DataError as e:
+                logger.error("[GATEWAY] Metriques horaires abandonnees: %s", e.orig)
+                applied = []
+            db.commit()
+    except (OperationalError, InterfaceError):
+        if db is not None:
+            db.rollback()
+        buffer.restore(pending, applied)
+        raise
+    except Exception:
+        if db is not None:
+            db.rollback()
+        buffer.dropped_logs += len(pending)
+        raise
+    finally:
+        if db is not None:
+            db.close()
+    return len(pending), len(applied)
+
+
+class MetricsFlusher(BackgroundFlusher):
+    """Thread de fond qui reporte le tampon par intervalle ou par taille."""
+
+    def __init__(self, buffer: RequestMetricsBuffer, session_factory: Callable,
+                 interval: float = METRICS_FLUSH_INTERVAL):
+        self.buffer = buffer
+        self.session_factory = session_factory
+        super().__init__(
+            lambda: flush_request_metrics(self.buffer, self.session_factory),
+            interval,
+            trigger=buffer.flush_requested,
+            name="gateway-metrics-flusher",
+            failure_result=(0, 0),
+            log=logger,
+            error_message="[GATEWAY] Report des logs / metriques en echec: %s",
+        )
+
+
+# ============================================================================
+# INSTANCES GLOBALES
+# ============================================================================
+
+_buffer = RequestMetricsBuffer()
+_flusher: Optional[MetricsFlusher] = None
+
+
+def get_metrics_buffer() -> RequestMetricsBuffer:
+    """Retourne le tampon global du processus."""
+    return _buffer
+
+
+def start_metrics_flusher(session_factory: Optional[Callable] = None) -> MetricsFlusher:
+    """Demarre le report periodique des logs et metriques (lifespan de l'application)."""
+    global _flusher
+    if _flusher is None:
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+        _flusher = MetricsFlusher(_buffer, session_factory)
+        _flusher.start()
+    return _flusher
+
+
+def stop_metrics_flusher() -> None:
+    """Arrete le report periodique (dernier report inclus)."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
@@ -842,6 +842,9 @@ class GatewayMetrics(Base):
     # Par methode (JSON)
     requests_by_method = Column(Text, nullable=True)
 
+    # Histogramme des temps de reponse (JSON, voir metrics_buffer.LatencyHistogram)
+    latency_histogram = Column(Text, nullable=True)
+
     # Timestamp
     created_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
     updated_at = Column(DateTime, nullable=False, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -11,6 +11,7 @@ from __future__ import annotations
 import json
 import logging
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
 from uuid import UUID
 
@@ -548,6 +549,59 @@ class QuotaUsageRepository(GatewayBaseRepository[GatewayQuotaUsage]):
         self.db.commit()
         return quota
 
+    def apply_deltas(self, deltas: List[Tuple[Any, Any]]) -> None:
+        """
+        Ajoute les increments reportes par le moteur de compteurs.
+
+        Une ecriture par (cle, periode) et par lot, lignes verrouillees le
+        temps du report. Pas de commit: transaction du QuotaFlusher.
+
+        Args:
+            deltas: Liste de (QuotaWindow, QuotaTotals)
+        """
+        by_key = {
+            (UUID(window.api_key_id), QuotaPeriod(window.period), window.start): (window, delta)
+            for window, delta in deltas
+        }
+        existing = {
+            (quota.api_key_id, quota.period, quota.period_start): quota
+            for quota in self._base_query().filter(
+                GatewayQuotaUsage.api_key_id.in_({key[0] for key in by_key}),
+                GatewayQuotaUsage.period_start.in_({key[2] for key in by_key})
+            ).with_for_update()
+        }
+
+        now = datetime.utcnow()
+        for key, (window, delta) in by_key.items():
+            quota = existing.get(key)
+            if quota is None:
+                quota = GatewayQuotaUsage(
+                    tenant_id=self.tenant_id,
+                    api_key_id=key[0],
+                    period=key[1],
+                    period_start=window.start,
+                    period_end=window.end,
+                    requests_limit=window.limit,
+                    requests_count=0,
+                    bytes_in=0,
+                    bytes_out=0,
+                    error_count=0,
+                    is_exceeded=False,
+                    overage_count=0
+                )
+                self.db.add(quota)
+
+            quota.requests_count += delta.requests
+            quota.bytes_in += delta.bytes_in
+            quota.bytes_out += delta.bytes_out
+            quota.error_count += delta.errors
+
+            if quota.requests_count >= quota.requests_limit:
+                if not quota.is_exceeded:
+                    quota.is_exceeded = True
+                    quota.exceeded_at = now
+                quota.overage_count = quota.requests_count - quota.requests_limit
+
 
 # ============================================================================
 # RATE LIMIT STATE REPOSITORY
@@ -833,6 +887,80 @@ class MetricsRepository(GatewayBaseRepository[GatewayMetrics]):
 
         return metrics
 
+    def apply_buckets(self, buckets: List[Any]) -> None:
+        """
+        Ajoute les cumuls horaires reportes par le tampon de metriques.
+
+        Une ecriture par heure et par lot, lignes verrouillees le temps du
+        report; les blobs JSON ne sont relus qu'une fois par lot. Pas de
+        commit: transaction du MetricsFlusher.
+
+        Args:
+            buckets: Liste de MetricsBucket (metriques globales du tenant)
+        """
+        from .metrics_buffer import LatencyHistogram
+
+        existing = {
+            metrics.period_start: metrics
+            for metrics in self._base_query().filter(
+                GatewayMetrics.period_type == "hour",
+                GatewayMetrics.period_start.in_({bucket.period_start for bucket in buckets}),
+                GatewayMetrics.api_key_id.is_(None),
+                GatewayMetrics.endpoint_id.is_(None)
+            ).with_for_update()
+        }
+
+        for bucket in buckets:
+            metrics = existing.get(bucket.period_start)
+            if metrics is None:
+                metrics = GatewayMetrics(
+                    tenant_id=self.tenant_id,
+                    period_type="hour",
+                    period_start=bucket.period_start,
+                    period_end=bucket.period_start + timedelta(hours=1),
+                    total_requests=0,
+                    successful_requests=0,
+                    failed_requests=0,
+                    throttled_requests=0,
+                    cached_requests=0,
+                    total_bytes_in=0,
+                    total_bytes_out=0,
+                    error_4xx_count=0,
+                    error_5xx_count=0
+                )
+                self.db.add(metrics)
+                existing[bucket.period_start] = metrics
+
+            metrics.total_requests += bucket.total_requests
+            metrics.successful_requests += bucket.successful_requests
+            metrics.failed_requests += bucket.failed_requests
+            metrics.throttled_requests += bucket.throttled_requests
+            metrics.cached_requests += bucket.cached_requests
+            metrics.total_bytes_in += bucket.total_bytes_in
+            metrics.total_bytes_out += bucket.total_bytes_out
+            metrics.error_4xx_count += bucket.error_4xx_count
+            metrics.error_5xx_count += bucket.error_5xx_count
+
+            for column, counts in (
+                ("requests_by_status", bucket.by_status),
+                ("requests_by_endpoint", bucket.by_endpoint),
+                ("requests_by_method", bucket.by_method),
+            ):
+                merged = json.loads(getattr(metrics, column) or '{}')
+                for key, count in counts.items():
+                    merged[key] = merged.get(key, 0) + count
+                setattr(metrics, column, json.dumps(merged))
+
+            histogram = LatencyHistogram.from_json(metrics.latency_histogram)
+            histogram.merge(bucket.latency)
+            metrics.latency_histogram = histogram.to_json()
+            metrics.avg_response_time = Decimal(str(round(histogram.mean, 2)))
+            metrics.min_response_time = histogram.min
+            metrics.max_response_time = histogram.max
+            metrics.p50_response_time = histogram.percentile(50)
+            metrics.p95_response_time = histogram.percentile(95)
+            metrics.p99_response_time = histogram.percentile(99)
+
     def list_for_range(
         self,
         period_type: str,
@@ -23,7 +23,6 @@ import logging
 import secrets
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
@@ -33,6 +32,8 @@ from sqlalchemy.orm import Session
 from app.core.base_service import BaseService
 from app.core.saas_context import Result, SaaSContext
 
+from .counters import CounterDecision, CounterEngine, QuotaTotals, QuotaWindow, get_counter_engine
+from .metrics_buffer import LatencyHistogram, RequestMetricsBuffer, get_metrics_buffer
 from .exceptions import (
     AuthenticationError,
     AuthorizationError,
@@ -68,7 +69,6 @@ from .models import (
     GatewayOAuthClient,
     GatewayOAuthToken,
     GatewayQuotaUsage,
-    GatewayRateLimitState,
     GatewayRequestLog,
     GatewayTransformation,
     GatewayWebhook,
@@ -163,12 +163,24 @@ class GatewayService:
     - Metriques et logs
     """
 
-    def __init__(self, db: Session, context: SaaSContext):
+    def __init__(
+        self,
+        db: Session,
+        context: SaaSContext,
+        counters: Optional[CounterEngine] = None,
+        metrics_buffer: Optional[RequestMetricsBuffer] = None
+    ):
         self.db = db
         self.context = context
         self.tenant_id = context.tenant_id
         self.user_id = context.user_id
 
+        # Compteurs de rate limiting et quotas (Redis ou memoire)
+        self._counters = counters or get_counter_engine()
+
+        # Logs de requetes et metriques horaires, reportes en base par lots
+        self._metrics_buffer = metrics_buffer if metrics_buffer is not None else get_metrics_buffer()
+
         # Repositories
         self._plan_repo = ApiPlanRepository(db, self.tenant_id)
         self._key_repo = ApiKeyRepository(db, self.tenant_id)
@@ -515,7 +527,8 @@ class GatewayService:
     ) -> ThrottleDecision:
         """
         Verifie le rate limiting pour une requete.
-        Utilise la strategie du plan.
+        Utilise la strategie du plan; verification et increment atomiques
+        dans le moteur de compteurs (aucune ecriture en base).
         """
         plan = self._plan_repo.get_active(api_key.plan_id)
         if not plan:
@@ -524,222 +537,119 @@ class GatewayService:
         # Determiner le pattern
         endpoint_pattern = endpoint.path_pattern if endpoint else "*"
 
-        # Obtenir ou creer l'etat
-        state = self._ratelimit_repo.get_or_create_state(
-            api_key.id,
-            endpoint_pattern,
-            float(plan.requests_per_minute)
+        strategy = plan.rate_limit_strategy or RateLimitStrategy.FIXED_WINDOW
+        decision = self._counters.hit(
+            f"{self.tenant_id}:{api_key.id}:{endpoint_pattern}",
+            strategy.value,
+            limit=plan.requests_per_minute,
+            burst=plan.burst_limit
         )
+        return self._to_throttle_decision(decision, strategy, plan)
 
-        # Appliquer la strategie
-        if plan.rate_limit_strategy == RateLimitStrategy.FIXED_WINDOW:
-            return self._check_fixed_window(state, plan)
-        elif plan.rate_limit_strategy == RateLimitStrategy.SLIDING_WINDOW:
-            return self._check_sliding_window(state, plan)
-        elif plan.rate_limit_strategy == RateLimitStrategy.TOKEN_BUCKET:
-            return self._check_token_bucket(state, plan)
-        elif plan.rate_limit_strategy == RateLimitStrategy.LEAKY_BUCKET:
-            return self._check_leaky_bucket(state, plan)
-
-        return ThrottleDecision(allowed=True, action="ALLOW")
-
-    def _check_fixed_window(
+    def _to_throttle_decision(
         self,
-        state: GatewayRateLimitState,
+        decision: CounterDecision,
+        strategy: RateLimitStrategy,
         plan: GatewayApiPlan
     ) -> ThrottleDecision:
-        """Strategie fenetre fixe."""
-        now = datetime.utcnow()
-        window_end = state.window_start + timedelta(seconds=60)  # 1 minute window
-
-        # Nouvelle fenetre?
-        if now >= window_end:
-            state.window_start = now
-            state.request_count = 0
-
-        # Verifier la limite
-        if state.request_count >= plan.requests_per_minute:
-            retry_after = int((window_end - now).total_seconds())
+        """Traduit le resultat du moteur de compteurs."""
+        reset = datetime.utcfromtimestamp(decision.reset_at_ms / 1000) if decision.reset_at_ms else None
+
+        if not decision.allowed:
+            reasons = {
+                RateLimitStrategy.FIXED_WINDOW: "Rate limit exceeded",
+                RateLimitStrategy.SLIDING_WINDOW: "Rate limit exceeded (sliding window)",
+                RateLimitStrategy.TOKEN_BUCKET: "Rate limit exceeded (token bucket)",
+                RateLimitStrategy.LEAKY_BUCKET: "Rate limit exceeded (leaky bucket full)",
+            }
+            retry_after = 0
+            if strategy != RateLimitStrategy.LEAKY_BUCKET:
+                retry_after = max(1, -(-decision.retry_after_ms // 1000))
             return ThrottleDecision(
                 allowed=False,
                 action="REJECT",
-                retry_after_seconds=max(1, retry_after),
-                reason="Rate limit exceeded",
+                retry_after_seconds=retry_after,
+                reason=reasons[strategy],
                 rate_limit=plan.requests_per_minute,
                 rate_limit_remaining=0,
-                rate_limit_reset=window_end
-            )
-
-        # Incrementer
-        state.request_count += 1
-        self.db.commit()
-
-        return ThrottleDecision(
-            allowed=True,
-            action="ALLOW",
-            rate_limit=plan.requests_per_minute,
-            rate_limit_remaining=plan.requests_per_minute - state.request_count,
-            rate_limit_reset=window_end
-        )
-
-    def _check_sliding_window(
-        self,
-        state: GatewayRateLimitState,
-        plan: GatewayApiPlan
-    ) -> ThrottleDecision:
-        """Strategie fenetre glissante."""
-        now = datetime.utcnow()
-        window_start = now - timedelta(seconds=60)
-
-        # Compter les requetes dans la fenetre
-        current_count = state.request_count
-
-        if state.window_start < window_start:
-            # Recalculer proportionnellement
-            elapsed = (now - state.window_start).total_seconds()
-            if elapsed > 0:
-                decay_ratio = max(0, 1 - (elapsed / 60))
-                current_count = int(state.request_count * decay_ratio)
-
-        # Verifier la limite
-        if current_count >= plan.requests_per_minute:
-            return ThrottleDecision(
-                allowed=False,
-                action="REJECT",
-                retry_after_seconds=1,
-                reason="Rate limit exceeded (sliding window)",
-                rate_limit=plan.requests_per_minute,
-                rate_limit_remaining=0
+                rate_limit_reset=reset
             )
 
-        # Mettre a jour
-        state.request_count = current_count + 1
-        state.window_start = now
-        self.db.commit()
-
-        return ThrottleDecision(
-            allowed=True,
-            action="ALLOW",
-            rate_limit=plan.requests_per_minute,
-            rate_limit_remaining=max(0, plan.requests_per_minute - state.request_count)
-        )
-
-    def _check_token_bucket(
-        self,
-        state: GatewayRateLimitState,
-        plan: GatewayApiPlan
-    ) -> ThrottleDecision:
-        """Strategie token bucket."""
-        now = datetime.utcnow()
-
-        # Calculer les tokens a ajouter
-        elapsed = (now - state.last_refill).total_seconds()
-        refill_rate = plan.requests_per_minute / 60.0  # tokens par seconde
-        tokens_to_add = elapsed * refill_rate
-
-        # Mettre a jour les tokens
-        max_tokens = plan.burst_limit
-        state.tokens_remaining = min(
-            Decimal(str(max_tokens)),
-            Decimal(str(float(state.tokens_remaining) + tokens_to_add))
-        )
-        state.last_refill = now
-
-        # Verifier si on peut consommer un token
-        if state.tokens_remaining < 1:
-            wait_time = (1 - float(state.tokens_remaining)) / refill_rate
+        # Leaky bucket: delai si le bucket n'est pas vide (max 5 secondes)
+        if 0 < decision.delay_ms < 5000:
             return ThrottleDecision(
-                allowed=False,
-                action="REJECT",
-                retry_after_seconds=int(wait_time) + 1,
-                reason="Rate limit exceeded (token bucket)",
+                allowed=True,
+                action="DELAY",
+                delay_ms=decision.delay_ms,
                 rate_limit=plan.requests_per_minute,
-                rate_limit_remaining=0
+                rate_limit_remaining=decision.remaining
             )
 
-        # Consommer un token
-        state.tokens_remaining = state.tokens_remaining - 1
-        self.db.commit()
-
         return ThrottleDecision(
             allowed=True,
             action="ALLOW",
             rate_limit=plan.requests_per_minute,
-            rate_limit_remaining=int(state.tokens_remaining)
+            rate_limit_remaining=decision.remaining,
+            rate_limit_reset=reset
         )
 
-    def _check_leaky_bucket(
-        self,
-        state: GatewayRateLimitState,
-        plan: GatewayApiPlan
-    ) -> ThrottleDecision:
-        """Strategie leaky bucket (ajoute un delai)."""
+    def _quota_windows(self, api_key_id: UUID, plan: GatewayApiPlan) -> List[QuotaWindow]:
+        """Periodes de quota courantes d'une cle."""
         now = datetime.utcnow()
+        periods = [
+            (QuotaPeriod.MINUTE, plan.requests_per_minute),
+            (QuotaPeriod.HOUR, plan.requests_per_hour),
+            (QuotaPeriod.DAY, plan.requests_per_day),
+            (QuotaPeriod.MONTH, plan.requests_per_month),
+        ]
 
-        # Calculer le "niveau" du bucket
-        elapsed = (now - state.last_refill).total_seconds()
-        leak_rate = plan.requests_per_minute / 60.0
-
-        leaked = elapsed * leak_rate
-        state.tokens_remaining = max(
-            Decimal(0),
-            Decimal(str(float(state.tokens_remaining) - leaked))
-        )
-        state.last_refill = now
-
-        max_bucket = plan.burst_limit
-
-        if float(state.tokens_remaining) >= max_bucket:
-            return ThrottleDecision(
-                allowed=False,
-                action="REJECT",
-                reason="Rate limit exceeded (leaky bucket full)",
-                rate_limit=plan.requests_per_minute,
-                rate_limit_remaining=0
-            )
-
-        # Calculer le delai
-        delay_ms = 0
-        if float(state.tokens_remaining) > 0:
-            delay_ms = int((float(state.tokens_remaining) / leak_rate) * 1000)
-
-        state.tokens_remaining = state.tokens_remaining + 1
-        self.db.commit()
-
-        if delay_ms > 0 and delay_ms < 5000:  # Max 5 secondes de delai
-            return ThrottleDecision(
-                allowed=True,
-                action="DELAY",
-                delay_ms=delay_ms,
-                rate_limit=plan.requests_per_minute,
-                rate_limit_remaining=int(max_bucket - float(state.tokens_remaining))
-            )
-
-        return ThrottleDecision(
-            allowed=True,
-            action="ALLOW",
-            rate_limit=plan.requests_per_minute,
-            rate_limit_remaining=int(max_bucket - float(state.tokens_remaining))
-        )
+        windows = []
+        for period, limit in periods:
+            start, end = self._quota_repo._calculate_period_bounds(now, period)
+            windows.append(QuotaWindow(self.tenant_id, str(api_key_id), period.value, start, end, limit))
+        return windows
 
     def check_quota(
         self,
         api_key: GatewayApiKey,
         plan: GatewayApiPlan
     ) -> Result[Dict[QuotaPeriod, GatewayQuotaUsage]]:
-        """Verifie les quotas pour toutes les periodes."""
+        """
+        Verifie les quotas pour toutes les periodes.
+
+        Les totaux viennent du moteur de compteurs; la base n'est lue qu'a la
+        premiere requete d'une periode (reprise des totaux deja reportes).
+        """
         quotas = {}
         exceeded = None
 
-        periods = [
-            (QuotaPeriod.MINUTE, plan.requests_per_minute),
-            (QuotaPeriod.HOUR, plan.requests_per_hour),
-            (QuotaPeriod.DAY, plan.requests_per_day),
-            (QuotaPeriod.MONTH, plan.requests_per_month),
-        ]
+        windows = self._quota_windows(api_key.id, plan)
+        totals = self._counters.quota_totals(windows)
 
-        for period, limit in periods:
-            quota = self._quota_repo.get_or_create_current(api_key.id, period, limit)
+        for window, total in zip(windows, totals):
+            period = QuotaPeriod(window.period)
+            if total is None:
+                quota = self._quota_repo.get_or_create_current(api_key.id, period, window.limit)
+                self._counters.seed_quota(window, QuotaTotals(
+                    quota.requests_count or 0, quota.bytes_in or 0, quota.bytes_out or 0, quota.error_count or 0
+                ))
+            else:
+                # Vue non persistee: le QuotaFlusher reporte les totaux en base
+                is_exceeded = total.requests >= window.limit
+                quota = GatewayQuotaUsage(
+                    tenant_id=self.tenant_id,
+                    api_key_id=api_key.id,
+                    period=period,
+                    period_start=window.start,
+                    period_end=window.end,
+                    requests_count=total.requests,
+                    requests_limit=window.limit,
+                    bytes_in=total.bytes_in,
+                    bytes_out=total.bytes_out,
+                    error_count=total.errors,
+                    is_exceeded=is_exceeded,
+                    overage_count=max(0, total.requests - window.limit)
+                )
             quotas[period] = quota
 
             if quota.is_exceeded and exceeded is None:
@@ -761,7 +671,7 @@ class GatewayService:
         bytes_out: int = 0,
         is_error: bool = False
     ) -> None:
-        """Incremente l'utilisation des quotas."""
+        """Incremente l'utilisation des quotas (moteur de compteurs, report en base par lots)."""
         plan = None
         api_key = self._key_repo.get_by_id(api_key_id)
         if api_key:
@@ -770,17 +680,9 @@ class GatewayService:
         if not plan:
             return
 
-        periods = [
-            (QuotaPeriod.MINUTE, plan.requests_per_minute),
-            (QuotaPeriod.HOUR, plan.requests_per_hour),
-            (QuotaPeriod.DAY, plan.requests_per_day),
-            (QuotaPeriod.MONTH, plan.requests_per_month),
-        ]
-
-        for period, limit in periods:
-            self._quota_repo.increment_usage(
-                api_key_id, period, limit, bytes_in, bytes_out, is_error
-            )
+        self._counters.increment_quota(
+            self._quota_windows(api_key_id, plan), bytes_in, bytes_out, is_error
+        )
 
     # ========================================================================
     # CIRCUIT BREAKER
@@ -1429,33 +1331,37 @@ class GatewayService:
         error_code: Optional[str] = None,
         error_message: Optional[str] = None
     ) -> GatewayRequestLog:
-        """Enregistre une requete."""
-        log = GatewayRequestLog(
-            tenant_id=self.tenant_id,
-            api_key_id=ctx.api_key.id if ctx.api_key else None,
-            endpoint_id=ctx.endpoint.id if ctx.endpoint else None,
-            method=ctx.method,
-            path=ctx.path,
-            client_ip=ctx.client_ip,
-            user_agent=ctx.user_agent,
-            origin=ctx.origin,
-            status_code=status_code,
-            response_body_size=response_body_size,
-            response_time_ms=response_time_ms,
-            rate_limit_remaining=throttle_decision.rate_limit_remaining if throttle_decision else None,
-            rate_limit_reset=throttle_decision.rate_limit_reset if throttle_decision else None,
-            was_throttled=throttle_decision.action == "REJECT" if throttle_decision else False,
-            error_code=error_code,
-            error_message=error_message,
-            correlation_id=ctx.correlation_id
-        )
-
-        self.db.add(log)
-        self.db.commit()
-        self.db.refresh(log)
+        """
+        Enregistre une requete.
 
-        # Mettre a jour les metriques
-        self._update_metrics(log)
+        Le log et les metriques horaires sont cumules dans le tampon
+        d'agregation et ecrits en base par MetricsFlusher; le log retourne
+        n'est pas attache a la session.
+        """
+        row = {
+            "id": uuid4(),
+            "tenant_id": self.tenant_id,
+            "api_key_id": ctx.api_key.id if ctx.api_key else None,
+            "endpoint_id": ctx.endpoint.id if ctx.endpoint else None,
+            "method": ctx.method,
+            "path": ctx.path,
+            "client_ip": ctx.client_ip,
+            "user_agent": ctx.user_agent,
+            "origin": ctx.origin,
+            "status_code": status_code,
+            "request_body_size": 0,
+            "response_body_size": response_body_size,
+            "response_time_ms": response_time_ms,
+            "rate_limit_remaining": throttle_decision.rate_limit_remaining if throttle_decision else None,
+            "rate_limit_reset": throttle_decision.rate_limit_reset if throttle_decision else None,
+            "was_throttled": throttle_decision.action == "REJECT" if throttle_decision else False,
+            "was_cached": False,
+            "error_code": error_code,
+            "error_message": error_message,
+            "correlation_id": ctx.correlation_id,
+            "timestamp": datetime.utcnow()
+        }
+        self._metrics_buffer.record(row)
 
         # Mettre a jour last_used sur la cle
         if ctx.api_key:
@@ -1470,62 +1376,7 @@ class GatewayService:
                 is_error=status_code >= 400
             )
 
-        return log
-
-    def _update_metrics(self, log: GatewayRequestLog) -> None:
-        """Met a jour les metriques agregees."""
-        now = datetime.utcnow()
-        hour_start = now.replace(minute=0, second=0, microsecond=0)
-        hour_end = hour_start + timedelta(hours=1)
-
-        metrics = self._metrics_repo.get_or_create_for_period(
-            "hour", hour_start, hour_end
-        )
-
-        metrics.total_requests += 1
-
-        if 200 <= log.status_code < 400:
-            metrics.successful_requests += 1
-        else:
-            metrics.failed_requests += 1
-            if 400 <= log.status_code < 500:
-                metrics.error_4xx_count += 1
-            else:
-                metrics.error_5xx_count += 1
-
-        if log.was_throttled:
-            metrics.throttled_requests += 1
-
-        if log.was_cached:
-            metrics.cached_requests += 1
-
-        metrics.total_bytes_out += log.response_body_size
-
-        # Moyenne temps de reponse
-        total_time = float(metrics.avg_response_time) * (metrics.total_requests - 1)
-        metrics.avg_response_time = Decimal(str((total_time + log.response_time_ms) / metrics.total_requests))
-
-        if log.response_time_ms < metrics.min_response_time or metrics.min_response_time == 0:
-            metrics.min_response_time = log.response_time_ms
-        if log.response_time_ms > metrics.max_response_time:
-            metrics.max_response_time = log.response_time_ms
-
-        # Par status
-        by_status = json.loads(metrics.requests_by_status or '{}')
-        by_status[str(log.status_code)] = by_status.get(str(log.status_code), 0) + 1
-        metrics.requests_by_status = json.dumps(by_status)
-
-        # Par endpoint
-        by_endpoint = json.loads(metrics.requests_by_endpoint or '{}')
-        by_endpoint[log.path] = by_endpoint.get(log.path, 0) + 1
-        metrics.requests_by_endpoint = json.dumps(by_endpoint)
-
-        # Par methode
-        by_method = json.loads(metrics.requests_by_method or '{}')
-        by_method[log.method.value] = by_method.get(log.method.value, 0) + 1
-        metrics.requests_by_method = json.dumps(by_method)
-
-        self.db.commit()
+        return GatewayRequestLog(**row)
 
     def get_request_logs(
         self,
@@ -1573,7 +1424,16 @@ class GatewayService:
     def get_dashboard_stats(self) -> Result[Dict[str, Any]]:
         """Recupere les statistiques du dashboard."""
         stats_24h = self._log_repo.count_24h()
-        since_24h = datetime.utcnow() - timedelta(hours=24)
+        now = datetime.utcnow()
+        since_24h = now - timedelta(hours=24)
+
+        # p95 sur 24h: fusion des histogrammes horaires
+        latency = LatencyHistogram()
+        for metrics in self._metrics_repo.list_for_range(
+            "hour", since_24h.replace(minute=0, second=0, microsecond=0), now + timedelta(hours=1)
+        ):
+            if metrics.api_key_id is None and metrics.endpoint_id is None:
+                latency.merge(LatencyHistogram.from_json(metrics.latency_histogram))
 
         stats = {
             "total_plans": self._plan_repo.count_active(),
@@ -1591,7 +1451,7 @@ class GatewayService:
             "failed_requests_24h": stats_24h["failed"],
             "throttled_requests_24h": stats_24h["throttled"],
             "avg_response_time_24h": self._log_repo.get_avg_response_time(since_24h),
-            "p95_response_time_24h": 0,  # A calculer
+            "p95_response_time_24h": latency.percentile(95),
             "error_rate_24h": (stats_24h["failed"] / stats_24h["total"] * 100) if stats_24h["total"] > 0 else 0,
             "top_errors": [],  # A implementer
             "open_circuits": self._circuit_repo.count_open()
@@ -1775,6 +1635,11 @@ class GatewayService:
 # FACTORY
 # ============================================================================
 
-def create_gateway_service(db: Session, context: SaaSContext) -> GatewayService:
+def create_gateway_service(
+    db: Session,
+    context: SaaSContext,
+    counters: Optional[CounterEngine] = None,
+    metrics_buffer: Optional[RequestMetricsBuffer] = None
+) -> GatewayService:
     """Cree une instance du service Gateway."""
-    return GatewayService(db, context)
+    return GatewayService(db, context, counters, metrics_buffer)
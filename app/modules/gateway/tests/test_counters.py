@@ -0,0 +1,166 @@
+"""
+AZALS MODULE GATEWAY - Tests Compteurs
+========================================
+
+Tests du moteur de compteurs (stand-in memoire du script Lua Redis)
+et du report des quotas en base.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.gateway.counters import (
+    MemoryCounterEngine,
+    QuotaFlusher,
+    QuotaTotals,
+    QuotaWindow,
+    flush_quota_deltas,
+)
+from app.modules.gateway.models import GatewayQuotaUsage, QuotaPeriod
+
+T0 = 1_700_000_040_000  # Debut d'une fenetre de 60 s (ms)
+
+
+@pytest.fixture
+def engine():
+    return MemoryCounterEngine()
+
+
+def hits(engine, strategy, count, now, limit=60, burst=10, key="k"):
+    return [engine.hit(key, strategy, limit=limit, burst=burst, now_ms=now) for _ in range(count)]
+
+
+# ============================================================================
+# TESTS RATE LIMITING
+# ============================================================================
+
+class TestStrategies:
+    """Verification + increment atomiques par strategie."""
+
+    def test_fixed_window(self, engine):
+        decisions = hits(engine, "FIXED_WINDOW", 61, T0)
+
+        assert [d.allowed for d in decisions].count(True) == 60
+        assert decisions[-1].retry_after_ms == 60_000
+        assert engine.hit("k", "FIXED_WINDOW", 60, 10, now_ms=T0 + 60_000).allowed
+
+    def test_sliding_window_weights_previous_window(self, engine):
+        hits(engine, "SLIDING_WINDOW", 60, T0)
+
+        # A mi-fenetre suivante, la precedente compte pour moitie
+        decisions = hits(engine, "SLIDING_WINDOW", 31, T0 + 90_000)
+
+        assert [d.allowed for d in decisions].count(True) == 30
+        assert decisions[0].remaining == 29
+
+    def test_token_bucket_refill(self, engine):
+        decisions = hits(engine, "TOKEN_BUCKET", 11, T0)
+
+        assert [d.allowed for d in decisions].count(True) == 10
+        assert decisions[-1].retry_after_ms == 1000
+        # 1 jeton par seconde a 60 req/min
+        assert engine.hit("k", "TOKEN_BUCKET", 60, 10, now_ms=T0 + 1000).allowed
+
+    def test_leaky_bucket_delay(self, engine):
+        decisions = hits(engine, "LEAKY_BUCKET", 11, T0)
+
+        assert [d.allowed for d in decisions].count(True) == 10
+        assert decisions[0].delay_ms == 0
+        assert decisions[3].delay_ms == 3000
+
+    def test_concurrent_hits_never_exceed_limit(self, engine):
+        allowed = []
+
+        def worker():
+            for _ in range(50):
+                allowed.append(engine.hit("k", "FIXED_WINDOW", 100, 10, now_ms=T0).allowed)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert allowed.count(True) == 100
+
+
+# ============================================================================
+# TESTS QUOTAS
+# ============================================================================
+
+def make_window(api_key_id, period=QuotaPeriod.DAY, limit=1000):
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return QuotaWindow("tenant_test_123", str(api_key_id), period.value, start, start + timedelta(days=1), limit)
+
+
+class TestQuotas:
+    """Totaux de quotas et report en base."""
+
+    def test_member_roundtrip(self):
+        window = make_window(uuid4())
+
+        assert QuotaWindow.from_member(window.member) == window
+
+    def test_seed_does_not_overwrite(self, engine):
+        window = make_window(uuid4())
+        assert engine.quota_totals([window]) == [None]
+
+        engine.seed_quota(window, QuotaTotals(requests=5))
+        engine.increment_quota([window], bytes_in=10)
+        engine.seed_quota(window, QuotaTotals(requests=100))
+
+        assert engine.quota_totals([window])[0] == QuotaTotals(requests=6, bytes_in=10)
+
+    def test_flush_batches_increments(self, engine):
+        db_engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        GatewayQuotaUsage.__table__.create(bind=db_engine)
+        Session = sessionmaker(bind=db_engine)
+        api_key_id = uuid4()
+        window = make_window(api_key_id, limit=3)
+
+        for _ in range(2):
+            engine.increment_quota([window], bytes_in=100, is_error=True)
+        assert flush_quota_deltas(engine, Session) == 1
+        engine.increment_quota([window], bytes_out=7)
+        assert flush_quota_deltas(engine, Session) == 1
+        assert flush_quota_deltas(engine, Session) == 0
+
+        db = Session()
+        quota = db.query(GatewayQuotaUsage).one()
+        assert (quota.requests_count, quota.bytes_in, quota.bytes_out, quota.error_count) == (3, 200, 7, 2)
+        assert quota.is_exceeded
+        assert quota.period == QuotaPeriod.DAY
+        db.close()
+        db_engine.dispose()
+
+    def test_failed_flush_restores_deltas(self, engine):
+        window = make_window(uuid4())
+        engine.increment_quota([window])
+
+        def broken_session():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            flush_quota_deltas(engine, broken_session)
+
+        assert engine.drain_quota_deltas() == {window: QuotaTotals(requests=1)}
+
+    def test_flusher_swallows_failure(self, engine):
+        window = make_window(uuid4())
+        engine.increment_quota([window])
+
+        def broken_session():
+            raise RuntimeError("db down")
+
+        assert QuotaFlusher(engine, broken_session).flush() == 0
+        assert engine.drain_quota_deltas() == {window: QuotaTotals(requests=1)}
@@ -0,0 +1,218 @@
+"""
+AZALS MODULE GATEWAY - Tests Tampon de metriques
+=================================================
+
+Tests de l'histogramme des temps de reponse, du tampon d'agregation et du
+report par lots des logs et metriques horaires.
+"""
+
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.gateway.metrics_buffer import (
+    LatencyHistogram,
+    MetricsFlusher,
+    RequestMetricsBuffer,
+    flush_request_metrics,
+)
+from app.modules.gateway.models import GatewayMetrics, GatewayRequestLog, HttpMethod
+
+TENANT = "tenant_test_123"
+NOW = datetime(2026, 3, 4, 10, 15)
+
+
+@pytest.fixture
+def Session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    GatewayRequestLog.__table__.create(bind=engine)
+    GatewayMetrics.__table__.create(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def make_row(status_code=200, response_time_ms=40, path="/api/orders", timestamp=NOW, tenant_id=TENANT):
+    return {
+        "id": uuid4(),
+        "tenant_id": tenant_id,
+        "api_key_id": None,
+        "endpoint_id": None,
+        "method": HttpMethod.GET,
+        "path": path,
+        "client_ip": "192.168.1.1",
+        "user_agent": None,
+        "origin": None,
+        "status_code": status_code,
+        "request_body_size": 10,
+        "response_body_size": 100,
+        "response_time_ms": response_time_ms,
+        "rate_limit_remaining": None,
+        "rate_limit_reset": None,
+        "was_throttled": status_code == 429,
+        "was_cached": False,
+        "error_code": None,
+        "error_message": None,
+        "correlation_id": None,
+        "timestamp": timestamp
+    }
+
+
+# ============================================================================
+# TESTS HISTOGRAMME
+# ============================================================================
+
+class TestLatencyHistogram:
+    """Percentiles et serialisation."""
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(value)
+
+        assert (histogram.min, histogram.max, histogram.mean) == (1, 1000, 500.5)
+        assert histogram.percentile(50) == 500
+        assert histogram.percentile(95) == 1000
+
+    def test_single_value_and_overflow_are_exact(self):
+        histogram = LatencyHistogram()
+        histogram.record(37)
+        assert histogram.percentile(99) == 37
+
+        histogram.record(90_000)
+        assert histogram.percentile(99) == 90_000
+
+    def test_merge_and_json_roundtrip(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        for value in (5, 50, 500):
+            a.record(value)
+        for value in (3, 70_000):
+            b.record(value)
+
+        a.merge(LatencyHistogram.from_json(b.to_json()))
+
+        restored = LatencyHistogram.from_json(a.to_json())
+        assert restored.counts == a.counts
+        assert (restored.count, restored.total, restored.min, restored.max) == (5, 70_558, 3, 70_000)
+
+
+# ============================================================================
+# TESTS TAMPON ET REPORT
+# ============================================================================
+
+class TestFlush:
+    """Report par lots en base."""
+
+    def test_flush_inserts_logs_and_merges_hourly_metrics(self, Session):
+        buffer = RequestMetricsBuffer()
+        for status_code, latency in ((200, 10), (200, 30), (404, 20), (500, 900)):
+            buffer.record(make_row(status_code, latency))
+        assert flush_request_metrics(buffer, Session) == (4, 1)
+
+        buffer.record(make_row(201, 50, path="/api/clients"))
+        buffer.record(make_row(200, 40, timestamp=NOW.replace(hour=11)))
+        assert flush_request_metrics(buffer, Session) == (2, 2)
+        assert flush_request_metrics(buffer, Session) == (0, 0)
+
+        db = Session()
+        assert db.query(GatewayRequestLog).count() == 6
+        metrics = db.query(GatewayMetrics).filter(GatewayMetrics.period_start == NOW.replace(minute=0)).one()
+        assert (metrics.total_requests, metrics.successful_requests, metrics.failed_requests) == (5, 3, 2)
+        assert (metrics.error_4xx_count, metrics.error_5xx_count) == (1, 1)
+        assert (metrics.total_bytes_in, metrics.total_bytes_out) == (50, 500)
+        assert json.loads(metrics.requests_by_status) == {"200": 2, "201": 1, "404": 1, "500": 1}
+        assert json.loads(metrics.requests_by_endpoint) == {"/api/orders": 4, "/api/clients": 1}
+        assert json.loads(metrics.requests_by_method) == {"GET": 5}
+        assert float(metrics.avg_response_time) == 202.0
+        assert (metrics.min_response_time, metrics.max_response_time) == (10, 900)
+        assert (metrics.p50_response_time, metrics.p99_response_time) == (30, 900)
+        db.close()
+
+    def test_failed_flush_restores_batch(self, Session):
+        buffer = RequestMetricsBuffer()
+        buffer.record(make_row())
+
+        def broken_session():
+            raise OperationalError("connect", {}, Exception("db down"))
+
+        with pytest.raises(OperationalError):
+            flush_request_metrics(buffer, broken_session)
+        buffer.record(make_row(500))
+
+        assert flush_request_metrics(buffer, Session) == (2, 1)
+        db = Session()
+        assert db.query(GatewayMetrics).one().total_requests == 2
+        db.close()
+
+    def test_invalid_rows_rejected_not_retried(self, Session):
+        buffer = RequestMetricsBuffer()
+        duplicate = make_row()
+        buffer.record(duplicate)
+        assert flush_request_metrics(buffer, Session) == (1, 1)
+
+        # Ligne en violation de contrainte (ici cle primaire deja inseree)
+        buffer.record(dict(duplicate))
+        buffer.record(make_row(404))
+        assert flush_request_metrics(buffer, Session) == (1, 1)
+        assert buffer.rejected_logs == 1
+        assert len(buffer) == 0
+
+        buffer.record(make_row(500))
+        assert flush_request_metrics(buffer, Session) == (1, 1)
+        db = Session()
+        assert db.query(GatewayRequestLog).count() == 3
+        assert db.query(GatewayMetrics).one().total_requests == 4
+        db.close()
+
+    def test_unexpected_error_drops_batch(self):
+        buffer = RequestMetricsBuffer()
+        buffer.record(make_row())
+
+        def broken_session():
+            raise RuntimeError("bug")
+
+        with pytest.raises(RuntimeError):
+            flush_request_metrics(buffer, broken_session)
+        assert len(buffer) == 0
+        assert buffer.dropped_logs == 1
+
+    def test_restore_keeps_buffer_bounded(self):
+        buffer = RequestMetricsBuffer(max_pending=1)
+        for _ in range(15):
+            buffer.record(make_row())
+        logs, buckets = buffer.drain()
+        for _ in range(10):
+            buffer.record(make_row())
+
+        buffer.restore(logs, buckets)
+
+        assert len(buffer) == 20
+        assert buffer.dropped_logs == 5
+        assert buffer.drain()[1][0].total_requests == 25
+
+    def test_flusher_drains_buffer(self, Session):
+        buffer = RequestMetricsBuffer(max_pending=3)
+        flusher = MetricsFlusher(buffer, Session, interval=60)
+        assert flusher.trigger is buffer.flush_requested
+        for _ in range(3):
+            buffer.record(make_row())
+        assert buffer.flush_requested.is_set()
+
+        assert flusher.flush() == (3, 1)
+        assert len(buffer) == 0
+
+        def broken_session():
+            raise RuntimeError("db down")
+
+        buffer.record(make_row())
+        assert MetricsFlusher(buffer, broken_session).flush() == (0, 0)
+        assert buffer.dropped_logs == 1
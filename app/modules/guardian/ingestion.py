@@ -0,0 +1,295 @@
+"""
+AZALS MODULE GUARDIAN - Ingestion asynchrone des erreurs
+========================================================
+
+Le middleware n'ouvre plus de session ni n'ecrit en base dans dispatch
+(boucle asyncio): chaque reponse 4xx/5xx ou exception est ajoutee a une file
+en memoire, sans E/S.
+
+Les erreurs sont regroupees par empreinte (tenant, modele de route, methode,
+status HTTP, type d'exception): une rafale de 401 d'un client defaillant ne
+produit qu'un agregat avec un compteur, dont l'echantillon (message, stack
+trace) n'est construit qu'a la premiere occurrence.
+
+ErrorIngestionFlusher vide la file toutes les GUARDIAN_INGESTION_FLUSH_SECONDS
+ou des que GUARDIAN_INGESTION_BUFFER_SIZE empreintes sont en attente: une
+session, une lecture des configurations, une lecture des erreurs deja connues
+et un commit par tenant.
+
+GuardianConfig.is_enabled est garde en cache par tenant (GuardianConfigCache):
+le middleware ignore sans E/S les tenants desactives deja connus.
+
+Usage:
+    from app.modules.guardian.ingestion import get_error_queue
+
+    get_error_queue().record(key, build_sample)
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from app.core.background_flusher import BackgroundFlusher, FlushTrigger
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de report en base (secondes), soit la fenetre d'agregation
+INGESTION_FLUSH_INTERVAL = float(os.environ.get("GUARDIAN_INGESTION_FLUSH_SECONDS", "5"))
+
+# Nombre d'empreintes en attente declenchant un report anticipe
+INGESTION_BUFFER_SIZE = int(os.environ.get("GUARDIAN_INGESTION_BUFFER_SIZE", "200"))
+
+# Au-dela (base indisponible), les nouvelles empreintes sont abandonnees; les
+# occurrences des empreintes deja en attente continuent d'etre comptees
+INGESTION_BUFFER_LIMIT_FACTOR = 20
+
+# Duree de validite de GuardianConfig.is_enabled en cache (secondes)
+CONFIG_CACHE_TTL = float(os.environ.get("GUARDIAN_CONFIG_CACHE_SECONDS", "60"))
+
+# (tenant, modele de route, methode, status HTTP, type d'exception)
+ErrorKey = Tuple[str, Optional[str], str, int, Optional[str]]
+
+
+# ============================================================================
+# CACHE DE CONFIGURATION
+# ============================================================================
+
+class GuardianConfigCache:
+    """Cache par tenant de GuardianConfig.is_enabled (tenant sans config: desactive)."""
+
+    def __init__(self, ttl: float = CONFIG_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[bool, float]] = {}
+
+    def get(self, tenant_id: str) -> Optional[bool]:
+        """Etat connu du tenant, None si absent ou expire (aucune E/S)."""
+        entry = self._entries.get(tenant_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def load(self, db, tenant_ids) -> Dict[str, bool]:
+        """Etat des tenants; les inconnus sont lus en une requete."""
+        from .models import GuardianConfig
+
+        states = {tenant_id: self.get(tenant_id) for tenant_id in tenant_ids}
+        missing = [tenant_id for tenant_id, enabled in states.items() if enabled is None]
+        if missing:
+            rows = dict(db.query(GuardianConfig.tenant_id, GuardianConfig.is_enabled).filter(
+                GuardianConfig.tenant_id.in_(missing)
+            ).all())
+            now = time.monotonic()
+            with self._lock:
+                for tenant_id in missing:
+                    states[tenant_id] = bool(rows.get(tenant_id, False))
+                    self._entries[tenant_id] = (states[tenant_id], now)
+        return states
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
+
+
+# ============================================================================
+# FILE D'INGESTION
+# ============================================================================
+
+@dataclass
+class ErrorAggregate:
+    """Occurrences d'une meme empreinte en attente de report."""
+    tenant_id: str
+    sample: Any  # ErrorDetectionCreate de la premiere occurrence
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
+    def merge(self, other: "ErrorAggregate") -> None:
+        self.count += other.count
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+
+
+class GuardianErrorQueue:
+    """File thread-safe des erreurs, agregees par empreinte."""
+
+    def __init__(self, max_pending: int = INGESTION_BUFFER_SIZE):
+        self.max_pending = max_pending
+        self.flush_requested = FlushTrigger(max_pending)
+        self.dropped_errors = 0
+        self._lock = threading.Lock()
+        self._aggregates: Dict[ErrorKey, ErrorAggregate] = {}
+
+    def __len__(self) -> int:
+        return len(self._aggregates)
+
+    def record(self, key: ErrorKey, build: Callable[[], Any], now: Optional[datetime] = None) -> None:
+        """
+        Compte une occurrence de l'empreinte key (tenant en premier element).
+
+        build() construit l'echantillon (ErrorDetectionCreate); il n'est
+        appele que pour une empreinte absente de la file.
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is not None:
+                aggregate.count += 1
+                aggregate.last_seen = now
+                return
+            if len(self._aggregates) >= self.max_pending * INGESTION_BUFFER_LIMIT_FACTOR:
+                self.dropped_errors += 1
+                return
+
+        sample = build()
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                self._aggregates[key] = ErrorAggregate(key[0], sample, 1, now, now)
+            else:
+                aggregate.count += 1
+                aggregate.last_seen = max(aggregate.last_seen, now)
+            pending = len(self._aggregates)
+
+        self.flush_requested.notify(pending)
+
+    def drain(self) -> Dict[ErrorKey, ErrorAggregate]:
+        """Retire et retourne le contenu de la file."""
+        with self._lock:
+            aggregates, self._aggregates = self._aggregates, {}
+        return aggregates
+
+    def restore(self, aggregates: Dict[ErrorKey, ErrorAggregate]) -> None:
+        """Remet dans la file un lot dont le report a echoue."""
+        with self._lock:
+            for key, aggregate in aggregates.items():
+                current = self._aggregates.get(key)
+                if current is not None:
+                    aggregate.merge(current)
+                self._aggregates[key] = aggregate
+
+
+# ============================================================================
+# REPORT EN BASE
+# ============================================================================
+
+def flush_guardian_errors(queue: GuardianErrorQueue, session_factory: Callable,
+                          config_cache: Optional[GuardianConfigCache] = None) -> int:
+    """
+    Reporte la file en base.
+
+    Les agregats des tenants desactives (ou sans configuration) sont
+    abandonnes. Un commit par tenant; les agregats des tenants non reportes
+    sont remis dans la file si l'ecriture echoue, sauf si les tables GUARDIAN
+    n'existent pas.
+
+    Returns:
+        Nombre d'agregats reportes
+    """
+    from .service import GuardianService
+
+    aggregates = queue.drain()
+    if not aggregates:
+        return 0
+    config_cache = config_cache if config_cache is not None else get_config_cache()
+
+    by_tenant: Dict[str, List[ErrorAggregate]] = defaultdict(list)
+    for aggregate in aggregates.values():
+        by_tenant[aggregate.tenant_id].append(aggregate)
+
+    written = 0
+    done = set()
+    db = None
+    try:
+        db = session_factory()
+        enabled = config_cache.load(db, by_tenant)
+        for tenant_id, tenant_aggregates in by_tenant.items():
+            if enabled[tenant_id]:
+                GuardianService(db, tenant_id).ingest_errors(
+                    [(a.sample, a.count, a.first_seen, a.last_seen) for a in tenant_aggregates]
+                )
+                written += len(tenant_aggregates)
+            done.add(tenant_id)
+    except (OperationalError, ProgrammingError) as e:
+        # Tables non creees: le lot est abandonne
+        if db is not None:
+            db.rollback()
+        logger.debug("[GUARDIAN] Tables indisponibles, %d erreurs ignorees: %s", len(aggregates), e)
+        return 0
+    except Exception:
+        if db is not None:
+            db.rollback()
+        # Un commit par tenant: seuls les tenants non reportes sont remis
+        queue.restore({key: a for key, a in aggregates.items() if a.tenant_id not in done})
+        raise
+    finally:
+        if db is not None:
+            db.close()
+    return written
+
+
+class ErrorIngestionFlusher(BackgroundFlusher):
+    """Thread de fond qui reporte la file par intervalle ou par taille."""
+
+    def __init__(self, queue: GuardianErrorQueue, session_factory: Callable,
+                 interval: float = INGESTION_FLUSH_INTERVAL):
+        self.queue = queue
+        self.session_factory = session_factory
+        super().__init__(
+            lambda: flush_guardian_errors(self.queue, self.session_factory),
+            interval,
+            trigger=queue.flush_requested,
+            name="guardian-error-ingestion",
+            log=logger,
+            error_message="[GUARDIAN] Report des erreurs en echec, nouvel essai au prochain cycle: %s",
+        )
+
+
+# ============================================================================
+# INSTANCES GLOBALES
+# ============================================================================
+
+_queue = GuardianErrorQueue()
+_config_cache = GuardianConfigCache()
+_flusher: Optional[ErrorIngestionFlusher] = None
+
+
+def get_error_queue() -> GuardianErrorQueue:
+    """Retourne la file globale du processus."""
+    return _queue
+
+
+def get_config_cache() -> GuardianConfigCache:
+    """Retourne le cache global de GuardianConfig.is_enabled."""
+    return _config_cache
+
+
+def start_error_ingestion(session_factory: Optional[Callable] = None) -> ErrorIngestionFlusher:
+    """Demarre le report periodique des erreurs (lifespan de l'application)."""
+    global _flusher
+    if _flusher is None:
+        if session_factory is None:
+            from app.core.database import SessionLocal
+            session_factory = SessionLocal
+        _flusher = ErrorIngestionFlusher(_queue, session_factory)
+        _flusher.start()
+    return _flusher
+
+
+def stop_error_ingestion() -> None:
+    """Arrete le report periodique (dernier report inclus)."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.stop()
+        _flusher = None
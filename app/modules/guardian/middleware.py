@@ -5,6 +5,10 @@ AZALS MODULE GUARDIAN - Middleware
 Middleware pour l'interception automatique des erreurs HTTP.
 Enregistre les erreurs détectées dans le système GUARDIAN.
 
+Aucune E/S dans dispatch: les erreurs sont ajoutées à la file d'ingestion
+(ingestion.py), agrégées par empreinte et reportées en base par un thread
+de fond.
+
 IMPORTANT: Ce module utilise les fonctions SAFE de error_response.py qui:
 - Ne dépendent JAMAIS d'un fichier HTML pour répondre
 - Renvoient toujours une réponse HTTP valide (JSON en fallback)
@@ -16,60 +20,28 @@ from collections.abc import Callable
 from datetime import datetime
 
 from fastapi import HTTPException
-from sqlalchemy.exc import OperationalError, ProgrammingError
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
-from app.core.database import SessionLocal
 from app.core.logging_config import get_correlation_id, get_logger
 
-# Import des fonctions SAFE de gestion des erreurs
-# Ces fonctions sont dans un module séparé pour éviter les imports circulaires
+from .ingestion import get_config_cache, get_error_queue
 from .models import (
     Environment,
     ErrorSeverity,
     ErrorSource,
     ErrorType,
-    GuardianConfig,
 )
 from .schemas import ErrorDetectionCreate
-from .service import GuardianService
 
 logger = get_logger(__name__)
 
-# Flag global pour savoir si les tables existent
-_tables_verified = False
-_tables_exist = False
-
-
-def _check_tables_exist() -> bool:
-    """Vérifie si les tables du système de correction existent."""
-    global _tables_verified, _tables_exist
 
-    if _tables_verified:
-        return _tables_exist
-
-    try:
-        db = SessionLocal()
-        try:
-            # Tenter une requête simple
-            db.query(GuardianConfig).limit(1).all()
-            _tables_exist = True
-        except (OperationalError, ProgrammingError):
-            # Tables non créées
-            _tables_exist = False
-        finally:
-            db.close()
-    except Exception as e:
-        logger.warning(
-            "[GUARDIAN_STARTUP] Erreur inattendue vérification tables",
-            extra={"error": str(e)[:300], "consequence": "tables_assumed_missing"}
-        )
-        _tables_exist = False
-
-    _tables_verified = True
-    return _tables_exist
+def _route_template(request: Request) -> str | None:
+    """Modèle de la route résolue (/api/v1/orders/{order_id}), None si aucune."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None)
 
 
 class GuardianMiddleware(BaseHTTPMiddleware):
@@ -143,7 +115,7 @@ class GuardianMiddleware(BaseHTTPMiddleware):
 
             # Vérifier si c'est une erreur HTTP
             if response.status_code >= 400:
-                await self._record_http_error(
+                self._record_http_error(
                     request=request,
                     response=response,
                     tenant_id=tenant_id,
@@ -154,7 +126,7 @@ class GuardianMiddleware(BaseHTTPMiddleware):
 
         except HTTPException as e:
             # Erreur HTTP FastAPI
-            await self._record_exception(
+            self._record_exception(
                 request=request,
                 exception=e,
                 tenant_id=tenant_id,
@@ -165,7 +137,7 @@ class GuardianMiddleware(BaseHTTPMiddleware):
 
         except Exception as e:
             # Erreur non gérée
-            await self._record_exception(
+            self._record_exception(
                 request=request,
                 exception=e,
                 tenant_id=tenant_id,
@@ -174,74 +146,47 @@ class GuardianMiddleware(BaseHTTPMiddleware):
             )
             raise
 
-    async def _record_http_error(
+    def _record_http_error(
         self,
         request: Request,
         response: Response,
         tenant_id: str | None,
         start_time: datetime
     ):
-        """Enregistre une erreur HTTP."""
-        if not tenant_id:
-            # Pas de tenant, on ne peut pas enregistrer
+        """Ajoute une erreur HTTP a la file d'ingestion (aucune E/S)."""
+        if not tenant_id or get_config_cache().get(tenant_id) is False:
             return
 
-        # Vérifier si les tables existent (évite les erreurs au démarrage)
-        if not _check_tables_exist():
-            return
+        status_code = response.status_code
+        route = _route_template(request)
+
+        def build() -> ErrorDetectionCreate:
+            return ErrorDetectionCreate(
+                severity=self._determine_severity(status_code),
+                source=ErrorSource.API_ERROR,
+                error_type=self._determine_error_type(status_code),
+                environment=self.environment,
+                error_message=f"HTTP {status_code} on {request.method} {route or request.url.path}",
+                module=self._extract_module(request.url.path),
+                route=route,
+                http_status=status_code,
+                http_method=request.method,
+                correlation_id=get_correlation_id(),
+                context_data={
+                    "path": request.url.path,
+                    "query_params": dict(request.query_params),
+                    "path_params": dict(request.path_params) if hasattr(request, 'path_params') else {},
+                    "duration_ms": (datetime.utcnow() - start_time).total_seconds() * 1000
+                }
+            )
 
         try:
-            db = SessionLocal()
-            try:
-                # Vérifier si le système est activé pour ce tenant
-                config = db.query(GuardianConfig).filter(
-                    GuardianConfig.tenant_id == tenant_id
-                ).first()
-
-                if not config or not config.is_enabled:
-                    return
-
-                # Déterminer la sévérité
-                severity = self._determine_severity(response.status_code)
-
-                # Déterminer le type d'erreur
-                error_type = self._determine_error_type(response.status_code)
-
-                # Créer l'enregistrement
-                error_data = ErrorDetectionCreate(
-                    severity=severity,
-                    source=ErrorSource.API_ERROR,
-                    error_type=error_type,
-                    environment=self.environment,
-                    error_message=f"HTTP {response.status_code} on {request.method} {request.url.path}",
-                    module=self._extract_module(request.url.path),
-                    route=str(request.url.path),
-                    http_status=response.status_code,
-                    http_method=request.method,
-                    correlation_id=get_correlation_id(),
-                    context_data={
-                        "query_params": dict(request.query_params),
-                        "path_params": dict(request.path_params) if hasattr(request, 'path_params') else {},
-                        "duration_ms": (datetime.utcnow() - start_time).total_seconds() * 1000
-                    }
-                )
-
-                service = GuardianService(db, tenant_id)
-                service.detect_error(error_data)
-
-            finally:
-                db.close()
-
-        except (OperationalError, ProgrammingError):
-            # Tables non créées - ignorer silencieusement
-            global _tables_verified, _tables_exist
-            _tables_verified = True
-            _tables_exist = False
+            get_error_queue().record((tenant_id, route, request.method, status_code, None), build)
         except Exception as e:
             # Ne jamais faire échouer la requête
             logger.debug("Error recording middleware: %s", e)
 
-    async def _record_exception(
+    def _record_exception(
         self,
         request: Request,
         exception: Exception,
@@ -249,64 +194,40 @@ class GuardianMiddleware(BaseHTTPMiddleware):
         start_time: datetime,
         http_status: int = 500
     ):
-        """Enregistre une exception."""
-        if not tenant_id:
+        """Ajoute une exception a la file d'ingestion (aucune E/S)."""
+        if not tenant_id or get_config_cache().get(tenant_id) is False:
             return
 
-        # Vérifier si les tables existent (évite les erreurs au démarrage)
-        if not _check_tables_exist():
-            return
+        route = _route_template(request)
+        exception_type = type(exception).__name__
+
+        def build() -> ErrorDetectionCreate:
+            # Stack trace anonymisé (chemins absolus retirés), construit une
+            # seule fois par empreinte et par fenêtre d'agrégation
+            stack_trace = "".join(traceback.format_exception(type(exception), exception, exception.__traceback__))
+            stack_trace = self._anonymize_stack_trace(stack_trace)
+            return ErrorDetectionCreate(
+                severity=self._determine_severity(http_status),
+                source=ErrorSource.BACKEND_LOG,
+                error_type=self._map_exception_to_type(exception),
+                environment=self.environment,
+                error_message=(str(exception) or exception_type)[:1000],
+                module=self._extract_module(request.url.path),
+                route=route,
+                function_name=exception_type,
+                stack_trace=stack_trace[:5000] if stack_trace else None,
+                http_status=http_status,
+                http_method=request.method,
+                correlation_id=get_correlation_id(),
+                context_data={
+                    "path": request.url.path,
+                    "exception_type": exception_type,
+                    "duration_ms": (datetime.utcnow() - start_time).total_seconds() * 1000
+                }
+            )
 
         try:
-            db = SessionLocal()
-            try:
-                # Vérifier si le système est activé
-                config = db.query(GuardianConfig).filter(
-                    GuardianConfig.tenant_id == tenant_id
-                ).first()
-
-                if not config or not config.is_enabled:
-                    return
-
-                # Extraire le stack trace
-                stack_trace = traceback.format_exc()
-
-                # Anonymiser le stack trace (enlever les chemins absolus)
-                stack_trace = self._anonymize_stack_trace(stack_trace)
-
-                severity = self._determine_severity(http_status)
-                error_type = self._map_exception_to_type(exception)
-
-                error_data = ErrorDetectionCreate(
-                    severity=severity,
-                    source=ErrorSource.BACKEND_LOG,
-                    error_type=error_type,
-                    environment=self.environment,
-                    error_message=str(exception)[:1000],
-                    module=self._extract_module(request.url.path),
-                    route=str(request.url.path),
-                    function_name=exception.__class__.__name__,
-                    stack_trace=stack_trace[:5000] if stack_trace else None,
-                    http_status=http_status,
-                    http_method=request.method,
-                    correlation_id=get_correlation_id(),
-                    context_data={
-                        "exception_type": type(exception).__name__,
-                        "duration_ms": (datetime.utcnow() - start_time).total_seconds() * 1000
-                    }
-                )
-
-                service = GuardianService(db, tenant_id)
-                service.detect_error(error_data)
-
-            finally:
-                db.close()
-
-        except (OperationalError, ProgrammingError):
-            # Tables non créées - ignorer silencieusement
-            global _tables_verified, _tables_exist
-            _tables_verified = True
-            _tables_exist = False
+            get_error_queue().record((tenant_id, route, request.method, http_status, exception_type), build)
         except Exception as e:
             # Ne jamais faire échouer la requête
             logger.debug("Exception recording error: %s", e)
@@ -24,6 +24,7 @@ from sqlalchemy.orm import Session
 
 from app.core.logging_config import get_logger
 
+from .ingestion import get_config_cache
 from .models import (
     CorrectionAction,
     CorrectionRegistry,
@@ -107,6 +108,7 @@ class GuardianService:
         self.db.commit()
         self.db.refresh(config)
         self._config = config
+        get_config_cache().invalidate(self.tenant_id)
 
         logger.info("GUARDIAN config updated for tenant %s", self.tenant_id)
         return config
@@ -214,6 +216,67 @@ class GuardianService:
             )
         ).first()
 
+    def ingest_errors(
+        self, entries: list[tuple[ErrorDetectionCreate, int, datetime, datetime]]
+    ) -> list[ErrorDetection]:
+        """
+        Enregistre un lot d'erreurs agrégées par le middleware.
+
+        Chaque entrée est (échantillon, occurrences, première, dernière
+        occurrence). Une erreur déjà connue dans la fenêtre de déduplication
+        (même source, type, route, méthode, status et exception) voit son
+        compteur augmenté du nombre d'occurrences; sinon elle est créée.
+        Une lecture et un commit pour tout le lot; alertes et corrections
+        automatiques ne concernent que les nouvelles erreurs.
+        """
+        if not entries:
+            return []
+        config = self.get_config()
+        window = datetime.utcnow() - timedelta(hours=1)
+
+        def fingerprint(e):
+            return (e.source, e.error_type, e.route, e.http_method, e.http_status,
+                    e.function_name, e.environment)
+
+        known: dict[tuple, ErrorDetection] = {}
+        for existing in self.db.query(ErrorDetection).filter(
+            ErrorDetection.tenant_id == self.tenant_id,
+            ErrorDetection.http_status.in_({data.http_status for data, _, _, _ in entries}),
+            ErrorDetection.last_occurrence_at >= window,
+        ).order_by(ErrorDetection.last_occurrence_at):
+            known[fingerprint(existing)] = existing
+
+        created = []
+        for data, count, first_seen, last_seen in entries:
+            existing = known.get(fingerprint(data))
+            if existing is not None:
+                existing.occurrence_count += count
+                existing.last_occurrence_at = max(existing.last_occurrence_at, last_seen)
+                continue
+            error = ErrorDetection(
+                tenant_id=self.tenant_id,
+                **data.model_dump(),
+                occurrence_count=count,
+                first_occurrence_at=first_seen,
+                last_occurrence_at=last_seen,
+                detected_at=first_seen,
+            )
+            self.db.add(error)
+            known[fingerprint(error)] = error
+            created.append(error)
+
+        self.db.commit()
+        logger.info(
+            "Errors ingested | tenant=%s aggregates=%s new=%s",
+            self.tenant_id, len(entries), len(created)
+        )
+
+        for error in created:
+            self._create_alert_if_needed(error)
+            if config.auto_correction_enabled:
+                self._attempt_auto_correction(error)
+        return created
+
     def report_frontend_error(self, data: FrontendErrorReport,
                               user_id: int | None = None) -> ErrorDetection:
         """
@@ -0,0 +1,265 @@
+"""
+AZALS MODULE GUARDIAN - Tests Ingestion des erreurs
+===================================================
+
+Tests de la file d'agregation des erreurs du middleware, du cache de
+configuration et du report par lots (SQLite en memoire).
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.guardian.ingestion import (
+    GuardianConfigCache,
+    ErrorIngestionFlusher,
+    GuardianErrorQueue,
+    flush_guardian_errors,
+)
+from app.modules.guardian.middleware import GuardianMiddleware
+from app.modules.guardian.models import (
+    Environment,
+    ErrorDetection,
+    ErrorSeverity,
+    ErrorSource,
+    ErrorType,
+    GuardianAlert,
+    GuardianConfig,
+)
+from app.modules.guardian.schemas import ErrorDetectionCreate
+
+TENANT = "tenant-guardian"
+NOW = datetime(2026, 3, 4, 10, 15)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (GuardianConfig, ErrorDetection, GuardianAlert):
+        model.__table__.create(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(engine):
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    db.add(GuardianConfig(tenant_id=TENANT, is_enabled=True, auto_correction_enabled=False))
+    db.add(GuardianConfig(tenant_id="tenant-off", is_enabled=False, auto_correction_enabled=False))
+    db.commit()
+    db.close()
+    return session_factory
+
+
+@pytest.fixture
+def queue():
+    return GuardianErrorQueue(max_pending=10)
+
+
+@pytest.fixture
+def config_cache():
+    return GuardianConfigCache()
+
+
+def make_error(status=401, route="/api/v1/orders/{order_id}", method="GET"):
+    return ErrorDetectionCreate(
+        severity=ErrorSeverity.MINOR,
+        source=ErrorSource.API_ERROR,
+        error_type=ErrorType.AUTHENTICATION,
+        environment=Environment.SANDBOX,
+        error_message=f"HTTP {status} on {method} {route}",
+        module="orders",
+        route=route,
+        http_status=status,
+        http_method=method,
+    )
+
+
+def record(queue, tenant_id=TENANT, status=401, route="/api/v1/orders/{order_id}", now=NOW):
+    queue.record((tenant_id, route, "GET", status, None), lambda: make_error(status, route), now=now)
+
+
+# ============================================================================
+# TESTS FILE
+# ============================================================================
+
+class TestErrorQueue:
+    """Agregation par empreinte."""
+
+    def test_duplicates_aggregated(self, queue):
+        built = []
+
+        def build():
+            built.append(1)
+            return make_error()
+
+        for i in range(50):
+            queue.record((TENANT, "/api/v1/orders/{order_id}", "GET", 401, None), build,
+                         now=NOW + timedelta(seconds=i))
+        record(queue, status=403)
+
+        aggregates = queue.drain()
+        assert len(aggregates) == 2
+        aggregate = aggregates[(TENANT, "/api/v1/orders/{order_id}", "GET", 401, None)]
+        assert aggregate.count == 50
+        assert (aggregate.first_seen, aggregate.last_seen) == (NOW, NOW + timedelta(seconds=49))
+        # Echantillon construit une seule fois
+        assert built == [1]
+        assert len(queue) == 0
+
+    def test_flush_requested_and_bounded(self, queue):
+        for i in range(10):
+            record(queue, route=f"/r{i}")
+        assert queue.flush_requested.is_set()
+
+        for i in range(10, 300):
+            record(queue, route=f"/r{i}")
+        record(queue, route="/r0")
+
+        assert len(queue) == 200
+        assert queue.dropped_errors == 100
+        assert queue.drain()[(TENANT, "/r0", "GET", 401, None)].count == 2
+
+
+# ============================================================================
+# TESTS REPORT
+# ============================================================================
+
+class TestFlush:
+    """Report par lots."""
+
+    def test_flush_writes_counts(self, Session, queue, config_cache):
+        for _ in range(30):
+            record(queue)
+        record(queue, status=404)
+
+        assert flush_guardian_errors(queue, Session, config_cache) == 2
+
+        db = Session()
+        rows = {row.http_status: row for row in db.query(ErrorDetection).all()}
+        assert rows[401].occurrence_count == 30
+        assert rows[401].route == "/api/v1/orders/{order_id}"
+        assert rows[404].occurrence_count == 1
+        db.close()
+
+    def test_next_window_increments_existing(self, Session, queue, config_cache):
+        now = datetime.utcnow()
+        for _ in range(5):
+            record(queue, now=now)
+        flush_guardian_errors(queue, Session, config_cache)
+        for _ in range(7):
+            record(queue, now=now + timedelta(seconds=5))
+        flush_guardian_errors(queue, Session, config_cache)
+
+        db = Session()
+        rows = db.query(ErrorDetection).all()
+        assert len(rows) == 1
+        assert rows[0].occurrence_count == 12
+        assert rows[0].last_occurrence_at == now + timedelta(seconds=5)
+        db.close()
+
+    def test_disabled_and_unknown_tenants_dropped(self, Session, queue, config_cache):
+        record(queue, tenant_id="tenant-off")
+        record(queue, tenant_id="tenant-unknown")
+        record(queue)
+
+        assert flush_guardian_errors(queue, Session, config_cache) == 1
+        assert config_cache.get("tenant-off") is False
+        assert config_cache.get("tenant-unknown") is False
+        assert config_cache.get(TENANT) is True
+
+    def test_queries_per_flush(self, engine, Session, queue, config_cache):
+        now = datetime.utcnow()
+        for window in range(2):
+            for i in range(20):
+                for _ in range(10):
+                    record(queue, route=f"/api/v1/orders/r{i}", now=now)
+            statements = []
+
+            @event.listens_for(engine, "before_cursor_execute")
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            flush_guardian_errors(queue, Session, config_cache)
+            event.remove(engine, "before_cursor_execute", count)
+
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        # Erreurs deja connues: config du service + erreurs de la fenetre
+        # (etat is_enabled en cache), quel que soit le nombre d'occurrences
+        assert len(selects) == 2
+        db = Session()
+        assert {row.occurrence_count for row in db.query(ErrorDetection).all()} == {20}
+        db.close()
+
+    def test_failed_flush_restored(self, queue, config_cache):
+        record(queue)
+        config_cache._entries[TENANT] = (True, float("inf"))
+
+        def broken_session():
+            raise RuntimeError("database down")
+
+        with pytest.raises(RuntimeError):
+            flush_guardian_errors(queue, broken_session, config_cache)
+
+        assert len(queue) == 1
+
+    def test_flusher_swallows_failure(self, queue):
+        record(queue)
+
+        def broken_session():
+            raise RuntimeError("database down")
+
+        flusher = ErrorIngestionFlusher(queue, broken_session)
+        assert flusher.trigger is queue.flush_requested
+        assert flusher.flush() == 0
+        assert len(queue) == 1
+
+
+# ============================================================================
+# TESTS MIDDLEWARE
+# ============================================================================
+
+class TestMiddleware:
+    """Le middleware n'ecrit plus en base: il alimente la file."""
+
+    @pytest.fixture
+    def client(self, queue, config_cache, monkeypatch):
+        monkeypatch.setattr("app.modules.guardian.middleware.get_error_queue", lambda: queue)
+        monkeypatch.setattr("app.modules.guardian.middleware.get_config_cache", lambda: config_cache)
+        app = FastAPI()
+        app.add_middleware(GuardianMiddleware, environment="test")
+
+        @app.get("/api/v1/orders/{order_id}")
+        def get_order(order_id: str):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+        return TestClient(app)
+
+    def test_errors_fingerprinted_by_route_template(self, client, queue):
+        for order_id in ("a", "b", "c"):
+            assert client.get(f"/api/v1/orders/{order_id}", headers={"X-Tenant-ID": TENANT}).status_code == 401
+
+        aggregates = queue.drain()
+        assert list(aggregates) == [(TENANT, "/api/v1/orders/{order_id}", "GET", 401, None)]
+        aggregate = next(iter(aggregates.values()))
+        assert aggregate.count == 3
+        assert aggregate.sample.route == "/api/v1/orders/{order_id}"
+        assert aggregate.sample.context_data["path"] == "/api/v1/orders/a"
+
+    def test_disabled_tenant_skipped(self, client, queue, config_cache):
+        config_cache._entries["tenant-off"] = (False, float("inf"))
+
+        client.get("/api/v1/orders/a", headers={"X-Tenant-ID": "tenant-off"})
+        client.get("/api/v1/orders/a")
+
+        assert len(queue) == 0
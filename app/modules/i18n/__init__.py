@@ -11,7 +11,7 @@ Fonctionnalites:
 - Formats regionaux (dates, nombres, devises)
 - Traduction automatique (OpenAI, Google, DeepL)
 - Import/Export (JSON, PO, XLIFF, CSV)
-- Cache des traductions
+- Cache des traductions (bundles partages par processus)
 - Interface de traduction inline
 - Dashboard couverture traduction
 - Glossaire de termes
@@ -89,6 +89,8 @@ from .repository import (
     TranslationJobRepository,
 )
 
+from .cache import TranslationBundleCache, get_bundle_cache
+
 from .service import I18NService, create_i18n_service
 
 from .router import router
@@ -164,6 +166,9 @@ __all__ = [
     "CacheRepository",
     "GlossaryRepository",
     "TranslationJobRepository",
+    # Cache
+    "TranslationBundleCache",
+    "get_bundle_cache",
     # Service
     "I18NService",
     "create_i18n_service",
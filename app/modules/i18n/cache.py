@@ -0,0 +1,188 @@
+"""
+AZALSCORE Module I18N - Cache partage des bundles
+==================================================
+
+Cache des bundles de traduction (namespace x langue) partage par toutes
+les instances de I18NService d'un meme processus.
+
+- Les bundles sont charges une fois par processus, t() et tp() sont servis
+  depuis la memoire
+- Chaque tenant a un numero de version dans le cache partage (Redis, ou
+  memoire en developpement), incremente a chaque modification de
+  traduction: les autres processus rechargent leurs bundles des qu'ils
+  constatent le changement
+- La version partagee est relue au plus une fois par CHECK_INTERVAL
+  secondes et par tenant; un bundle expire de toute facon apres MAX_AGE
+  (filet de securite si le cache partage est indisponible)
+- Le numero de version est lu AVANT le chargement du bundle: un bundle lu
+  pendant une modification concurrente porte l'ancienne version et sera
+  recharge
+"""
+from __future__ import annotations
+
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.cache import CacheBackend, CacheTTL, cache_key_tenant, get_cache
+
+
+# (cle, valeur, supports_plural, plural_values)
+BundleRow = Tuple[str, Optional[str], bool, Optional[Dict[str, str]]]
+
+
+@dataclass
+class CachedBundle:
+    """Bundle d'un namespace dans une langue, pret a l'emploi."""
+    values: Dict[str, str]
+    plurals: Dict[str, Dict[str, str]]
+    translations: Dict[str, Any]
+    etag: str
+    version: int
+    generated_at: datetime = field(default_factory=datetime.utcnow)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[BundleRow], version: int) -> "CachedBundle":
+        values: Dict[str, str] = {}
+        plurals: Dict[str, Dict[str, str]] = {}
+        translations: Dict[str, Any] = {}
+        for key, value, supports_plural, plural_values in rows:
+            values[key] = value
+            if supports_plural and plural_values:
+                plurals[key] = plural_values
+                translations[key] = plural_values
+            else:
+                translations[key] = value
+        return cls(
+            values=values,
+            plurals=plurals,
+            translations=translations,
+            etag=compute_etag(translations),
+            version=version,
+        )
+
+
+def compute_etag(translations: Dict[str, Any]) -> str:
+    """Empreinte stable du contenu d'un bundle."""
+    payload = json.dumps(translations, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class TranslationBundleCache:
+    """
+    Cache processus des bundles, invalide par version de tenant.
+
+    Usage:
+        cache = get_bundle_cache()
+        bundle = cache.get_or_load(tenant_id, "common", "fr", loader)
+        cache.bump(tenant_id)  # apres modification d'une traduction
+    """
+
+    CHECK_INTERVAL = 1.0
+    MAX_AGE = CacheTTL.LONG
+
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self._backend = backend
+        self._lock = threading.Lock()
+        self._bundles: Dict[Tuple[str, str, str], CachedBundle] = {}
+        # tenant -> (version connue, instant de la derniere lecture)
+        self._versions: Dict[str, Tuple[int, float]] = {}
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = get_cache()
+        return self._backend
+
+    @staticmethod
+    def _version_key(tenant_id: str) -> str:
+        return cache_key_tenant(tenant_id, "i18n", "version")
+
+    def version(self, tenant_id: str) -> int:
+        """Version courante du tenant (relue au plus une fois par CHECK_INTERVAL)."""
+        now = time.monotonic()
+        known = self._versions.get(tenant_id)
+        if known and now - known[1] < self.CHECK_INTERVAL:
+            return known[0]
+
+        raw = self.backend.get(self._version_key(tenant_id))
+        version = int(raw) if raw else 0
+        with self._lock:
+            if known and known[0] != version:
+                self._drop(tenant_id)
+            self._versions[tenant_id] = (version, now)
+        return version
+
+    def get(self, tenant_id: str, namespace_code: str, language_code: str) -> Optional[CachedBundle]:
+        """Bundle en cache s'il est a jour, sinon None."""
+        version = self.version(tenant_id)
+        bundle = self._bundles.get((tenant_id, namespace_code, language_code))
+        if bundle is None or bundle.version != version:
+            return None
+        if time.monotonic() - bundle.loaded_at > self.MAX_AGE:
+            return None
+        return bundle
+
+    def get_or_load(
+        self,
+        tenant_id: str,
+        namespace_code: str,
+        language_code: str,
+        loader: Callable[[], Iterable[BundleRow]],
+    ) -> CachedBundle:
+        """Bundle en cache, ou charge via loader() et mis en cache."""
+        bundle = self.get(tenant_id, namespace_code, language_code)
+        if bundle is not None:
+            return bundle
+        return self.load(tenant_id, namespace_code, language_code, loader)
+
+    def load(
+        self,
+        tenant_id: str,
+        namespace_code: str,
+        language_code: str,
+        loader: Callable[[], Iterable[BundleRow]],
+    ) -> CachedBundle:
+        """Charge le bundle via loader() et le met en cache."""
+        version = self.version(tenant_id)
+        bundle = CachedBundle.from_rows(loader(), version)
+        with self._lock:
+            self._bundles[(tenant_id, namespace_code, language_code)] = bundle
+        return bundle
+
+    def bump(self, tenant_id: str) -> None:
+        """Invalide les bundles du tenant dans tous les processus."""
+        self.backend.incr(self._version_key(tenant_id))
+        with self._lock:
+            self._drop(tenant_id)
+            self._versions.pop(tenant_id, None)
+
+    def clear(self) -> None:
+        """Vide le cache local (tous tenants)."""
+        with self._lock:
+            self._bundles.clear()
+            self._versions.clear()
+
+    def _drop(self, tenant_id: str) -> None:
+        for key in [k for k in self._bundles if k[0] == tenant_id]:
+            del self._bundles[key]
+
+    def __len__(self) -> int:
+        return len(self._bundles)
+
+
+_bundle_cache: Optional[TranslationBundleCache] = None
+
+
+def get_bundle_cache() -> TranslationBundleCache:
+    """Retourne le cache des bundles du processus (singleton)."""
+    global _bundle_cache
+    if _bundle_cache is None:
+        _bundle_cache = TranslationBundleCache()
+    return _bundle_cache
@@ -706,24 +706,45 @@ class TranslationRepository:
         self.db.commit()
         return created, updated
 
-    def get_bundle(
+    def get_bundle_rows(
         self,
         language_code: str,
         namespace_code: str
-    ) -> Dict[str, Any]:
-        """Recupere un bundle de traductions pour le frontend."""
-        results = self._base_query().join(TranslationKey).join(TranslationNamespace).filter(
+    ) -> List[Tuple[str, Optional[str], bool, Optional[Dict[str, str]]]]:
+        """
+        Lignes d'un bundle en une requete:
+        (cle, valeur, supports_plural, plural_values).
+        """
+        query = self.db.query(
+            TranslationKey.key,
+            Translation.value,
+            TranslationKey.supports_plural,
+            Translation.plural_values,
+        ).select_from(Translation).join(
+            TranslationKey, Translation.translation_key_id == TranslationKey.id
+        ).join(
+            TranslationNamespace, TranslationKey.namespace_id == TranslationNamespace.id
+        ).filter(
+            Translation.tenant_id == self.tenant_id,
             TranslationNamespace.code == namespace_code,
             Translation.language_code == language_code
-        ).all()
+        )
+        if not self.include_deleted:
+            query = query.filter(Translation.deleted_at.is_(None))
+        return [tuple(row) for row in query.all()]
 
+    def get_bundle(
+        self,
+        language_code: str,
+        namespace_code: str
+    ) -> Dict[str, Any]:
+        """Recupere un bundle de traductions pour le frontend."""
         bundle = {}
-        for trans in results:
-            key = trans.translation_key.key
-            if trans.translation_key.supports_plural and trans.plural_values:
-                bundle[key] = trans.plural_values
+        for key, value, supports_plural, plural_values in self.get_bundle_rows(language_code, namespace_code):
+            if supports_plural and plural_values:
+                bundle[key] = plural_values
             else:
-                bundle[key] = trans.value
+                bundle[key] = value
 
         return bundle
 
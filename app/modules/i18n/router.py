@@ -11,7 +11,7 @@ from __future__ import annotations
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, UploadFile, File
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 
@@ -522,20 +522,43 @@ async def inline_translate(
 # BUNDLE ROUTES (pour le frontend)
 # ============================================================================
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compare l'en-tete If-None-Match (liste, W/, *) a l'ETag du bundle."""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
+
+
 @router.get("/bundle/{language_code}/{namespace_code}", response_model=TranslationBundle)
 async def get_translation_bundle(
     language_code: str,
     namespace_code: str,
+    response: Response,
     no_cache: bool = Query(False),
+    if_none_match: Optional[str] = Header(None),
     service: I18NService = Depends(get_i18n_service),
     _: None = Depends(require_permission("i18n.view"))
 ):
-    """Recupere un bundle de traductions pour le frontend."""
+    """
+    Recupere un bundle de traductions pour le frontend.
+
+    Renvoie un ETag; 304 sans contenu si If-None-Match correspond.
+    """
     try:
-        return service.get_bundle(language_code, namespace_code, use_cache=not no_cache)
+        bundle = service.get_bundle(language_code, namespace_code, use_cache=not no_cache)
     except (LanguageNotFoundError, NamespaceNotFoundError) as e:
         raise HTTPException(status_code=404, detail=str(e))
 
+    etag = f'"{bundle.etag}"'
+    if if_none_match and _etag_matches(if_none_match, bundle.etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return bundle
+
 
 @router.post("/bundles", response_model=dict)
 async def get_translation_bundles(
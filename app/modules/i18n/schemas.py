@@ -339,6 +339,7 @@ class TranslationBundle(BaseModel):
     translations: Dict[str, Any]  # Peut inclure pluriels
     generated_at: datetime
     key_count: int
+    etag: Optional[str] = None  # Empreinte du contenu (en-tete ETag)
 
 
 class TranslationBundleRequest(BaseModel):
@@ -12,7 +12,8 @@ Fonctionnalites:
 - Formats regionaux (dates, nombres, devises)
 - Traduction automatique (OpenAI, Google, DeepL)
 - Import/Export (JSON, PO, XLIFF, CSV)
-- Cache des traductions
+- Cache des traductions (bundles partages par processus, invalides par
+  version de tenant, voir cache.py)
 - Dashboard couverture traduction
 """
 from __future__ import annotations
@@ -39,6 +40,7 @@ from .models import (
     Glossary,
     DateFormatType, NumberFormatType,
 )
+from .cache import CachedBundle, TranslationBundleCache, compute_etag, get_bundle_cache
 from .repository import (
     LanguageRepository,
     NamespaceRepository,
@@ -110,7 +112,12 @@ class I18NService:
         formatted = service.format_currency(Decimal("1234.56"), "EUR", "fr")
     """
 
-    def __init__(self, db: Session, tenant_id: str):
+    def __init__(
+        self,
+        db: Session,
+        tenant_id: str,
+        bundle_cache: Optional[TranslationBundleCache] = None
+    ):
         self.db = db
         self.tenant_id = tenant_id
 
@@ -123,8 +130,8 @@ class I18NService:
         self.glossary_repo = GlossaryRepository(db, tenant_id)
         self.job_repo = TranslationJobRepository(db, tenant_id)
 
-        # Cache local
-        self._bundle_cache: Dict[str, Dict[str, Any]] = {}
+        # Bundles partages par toutes les instances du processus
+        self.bundle_cache = bundle_cache if bundle_cache is not None else get_bundle_cache()
 
     # ========================================================================
     # GESTION DES LANGUES
@@ -180,7 +187,7 @@ class I18NService:
         )
 
         # Invalider le cache
-        self.cache_repo.invalidate_all()
+        self.invalidate_cache()
 
         return lang
 
@@ -199,7 +206,7 @@ class I18NService:
         )
 
         # Invalider le cache de cette langue
-        self.cache_repo.invalidate(language_code=lang.code)
+        self.invalidate_cache(language_code=lang.code)
 
         return updated
 
@@ -222,7 +229,7 @@ class I18NService:
             self.language_repo.soft_delete(lang, deleted_by)
 
         # Invalider le cache
-        self.cache_repo.invalidate(language_code=lang.code)
+        self.invalidate_cache(language_code=lang.code)
 
         return True
 
@@ -298,7 +305,7 @@ class I18NService:
         )
 
         # Invalider le cache du namespace
-        self.cache_repo.invalidate(namespace_code=ns.code)
+        self.invalidate_cache(namespace_code=ns.code)
 
         return updated
 
@@ -314,7 +321,7 @@ class I18NService:
             raise NamespaceNotEditableError(ns.code)
 
         self.namespace_repo.soft_delete(ns, deleted_by)
-        self.cache_repo.invalidate(namespace_code=ns.code)
+        self.invalidate_cache(namespace_code=ns.code)
 
         return True
 
@@ -403,7 +410,7 @@ class I18NService:
 
         # Invalider le cache du namespace
         ns = self.get_namespace(data.namespace_id)
-        self.cache_repo.invalidate(namespace_code=ns.code)
+        self.invalidate_cache(namespace_code=ns.code)
 
         return key
 
@@ -423,7 +430,7 @@ class I18NService:
             updated_by
         )
 
-        self.cache_repo.invalidate(namespace_code=ns.code)
+        self.invalidate_cache(namespace_code=ns.code)
 
         return updated
 
@@ -437,7 +444,7 @@ class I18NService:
         ns = self.get_namespace(key.namespace_id)
 
         self.key_repo.soft_delete(key, deleted_by)
-        self.cache_repo.invalidate(namespace_code=ns.code)
+        self.invalidate_cache(namespace_code=ns.code)
 
         return True
 
@@ -473,18 +480,10 @@ class I18NService:
             service.t("button.save", "fr")
             service.t("greeting", "fr", name="John") -> "Bonjour John"
         """
-        # Essayer le cache d'abord
-        cache_key = f"{namespace}:{language_code}"
-        if cache_key in self._bundle_cache:
-            bundle = self._bundle_cache[cache_key]
-            if key in bundle:
-                return self._interpolate(bundle[key], params)
-
-        # Sinon, requete DB
-        value = self.translation_repo.get_value(
-            namespace, key, language_code,
-            fallback_language_code="en"
-        )
+        # Bundle du processus, puis fallback anglais
+        value = self._cached_bundle(namespace, language_code).values.get(key)
+        if not value and language_code != "en":
+            value = self._cached_bundle(namespace, "en").values.get(key)
 
         if value:
             return self._interpolate(value, params)
@@ -511,25 +510,26 @@ class I18NService:
         # Determiner la forme plurielle
         plural_form = self._get_plural_form(count, language_code)
 
-        # Recuperer la traduction
-        try:
-            tk = self.key_repo.get_by_full_key(namespace, key)
-            if tk and tk.supports_plural:
-                lang = self.language_repo.get_by_code(language_code)
-                if lang:
-                    trans = self.translation_repo.get_by_key_language(tk.id, lang.id)
-                    if trans and trans.plural_values:
-                        value = trans.plural_values.get(
-                            plural_form,
-                            trans.plural_values.get("other", trans.value)
-                        )
-                        return self._interpolate(value, {**params, "count": count})
-        except Exception:
-            pass
+        # Formes plurielles depuis le bundle du processus
+        bundle = self._cached_bundle(namespace, language_code)
+        plural_values = bundle.plurals.get(key)
+        if plural_values:
+            value = plural_values.get(
+                plural_form,
+                plural_values.get("other", bundle.values.get(key))
+            )
+            return self._interpolate(value, {**params, "count": count})
 
         # Fallback sur traduction simple
         return self.t(key, language_code, namespace, count=count, **params)
 
+    def _cached_bundle(self, namespace_code: str, language_code: str) -> CachedBundle:
+        """Bundle (namespace, langue) du cache processus, charge si besoin."""
+        return self.bundle_cache.get_or_load(
+            self.tenant_id, namespace_code, language_code,
+            lambda: self.translation_repo.get_bundle_rows(language_code, namespace_code)
+        )
+
     def _get_plural_form(self, count: int, language_code: str) -> str:
         """Determine la forme plurielle selon la langue."""
         # Regles simplifiees (ICU CLDR)
@@ -610,8 +610,7 @@ class I18NService:
 
         # Invalider le cache
         ns = self.get_namespace(key.namespace_id)
-        self.cache_repo.invalidate(namespace_code=ns.code, language_code=lang.code)
-        self._bundle_cache.pop(f"{ns.code}:{lang.code}", None)
+        self.invalidate_cache(ns.code, lang.code)
 
         # Mettre a jour la couverture
         self.language_repo.update_coverage(language_id)
@@ -660,8 +659,7 @@ class I18NService:
         created, updated = self.translation_repo.bulk_upsert(translations, created_by)
 
         # Invalider le cache
-        self.cache_repo.invalidate(namespace_code=ns.code, language_code=lang.code)
-        self._bundle_cache.pop(f"{ns.code}:{lang.code}", None)
+        self.invalidate_cache(ns.code, lang.code)
 
         # Mettre a jour la couverture
         self.language_repo.update_coverage(lang.id)
@@ -694,6 +692,7 @@ class I18NService:
         existing = self.translation_repo.get_by_key_language(tk.id, lang.id)
         if existing:
             self.translation_repo.update(existing, {"value": request.value}, created_by)
+            self.invalidate_cache(ns.code, lang.code)
             return InlineTranslationResponse(
                 key=request.key,
                 namespace=request.namespace,
@@ -712,7 +711,7 @@ class I18NService:
             }, created_by)
 
             # Invalider le cache
-            self.cache_repo.invalidate(namespace_code=ns.code, language_code=lang.code)
+            self.invalidate_cache(ns.code, lang.code)
 
             return InlineTranslationResponse(
                 key=request.key,
@@ -738,44 +737,45 @@ class I18NService:
 
         Utilise le cache pour de meilleures performances.
         """
-        cache_key = f"{namespace_code}:{language_code}"
-
-        # Verifier le cache local
-        if use_cache and cache_key in self._bundle_cache:
-            return TranslationBundle(
-                language=language_code,
-                namespace=namespace_code,
-                translations=self._bundle_cache[cache_key],
-                generated_at=datetime.utcnow(),
-                key_count=len(self._bundle_cache[cache_key])
-            )
+        # Verifier le cache du processus
+        if use_cache:
+            cached_bundle = self.bundle_cache.get(self.tenant_id, namespace_code, language_code)
+            if cached_bundle:
+                return self._to_schema(language_code, namespace_code, cached_bundle)
 
         # Verifier le cache DB
         if use_cache:
             cached = self.cache_repo.get(namespace_code, language_code)
             if cached and cached.is_valid:
-                self._bundle_cache[cache_key] = cached.translations
                 return TranslationBundle(
                     language=language_code,
                     namespace=namespace_code,
                     translations=cached.translations,
                     generated_at=cached.generated_at,
-                    key_count=cached.key_count
+                    key_count=cached.key_count,
+                    etag=compute_etag(cached.translations)
                 )
 
         # Generer le bundle
-        translations = self.translation_repo.get_bundle(language_code, namespace_code)
+        cached_bundle = self.bundle_cache.load(
+            self.tenant_id, namespace_code, language_code,
+            lambda: self.translation_repo.get_bundle_rows(language_code, namespace_code)
+        )
 
         # Mettre en cache
-        self.cache_repo.set(namespace_code, language_code, translations)
-        self._bundle_cache[cache_key] = translations
+        self.cache_repo.set(namespace_code, language_code, cached_bundle.translations)
 
+        return self._to_schema(language_code, namespace_code, cached_bundle)
+
+    @staticmethod
+    def _to_schema(language_code: str, namespace_code: str, bundle: CachedBundle) -> TranslationBundle:
         return TranslationBundle(
             language=language_code,
             namespace=namespace_code,
-            translations=translations,
-            generated_at=datetime.utcnow(),
-            key_count=len(translations)
+            translations=bundle.translations,
+            generated_at=bundle.generated_at,
+            key_count=len(bundle.translations),
+            etag=bundle.etag
         )
 
     def get_bundles(
@@ -794,22 +794,15 @@ class I18NService:
         namespace_code: Optional[str] = None,
         language_code: Optional[str] = None
     ) -> int:
-        """Invalide le cache."""
-        count = self.cache_repo.invalidate(namespace_code, language_code)
+        """
+        Invalide le cache.
 
-        # Vider le cache local
-        if namespace_code and language_code:
-            self._bundle_cache.pop(f"{namespace_code}:{language_code}", None)
-        elif namespace_code:
-            keys_to_remove = [k for k in self._bundle_cache if k.startswith(f"{namespace_code}:")]
-            for k in keys_to_remove:
-                self._bundle_cache.pop(k, None)
-        elif language_code:
-            keys_to_remove = [k for k in self._bundle_cache if k.endswith(f":{language_code}")]
-            for k in keys_to_remove:
-                self._bundle_cache.pop(k, None)
-        else:
-            self._bundle_cache.clear()
+        Le cache DB est invalide pour le namespace / la langue; les bundles
+        du processus sont invalides pour tout le tenant, dans tous les
+        processus (increment de la version partagee).
+        """
+        count = self.cache_repo.invalidate(namespace_code, language_code)
+        self.bundle_cache.bump(self.tenant_id)
 
         return count
 
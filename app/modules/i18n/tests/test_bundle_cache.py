@@ -0,0 +1,182 @@
+"""
+Tests du cache partage des bundles de traduction (SQLite en memoire).
+"""
+
+import pytest
+from uuid import uuid4
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.cache import MemoryCache
+from app.modules.i18n.cache import TranslationBundleCache
+from app.modules.i18n.models import (
+    Language,
+    Translation,
+    TranslationCache,
+    TranslationKey,
+    TranslationNamespace,
+)
+from app.modules.i18n.router import _etag_matches
+from app.modules.i18n.service import I18NService
+
+
+TENANT = "tenant-i18n"
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (Language, TranslationNamespace, TranslationKey, Translation, TranslationCache):
+        model.__table__.create(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def queries(engine):
+    """Compteur des SELECT executes."""
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    return statements
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def data(db):
+    """Namespace common, langues fr/en, une cle simple et une cle plurielle."""
+    ns = TranslationNamespace(id=uuid4(), tenant_id=TENANT, code="common", name="Common")
+    fr = Language(id=uuid4(), tenant_id=TENANT, code="fr", name="French", native_name="Francais")
+    en = Language(id=uuid4(), tenant_id=TENANT, code="en", name="English", native_name="English")
+    save = TranslationKey(id=uuid4(), tenant_id=TENANT, namespace_id=ns.id, key="button.save")
+    cancel = TranslationKey(id=uuid4(), tenant_id=TENANT, namespace_id=ns.id, key="button.cancel")
+    item = TranslationKey(id=uuid4(), tenant_id=TENANT, namespace_id=ns.id, key="item", supports_plural=True)
+    db.add_all([ns, fr, en, save, cancel, item])
+    for key, lang, value, plurals in (
+        (save, fr, "Enregistrer", None),
+        (save, en, "Save", None),
+        (cancel, en, "Cancel", None),
+        (item, fr, "{count} elements", {"zero": "aucun element", "one": "{count} element"}),
+    ):
+        db.add(Translation(
+            id=uuid4(), tenant_id=TENANT, translation_key_id=key.id, language_id=lang.id,
+            language_code=lang.code, value=value, plural_values=plurals or {},
+        ))
+    db.commit()
+    return {"fr": fr, "en": en, "save": save}
+
+
+@pytest.fixture
+def shared():
+    """Cache partage (Redis) simule par un cache memoire."""
+    return MemoryCache()
+
+
+@pytest.fixture
+def bundle_cache(shared):
+    return TranslationBundleCache(shared)
+
+
+@pytest.fixture
+def service(db, data, bundle_cache):
+    return I18NService(db, TENANT, bundle_cache=bundle_cache)
+
+
+# ============================================================================
+# TESTS
+# ============================================================================
+
+class TestLookups:
+
+    def test_t_and_tp_served_from_memory(self, service, queries):
+        assert service.t("button.save", "fr") == "Enregistrer"
+        assert service.t("button.cancel", "fr") == "Cancel"
+        queries.clear()
+
+        assert service.t("button.save", "fr") == "Enregistrer"
+        assert service.t("button.cancel", "fr") == "Cancel"
+        assert service.t("unknown", "fr") == "unknown"
+        assert service.tp("item", 0, "fr") == "aucun element"
+        assert service.tp("item", 1, "fr") == "1 element"
+        assert service.tp("item", 5, "fr") == "5 elements"
+
+        assert queries == []
+
+    def test_bundle_shared_between_instances(self, db, data, bundle_cache, queries):
+        I18NService(db, TENANT, bundle_cache=bundle_cache).t("button.save", "fr")
+        queries.clear()
+
+        assert I18NService(db, TENANT, bundle_cache=bundle_cache).t("button.save", "fr") == "Enregistrer"
+        assert queries == []
+
+    def test_bundle_loaded_in_one_query(self, service, queries):
+        bundle = service.get_bundle("fr", "common", use_cache=False)
+
+        assert bundle.translations == {
+            "button.save": "Enregistrer",
+            "item": {"zero": "aucun element", "one": "{count} element"},
+        }
+        # Une seule requete sur les traductions (plus de N+1 sur les cles)
+        assert len([q for q in queries if "i18n_translations" in q]) == 1
+
+
+class TestInvalidation:
+
+    def test_set_translation_invalidates(self, service, data):
+        assert service.t("button.save", "fr") == "Enregistrer"
+
+        service.set_translation(data["save"].id, data["fr"].id, "Sauvegarder")
+
+        assert service.t("button.save", "fr") == "Sauvegarder"
+
+    def test_other_process_sees_new_version(self, db, data, shared):
+        reader = I18NService(db, TENANT, bundle_cache=TranslationBundleCache(shared))
+        writer = I18NService(db, TENANT, bundle_cache=TranslationBundleCache(shared))
+        assert reader.t("button.save", "fr") == "Enregistrer"
+
+        writer.set_translation(data["save"].id, data["fr"].id, "Sauvegarder")
+
+        # Version partagee relue au plus une fois par CHECK_INTERVAL
+        assert reader.t("button.save", "fr") == "Enregistrer"
+        reader.bundle_cache.CHECK_INTERVAL = 0
+        assert reader.t("button.save", "fr") == "Sauvegarder"
+
+    def test_etag_changes_with_content(self, service, data):
+        first = service.get_bundle("fr", "common")
+        again = service.get_bundle("fr", "common")
+
+        service.set_translation(data["save"].id, data["fr"].id, "Sauvegarder")
+        changed = service.get_bundle("fr", "common")
+
+        assert first.etag and first.etag == again.etag
+        assert changed.etag != first.etag
+
+
+class TestEtagHeader:
+
+    def test_matches(self):
+        assert _etag_matches('"abc"', "abc")
+        assert _etag_matches('W/"abc"', "abc")
+        assert _etag_matches('"xyz", "abc"', "abc")
+        assert _etag_matches("*", "abc")
+        assert not _etag_matches('"xyz"', "abc")
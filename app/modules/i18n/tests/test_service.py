@@ -27,6 +27,8 @@ from app.modules.i18n.schemas import (
     ExportRequest, ImportRequest,
     ImportExportFormat,
 )
+from app.core.cache import MemoryCache
+from app.modules.i18n.cache import TranslationBundleCache
 from app.modules.i18n.service import I18NService
 from app.modules.i18n.exceptions import (
     LanguageNotFoundError,
@@ -58,8 +60,8 @@ def tenant_id():
 
 @pytest.fixture
 def service(mock_db, tenant_id):
-    """Instance du service I18N."""
-    return I18NService(mock_db, tenant_id)
+    """Instance du service I18N (cache de bundles isole)."""
+    return I18NService(mock_db, tenant_id, bundle_cache=TranslationBundleCache(MemoryCache()))
 
 
 @pytest.fixture
@@ -220,7 +222,9 @@ class TestTranslation:
 
     def test_t_simple(self, service):
         """Test traduction simple."""
-        service.translation_repo.get_value = MagicMock(return_value="Enregistrer")
+        service.translation_repo.get_bundle_rows = MagicMock(
+            return_value=[("save", "Enregistrer", False, None)]
+        )
 
         result = service.t("save", "fr", "common")
 
@@ -228,7 +232,9 @@ class TestTranslation:
 
     def test_t_with_params(self, service):
         """Test traduction avec parametres."""
-        service.translation_repo.get_value = MagicMock(return_value="Bonjour {name}")
+        service.translation_repo.get_bundle_rows = MagicMock(
+            return_value=[("greeting", "Bonjour {name}", False, None)]
+        )
 
         result = service.t("greeting", "fr", "common", name="Jean")
 
@@ -236,7 +242,7 @@ class TestTranslation:
 
     def test_t_fallback_to_key(self, service):
         """Test fallback sur la cle si pas de traduction."""
-        service.translation_repo.get_value = MagicMock(return_value=None)
+        service.translation_repo.get_bundle_rows = MagicMock(return_value=[])
 
         result = service.t("unknown.key", "fr", "common")
 
@@ -245,8 +251,9 @@ class TestTranslation:
     def test_tp_zero(self, service):
         """Test pluriel zero."""
         # Le service fallback sur t() si pas de pluriel configure
-        service.key_repo.get_by_full_key = MagicMock(return_value=None)
-        service.translation_repo.get_value = MagicMock(return_value="{count} elements")
+        service.translation_repo.get_bundle_rows = MagicMock(
+            return_value=[("item", "{count} elements", False, None)]
+        )
 
         result = service.tp("item", 0, "fr", "common")
 
@@ -254,8 +261,9 @@ class TestTranslation:
 
     def test_tp_one(self, service):
         """Test pluriel un."""
-        service.key_repo.get_by_full_key = MagicMock(return_value=None)
-        service.translation_repo.get_value = MagicMock(return_value="{count} element")
+        service.translation_repo.get_bundle_rows = MagicMock(
+            return_value=[("item", "{count} element", False, None)]
+        )
 
         result = service.tp("item", 1, "fr", "common")
 
@@ -419,10 +427,10 @@ class TestBundles:
     def test_get_bundle(self, service, sample_namespace, sample_language):
         """Test recuperation bundle."""
         service.cache_repo.get = MagicMock(return_value=None)
-        service.translation_repo.get_bundle = MagicMock(return_value={
-            "save": "Enregistrer",
-            "cancel": "Annuler"
-        })
+        service.translation_repo.get_bundle_rows = MagicMock(return_value=[
+            ("save", "Enregistrer", False, None),
+            ("cancel", "Annuler", False, None),
+        ])
         service.cache_repo.set = MagicMock()
 
         result = service.get_bundle("fr", "common")
@@ -18,11 +18,12 @@ from __future__ import annotations
 
 import logging
 import re
-from collections.abc import Callable
+from collections import OrderedDict
 from dataclasses import dataclass
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 # Import de la fonction SAFE de gestion des erreurs
 # Note: Utilise error_response.py au lieu de middleware.py pour éviter les imports circulaires
@@ -749,11 +750,122 @@ AUTHENTICATED_ONLY_ROUTES: list[str] = [
 ]
 
 
+# ============================================================================
+# INDEX COMPILÉ DES ROUTES
+# ============================================================================
+
+class RouteIndex:
+    """
+    Index précompilé des routes RBAC.
+
+    Remplace les parcours linéaires (un re.match par pattern et par requête)
+    par une regex d'alternation unique par méthode HTTP, plus une pour les
+    routes publiques et une pour les routes authentifiées uniquement.
+    L'alternation respecte l'ordre de déclaration: le premier pattern qui
+    matche gagne, comme avec le parcours linéaire.
+
+    Les résultats sont mémorisés par chemin (LRU borné). L'index est
+    reconstruit par register_route_permission / register_public_route, ou si
+    la taille d'une des tables a changé depuis la dernière compilation.
+    """
+
+    MEMO_SIZE = 4096
+
+    def __init__(self):
+        self._signature: tuple[int, int, int] | None = None
+        self._by_method: dict[str, tuple[re.Pattern, list[RoutePermission]]] = {}
+        self._public: re.Pattern | None = None
+        self._authenticated_only: re.Pattern | None = None
+        self._memo: OrderedDict[tuple[str, str], object] = OrderedDict()
+
+    def invalidate(self) -> None:
+        """Force la recompilation au prochain lookup."""
+        self._signature = None
+
+    def _current_signature(self) -> tuple[int, int, int]:
+        return (len(ROUTE_PERMISSIONS), len(PUBLIC_ROUTES), len(AUTHENTICATED_ONLY_ROUTES))
+
+    def _ensure_built(self) -> None:
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+
+        grouped: dict[str, list[tuple[str, RoutePermission]]] = {}
+        for (method, pattern), permission in ROUTE_PERMISSIONS.items():
+            grouped.setdefault(method, []).append((pattern, permission))
+
+        self._by_method = {
+            method: (
+                re.compile("|".join(f"(?P<r{i}>{pattern})" for i, (pattern, _) in enumerate(routes))),
+                [permission for _, permission in routes],
+            )
+            for method, routes in grouped.items()
+        }
+        self._public = self._compile_any(PUBLIC_ROUTES)
+        self._authenticated_only = self._compile_any(AUTHENTICATED_ONLY_ROUTES)
+        self._memo.clear()
+        self._signature = signature
+
+    @staticmethod
+    def _compile_any(patterns: list[str]) -> re.Pattern | None:
+        if not patterns:
+            return None
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def _memoized(self, key: tuple[str, str], compute):
+        self._ensure_built()
+        try:
+            value = self._memo[key]
+            self._memo.move_to_end(key)
+            return value
+        except KeyError:
+            pass
+
+        value = compute()
+        self._memo[key] = value
+        if len(self._memo) > self.MEMO_SIZE:
+            self._memo.popitem(last=False)
+        return value
+
+    def is_public(self, path: str) -> bool:
+        return self._memoized(
+            ("PUBLIC", path),
+            lambda: bool(self._public and self._public.match(path)),
+        )
+
+    def is_authenticated_only(self, path: str) -> bool:
+        return self._memoized(
+            ("AUTH_ONLY", path),
+            lambda: bool(self._authenticated_only and self._authenticated_only.match(path)),
+        )
+
+    def find_permission(self, method: str, path: str) -> RoutePermission | None:
+        def compute() -> RoutePermission | None:
+            entry = self._by_method.get(method)
+            if entry is None:
+                return None
+            regex, permissions = entry
+            match = regex.match(path)
+            if match is None:
+                return None
+            return permissions[int(match.lastgroup[1:])]
+
+        return self._memoized((method, path), compute)
+
+
+_route_index = RouteIndex()
+
+
+def get_route_index() -> RouteIndex:
+    """Retourne l'index compilé des routes RBAC."""
+    return _route_index
+
+
 # ============================================================================
 # MIDDLEWARE RBAC
 # ============================================================================
 
-class RBACMiddleware(BaseHTTPMiddleware):
+class RBACMiddleware:
     """
     Middleware pour appliquer automatiquement les vérifications RBAC.
 
@@ -762,16 +874,40 @@ class RBACMiddleware(BaseHTTPMiddleware):
     2. Vérifie si l'utilisateur est authentifié
     3. Vérifie les permissions selon la matrice RBAC
     4. Log les refus critiques
+
+    Middleware ASGI pur: un refus est envoyé directement, sinon la requête
+    est transmise sans envelopper le flux de réponse.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable):
-        """Traite chaque requête."""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """ASGI middleware interface."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        denied = self._check_access(Request(scope))
+        if denied is not None:
+            await denied(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def _check_access(self, request: Request) -> Response | None:
+        """
+        Applique les règles RBAC à la requête.
+
+        Returns:
+            Réponse d'erreur (401/403) si l'accès est refusé, None sinon
+        """
         path = request.url.path
         method = request.method
 
         # 1. Routes publiques → passer sans vérification
         if self._is_public_route(path):
-            return await call_next(request)
+            return None
 
         # 2. Routes authentifiées uniquement (pas de permission spécifique)
         if self._is_authenticated_only_route(path):
@@ -782,7 +918,7 @@ class RBACMiddleware(BaseHTTPMiddleware):
                     message="Authentification requise",
                     html_path="frontend/errors/401.html"
                 )
-            return await call_next(request)
+            return None
 
         # 3. Trouver la permission requise pour cette route
         # IMPORTANT: Faire ceci AVANT la vérification d'auth pour le mode bêta
@@ -809,7 +945,7 @@ class RBACMiddleware(BaseHTTPMiddleware):
             else:
                 # Mode bêta: warning mais laisse passer
                 logger.debug("RBAC: Route non configurée, mode permissif: %s %s", method, path)
-                return await call_next(request)
+                return None
 
         # 4. Route configurée → Vérifier l'authentification
         if not self._is_authenticated(request):
@@ -859,15 +995,15 @@ class RBACMiddleware(BaseHTTPMiddleware):
         request.state.rbac_restriction = permission.restriction
         request.state.rbac_permission = route_perm
 
-        return await call_next(request)
+        return None
 
     def _is_public_route(self, path: str) -> bool:
         """Vérifie si la route est publique."""
-        return any(re.match(pattern, path) for pattern in PUBLIC_ROUTES)
+        return _route_index.is_public(path)
 
     def _is_authenticated_only_route(self, path: str) -> bool:
         """Vérifie si la route nécessite seulement l'authentification."""
-        return any(re.match(pattern, path) for pattern in AUTHENTICATED_ONLY_ROUTES)
+        return _route_index.is_authenticated_only(path)
 
     def _is_authenticated(self, request: Request) -> bool:
         """Vérifie si l'utilisateur est authentifié."""
@@ -910,10 +1046,7 @@ class RBACMiddleware(BaseHTTPMiddleware):
 
     def _find_route_permission(self, method: str, path: str) -> RoutePermission | None:
         """Trouve la permission requise pour une route."""
-        for (route_method, pattern), permission in ROUTE_PERMISSIONS.items():
-            if route_method == method and re.match(pattern, path):
-                return permission
-        return None
+        return _route_index.find_permission(method, path)
 
     def _log_denied(self, request: Request, route_perm: RoutePermission, reason: str):
         """Log un refus d'accès."""
@@ -952,6 +1085,7 @@ def register_route_permission(
         action=action,
         allow_public=allow_public
     )
+    _route_index.invalidate()
 
 
 def register_public_route(path_pattern: str):
@@ -962,6 +1096,7 @@ def register_public_route(path_pattern: str):
         register_public_route(r"^/api/public/.*$")
     """
     PUBLIC_ROUTES.append(path_pattern)
+    _route_index.invalidate()
 
 
 # ============================================================================
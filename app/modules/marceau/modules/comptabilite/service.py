@@ -675,7 +675,7 @@ Reponds en JSON avec:
                 entries, total = accounting.get_balance(
                     fiscal_year_id=fiscal_year_id,
                     period=period,
-                    per_page=1000,
+                    per_page=None,
                 )
                 report_data = {
                     "type": "balance",
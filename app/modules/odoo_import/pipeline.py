@@ -0,0 +1,125 @@
+"""
+AZALS MODULE - Odoo Import - Lecture paginée
+=============================================
+
+Lecture d'un modèle Odoo par pages, en parallèle sur un pool de connecteurs.
+
+- Pagination par curseur d'ID: les IDs sont recherchés par blocs
+  (search avec ("id", ">", dernier_id), tri par id), jamais par offset
+- Chaque page d'IDs est lue (read) par un connecteur du pool: un
+  ServerProxy XML-RPC n'est pas thread-safe, chaque connecteur n'est
+  utilisé que par un thread à la fois
+- Les pages sont restituées dans l'ordre des IDs, avec au plus
+  2 x nombre de connecteurs pages en mémoire
+"""
+from __future__ import annotations
+
+
+import logging
+import queue
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from app.modules.odoo_import.connector import OdooAPIError, OdooConnector
+
+logger = logging.getLogger(__name__)
+
+
+class OdooPagedReader:
+    """
+    Lecture paginée et parallèle d'un modèle Odoo.
+
+    Usage:
+        reader = OdooPagedReader(connectors, page_size=1000)
+        total = reader.count("product.product", domain)
+        for page in reader.iter_pages("product.product", domain, fields):
+            ...
+    """
+
+    def __init__(
+        self,
+        connectors: List[OdooConnector],
+        page_size: int = 1000,
+        max_retries: int = 2,
+    ):
+        """
+        Args:
+            connectors: Connecteurs connectés (un par lecture simultanée)
+            page_size: Nombre d'enregistrements par appel read
+            max_retries: Nouvelles tentatives par page en cas d'erreur API
+        """
+        if not connectors:
+            raise ValueError("Au moins un connecteur est requis")
+        self.page_size = page_size
+        self.max_retries = max_retries
+        self.workers = len(connectors)
+        self._pool: queue.Queue[OdooConnector] = queue.Queue()
+        for connector in connectors:
+            self._pool.put(connector)
+
+    @contextmanager
+    def _connector(self) -> Iterator[OdooConnector]:
+        connector = self._pool.get()
+        try:
+            yield connector
+        finally:
+            self._pool.put(connector)
+
+    def _call(self, func: Callable[[OdooConnector], Any]) -> Any:
+        """Appelle func avec un connecteur libre, avec nouvelles tentatives."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self._connector() as connector:
+                    return func(connector)
+            except OdooAPIError as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning("[ODOO] Appel en échec (tentative %d): %s", attempt + 1, e)
+
+    def count(self, model: str, domain: List[Any]) -> int:
+        """Nombre d'enregistrements correspondant au domaine."""
+        return self._call(lambda c: c.search_count(model, domain))
+
+    def iter_ids(self, model: str, domain: List[Any]) -> Iterator[List[int]]:
+        """Pages d'IDs triés, par curseur ("id" > dernier ID lu)."""
+        last_id = 0
+        block = self.page_size * self.workers
+        while True:
+            ids = self._call(
+                lambda c, last_id=last_id: c.search(
+                    model, [*domain, ("id", ">", last_id)], limit=block, order="id asc"
+                )
+            )
+            if not ids:
+                return
+            for start in range(0, len(ids), self.page_size):
+                yield ids[start:start + self.page_size]
+            if len(ids) < block:
+                return
+            last_id = ids[-1]
+
+    def iter_pages(
+        self,
+        model: str,
+        domain: List[Any],
+        fields: Optional[List[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Pages d'enregistrements, lues en parallèle et restituées dans l'ordre."""
+        window = self.workers * 2
+        pending: deque[Future] = deque()
+        id_pages = self.iter_ids(model, domain)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="odoo-read") as executor:
+            try:
+                for ids in id_pages:
+                    pending.append(executor.submit(self._call, lambda c, ids=ids: c.read(model, ids, fields)))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
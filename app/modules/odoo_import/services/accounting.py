@@ -573,6 +573,14 @@ class AccountingImportService(BaseOdooService[OdooImportHistory]):
         except Exception:
             self.db.rollback()
 
+        # Écritures créées directement en POSTED: resynchroniser les soldes matérialisés
+        if created or updated:
+            from app.modules.accounting.balances import AccountBalanceService
+
+            balances = AccountBalanceService(self.db, self.tenant_id)
+            for fiscal_year_id in set(fiscal_years_cache.values()):
+                balances.rebuild(fiscal_year_id)
+
         return created, updated, errors
 
     def _get_or_create_fiscal_year(
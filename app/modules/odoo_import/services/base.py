@@ -20,6 +20,7 @@ from sqlalchemy.orm import Session
 from app.core.cache import CacheTTL, get_cache
 from app.modules.odoo_import.connector import OdooConnector
 from app.modules.odoo_import.mapper import OdooMapper
+from app.modules.odoo_import.pipeline import OdooPagedReader
 from app.modules.odoo_import.models import (
     OdooConnectionConfig,
     OdooFieldMapping,
@@ -57,6 +58,10 @@ class BaseOdooService(Generic[T]):
 
     model: Type[T] = None
 
+    # Enregistrements par appel read et lectures Odoo simultanées
+    IMPORT_PAGE_SIZE = 1000
+    IMPORT_WORKERS = 4
+
     def __init__(
         self,
         db: Session,
@@ -130,6 +135,35 @@ class BaseOdooService(Generic[T]):
         connector.connect()
         return connector
 
+    def _get_reader(self, config: OdooConnectionConfig) -> OdooPagedReader:
+        """
+        Crée un lecteur paginé avec un connecteur par lecture simultanée.
+
+        Args:
+            config: Configuration de connexion
+
+        Returns:
+            Lecteur paginé Odoo
+        """
+        connectors = [self._get_connector(config) for _ in range(self.IMPORT_WORKERS)]
+        return OdooPagedReader(connectors, page_size=self.IMPORT_PAGE_SIZE)
+
+    @staticmethod
+    def _delta_domain(delta_date: Optional[datetime]) -> List[Any]:
+        """
+        Domaine Odoo des enregistrements créés ou modifiés depuis une date.
+
+        Args:
+            delta_date: Date de dernière synchronisation (None: tout)
+
+        Returns:
+            Termes de domaine à ajouter (liste vide sans delta)
+        """
+        if not delta_date:
+            return []
+        since = delta_date.strftime("%Y-%m-%d %H:%M:%S")
+        return ["|", ("write_date", ">=", since), ("create_date", ">=", since)]
+
     def _get_mapper(self, config_id: UUID) -> OdooMapper:
         """
         Crée un mapper avec les mappings personnalisés du tenant.
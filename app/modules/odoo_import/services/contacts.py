@@ -9,10 +9,12 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 from uuid import UUID
 
+from app.modules.odoo_import.mapper import OdooMapper
 from app.modules.odoo_import.models import OdooImportHistory, OdooSyncType
+from app.modules.odoo_import.pipeline import OdooPagedReader
 
 from .base import BaseOdooService
 
@@ -54,7 +56,7 @@ class ContactImportService(BaseOdooService[OdooImportHistory]):
         )
 
         try:
-            connector = self._get_connector(config)
+            reader = self._get_reader(config)
             mapper = self._get_mapper(config_id)
 
             # Déterminer la date de delta
@@ -70,23 +72,11 @@ class ContactImportService(BaseOdooService[OdooImportHistory]):
 
             fields = mapper.get_odoo_fields("res.partner")
 
-            if delta_date:
-                domain.extend([
-                    "|",
-                    ("write_date", ">=", delta_date.strftime("%Y-%m-%d %H:%M:%S")),
-                    ("create_date", ">=", delta_date.strftime("%Y-%m-%d %H:%M:%S")),
-                ])
+            domain.extend(self._delta_domain(delta_date))
+            history.total_records = reader.count("res.partner", domain)
 
-            odoo_contacts = connector.search_read("res.partner", domain, fields)
-            history.total_records = len(odoo_contacts)
-
-            # Mapper et importer
-            mapped_contacts = mapper.map_records(
-                "res.partner",
-                odoo_contacts,
-                self.tenant_id,
-            )
-            created, updated, errors = self._import_contacts_batch(mapped_contacts)
+            # Mapper et importer page par page
+            created, updated, errors = self._import_contacts_pages(reader, mapper, domain, fields)
 
             # Mettre à jour la configuration
             config.contacts_last_sync_at = datetime.utcnow()
@@ -134,7 +124,7 @@ class ContactImportService(BaseOdooService[OdooImportHistory]):
         )
 
         try:
-            connector = self._get_connector(config)
+            reader = self._get_reader(config)
             mapper = self._get_mapper(config_id)
 
             delta_date = None
@@ -146,23 +136,11 @@ class ContactImportService(BaseOdooService[OdooImportHistory]):
             domain = [("supplier_rank", ">", 0)]
             fields = mapper.get_odoo_fields("res.partner")
 
-            if delta_date:
-                domain.extend([
-                    "|",
-                    ("write_date", ">=", delta_date.strftime("%Y-%m-%d %H:%M:%S")),
-                    ("create_date", ">=", delta_date.strftime("%Y-%m-%d %H:%M:%S")),
-                ])
-
-            odoo_suppliers = connector.search_read("res.partner", domain, fields)
-            history.total_records = len(odoo_suppliers)
+            domain.extend(self._delta_domain(delta_date))
+            history.total_records = reader.count("res.partner", domain)
 
             # Utilise le même processus que contacts
-            mapped_suppliers = mapper.map_records(
-                "res.partner",
-                odoo_suppliers,
-                self.tenant_id,
-            )
-            created, updated, errors = self._import_contacts_batch(mapped_suppliers)
+            created, updated, errors = self._import_contacts_pages(reader, mapper, domain, fields)
 
             # Mettre à jour la configuration
             config.suppliers_last_sync_at = datetime.utcnow()
@@ -186,9 +164,44 @@ class ContactImportService(BaseOdooService[OdooImportHistory]):
             self.db.commit()
             raise
 
+    def _import_contacts_pages(
+        self,
+        reader: OdooPagedReader,
+        mapper: OdooMapper,
+        domain: List[Any],
+        fields: List[str],
+    ) -> Tuple[int, int, List[Dict[str, Any]]]:
+        """
+        Importe les partenaires Odoo page par page.
+
+        Les pages sont lues en parallèle; chaque page est mappée puis
+        importée (et commitée) avant de passer à la suivante.
+
+        Args:
+            reader: Lecteur paginé Odoo
+            mapper: Mapper configuré
+            domain: Domaine de recherche res.partner
+            fields: Champs à lire
+
+        Returns:
+            Tuple (created_count, updated_count, errors)
+        """
+        created = 0
+        updated = 0
+        errors: List[Dict[str, Any]] = []
+        for page in reader.iter_pages("res.partner", domain, fields):
+            page_created, page_updated, page_errors = self._import_contacts_batch(
+                mapper.map_record("res.partner", record, self.tenant_id)
+                for record in page
+            )
+            created += page_created
+            updated += page_updated
+            errors.extend(page_errors)
+        return created, updated, errors
+
     def _import_contacts_batch(
         self,
-        mapped_contacts: List[Dict[str, Any]],
+        mapped_contacts: Iterable[Dict[str, Any]],
     ) -> Tuple[int, int, List[Dict[str, Any]]]:
         """
         Importe un lot de contacts mappés.
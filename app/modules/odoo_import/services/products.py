@@ -9,9 +9,12 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Tuple
 from uuid import UUID
 
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
 from app.modules.odoo_import.models import OdooImportHistory, OdooSyncType
 
 from .base import BaseOdooService
@@ -33,6 +36,7 @@ class ProductImportService(BaseOdooService[OdooImportHistory]):
         Importe les produits depuis Odoo.
 
         Supporte l'import delta (incrémental) basé sur write_date.
+        Les produits sont lus par pages en parallèle et écrits par lot.
 
         Args:
             config_id: ID de la configuration
@@ -54,7 +58,7 @@ class ProductImportService(BaseOdooService[OdooImportHistory]):
         )
 
         try:
-            connector = self._get_connector(config)
+            reader = self._get_reader(config)
             mapper = self._get_mapper(config_id)
 
             # Déterminer la date de delta
@@ -63,31 +67,23 @@ class ProductImportService(BaseOdooService[OdooImportHistory]):
                 delta_date = config.products_last_sync_at
                 history.delta_from_date = delta_date
 
-            # Récupérer les produits Odoo
+            # Inclure les produits inactifs, en complet comme en delta
+            domain = [("active", "in", [True, False]), *self._delta_domain(delta_date)]
             fields = mapper.get_odoo_fields("product.product")
-
-            if delta_date:
-                odoo_products = connector.get_modified_since(
-                    "product.product",
-                    delta_date,
-                    fields,
+            history.total_records = reader.count("product.product", domain)
+
+            # Pages lues en parallèle, mappées et écrites une à une
+            created = 0
+            updated = 0
+            errors: List[Dict[str, Any]] = []
+            for page in reader.iter_pages("product.product", domain, fields):
+                page_created, page_updated, page_errors = self._import_batch(
+                    mapper.map_record("product.product", record, self.tenant_id)
+                    for record in page
                 )
-            else:
-                odoo_products = connector.search_read(
-                    "product.product",
-                    [("active", "in", [True, False])],  # Inclure produits inactifs
-                    fields,
-                )
-
-            history.total_records = len(odoo_products)
-
-            # Mapper et importer
-            mapped_products = mapper.map_records(
-                "product.product",
-                odoo_products,
-                self.tenant_id,
-            )
-            created, updated, errors = self._import_batch(mapped_products)
+                created += page_created
+                updated += page_updated
+                errors.extend(page_errors)
 
             # Mettre à jour la configuration
             config.products_last_sync_at = datetime.utcnow()
@@ -114,33 +110,30 @@ class ProductImportService(BaseOdooService[OdooImportHistory]):
 
     def _import_batch(
         self,
-        mapped_products: List[Dict[str, Any]],
+        mapped_products: Iterable[Dict[str, Any]],
     ) -> Tuple[int, int, List[Dict[str, Any]]]:
         """
-        Importe un lot de produits mappés.
+        Importe un lot de produits mappés par INSERT ... ON CONFLICT.
 
-        Utilise des savepoints pour pouvoir rollback chaque produit
-        individuellement en cas d'erreur.
+        Le lot est écrit en une requête dans un savepoint; s'il échoue,
+        il est rejoué produit par produit pour isoler les erreurs.
 
         Args:
-            mapped_products: Liste des produits mappés
+            mapped_products: Produits mappés (une page Odoo)
 
         Returns:
             Tuple (created_count, updated_count, errors)
         """
         from app.modules.inventory.models import Product
 
-        created = 0
-        updated = 0
+        columns = set(Product.__table__.columns.keys()) - {"id", "created_at"}
         errors = []
+        rows: Dict[str, Dict[str, Any]] = {}
+        odoo_ids: Dict[str, Any] = {}
+        now = datetime.utcnow()
 
         for mapped in mapped_products:
-            # Extraire les métadonnées Odoo
-            odoo_id = mapped.pop("_odoo_id", None)
-            mapped.pop("_odoo_model", None)
-            mapped.pop("_odoo_category_id", None)
-            mapped.pop("_odoo_category_name", None)
-
+            odoo_id = mapped.get("_odoo_id")
             code = mapped.get("code")
             if not code:
                 errors.append({
@@ -150,81 +143,113 @@ class ProductImportService(BaseOdooService[OdooImportHistory]):
                 })
                 continue
 
-            try:
-                savepoint = self.db.begin_nested()
-
-                # Rechercher un produit existant
-                existing = (
-                    self.db.query(Product)
-                    .filter(
-                        Product.tenant_id == self.tenant_id,
-                        Product.code == code,
-                    )
-                    .first()
-                )
+            # Métadonnées Odoo et champs sans colonne ignorés
+            row = {key: value for key, value in mapped.items() if key in columns}
+            row["tenant_id"] = self.tenant_id
+            row["updated_at"] = now
+            # Un code présent deux fois dans la page: la dernière version gagne
+            rows[code] = row
+            odoo_ids[code] = odoo_id
 
-                if existing:
-                    # Mise à jour
-                    for key, value in mapped.items():
-                        if key not in ("tenant_id", "id") and hasattr(existing, key):
-                            setattr(existing, key, value)
-                    existing.updated_at = datetime.utcnow()
-                    savepoint.commit()
-                    updated += 1
-                    logger.debug("Produit mis à jour: %s", code)
-                else:
-                    # Création
-                    product = Product(**mapped)
-                    self.db.add(product)
-                    savepoint.commit()
-                    created += 1
-                    logger.debug("Produit créé: %s", code)
-
-            except Exception as e:
-                self.db.rollback()
-                error_msg = str(e)
-
-                # Gestion des conflits de duplication
-                if "unique" in error_msg.lower() or "duplicate" in error_msg.lower():
-                    try:
-                        existing = (
-                            self.db.query(Product)
-                            .filter(
-                                Product.tenant_id == self.tenant_id,
-                                Product.code == code,
-                            )
-                            .first()
-                        )
-                        if existing:
-                            for key, value in mapped.items():
-                                if key not in ("tenant_id", "id") and hasattr(existing, key):
-                                    setattr(existing, key, value)
-                            existing.updated_at = datetime.utcnow()
-                            self.db.commit()
-                            updated += 1
-                            logger.debug(
-                                "Produit mis à jour après conflit: %s",
-                                code,
-                            )
-                            continue
-                    except Exception as e2:
-                        error_msg = str(e2)
+        if not rows:
+            return 0, 0, errors
 
-                errors.append({
-                    "odoo_id": odoo_id,
-                    "code": code,
-                    "error": error_msg[:200],
-                })
-                logger.warning(
-                    "Erreur produit %s: %s",
-                    code,
-                    error_msg[:100],
-                )
-
-        # Commit final
         try:
-            self.db.commit()
-        except Exception:
-            self.db.rollback()
+            with self.db.begin_nested():
+                created, updated = self._upsert_products(list(rows.values()))
+            imported = list(rows)
+        except Exception as e:
+            logger.warning("Lot produits en échec, import unitaire: %s", str(e)[:100])
+            created = updated = 0
+            imported = []
+            for code, row in rows.items():
+                try:
+                    with self.db.begin_nested():
+                        row_created, row_updated = self._upsert_products([row])
+                    created += row_created
+                    updated += row_updated
+                    imported.append(code)
+                except Exception as row_error:
+                    error_msg = str(row_error)
+                    errors.append({
+                        "odoo_id": odoo_ids[code],
+                        "code": code,
+                        "error": error_msg[:200],
+                    })
+                    logger.warning("Erreur produit %s: %s", code, error_msg[:100])
+
+        # Commit par page: la transaction reste bornée
+        self.db.commit()
+        self._index_products(imported)
 
         return created, updated, errors
+
+    def _index_products(self, codes: List[str]) -> None:
+        """
+        Répercute une page commitée sur les index de recherche.
+
+        L'upsert Core ne déclenche pas les événements ORM de l'indexation
+        incrémentale: les produits sont relus et transmis à
+        apply_entity_changes().
+
+        Args:
+            codes: Codes des produits importés
+        """
+        from app.modules.inventory.models import Product
+        from app.modules.search.events import apply_entity_changes, entity_changes
+
+        if not codes:
+            return
+        products = self.db.execute(
+            select(Product).where(Product.tenant_id == self.tenant_id, Product.code.in_(codes))
+        ).scalars()
+        changes = entity_changes(products)
+        if changes:
+            apply_entity_changes(changes)
+
+    def _upsert_products(self, rows: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        Insère ou met à jour des produits par code (contrainte tenant_id, code).
+
+        Args:
+            rows: Lignes de la table products, codes distincts
+
+        Returns:
+            Tuple (created_count, updated_count)
+        """
+        from app.modules.inventory.models import Product
+
+        table = Product.__table__
+        codes = [row["code"] for row in rows]
+        existing = set(self.db.execute(
+            select(table.c.code).where(table.c.tenant_id == self.tenant_id, table.c.code.in_(codes))
+        ).scalars())
+
+        # Une requête par jeu de colonnes (les champs False d'Odoo sont omis)
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+
+        dialect = self.db.get_bind().dialect.name
+        for keys, group in groups.items():
+            if dialect in ("postgresql", "sqlite"):
+                dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                stmt = dialect_insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["tenant_id", "code"],
+                    set_={key: stmt.excluded[key] for key in keys if key not in ("tenant_id", "code")},
+                )
+                self.db.execute(stmt, group)
+            else:
+                for row in group:
+                    if row["code"] in existing:
+                        self.db.execute(
+                            update(table)
+                            .where(table.c.tenant_id == self.tenant_id, table.c.code == row["code"])
+                            .values(row)
+                        )
+                    else:
+                        self.db.execute(insert(table).values(row))
+
+        updated = sum(1 for code in codes if code in existing)
+        return len(codes) - updated, updated
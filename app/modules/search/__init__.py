@@ -9,6 +9,9 @@ Moteur de recherche full-text:
 - Recherche phonétique
 - Synonymes configurables
 - Historique de recherche
+- Index inversé persistant (BM25), indexation sur événements d'entités
+  appliquée en arrière-plan
+- API REST /search (index du tenant, recherche, autocomplétion)
 """
 
 from .service import (
@@ -37,6 +40,20 @@ from .service import (
     SearchService,
     create_search_service,
 )
+from .index import (
+    SearchStore,
+    MemorySearchStore,
+    SQLSearchStore,
+)
+from .fuzzy import LevenshteinAutomaton, TermDictionary
+from .events import (
+    apply_entity_changes,
+    entity_changes,
+    register_search_entity,
+    start_search_indexing,
+    stop_search_indexing,
+    unregister_search_entity,
+)
 
 __all__ = [
     "IndexStatus",
@@ -58,4 +75,15 @@ __all__ = [
     "ReindexJob",
     "SearchService",
     "create_search_service",
+    "SearchStore",
+    "MemorySearchStore",
+    "SQLSearchStore",
+    "LevenshteinAutomaton",
+    "TermDictionary",
+    "apply_entity_changes",
+    "entity_changes",
+    "register_search_entity",
+    "start_search_indexing",
+    "stop_search_indexing",
+    "unregister_search_entity",
 ]
@@ -0,0 +1,79 @@
+"""
+AZALS MODULE - SEARCH: Entités indexées automatiquement
+========================================================
+
+Modèles métier branchés sur l'indexation incrémentale (events.py): les
+index d'un tenant dont l'entity_type correspond sont tenus à jour à chaque
+commit de ces entités.
+
+Appelé au démarrage de l'application (lifespan):
+    from app.modules.search.entities import register_default_search_entities
+
+    register_default_search_entities()
+"""
+from __future__ import annotations
+
+import enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from .events import register_search_entity
+
+
+def _fields(*names: str) -> Callable[[Any], Dict[str, Any]]:
+    """Instance -> {champ: valeur} pour les attributs renseignés (Enum -> valeur)."""
+
+    def to_fields(instance: Any) -> Dict[str, Any]:
+        fields = {}
+        for name in names:
+            value = getattr(instance, name, None)
+            if value is None or value == "":
+                continue
+            fields[name] = value.value if isinstance(value, enum.Enum) else value
+        return fields
+
+    return to_fields
+
+
+def default_search_entities() -> List[Tuple[Type, str, Callable[[Any], Dict[str, Any]]]]:
+    """(modèle, entity_type, extraction des champs) des entités métier recherchables."""
+    from app.modules.commercial.models import CommercialDocument, Customer
+    from app.modules.inventory.models import Product
+    from app.modules.procurement.models import Supplier
+
+    return [
+        (Customer, "customer", _fields(
+            "code", "name", "legal_name", "type", "email", "phone", "city",
+            "postal_code", "country_code", "tax_id", "registration_number", "industry", "segment",
+        )),
+        (Supplier, "supplier", _fields(
+            "code", "name", "legal_name", "type", "status", "email", "phone", "city",
+            "postal_code", "country", "tax_id", "vat_number",
+        )),
+        (Product, "product", _fields(
+            "code", "name", "trade_name", "description", "type", "status",
+            "barcode", "ean13", "sku", "sale_price", "currency",
+        )),
+        (CommercialDocument, "commercial_document", _fields(
+            "number", "reference", "type", "status", "date", "total", "currency",
+        )),
+    ]
+
+
+def register_default_search_entities(
+    entities: Optional[Iterable[Tuple[Type, str, Callable]]] = None,
+    **options,
+) -> int:
+    """
+    Branche les entités métier sur l'indexation incrémentale.
+
+    Args:
+        entities: (modèle, entity_type, extraction) (défaut: default_search_entities())
+        **options: Transmis à register_search_entity (session_factory...)
+
+    Returns:
+        Nombre de modèles enregistrés
+    """
+    entities = default_search_entities() if entities is None else list(entities)
+    for model, entity_type, to_fields in entities:
+        register_search_entity(model, entity_type, to_fields, **options)
+    return len(entities)
@@ -0,0 +1,370 @@
+"""
+AZALS MODULE - SEARCH: Indexation incrémentale sur événements d'entités
+========================================================================
+
+Les modèles enregistrés via register_search_entity() sont réindexés
+automatiquement: les créations / modifications / suppressions sont
+collectées à chaque flush, puis appliquées à l'index persistant après le
+commit de la transaction métier (rien n'est indexé en cas de rollback).
+
+Le commit métier ne fait aucune E/S d'indexation:
+- les types d'entités indexés de chaque tenant sont gardés en cache
+  (IndexedTypesCache, invalidé à la création / suppression d'un index):
+  les changements d'un tenant sans index de ce type sont ignorés
+- les autres sont mis en file (SearchChangeQueue) et appliqués par
+  SearchIndexingFlusher toutes les SEARCH_INDEXING_FLUSH_SECONDS ou dès
+  que SEARCH_INDEXING_BUFFER_SIZE entités sont en attente
+- sans flusher démarré (scripts, tests), ils sont appliqués au commit
+
+Usage:
+    from app.modules.search.events import register_search_entity
+
+    register_search_entity(
+        Product, "product",
+        lambda p: {"name": p.name, "description": p.description, "price": p.price},
+    )
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple, Type
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.background_flusher import BackgroundFlusher, FlushTrigger
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "search_pending_changes"
+
+# Intervalle d'application des changements en file (secondes)
+INDEXING_FLUSH_INTERVAL = float(os.environ.get("SEARCH_INDEXING_FLUSH_SECONDS", "1"))
+
+# Nombre d'entités en attente déclenchant une application anticipée
+INDEXING_BUFFER_SIZE = int(os.environ.get("SEARCH_INDEXING_BUFFER_SIZE", "500"))
+
+# Au-delà, les nouveaux changements sont abandonnés (rattrapés par réindexation)
+INDEXING_BUFFER_LIMIT_FACTOR = 20
+
+# Durée de validité des types d'entités indexés d'un tenant en cache (secondes);
+# borne le retard d'un index créé par un autre processus
+INDEXED_TYPES_CACHE_TTL = float(os.environ.get("SEARCH_INDEXED_TYPES_CACHE_SECONDS", "60"))
+
+# {(tenant_id, entity_type, entity_id): champs | None}
+EntityChanges = Dict[Tuple[str, str, str], Optional[Dict[str, Any]]]
+
+
+@dataclass(frozen=True)
+class SearchEntityBinding:
+    """Liaison modèle -> type d'entité indexé."""
+    entity_type: str
+    to_fields: Callable[[Any], Dict[str, Any]]
+    tenant_attr: str = "tenant_id"
+    id_attr: str = "id"
+
+
+_bindings: Dict[Type, SearchEntityBinding] = {}
+_session_factory: Optional[Callable[[], Session]] = None
+_listeners_installed = False
+
+
+def register_search_entity(
+    model: Type,
+    entity_type: str,
+    to_fields: Callable[[Any], Dict[str, Any]],
+    tenant_attr: str = "tenant_id",
+    id_attr: str = "id",
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> None:
+    """
+    Indexe automatiquement les instances de `model` dans les index `entity_type`.
+
+    Args:
+        model: Modèle SQLAlchemy
+        entity_type: Type d'entité des index à alimenter
+        to_fields: Instance -> champs à indexer
+        tenant_attr / id_attr: Attributs tenant et identifiant de l'instance
+        session_factory: Sessions utilisées pour écrire dans l'index
+            (défaut: app.core.database.SessionLocal)
+    """
+    global _session_factory
+    _bindings[model] = SearchEntityBinding(entity_type, to_fields, tenant_attr, id_attr)
+    if session_factory is not None:
+        _session_factory = session_factory
+    _install_listeners()
+
+
+def unregister_search_entity(model: Type) -> None:
+    """Retire un modèle de l'indexation automatique."""
+    _bindings.pop(model, None)
+
+
+def _binding_for(instance: Any) -> Optional[SearchEntityBinding]:
+    for model, binding in _bindings.items():
+        if isinstance(instance, model):
+            return binding
+    return None
+
+
+def entity_changes(instances: Iterable[Any], deleted: bool = False) -> EntityChanges:
+    """
+    Changements {(tenant_id, entity_type, entity_id): champs | None} des
+    instances de modèles enregistrés (les autres sont ignorées).
+
+    Pour les écritures qui contournent l'ORM (insert Core...), à passer à
+    apply_entity_changes() après le commit.
+    """
+    changes: EntityChanges = {}
+    for instance in instances:
+        binding = _binding_for(instance)
+        if binding is None:
+            continue
+        key = (
+            str(getattr(instance, binding.tenant_attr)),
+            binding.entity_type,
+            str(getattr(instance, binding.id_attr)),
+        )
+        try:
+            changes[key] = None if deleted else binding.to_fields(instance)
+        except Exception:
+            logger.exception("Search indexing: field extraction failed for %s", key)
+    return changes
+
+
+def _collect(session: Session, flush_context) -> None:
+    """after_flush: mémorise la dernière version de chaque entité modifiée."""
+    if not _bindings:
+        return
+
+    pending: EntityChanges = session.info.setdefault(_PENDING_KEY, {})
+    for instances, deleted in ((session.new, False), (session.dirty, False), (session.deleted, True)):
+        pending.update(entity_changes(instances, deleted))
+
+
+def _discard(session: Session) -> None:
+    """after_rollback: les changements collectés ne seront jamais commités."""
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _apply(session: Session) -> None:
+    """after_commit: met en file les changements des tenants indexés (aucune E/S)."""
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    pending = _types_cache.skip_unindexed(pending)
+    if not pending:
+        return
+    if _flusher is not None:
+        _queue.extend(pending)
+    else:
+        apply_entity_changes(pending)
+
+
+# ============================================================================
+# CACHE DES TYPES INDEXÉS
+# ============================================================================
+
+class IndexedTypesCache:
+    """Cache par tenant des entity_type ayant au moins un index."""
+
+    def __init__(self, ttl: float = INDEXED_TYPES_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[FrozenSet[str], float]] = {}
+
+    def get(self, tenant_id: str) -> Optional[FrozenSet[str]]:
+        """Types connus du tenant, None si absent ou expiré (aucune E/S)."""
+        entry = self._entries.get(tenant_id)
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def load(self, db: Session, tenant_id: str) -> FrozenSet[str]:
+        """Types du tenant; lus en une requête s'ils ne sont pas en cache."""
+        from .models import SearchIndexRecord
+
+        types = self.get(tenant_id)
+        if types is None:
+            types = frozenset(
+                entity_type for (entity_type,) in db.query(SearchIndexRecord.entity_type).filter(
+                    SearchIndexRecord.tenant_id == tenant_id
+                ).distinct()
+            )
+            with self._lock:
+                self._entries[tenant_id] = (types, time.monotonic())
+        return types
+
+    def skip_unindexed(self, changes: EntityChanges) -> EntityChanges:
+        """Retire les changements des tenants connus sans index de ce type (aucune E/S)."""
+        kept = {}
+        for key, fields in changes.items():
+            types = self.get(key[0])
+            if types is None or key[1] in types:
+                kept[key] = fields
+        return kept
+
+    def invalidate(self, tenant_id: Optional[str] = None) -> None:
+        with self._lock:
+            if tenant_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(tenant_id, None)
+
+
+# ============================================================================
+# FILE D'INDEXATION
+# ============================================================================
+
+class SearchChangeQueue:
+    """File thread-safe des changements, dernière version par entité."""
+
+    def __init__(self, max_pending: int = INDEXING_BUFFER_SIZE):
+        self.max_pending = max_pending
+        self.flush_requested = FlushTrigger(max_pending)
+        self.dropped_changes = 0
+        self._lock = threading.Lock()
+        self._changes: EntityChanges = {}
+
+    def __len__(self) -> int:
+        return len(self._changes)
+
+    def extend(self, changes: EntityChanges) -> None:
+        with self._lock:
+            for key, fields in changes.items():
+                if key not in self._changes and len(self._changes) >= self.max_pending * INDEXING_BUFFER_LIMIT_FACTOR:
+                    self.dropped_changes += 1
+                    continue
+                self._changes[key] = fields
+            pending = len(self._changes)
+
+        self.flush_requested.notify(pending)
+
+    def drain(self) -> EntityChanges:
+        """Retire et retourne le contenu de la file."""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        return changes
+
+
+# ============================================================================
+# APPLICATION À L'INDEX
+# ============================================================================
+
+def apply_entity_changes(changes: EntityChanges) -> int:
+    """
+    Applique des changements {(tenant_id, entity_type, entity_id): champs | None}.
+
+    Une session par tenant, ouverte seulement si le tenant a un index du
+    type concerné. Les erreurs d'indexation sont journalisées sans remonter:
+    la transaction métier est déjà commitée, l'index se rattrape par
+    réindexation.
+
+    Returns:
+        Nombre de changements appliqués
+    """
+    from .service import SearchService
+
+    factory = _session_factory
+    if factory is None:
+        from app.core.database import SessionLocal
+        factory = SessionLocal
+
+    by_tenant: Dict[str, list] = {}
+    for (tenant_id, entity_type, entity_id), fields in changes.items():
+        by_tenant.setdefault(tenant_id, []).append((entity_type, entity_id, fields))
+
+    applied = 0
+    for tenant_id, tenant_changes in by_tenant.items():
+        types = _types_cache.get(tenant_id)
+        if types is not None and not any(change[0] in types for change in tenant_changes):
+            continue
+        db = factory()
+        try:
+            types = _types_cache.load(db, tenant_id)
+            tenant_changes = [change for change in tenant_changes if change[0] in types]
+            if not tenant_changes:
+                continue
+            service = SearchService(tenant_id, db=db)
+            for entity_type, entity_id, fields in tenant_changes:
+                service.apply_entity_change(entity_type, entity_id, fields)
+            applied += len(tenant_changes)
+        except Exception:
+            db.rollback()
+            logger.exception("Search indexing failed | tenant=%s changes=%s", tenant_id, len(tenant_changes))
+        finally:
+            db.close()
+    return applied
+
+
+def flush_search_changes(queue: SearchChangeQueue) -> int:
+    """Applique le contenu de la file; retourne le nombre de changements appliqués."""
+    changes = queue.drain()
+    if not changes:
+        return 0
+    return apply_entity_changes(changes)
+
+
+class SearchIndexingFlusher(BackgroundFlusher):
+    """Thread de fond qui applique la file par intervalle ou par taille."""
+
+    def __init__(self, queue: SearchChangeQueue, interval: float = INDEXING_FLUSH_INTERVAL):
+        self.queue = queue
+        super().__init__(
+            lambda: flush_search_changes(self.queue),
+            interval,
+            trigger=queue.flush_requested,
+            name="search-indexing",
+            log=logger,
+            error_message="Search indexing flush failed, retry next cycle: %s",
+        )
+
+
+# ============================================================================
+# INSTANCES GLOBALES
+# ============================================================================
+
+_types_cache = IndexedTypesCache()
+_queue = SearchChangeQueue()
+_flusher: Optional[SearchIndexingFlusher] = None
+
+
+def get_indexed_types_cache() -> IndexedTypesCache:
+    """Retourne le cache global des types indexés."""
+    return _types_cache
+
+
+def get_change_queue() -> SearchChangeQueue:
+    """Retourne la file globale du processus."""
+    return _queue
+
+
+def start_search_indexing() -> SearchIndexingFlusher:
+    """Démarre l'application en arrière-plan des changements (lifespan de l'application)."""
+    global _flusher
+    if _flusher is None:
+        _flusher = SearchIndexingFlusher(_queue)
+        _flusher.start()
+    return _flusher
+
+
+def stop_search_indexing() -> None:
+    """Arrête l'application en arrière-plan (dernière application incluse)."""
+    global _flusher
+    if _flusher is not None:
+        flusher, _flusher = _flusher, None
+        flusher.stop()
+
+
+def _install_listeners() -> None:
+    global _listeners_installed
+    if _listeners_installed:
+        return
+    event.listen(Session, "after_flush", _collect)
+    event.listen(Session, "after_commit", _apply)
+    event.listen(Session, "after_rollback", _discard)
+    _listeners_installed = True
@@ -0,0 +1,206 @@
+"""
+AZALS MODULE - SEARCH: Recherche floue sur le dictionnaire des termes
+=====================================================================
+
+Automate de Levenshtein (DFA construit à la demande) parcouru sur le
+vocabulaire trié, vu comme un trie implicite:
+- un état est une ligne de la matrice de distance, bornée à max_distance + 1;
+  les transitions (état, caractère) sont mémorisées, un pas coûte donc une
+  recherche de dictionnaire
+- TermDictionary conserve, pour chaque terme, la longueur du préfixe commun
+  avec le terme précédent: les états de ce préfixe sont réutilisés tels quels
+- dès qu'un préfixe atteint l'état mort, tous les termes qui le partagent
+  sont sautés d'un coup (recherche exponentielle puis bisect)
+
+Le coût dépend du nombre de préfixes « vivants », pas de la taille du
+vocabulaire (quelques ms sur 500 000 termes, voir
+scripts/benchmarks/bench_search_fuzzy.py). Alternatives écartées: index de
+suppressions à la SymSpell (~30 clés par terme à distance 2), BK-tree (trop
+de calculs de distance complets en Python).
+"""
+from __future__ import annotations
+
+import bisect
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Au-delà, le nombre de préfixes vivants explose (même borne qu'Elasticsearch)
+MAX_FUZZINESS = 2
+
+State = Tuple[int, ...]
+
+_MISSING = object()
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = 0
+    limit = min(len(a), len(b))
+    while n < limit and a[n] == b[n]:
+        n += 1
+    return n
+
+
+def _prefix_upper_bound(prefix: str) -> str:
+    """Plus petite chaîne supérieure à toutes celles commençant par prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class LevenshteinAutomaton:
+    """DFA de Levenshtein pour un mot et une distance maximale, construit à la demande."""
+
+    def __init__(self, word: str, max_distance: int):
+        self.word = word
+        self.max_distance = max_distance
+        self.start: State = tuple(min(j, max_distance + 1) for j in range(len(word) + 1))
+        self.transitions: Dict[Tuple[State, str], Optional[State]] = {}
+
+    def step(self, state: State, char: str) -> Optional[State]:
+        """État suivant, ou None si plus aucun suffixe ne peut correspondre."""
+        key = (state, char)
+        result = self.transitions.get(key, _MISSING)
+        if result is not _MISSING:
+            return result
+
+        cap = self.max_distance + 1
+        word = self.word
+        row = [min(state[0] + 1, cap)]
+        for j in range(1, len(state)):
+            row.append(min(row[j - 1] + 1, state[j] + 1, state[j - 1] + (word[j - 1] != char), cap))
+        result = tuple(row) if min(row) <= self.max_distance else None
+        self.transitions[key] = result
+        return result
+
+    def distance(self, word: str) -> int:
+        """Distance de word au mot de l'automate (max_distance + 1 si trop loin)."""
+        state: Optional[State] = self.start
+        for char in word:
+            state = self.step(state, char)
+            if state is None:
+                return self.max_distance + 1
+        return state[-1]
+
+
+class TermDictionary:
+    """
+    Vocabulaire trié d'un index, maintenu par insertions / suppressions.
+
+    lcp[i] est la longueur du préfixe commun entre les termes i - 1 et i;
+    il est mis à jour localement à chaque modification.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        self._terms: List[str] = sorted(set(terms))
+        self._lcp = array("H", [0] * len(self._terms))
+        for i in range(1, len(self._terms)):
+            self._lcp[i] = _common_prefix_length(self._terms[i - 1], self._terms[i])
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        i = bisect.bisect_left(self._terms, term)
+        return i < len(self._terms) and self._terms[i] == term
+
+    def _relink(self, i: int) -> None:
+        if i < len(self._terms):
+            self._lcp[i] = _common_prefix_length(self._terms[i - 1], self._terms[i]) if i else 0
+
+    def add(self, term: str) -> bool:
+        """Ajoute un terme; False s'il était déjà présent."""
+        terms = self._terms
+        i = bisect.bisect_left(terms, term)
+        if i < len(terms) and terms[i] == term:
+            return False
+        terms.insert(i, term)
+        self._lcp.insert(i, 0)
+        self._relink(i)
+        self._relink(i + 1)
+        return True
+
+    def discard(self, term: str) -> bool:
+        """Retire un terme; False s'il était absent."""
+        terms = self._terms
+        i = bisect.bisect_left(terms, term)
+        if i == len(terms) or terms[i] != term:
+            return False
+        del terms[i]
+        del self._lcp[i]
+        self._relink(i)
+        return True
+
+    def prefix(self, prefix: str) -> List[str]:
+        """Termes commençant par prefix, dans l'ordre du dictionnaire."""
+        if not prefix:
+            return list(self._terms)
+        terms = self._terms
+        return terms[bisect.bisect_left(terms, prefix):bisect.bisect_left(terms, _prefix_upper_bound(prefix))]
+
+    def fuzzy(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """
+        Termes à une distance de Levenshtein <= max_distance de word.
+
+        Args:
+            word: Terme recherché (déjà normalisé)
+            max_distance: Distance maximale, bornée à MAX_FUZZINESS
+
+        Returns:
+            Liste de (terme, distance), dans l'ordre du dictionnaire
+        """
+        max_distance = min(max_distance, MAX_FUZZINESS)
+        if max_distance < 0:
+            return []
+
+        automaton = LevenshteinAutomaton(word, max_distance)
+        step = automaton.step
+        transitions = automaton.transitions
+        terms = self._terms
+        lcp = self._lcp
+        count = len(terms)
+
+        # states[k]: état après les k premiers caractères du terme courant
+        states: List[State] = [automaton.start]
+        results: List[Tuple[str, int]] = []
+
+        i = 0
+        while i < count:
+            term = terms[i]
+            depth = len(states) - 1
+            if lcp[i] < depth:
+                depth = lcp[i]
+                del states[depth + 1:]
+
+            state = states[depth]
+            dead_at = 0
+            for k in range(depth, len(term)):
+                char = term[k]
+                state = transitions.get((state, char), _MISSING)
+                if state is _MISSING:
+                    state = step(states[k], char)
+                if state is None:
+                    dead_at = k + 1
+                    break
+                states.append(state)
+
+            if dead_at:
+                # Aucun terme partageant ce préfixe ne peut correspondre:
+                # recherche exponentielle de la fin de la plage, puis bisect
+                prefix = term[:dead_at]
+                last, probe, gap = i, i + 1, 1
+                while probe < count and terms[probe].startswith(prefix):
+                    last = probe
+                    gap *= 2
+                    probe = last + gap
+                probe = min(probe, count)
+                if probe - last > 1:
+                    probe = bisect.bisect_left(terms, _prefix_upper_bound(prefix), last + 1, probe)
+                i = probe
+                continue
+
+            if state[-1] <= max_distance:
+                results.append((term, state[-1]))
+            i += 1
+
+        return results
@@ -0,0 +1,798 @@
+"""
+AZALS MODULE - SEARCH: Stockage de l'index inversé
+===================================================
+
+Deux implémentations de SearchStore, utilisées par SearchService:
+- MemorySearchStore: dictionnaires en mémoire (tests, usage sans base)
+- SQLSearchStore: tables search_* (persistant, partagé entre workers)
+
+Structures:
+- postings: terme -> {doc_num: (tf, longueur du document)}, suffisant pour
+  le scoring BM25 sans relire les documents
+- dictionnaire des termes trié: requêtes préfixe / wildcard par plage,
+  recherche floue par automate de Levenshtein (voir fuzzy.py)
+- entity_id -> doc_num: mise à jour et suppression sans parcours
+
+En base, les postings d'un terme sont découpés en shards de 2^SHARD_BITS
+documents et encodés en varints (delta doc_num, tf, longueur): une mise à
+jour ne réécrit que le shard du document concerné. Le vocabulaire utilisé
+par la recherche floue est gardé en cache par processus et validé par
+search_indexes.terms_version, incrémenté à chaque ajout / retrait de terme.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from .fuzzy import TermDictionary, _prefix_upper_bound
+from .models import SearchDocumentRecord, SearchIndexRecord, SearchPosting
+
+if TYPE_CHECKING:
+    from .service import IndexDefinition, IndexedDocument
+
+# Documents par shard de postings
+SHARD_BITS = 12
+
+# Longueur maximale d'un terme indexé
+MAX_TERM_LENGTH = 100
+
+# Taille des lots IN (...) / lecture par curseur
+_CHUNK_SIZE = 500
+
+# Vocabulaires (TermDictionary) gardés en cache par processus
+SEARCH_VOCABULARY_CACHE_SIZE = int(os.environ.get("SEARCH_VOCABULARY_CACHE_SIZE", "16"))
+
+# doc_num -> (tf, longueur du document)
+Postings = Dict[int, Tuple[int, int]]
+
+
+# ============================================================
+# ENCODAGE DES POSTINGS
+# ============================================================
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_postings(postings: Postings) -> bytes:
+    """Encode des postings en varints: (delta doc_num, tf, longueur) triés par doc_num."""
+    out = bytearray()
+    previous = 0
+    for doc_num in sorted(postings):
+        tf, length = postings[doc_num]
+        _write_varint(out, doc_num - previous)
+        _write_varint(out, tf)
+        _write_varint(out, length)
+        previous = doc_num
+    return bytes(out)
+
+
+def decode_postings(data: bytes) -> Postings:
+    """Décode des postings encodés par encode_postings()."""
+    postings: Postings = {}
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+
+    doc_num = 0
+    for i in range(0, len(values), 3):
+        doc_num += values[i]
+        postings[doc_num] = (values[i + 1], values[i + 2])
+    return postings
+
+
+def posting_changes(
+    old_docs: Iterable["IndexedDocument"],
+    new_docs: Iterable["IndexedDocument"],
+) -> Dict[str, Tuple[set, Postings]]:
+    """Changements de postings par terme: (doc_nums retirés, postings ajoutés)."""
+    changes: Dict[str, Tuple[set, Postings]] = defaultdict(lambda: (set(), {}))
+    for doc in old_docs:
+        for term in set(doc.tokens):
+            changes[term][0].add(doc.doc_num)
+    for doc in new_docs:
+        length = len(doc.tokens)
+        counts: Dict[str, int] = defaultdict(int)
+        for token in doc.tokens:
+            counts[token] += 1
+        for term, tf in counts.items():
+            changes[term][1][doc.doc_num] = (tf, length)
+    return changes
+
+
+def _json_value(value: Any) -> Any:
+    """Valeur de champ sérialisable en JSON (Decimal, dates)."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_json_value(v) for v in value]
+    return value
+
+
+# ============================================================
+# INTERFACE
+# ============================================================
+
+class SearchStore(ABC):
+    """Stockage des index, documents et postings d'un tenant."""
+
+    # Index
+    @abstractmethod
+    def save_index(self, index: "IndexDefinition") -> None: ...
+
+    @abstractmethod
+    def get_index(self, index_id: str) -> Optional["IndexDefinition"]: ...
+
+    @abstractmethod
+    def get_index_by_name(self, name: str) -> Optional["IndexDefinition"]: ...
+
+    @abstractmethod
+    def list_indexes(self) -> List["IndexDefinition"]: ...
+
+    @abstractmethod
+    def delete_index(self, index_id: str) -> None: ...
+
+    # Documents
+    @abstractmethod
+    def find_document(self, index: "IndexDefinition", entity_id: str) -> Optional["IndexedDocument"]: ...
+
+    @abstractmethod
+    def get_documents(self, index: "IndexDefinition", doc_nums: Iterable[int]) -> Dict[int, "IndexedDocument"]: ...
+
+    @abstractmethod
+    def all_doc_nums(self, index_id: str) -> List[int]: ...
+
+    @abstractmethod
+    def write_documents(
+        self,
+        index: "IndexDefinition",
+        new_docs: List["IndexedDocument"],
+        old_docs: List["IndexedDocument"],
+    ) -> None:
+        """
+        Remplace old_docs par new_docs (old_docs seuls = suppression).
+
+        Attribue doc_num aux nouveaux documents, met à jour les postings et
+        les statistiques de l'index (document_count, total_length).
+        """
+
+    @abstractmethod
+    def reindex(
+        self,
+        index: "IndexDefinition",
+        retokenize: Callable[["IndexedDocument"], List[str]],
+    ) -> Tuple[int, int]:
+        """Recalcule les tokens de tous les documents et reconstruit les postings; (traités, échecs)."""
+
+    # Postings / dictionnaire des termes
+    @abstractmethod
+    def postings(self, index_id: str, terms: Iterable[str]) -> Dict[str, Postings]: ...
+
+    @abstractmethod
+    def terms(self, index_id: str, prefix: str = "") -> List[Tuple[str, int]]:
+        """Termes (triés) commençant par prefix, avec leur fréquence documentaire."""
+
+    @abstractmethod
+    def fuzzy_terms(self, index_id: str, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Termes (triés) à une distance de Levenshtein <= max_distance de word, avec cette distance."""
+
+    @abstractmethod
+    def document_frequencies(self, index_id: str, terms: Iterable[str]) -> Dict[str, int]:
+        """Fréquence documentaire des termes présents dans l'index."""
+
+    @abstractmethod
+    def commit(self) -> None:
+        """Valide les écritures."""
+
+
+# ============================================================
+# MÉMOIRE
+# ============================================================
+
+class MemorySearchStore(SearchStore):
+    """Index inversé en mémoire, propre à l'instance."""
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self._indexes: Dict[str, "IndexDefinition"] = {}
+        self._documents: Dict[str, Dict[int, "IndexedDocument"]] = {}
+        self._entity_map: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[str, Postings]] = {}
+        self._terms: Dict[str, TermDictionary] = {}
+        self._next_doc_num: Dict[str, int] = {}
+
+    def save_index(self, index: "IndexDefinition") -> None:
+        self._indexes[index.id] = index
+        self._documents.setdefault(index.id, {})
+        self._entity_map.setdefault(index.id, {})
+        self._postings.setdefault(index.id, {})
+        self._terms.setdefault(index.id, TermDictionary())
+        self._next_doc_num.setdefault(index.id, 0)
+
+    def get_index(self, index_id: str) -> Optional["IndexDefinition"]:
+        return self._indexes.get(index_id)
+
+    def get_index_by_name(self, name: str) -> Optional["IndexDefinition"]:
+        for index in self._indexes.values():
+            if index.name == name:
+                return index
+        return None
+
+    def list_indexes(self) -> List["IndexDefinition"]:
+        return list(self._indexes.values())
+
+    def delete_index(self, index_id: str) -> None:
+        for store in (self._indexes, self._documents, self._entity_map,
+                      self._postings, self._terms, self._next_doc_num):
+            store.pop(index_id, None)
+
+    def find_document(self, index: "IndexDefinition", entity_id: str) -> Optional["IndexedDocument"]:
+        doc_num = self._entity_map.get(index.id, {}).get(entity_id)
+        if doc_num is None:
+            return None
+        return self._documents[index.id].get(doc_num)
+
+    def get_documents(self, index: "IndexDefinition", doc_nums: Iterable[int]) -> Dict[int, "IndexedDocument"]:
+        documents = self._documents.get(index.id, {})
+        return {n: documents[n] for n in doc_nums if n in documents}
+
+    def all_doc_nums(self, index_id: str) -> List[int]:
+        return sorted(self._documents.get(index_id, {}))
+
+    def write_documents(self, index, new_docs, old_docs) -> None:
+        documents = self._documents[index.id]
+        entity_map = self._entity_map[index.id]
+
+        for doc in new_docs:
+            if doc.doc_num is None:
+                doc.doc_num = self._next_doc_num[index.id]
+                self._next_doc_num[index.id] += 1
+
+        self._apply_postings(index.id, posting_changes(old_docs, new_docs))
+
+        for doc in old_docs:
+            documents.pop(doc.doc_num, None)
+            entity_map.pop(doc.entity_id, None)
+            index.total_length -= len(doc.tokens)
+        for doc in new_docs:
+            documents[doc.doc_num] = doc
+            entity_map[doc.entity_id] = doc.doc_num
+            index.total_length += len(doc.tokens)
+        index.document_count = len(documents)
+
+    def _apply_postings(self, index_id: str, changes: Dict[str, Tuple[set, Postings]]) -> None:
+        inv_idx = self._postings[index_id]
+        terms = self._terms[index_id]
+        for term, (removed, added) in changes.items():
+            postings = inv_idx.get(term)
+            if postings is None:
+                if not added:
+                    continue
+                postings = inv_idx[term] = {}
+                terms.add(term)
+            for doc_num in removed:
+                postings.pop(doc_num, None)
+            postings.update(added)
+            if not postings:
+                del inv_idx[term]
+                terms.discard(term)
+
+    def reindex(self, index, retokenize) -> Tuple[int, int]:
+        self._postings[index.id] = {}
+        self._terms[index.id] = TermDictionary()
+        index.total_length = 0
+
+        processed = failed = 0
+        for doc in list(self._documents[index.id].values()):
+            try:
+                doc.tokens = retokenize(doc)
+                self._apply_postings(index.id, posting_changes([], [doc]))
+                index.total_length += len(doc.tokens)
+                processed += 1
+            except Exception:
+                failed += 1
+        return processed, failed
+
+    def postings(self, index_id: str, terms: Iterable[str]) -> Dict[str, Postings]:
+        inv_idx = self._postings.get(index_id, {})
+        return {term: inv_idx[term] for term in terms if term in inv_idx}
+
+    def terms(self, index_id: str, prefix: str = "") -> List[Tuple[str, int]]:
+        inv_idx = self._postings.get(index_id, {})
+        terms = self._terms.get(index_id, TermDictionary()).prefix(prefix)
+        return [(term, len(inv_idx[term])) for term in terms]
+
+    def fuzzy_terms(self, index_id: str, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        terms = self._terms.get(index_id)
+        return terms.fuzzy(word, max_distance) if terms is not None else []
+
+    def document_frequencies(self, index_id: str, terms: Iterable[str]) -> Dict[str, int]:
+        inv_idx = self._postings.get(index_id, {})
+        return {term: len(inv_idx[term]) for term in terms if term in inv_idx}
+
+    def commit(self) -> None:
+        """Écritures immédiates en mémoire: rien à valider."""
+
+
+# ============================================================
+# BASE DE DONNÉES
+# ============================================================
+
+@dataclass
+class _Vocabulary:
+    """Vocabulaire d'un index, à jour pour une valeur de search_indexes.terms_version."""
+    version: int
+    terms: TermDictionary
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class _VocabularyCache:
+    """Cache LRU des vocabulaires, partagé par toutes les sessions du processus."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[uuid.UUID, _Vocabulary]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, index_key: uuid.UUID, version: int) -> Optional[_Vocabulary]:
+        with self._lock:
+            vocabulary = self._entries.get(index_key)
+            if vocabulary is None or vocabulary.version != version:
+                return None
+            self._entries.move_to_end(index_key)
+            return vocabulary
+
+    def put(self, index_key: uuid.UUID, vocabulary: _Vocabulary) -> None:
+        with self._lock:
+            self._entries[index_key] = vocabulary
+            self._entries.move_to_end(index_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, index_key: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(index_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_vocabularies = _VocabularyCache(SEARCH_VOCABULARY_CACHE_SIZE)
+
+
+@dataclass
+class _VocabularyChange:
+    """Termes ajoutés / retirés par la transaction en cours, reportés dans le cache après commit."""
+    transaction: Any
+    base_version: int
+    version: int = 0
+    added: set = field(default_factory=set)
+    removed: set = field(default_factory=set)
+    reset: bool = False
+
+
+class SQLSearchStore(SearchStore):
+    """Index inversé persistant (tables search_*), filtré par tenant."""
+
+    def __init__(self, db: Session, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+        self._vocabulary_changes: Dict[uuid.UUID, _VocabularyChange] = {}
+
+    # ---------------- Index ----------------
+
+    def save_index(self, index: "IndexDefinition") -> None:
+        from .service import index_to_definition
+
+        record = self._index_query().filter(SearchIndexRecord.id == uuid.UUID(index.id)).first()
+        if record is None:
+            record = SearchIndexRecord(id=uuid.UUID(index.id), tenant_id=self.tenant_id, created_at=index.created_at)
+            self.db.add(record)
+        record.name = index.name
+        record.entity_type = index.entity_type
+        record.definition = index_to_definition(index)
+        record.status = index.status.value
+        record.document_count = index.document_count
+        record.total_length = index.total_length
+        record.updated_at = index.updated_at
+        record.last_reindex_at = index.last_reindex_at
+        self.db.flush()
+
+    def _to_index(self, record: SearchIndexRecord) -> "IndexDefinition":
+        from .service import index_from_definition
+
+        index = index_from_definition(str(record.id), record.tenant_id, record.name,
+                                      record.entity_type, record.definition)
+        index.status = type(index.status)(record.status)
+        index.document_count = record.document_count
+        index.total_length = record.total_length
+        index.created_at = record.created_at
+        index.updated_at = record.updated_at
+        index.last_reindex_at = record.last_reindex_at
+        return index
+
+    def _index_query(self):
+        return self.db.query(SearchIndexRecord).filter(SearchIndexRecord.tenant_id == self.tenant_id)
+
+    def get_index(self, index_id: str) -> Optional["IndexDefinition"]:
+        try:
+            key = uuid.UUID(str(index_id))
+        except ValueError:
+            return None
+        record = self._index_query().filter(SearchIndexRecord.id == key).first()
+        return self._to_index(record) if record else None
+
+    def get_index_by_name(self, name: str) -> Optional["IndexDefinition"]:
+        record = self._index_query().filter(SearchIndexRecord.name == name).first()
+        return self._to_index(record) if record else None
+
+    def list_indexes(self) -> List["IndexDefinition"]:
+        return [self._to_index(r) for r in self._index_query().order_by(SearchIndexRecord.name).all()]
+
+    def delete_index(self, index_id: str) -> None:
+        key = uuid.UUID(index_id)
+        self.db.execute(delete(SearchPosting).where(
+            SearchPosting.tenant_id == self.tenant_id, SearchPosting.index_id == key))
+        self.db.execute(delete(SearchDocumentRecord).where(
+            SearchDocumentRecord.tenant_id == self.tenant_id, SearchDocumentRecord.index_id == key))
+        self.db.execute(delete(SearchIndexRecord).where(
+            SearchIndexRecord.tenant_id == self.tenant_id, SearchIndexRecord.id == key))
+        _vocabularies.discard(key)
+
+    # ---------------- Documents ----------------
+
+    def _to_document(self, index: "IndexDefinition", record: SearchDocumentRecord) -> "IndexedDocument":
+        from .service import IndexedDocument
+
+        return IndexedDocument(
+            id=str(record.id),
+            tenant_id=record.tenant_id,
+            index_id=index.id,
+            entity_id=record.entity_id,
+            entity_type=index.entity_type,
+            fields=record.fields or {},
+            _all_text=record.all_text or "",
+            tokens=record.tokens or [],
+            indexed_at=record.indexed_at,
+            updated_at=record.updated_at,
+            version=record.version,
+            doc_num=record.doc_num,
+        )
+
+    def _document_query(self, index_id: str):
+        return self.db.query(SearchDocumentRecord).filter(
+            SearchDocumentRecord.tenant_id == self.tenant_id,
+            SearchDocumentRecord.index_id == uuid.UUID(index_id),
+        )
+
+    def find_document(self, index: "IndexDefinition", entity_id: str) -> Optional["IndexedDocument"]:
+        record = self._document_query(index.id).filter(SearchDocumentRecord.entity_id == entity_id).first()
+        return self._to_document(index, record) if record else None
+
+    def get_documents(self, index: "IndexDefinition", doc_nums: Iterable[int]) -> Dict[int, "IndexedDocument"]:
+        doc_nums = list(doc_nums)
+        documents = {}
+        for i in range(0, len(doc_nums), _CHUNK_SIZE):
+            for record in self._document_query(index.id).filter(
+                SearchDocumentRecord.doc_num.in_(doc_nums[i:i + _CHUNK_SIZE])
+            ):
+                documents[record.doc_num] = self._to_document(index, record)
+        return documents
+
+    def all_doc_nums(self, index_id: str) -> List[int]:
+        return [
+            row[0] for row in self.db.execute(
+                select(SearchDocumentRecord.doc_num).where(
+                    SearchDocumentRecord.tenant_id == self.tenant_id,
+                    SearchDocumentRecord.index_id == uuid.UUID(index_id),
+                ).order_by(SearchDocumentRecord.doc_num)
+            )
+        ]
+
+    def _lock_index(self, index_id: str) -> SearchIndexRecord:
+        """Verrouille la ligne de l'index: statistiques et doc_num cohérents entre workers."""
+        return self._index_query().filter(
+            SearchIndexRecord.id == uuid.UUID(index_id)
+        ).with_for_update().one()
+
+    def write_documents(self, index, new_docs, old_docs) -> None:
+        record = self._lock_index(index.id)
+        index_key = uuid.UUID(index.id)
+
+        for doc in new_docs:
+            if doc.doc_num is None:
+                doc.doc_num = record.next_doc_num
+                record.next_doc_num += 1
+
+        added_terms, removed_terms = self._apply_postings(index.id, posting_changes(old_docs, new_docs))
+        if added_terms or removed_terms:
+            self._track_vocabulary(record, added_terms, removed_terms)
+
+        # Documents: suppression des anciennes versions non remplacées, upsert des nouvelles
+        replaced = {doc.doc_num for doc in new_docs}
+        removed = [doc.doc_num for doc in old_docs if doc.doc_num not in replaced]
+        if removed:
+            self.db.execute(delete(SearchDocumentRecord).where(
+                SearchDocumentRecord.tenant_id == self.tenant_id,
+                SearchDocumentRecord.index_id == index_key,
+                SearchDocumentRecord.doc_num.in_(removed),
+            ))
+
+        existing = {
+            r.doc_num: r for r in self._document_query(index.id).filter(
+                SearchDocumentRecord.doc_num.in_([d.doc_num for d in new_docs])
+            )
+        } if new_docs else {}
+        for doc in new_docs:
+            doc_record = existing.get(doc.doc_num)
+            if doc_record is None:
+                doc_record = SearchDocumentRecord(
+                    id=uuid.UUID(doc.id), tenant_id=self.tenant_id, index_id=index_key, doc_num=doc.doc_num
+                )
+                self.db.add(doc_record)
+            doc_record.entity_id = doc.entity_id
+            doc_record.fields = _json_value(doc.fields)
+            doc_record.all_text = doc._all_text
+            doc_record.tokens = doc.tokens
+            doc_record.version = doc.version
+            doc_record.indexed_at = doc.indexed_at
+            doc_record.updated_at = doc.updated_at
+
+        # Statistiques BM25
+        record.document_count += len(new_docs) - len(old_docs)
+        record.total_length += sum(len(d.tokens) for d in new_docs) - sum(len(d.tokens) for d in old_docs)
+        record.updated_at = datetime.utcnow()
+        index.document_count = record.document_count
+        index.total_length = record.total_length
+        self.db.flush()
+
+    def _apply_postings(self, index_id: str, changes: Dict[str, Tuple[set, Postings]]) -> Tuple[set, set]:
+        """
+        Applique les changements shard par shard (lecture verrouillée, réécriture).
+
+        Returns:
+            (termes dont une ligne a été créée, termes dont une ligne a été supprimée)
+        """
+        index_key = uuid.UUID(index_id)
+        by_shard: Dict[Tuple[str, int], Tuple[set, Postings]] = defaultdict(lambda: (set(), {}))
+        for term, (removed, added) in changes.items():
+            for doc_num in removed:
+                by_shard[(term, doc_num >> SHARD_BITS)][0].add(doc_num)
+            for doc_num, value in added.items():
+                by_shard[(term, doc_num >> SHARD_BITS)][1][doc_num] = value
+
+        keys = list(by_shard)
+        rows: Dict[Tuple[str, int], SearchPosting] = {}
+        for i in range(0, len(keys), _CHUNK_SIZE):
+            for row in self.db.query(SearchPosting).filter(
+                SearchPosting.index_id == index_key,
+                tuple_(SearchPosting.term, SearchPosting.shard).in_(keys[i:i + _CHUNK_SIZE]),
+            ).with_for_update():
+                rows[(row.term, row.shard)] = row
+
+        added_terms: set = set()
+        removed_terms: set = set()
+        for key, (removed, added) in by_shard.items():
+            row = rows.get(key)
+            postings = decode_postings(row.postings) if row else {}
+            for doc_num in removed:
+                postings.pop(doc_num, None)
+            postings.update(added)
+
+            if not postings:
+                if row is not None:
+                    self.db.delete(row)
+                    removed_terms.add(key[0])
+                continue
+            if row is None:
+                row = SearchPosting(index_id=index_key, term=key[0], shard=key[1], tenant_id=self.tenant_id)
+                self.db.add(row)
+                added_terms.add(key[0])
+            row.postings = encode_postings(postings)
+            row.doc_count = len(postings)
+        return added_terms, removed_terms
+
+    def reindex(self, index, retokenize) -> Tuple[int, int]:
+        record = self._lock_index(index.id)
+        index_key = uuid.UUID(index.id)
+        self.db.execute(delete(SearchPosting).where(
+            SearchPosting.tenant_id == self.tenant_id, SearchPosting.index_id == index_key))
+
+        processed = failed = total_length = 0
+        shard = None
+        shard_postings: Dict[str, Postings] = defaultdict(dict)
+
+        def flush_shard():
+            self.db.add_all(
+                SearchPosting(index_id=index_key, term=term, shard=shard, tenant_id=self.tenant_id,
+                              postings=encode_postings(postings), doc_count=len(postings))
+                for term, postings in shard_postings.items()
+            )
+            self.db.flush()
+            shard_postings.clear()
+
+        # Documents lus dans l'ordre des doc_num: un shard est complet dès qu'on le quitte
+        query = select(SearchDocumentRecord).where(
+            SearchDocumentRecord.tenant_id == self.tenant_id,
+            SearchDocumentRecord.index_id == index_key,
+        ).order_by(SearchDocumentRecord.doc_num).execution_options(yield_per=_CHUNK_SIZE)
+        for doc_record in self.db.execute(query).scalars():
+            doc_shard = doc_record.doc_num >> SHARD_BITS
+            if shard is not None and doc_shard != shard:
+                flush_shard()
+            shard = doc_shard
+            try:
+                doc = self._to_document(index, doc_record)
+                doc.tokens = retokenize(doc)
+                doc_record.tokens = doc.tokens
+                for term, (_, added) in posting_changes([], [doc]).items():
+                    shard_postings[term].update(added)
+                total_length += len(doc.tokens)
+                processed += 1
+            except Exception:
+                failed += 1
+        if shard_postings:
+            flush_shard()
+
+        record.total_length = total_length
+        index.total_length = total_length
+        self._track_vocabulary(record, reset=True)
+        self.db.flush()
+        return processed, failed
+
+    # ---------------- Vocabulaire ----------------
+
+    def _track_vocabulary(self, record: SearchIndexRecord, added: Iterable[str] = (),
+                          removed: Iterable[str] = (), reset: bool = False) -> None:
+        """Incrémente terms_version (ligne verrouillée) et mémorise le delta pour le cache."""
+        transaction = self.db.get_transaction()
+        change = self._vocabulary_changes.get(record.id)
+        if change is None or change.transaction is not transaction:
+            # Première écriture de la transaction (la précédente a pu être annulée)
+            change = self._vocabulary_changes[record.id] = _VocabularyChange(transaction, record.terms_version)
+        record.terms_version += 1
+        change.version = record.terms_version
+        change.added.update(added)
+        change.removed.update(removed)
+        change.reset = change.reset or reset
+
+    def _existing_terms(self, index_key: uuid.UUID, terms: Iterable[str]) -> set:
+        terms = list(terms)
+        existing = set()
+        for i in range(0, len(terms), _CHUNK_SIZE):
+            existing.update(self.db.execute(
+                select(SearchPosting.term).where(
+                    SearchPosting.tenant_id == self.tenant_id,
+                    SearchPosting.index_id == index_key,
+                    SearchPosting.term.in_(terms[i:i + _CHUNK_SIZE]),
+                ).distinct()
+            ).scalars())
+        return existing
+
+    def _vocabulary(self, index_id: str) -> Optional[_Vocabulary]:
+        """Vocabulaire de l'index, rechargé si terms_version a changé depuis sa mise en cache."""
+        index_key = uuid.UUID(index_id)
+        version = self.db.execute(
+            select(SearchIndexRecord.terms_version).where(
+                SearchIndexRecord.tenant_id == self.tenant_id,
+                SearchIndexRecord.id == index_key,
+            )
+        ).scalar()
+        if version is None:
+            return None
+
+        vocabulary = _vocabularies.get(index_key, version)
+        if vocabulary is None:
+            terms = self.db.execute(
+                select(SearchPosting.term).where(
+                    SearchPosting.tenant_id == self.tenant_id,
+                    SearchPosting.index_id == index_key,
+                ).distinct().order_by(SearchPosting.term)
+            ).scalars()
+            vocabulary = _Vocabulary(version, TermDictionary(terms))
+            # Jamais de termes non commités dans le cache partagé
+            if index_key not in self._vocabulary_changes:
+                _vocabularies.put(index_key, vocabulary)
+        return vocabulary
+
+    # ---------------- Postings ----------------
+
+    def postings(self, index_id: str, terms: Iterable[str]) -> Dict[str, Postings]:
+        terms = list(dict.fromkeys(terms))
+        result: Dict[str, Postings] = {}
+        for i in range(0, len(terms), _CHUNK_SIZE):
+            rows = self.db.execute(
+                select(SearchPosting.term, SearchPosting.postings).where(
+                    SearchPosting.tenant_id == self.tenant_id,
+                    SearchPosting.index_id == uuid.UUID(index_id),
+                    SearchPosting.term.in_(terms[i:i + _CHUNK_SIZE]),
+                )
+            )
+            for term, data in rows:
+                result.setdefault(term, {}).update(decode_postings(data))
+        return result
+
+    def terms(self, index_id: str, prefix: str = "") -> List[Tuple[str, int]]:
+        query = select(SearchPosting.term, func.sum(SearchPosting.doc_count)).where(
+            SearchPosting.tenant_id == self.tenant_id,
+            SearchPosting.index_id == uuid.UUID(index_id),
+        )
+        if prefix:
+            # Plage sur la clé primaire triée (index_id, term, shard)
+            query = query.where(and_(SearchPosting.term >= prefix, SearchPosting.term < _prefix_upper_bound(prefix)))
+        query = query.group_by(SearchPosting.term).order_by(SearchPosting.term)
+        return [(term, int(df)) for term, df in self.db.execute(query)]
+
+    def fuzzy_terms(self, index_id: str, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        vocabulary = self._vocabulary(index_id)
+        if vocabulary is None:
+            return []
+        with vocabulary.lock:
+            return vocabulary.terms.fuzzy(word, max_distance)
+
+    def document_frequencies(self, index_id: str, terms: Iterable[str]) -> Dict[str, int]:
+        terms = list(dict.fromkeys(terms))
+        result: Dict[str, int] = {}
+        for i in range(0, len(terms), _CHUNK_SIZE):
+            rows = self.db.execute(
+                select(SearchPosting.term, func.sum(SearchPosting.doc_count)).where(
+                    SearchPosting.tenant_id == self.tenant_id,
+                    SearchPosting.index_id == uuid.UUID(index_id),
+                    SearchPosting.term.in_(terms[i:i + _CHUNK_SIZE]),
+                ).group_by(SearchPosting.term)
+            )
+            result.update((term, int(df)) for term, df in rows)
+        return result
+
+    def commit(self) -> None:
+        changes, self._vocabulary_changes = self._vocabulary_changes, {}
+
+        # Termes dont une ligne a été supprimée: encore présents dans un autre shard ?
+        updates = []
+        for index_key, change in changes.items():
+            # Vocabulaire absent du cache ou périmé: rechargé à la prochaine recherche
+            if not change.reset and _vocabularies.get(index_key, change.base_version) is not None:
+                absent = change.removed - self._existing_terms(index_key, change.removed)
+                updates.append((index_key, change, absent))
+
+        self.db.commit()
+
+        for index_key, change in changes.items():
+            if change.reset:
+                _vocabularies.discard(index_key)
+        for index_key, change, absent in updates:
+            vocabulary = _vocabularies.get(index_key, change.base_version)
+            if vocabulary is None:
+                continue
+            with vocabulary.lock:
+                if vocabulary.version != change.base_version:
+                    continue
+                for term in change.added - absent:
+                    vocabulary.terms.add(term)
+                for term in absent:
+                    vocabulary.terms.discard(term)
+                vocabulary.version = change.version
@@ -0,0 +1,94 @@
+"""
+AZALS MODULE - SEARCH: Modèles
+===============================
+
+Index inversé persistant, partagé par tous les workers:
+- search_indexes: définitions d'index et statistiques BM25
+- search_documents: documents indexés (table entity_id -> doc_num)
+- search_postings: listes de postings compactes, une ligne par
+  (index, terme, shard); la clé primaire triée sert de dictionnaire
+  des termes pour les requêtes préfixe et wildcard
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Index, Integer, LargeBinary, String, Text
+
+from app.core.types import JSON, UniversalUUID
+from app.db import Base
+
+
+class SearchIndexRecord(Base):
+    """Définition et statistiques d'un index de recherche."""
+    __tablename__ = "search_indexes"
+
+    id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(50), nullable=False)
+
+    name = Column(String(100), nullable=False)
+    entity_type = Column(String(50), nullable=False)
+
+    # Mapping, analyseur, synonymes, configuration (IndexDefinition sérialisée)
+    definition = Column(JSON, nullable=False)
+    status = Column(String(20), nullable=False, default="active")
+
+    # Statistiques BM25
+    document_count = Column(Integer, nullable=False, default=0)
+    total_length = Column(Integer, nullable=False, default=0)
+    next_doc_num = Column(Integer, nullable=False, default=0)
+
+    # Incrémenté à chaque ajout / retrait de terme: valide les vocabulaires en cache
+    terms_version = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_reindex_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_search_indexes_name', 'tenant_id', 'name', unique=True),
+        Index('idx_search_indexes_entity', 'tenant_id', 'entity_type'),
+    )
+
+
+class SearchDocumentRecord(Base):
+    """Document indexé; doc_num est l'identifiant compact utilisé dans les postings."""
+    __tablename__ = "search_documents"
+
+    id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(50), nullable=False)
+    index_id = Column(UniversalUUID(), nullable=False)
+
+    doc_num = Column(Integer, nullable=False)
+    entity_id = Column(String(100), nullable=False)
+
+    fields = Column(JSON, nullable=False, default=dict)
+    all_text = Column(Text, nullable=False, default="")
+    # Tokens indexés (nécessaires pour retirer les postings à la mise à jour)
+    tokens = Column(JSON, nullable=False, default=list)
+
+    version = Column(Integer, nullable=False, default=1)
+    indexed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_search_documents_entity', 'index_id', 'entity_id', unique=True),
+        Index('idx_search_documents_num', 'index_id', 'doc_num', unique=True),
+    )
+
+
+class SearchPosting(Base):
+    """
+    Postings d'un terme pour un shard de documents (doc_num >> SHARD_BITS).
+
+    postings: varints (delta doc_num, tf, longueur du document), triés par doc_num.
+    """
+    __tablename__ = "search_postings"
+
+    index_id = Column(UniversalUUID(), primary_key=True)
+    term = Column(String(100), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+
+    tenant_id = Column(String(50), nullable=False)
+    doc_count = Column(Integer, nullable=False, default=0)
+    postings = Column(LargeBinary, nullable=False)
@@ -0,0 +1,105 @@
+"""
+AZALS MODULE - SEARCH: Router API
+=================================
+
+Recherche full-text dans les index du tenant (alimentés par l'indexation
+incrémentale des entités métier).
+"""
+from __future__ import annotations
+
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.core.dependencies_v2 import require_permission
+
+from .schemas import (
+    FacetBucketResponse,
+    SearchHitResponse,
+    SearchIndexResponse,
+    SearchRequest,
+    SearchResponse,
+    SuggestionResponse,
+)
+from .service import SearchQuery, SearchService, create_search_service
+
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+
+# ============================================================================
+# DEPENDENCIES
+# ============================================================================
+
+def get_search_service(
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user)
+) -> SearchService:
+    """Dependency pour obtenir le service de recherche."""
+    return create_search_service(str(current_user.tenant_id), db=db)
+
+
+def _require_index(service: SearchService, index_id: str) -> None:
+    if service.get_index(index_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Index introuvable")
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+@router.get("/indexes", response_model=List[SearchIndexResponse])
+async def list_indexes(
+    service: SearchService = Depends(get_search_service),
+    _: None = Depends(require_permission("search.read"))
+):
+    """Liste les index de recherche du tenant."""
+    return service.list_indexes()
+
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+@router.post("/indexes/{index_id}/query", response_model=SearchResponse)
+async def search(
+    index_id: str,
+    data: SearchRequest,
+    service: SearchService = Depends(get_search_service),
+    current_user=Depends(get_current_user),
+    _: None = Depends(require_permission("search.read"))
+):
+    """Recherche full-text (scoring BM25, filtres, facettes)."""
+    _require_index(service, index_id)
+    result = service.search(
+        index_id,
+        SearchQuery(**data.model_dump()),
+        user_id=str(current_user.id),
+    )
+    return SearchResponse(
+        total_hits=result.total_hits,
+        hits=[SearchHitResponse.model_validate(hit) for hit in result.hits],
+        facets={
+            name: [FacetBucketResponse.model_validate(bucket) for bucket in facet.buckets]
+            for name, facet in result.facets.items()
+        },
+        took_ms=result.took_ms,
+        suggestions=result.suggestions,
+    )
+
+
+@router.get("/indexes/{index_id}/suggest", response_model=List[SuggestionResponse])
+async def suggest(
+    index_id: str,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    service: SearchService = Depends(get_search_service),
+    _: None = Depends(require_permission("search.read"))
+):
+    """Autocomplétion sur le dictionnaire des termes de l'index."""
+    _require_index(service, index_id)
+    return service.suggest(q, index_id, limit=limit)
@@ -0,0 +1,91 @@
+"""
+AZALS MODULE - SEARCH: Schemas Pydantic
+=======================================
+
+Schemas de l'API de recherche (index du tenant, recherche, autocomplétion).
+"""
+from __future__ import annotations
+
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from .service import IndexStatus, QueryType, SortOrder, SuggestionType
+
+
+# ============================================================================
+# INDEX
+# ============================================================================
+
+class SearchIndexResponse(BaseModel):
+    """Index de recherche du tenant."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    name: str
+    entity_type: str
+    status: IndexStatus
+    document_count: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    last_reindex_at: Optional[datetime] = None
+
+
+# ============================================================================
+# RECHERCHE
+# ============================================================================
+
+class SearchRequest(BaseModel):
+    """Requête de recherche sur un index."""
+    query_text: str = Field(..., max_length=500)
+    query_type: QueryType = QueryType.MULTI_MATCH
+    fields: List[str] = Field(default_factory=list)
+    filters: Dict[str, Any] = Field(default_factory=dict)
+    range_filters: Dict[str, Tuple[Any, Any]] = Field(default_factory=dict)
+    offset: int = Field(0, ge=0)
+    limit: int = Field(20, ge=1, le=100)
+    sort_by: Optional[str] = None
+    sort_order: SortOrder = SortOrder.RELEVANCE
+    highlight: bool = True
+    facets: List[str] = Field(default_factory=list)
+    fuzziness: int = Field(0, ge=0, le=2)
+
+
+class SearchHitResponse(BaseModel):
+    """Document trouvé."""
+    model_config = ConfigDict(from_attributes=True)
+
+    entity_id: str
+    entity_type: str
+    score: float
+    source: Dict[str, Any] = Field(default_factory=dict)
+    highlights: Dict[str, List[str]] = Field(default_factory=dict)
+
+
+class FacetBucketResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    value: Any
+    count: int
+
+
+class SearchResponse(BaseModel):
+    """Résultat de recherche."""
+    model_config = ConfigDict(from_attributes=True)
+
+    total_hits: int
+    hits: List[SearchHitResponse] = Field(default_factory=list)
+    facets: Dict[str, List[FacetBucketResponse]] = Field(default_factory=dict)
+    took_ms: int = 0
+    suggestions: List[str] = Field(default_factory=list)
+
+
+class SuggestionResponse(BaseModel):
+    """Suggestion d'autocomplétion."""
+    model_config = ConfigDict(from_attributes=True)
+
+    text: str
+    suggestion_type: SuggestionType
+    frequency: int = 0
@@ -9,19 +9,31 @@ Moteur de recherche full-text:
 - Recherche phonétique
 - Synonymes configurables
 - Historique de recherche
+
+Index inversé (voir index.py): postings avec tf et longueur des documents,
+scoring BM25, dictionnaire des termes trié pour préfixes et wildcards.
+Stockage en mémoire, ou en base (persistant, partagé entre workers) si une
+session est fournie.
 """
 from __future__ import annotations
 
 
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from enum import Enum
 from typing import Any, Dict, List, Optional, Set, Tuple
 from uuid import uuid4
+import fnmatch
+import math
 import re
 import unicodedata
 
+from sqlalchemy.orm import Session
+
+from .events import get_indexed_types_cache
+from .index import MAX_TERM_LENGTH, MemorySearchStore, Postings, SearchStore, SQLSearchStore
+
 
 # ============================================================
 # ÉNUMÉRATIONS
@@ -139,6 +151,7 @@ class IndexDefinition:
     status: IndexStatus = IndexStatus.ACTIVE
     document_count: int = 0
     size_bytes: int = 0
+    total_length: int = 0  # Somme des longueurs (BM25: longueur moyenne)
 
     # Métadonnées
     created_at: datetime = field(default_factory=datetime.now)
@@ -169,6 +182,9 @@ class IndexedDocument:
     updated_at: Optional[datetime] = None
     version: int = 1
 
+    # Identifiant compact dans les postings (attribué à l'indexation)
+    doc_num: Optional[int] = None
+
 
 @dataclass
 class SearchQuery:
@@ -302,6 +318,76 @@ class ReindexJob:
         return (self.processed_documents / self.total_documents) * 100
 
 
+
+
+# ============================================================
+# SÉRIALISATION DES DÉFINITIONS D'INDEX
+# ============================================================
+
+def _mapping_to_dict(mapping: FieldMapping) -> Dict[str, Any]:
+    return {
+        "name": mapping.name,
+        "field_type": mapping.field_type.value,
+        "analyzer": mapping.analyzer.value if mapping.analyzer else None,
+        "searchable": mapping.searchable,
+        "filterable": mapping.filterable,
+        "sortable": mapping.sortable,
+        "facetable": mapping.facetable,
+        "boost": mapping.boost,
+        "copy_to": mapping.copy_to,
+        "nested_fields": [_mapping_to_dict(m) for m in mapping.nested_fields],
+    }
+
+
+def _mapping_from_dict(data: Dict[str, Any]) -> FieldMapping:
+    return FieldMapping(
+        name=data["name"],
+        field_type=FieldType(data["field_type"]),
+        analyzer=AnalyzerType(data["analyzer"]) if data.get("analyzer") else None,
+        searchable=data.get("searchable", True),
+        filterable=data.get("filterable", True),
+        sortable=data.get("sortable", False),
+        facetable=data.get("facetable", False),
+        boost=data.get("boost", 1.0),
+        copy_to=data.get("copy_to"),
+        nested_fields=[_mapping_from_dict(m) for m in data.get("nested_fields", [])],
+    )
+
+
+def index_to_definition(index: IndexDefinition) -> Dict[str, Any]:
+    """Partie configurable d'un index, sérialisable en JSON."""
+    return {
+        "field_mappings": [_mapping_to_dict(m) for m in index.field_mappings],
+        "default_analyzer": index.default_analyzer.value,
+        "refresh_interval_seconds": index.refresh_interval_seconds,
+        "number_of_shards": index.number_of_shards,
+        "number_of_replicas": index.number_of_replicas,
+        "synonyms": index.synonyms,
+    }
+
+
+def index_from_definition(
+    index_id: str,
+    tenant_id: str,
+    name: str,
+    entity_type: str,
+    definition: Dict[str, Any],
+) -> IndexDefinition:
+    """Reconstruit un IndexDefinition depuis index_to_definition()."""
+    return IndexDefinition(
+        id=index_id,
+        tenant_id=tenant_id,
+        name=name,
+        entity_type=entity_type,
+        field_mappings=[_mapping_from_dict(m) for m in definition.get("field_mappings", [])],
+        default_analyzer=AnalyzerType(definition.get("default_analyzer", AnalyzerType.FRENCH.value)),
+        refresh_interval_seconds=definition.get("refresh_interval_seconds", 1),
+        number_of_shards=definition.get("number_of_shards", 1),
+        number_of_replicas=definition.get("number_of_replicas", 0),
+        synonyms=definition.get("synonyms", {}),
+    )
+
+
 # ============================================================
 # SERVICE PRINCIPAL
 # ============================================================
@@ -309,21 +395,20 @@ class ReindexJob:
 class SearchService:
     """Service de recherche et indexation."""
 
-    def __init__(self, tenant_id: str):
+    # Paramètres BM25
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+
+    def __init__(self, tenant_id: str, db: Optional[Session] = None):
         self.tenant_id = tenant_id
 
-        # Stockage en mémoire (à remplacer par Elasticsearch/Meilisearch)
-        self._indexes: Dict[str, IndexDefinition] = {}
-        self._documents: Dict[str, IndexedDocument] = {}
+        # Index inversé: persistant si une session est fournie
+        self._store: SearchStore = (
+            SQLSearchStore(db, tenant_id) if db is not None else MemorySearchStore(tenant_id)
+        )
         self._search_history: List[SearchHistory] = []
         self._reindex_jobs: Dict[str, ReindexJob] = {}
 
-        # Index inversé simplifié (token -> doc_ids)
-        self._inverted_index: Dict[str, Dict[str, Set[str]]] = {}
-
-        # Suggestions (terme -> fréquence)
-        self._term_frequencies: Dict[str, int] = {}
-
         # Stopwords français
         self._stopwords = {
             "le", "la", "les", "un", "une", "des", "du", "de", "et", "ou",
@@ -359,31 +444,30 @@ class SearchService:
             synonyms=kwargs.get("synonyms", {}),
         )
 
-        self._indexes[index.id] = index
-
-        # Initialiser l'index inversé
-        self._inverted_index[index.id] = {}
+        self._store.save_index(index)
+        self._store.commit()
+        get_indexed_types_cache().invalidate(self.tenant_id)
 
         return index
 
     def get_index(self, index_id: str) -> Optional[IndexDefinition]:
         """Récupère un index."""
-        index = self._indexes.get(index_id)
+        index = self._store.get_index(index_id)
         if index and index.tenant_id == self.tenant_id:
             return index
         return None
 
     def get_index_by_name(self, name: str) -> Optional[IndexDefinition]:
         """Récupère un index par son nom."""
-        for index in self._indexes.values():
-            if index.tenant_id == self.tenant_id and index.name == name:
-                return index
+        index = self._store.get_index_by_name(name)
+        if index and index.tenant_id == self.tenant_id:
+            return index
         return None
 
     def list_indexes(self) -> List[IndexDefinition]:
         """Liste tous les index."""
         return [
-            idx for idx in self._indexes.values()
+            idx for idx in self._store.list_indexes()
             if idx.tenant_id == self.tenant_id
         ]
 
@@ -393,20 +477,10 @@ class SearchService:
         if not index:
             return False
 
-        # Supprimer les documents
-        to_delete = [
-            doc_id for doc_id, doc in self._documents.items()
-            if doc.index_id == index_id
-        ]
-        for doc_id in to_delete:
-            del self._documents[doc_id]
-
-        # Supprimer l'index inversé
-        if index_id in self._inverted_index:
-            del self._inverted_index[index_id]
-
-        # Supprimer l'index
-        del self._indexes[index_id]
+        # Index, documents et postings
+        self._store.delete_index(index_id)
+        self._store.commit()
+        get_indexed_types_cache().invalidate(self.tenant_id)
 
         return True
 
@@ -422,6 +496,8 @@ class SearchService:
 
         index.synonyms = synonyms
         index.updated_at = datetime.now()
+        self._store.save_index(index)
+        self._store.commit()
         return True
 
     # ========================================
@@ -441,15 +517,33 @@ class SearchService:
 
         # Vérifier si le document existe déjà
         existing = self._find_document(index_id, entity_id)
+        doc = self._build_document(index, entity_id, fields, existing)
+
+        # Mettre à jour l'index inversé et les statistiques
+        self._store.write_documents(index, [doc], [existing] if existing else [])
+        index.updated_at = datetime.now()
+        self._store.commit()
 
+        return doc
+
+    def _build_document(
+        self,
+        index: IndexDefinition,
+        entity_id: str,
+        fields: Dict[str, Any],
+        existing: Optional[IndexedDocument]
+    ) -> IndexedDocument:
+        """Construit un document (texte combiné et tokens) sans l'écrire."""
         doc = IndexedDocument(
             id=existing.id if existing else str(uuid4()),
             tenant_id=self.tenant_id,
-            index_id=index_id,
+            index_id=index.id,
             entity_id=entity_id,
             entity_type=index.entity_type,
             fields=fields,
             version=(existing.version + 1) if existing else 1,
+            doc_num=existing.doc_num if existing else None,
+            updated_at=datetime.now() if existing else None,
         )
 
         # Construire le texte combiné
@@ -464,39 +558,26 @@ class SearchService:
                         text_parts.append(value)
 
         doc._all_text = " ".join(text_parts)
-
-        # Tokeniser
-        doc.tokens = self._tokenize(doc._all_text, index.default_analyzer)
-
-        # Appliquer les synonymes
-        doc.tokens = self._expand_synonyms(doc.tokens, index.synonyms)
-
-        # Mettre à jour l'index inversé
-        if existing:
-            self._remove_from_inverted_index(index_id, existing)
-        self._add_to_inverted_index(index_id, doc)
-
-        # Stocker
-        self._documents[doc.id] = doc
-
-        # Mettre à jour le compteur de fréquence des termes
-        for token in set(doc.tokens):
-            self._term_frequencies[token] = self._term_frequencies.get(token, 0) + 1
-
-        # Mettre à jour les stats de l'index
-        index.document_count = sum(
-            1 for d in self._documents.values() if d.index_id == index_id
-        )
-        index.updated_at = datetime.now()
+        doc.tokens = self._analyze(doc._all_text, index)
 
         return doc
 
+    def _analyze(self, text: str, index: IndexDefinition) -> List[str]:
+        """Tokenise puis applique les synonymes de l'index."""
+        return self._expand_synonyms(self._tokenize(text, index.default_analyzer), index.synonyms)
+
     def _find_document(self, index_id: str, entity_id: str) -> Optional[IndexedDocument]:
-        """Trouve un document par entité."""
-        for doc in self._documents.values():
-            if doc.index_id == index_id and doc.entity_id == entity_id:
-                return doc
-        return None
+        """Trouve un document par entité (table entity_id -> doc_num)."""
+        index = self.get_index(index_id)
+        if not index:
+            return None
+        return self._store.find_document(index, entity_id)
+
+    def _normalize(self, text: str) -> str:
+        """Supprime accents et casse."""
+        text = unicodedata.normalize('NFKD', text)
+        text = text.encode('ASCII', 'ignore').decode('ASCII')
+        return text.lower()
 
     def _tokenize(self, text: str, analyzer: AnalyzerType) -> List[str]:
         """Tokenise le texte selon l'analyseur."""
@@ -504,9 +585,7 @@ class SearchService:
             return []
 
         # Normaliser (accents, casse)
-        text = unicodedata.normalize('NFKD', text)
-        text = text.encode('ASCII', 'ignore').decode('ASCII')
-        text = text.lower()
+        text = self._normalize(text)
 
         # Tokeniser
         if analyzer == AnalyzerType.WHITESPACE:
@@ -525,7 +604,7 @@ class SearchService:
         if analyzer == AnalyzerType.FRENCH:
             tokens = [self._stem_french(t) for t in tokens]
 
-        return tokens
+        return [t[:MAX_TERM_LENGTH] for t in tokens]
 
     def _stem_french(self, word: str) -> str:
         """Stemming simplifié pour le français."""
@@ -556,43 +635,19 @@ class SearchService:
                 expanded.extend(synonyms[token])
         return expanded
 
-    def _add_to_inverted_index(self, index_id: str, doc: IndexedDocument) -> None:
-        """Ajoute un document à l'index inversé."""
-        if index_id not in self._inverted_index:
-            self._inverted_index[index_id] = {}
-
-        inv_idx = self._inverted_index[index_id]
-        for token in set(doc.tokens):
-            if token not in inv_idx:
-                inv_idx[token] = set()
-            inv_idx[token].add(doc.id)
-
-    def _remove_from_inverted_index(self, index_id: str, doc: IndexedDocument) -> None:
-        """Supprime un document de l'index inversé."""
-        if index_id not in self._inverted_index:
-            return
-
-        inv_idx = self._inverted_index[index_id]
-        for token in set(doc.tokens):
-            if token in inv_idx:
-                inv_idx[token].discard(doc.id)
-                if not inv_idx[token]:
-                    del inv_idx[token]
-
     def delete_document(self, index_id: str, entity_id: str) -> bool:
         """Supprime un document de l'index."""
-        doc = self._find_document(index_id, entity_id)
-        if not doc:
+        index = self.get_index(index_id)
+        if not index:
             return False
 
-        self._remove_from_inverted_index(index_id, doc)
-        del self._documents[doc.id]
+        doc = self._store.find_document(index, entity_id)
+        if not doc:
+            return False
 
-        # Mettre à jour les stats
-        index = self.get_index(index_id)
-        if index:
-            index.document_count -= 1
-            index.updated_at = datetime.now()
+        self._store.write_documents(index, [], [doc])
+        index.updated_at = datetime.now()
+        self._store.commit()
 
         return True
 
@@ -604,23 +659,68 @@ class SearchService:
         """
         Indexe plusieurs documents.
         Retourne (succès, échecs).
+
+        Les postings sont mis à jour en une seule écriture pour tout le lot.
         """
+        index = self.get_index(index_id)
+        if not index:
+            return 0, len(documents)
+
         success = 0
         failures = 0
+        new_docs: Dict[str, IndexedDocument] = {}
+        old_docs: Dict[str, IndexedDocument] = {}
 
         for doc_data in documents:
             entity_id = doc_data.pop("_id", str(uuid4()))
             try:
-                result = self.index_document(index_id, entity_id, doc_data)
-                if result:
-                    success += 1
-                else:
-                    failures += 1
+                existing = new_docs.get(entity_id) or self._store.find_document(index, entity_id)
+                if existing and entity_id not in new_docs:
+                    old_docs[entity_id] = existing
+                doc = self._build_document(index, entity_id, doc_data, existing)
+                new_docs[entity_id] = doc
+                success += 1
             except Exception:
                 failures += 1
 
+        if new_docs:
+            self._store.write_documents(index, list(new_docs.values()), list(old_docs.values()))
+            index.updated_at = datetime.now()
+            self._store.commit()
+
         return success, failures
 
+    def apply_entity_change(
+        self,
+        entity_type: str,
+        entity_id: str,
+        fields: Optional[Dict[str, Any]]
+    ) -> int:
+        """
+        Répercute la modification d'une entité sur tous les index de son type.
+
+        fields=None signifie que l'entité a été supprimée.
+        Retourne le nombre d'index mis à jour.
+        """
+        updated = 0
+        for index in self.list_indexes():
+            if index.entity_type != entity_type:
+                continue
+
+            existing = self._store.find_document(index, entity_id)
+            if fields is None:
+                if not existing:
+                    continue
+                self._store.write_documents(index, [], [existing])
+            else:
+                doc = self._build_document(index, entity_id, fields, existing)
+                self._store.write_documents(index, [doc], [existing] if existing else [])
+            updated += 1
+
+        if updated:
+            self._store.commit()
+        return updated
+
     # ========================================
     # RECHERCHE
     # ========================================
@@ -639,35 +739,46 @@ class SearchService:
         if not index:
             return SearchResult(query=query, total_hits=0)
 
-        # Tokeniser la requête
-        query_tokens = self._tokenize(query.query_text, index.default_analyzer)
-        query_tokens = self._expand_synonyms(query_tokens, index.synonyms)
+        # Termes de la requête et leurs postings
+        query_tokens = self._query_terms(query, index)
+        term_postings = self._resolve_terms(index_id, query_tokens, query.query_type)
 
         # Appliquer le fuzziness
-        if query.fuzziness > 0:
-            query_tokens = self._apply_fuzziness(query_tokens, index_id, query.fuzziness)
+        if query.fuzziness > 0 and query.query_type not in (QueryType.PREFIX, QueryType.WILDCARD):
+            fuzzy_terms = self._apply_fuzziness(query_tokens, index_id, query.fuzziness)
+            term_postings.update(self._store.postings(
+                index_id, [t for t in fuzzy_terms if t not in term_postings]
+            ))
+            query_tokens = fuzzy_terms
 
         # Trouver les documents correspondants
-        matching_doc_ids = self._find_matching_documents(index_id, query_tokens, query.query_type)
+        matching_doc_nums = self._find_matching_documents(
+            index_id, query_tokens, term_postings, query.query_type
+        )
+
+        # Documents chargés seulement si filtres, tri par champ ou facettes
+        documents: Dict[int, IndexedDocument] = {}
+        needs_fields = bool(query.filters or query.range_filters or query.facets
+                            or (query.sort_order != SortOrder.RELEVANCE and query.sort_by))
+        if needs_fields:
+            documents = self._store.get_documents(index, matching_doc_nums)
 
         # Appliquer les filtres
         if query.filters:
-            matching_doc_ids = self._apply_filters(matching_doc_ids, query.filters)
+            matching_doc_nums = self._apply_filters(matching_doc_nums, documents, query.filters)
 
         if query.range_filters:
-            matching_doc_ids = self._apply_range_filters(matching_doc_ids, query.range_filters)
+            matching_doc_nums = self._apply_range_filters(matching_doc_nums, documents, query.range_filters)
 
-        # Scorer et trier
-        scored_hits = self._score_documents(
-            matching_doc_ids, query_tokens, query.fields, index
-        )
+        # Scorer (BM25) et trier
+        scored_hits = self._score_documents(matching_doc_nums, term_postings, index)
 
         # Trier
         if query.sort_order == SortOrder.RELEVANCE:
-            scored_hits.sort(key=lambda x: x[1], reverse=True)
+            scored_hits.sort(key=lambda x: (-x[1], x[0]))
         elif query.sort_by:
             scored_hits.sort(
-                key=lambda x: self._get_sort_value(x[0], query.sort_by),
+                key=lambda x: self._get_sort_value(documents.get(x[0]), query.sort_by),
                 reverse=(query.sort_order == SortOrder.DESC)
             )
 
@@ -675,11 +786,12 @@ class SearchService:
 
         # Paginer
         paginated = scored_hits[query.offset:query.offset + query.limit]
+        page_documents = documents or self._store.get_documents(index, [n for n, _ in paginated])
 
         # Construire les hits
         hits = []
-        for doc_id, score in paginated:
-            doc = self._documents.get(doc_id)
+        for doc_num, score in paginated:
+            doc = page_documents.get(doc_num)
             if doc:
                 hit = SearchHit(
                     document_id=doc.id,
@@ -700,7 +812,7 @@ class SearchService:
         # Facettes
         facets = {}
         if query.facets:
-            all_matching_docs = [self._documents.get(did) for did, _ in scored_hits]
+            all_matching_docs = [documents.get(num) for num, _ in scored_hits]
             all_matching_docs = [d for d in all_matching_docs if d]
             facets = self._compute_facets(all_matching_docs, query.facets)
 
@@ -723,68 +835,66 @@ class SearchService:
 
         return result
 
-    def _find_matching_documents(
+    def _query_terms(self, query: SearchQuery, index: IndexDefinition) -> List[str]:
+        """Termes de la requête; préfixes et motifs wildcard ne sont ni filtrés ni racinisés."""
+        if query.query_type in (QueryType.PREFIX, QueryType.WILDCARD):
+            allowed = r'[a-z0-9*?]+' if query.query_type == QueryType.WILDCARD else r'[a-z0-9]+'
+            return re.findall(allowed, self._normalize(query.query_text or ""))
+        return self._analyze(query.query_text, index)
+
+    def _resolve_terms(
         self,
         index_id: str,
         tokens: List[str],
         query_type: QueryType
-    ) -> Set[str]:
-        """Trouve les documents correspondant aux tokens."""
-        if index_id not in self._inverted_index:
-            return set()
-
-        inv_idx = self._inverted_index[index_id]
+    ) -> Dict[str, Postings]:
+        """Postings des termes de la requête (termes du dictionnaire pour préfixe / wildcard)."""
+        if query_type == QueryType.PREFIX:
+            terms = [t for token in tokens for t, _ in self._store.terms(index_id, token)]
+        elif query_type == QueryType.WILDCARD:
+            terms = []
+            for token in tokens:
+                # Plage du dictionnaire sur la partie littérale, puis motif complet
+                literal = re.split(r'[*?]', token, maxsplit=1)[0]
+                pattern = re.compile(fnmatch.translate(token))
+                terms.extend(t for t, _ in self._store.terms(index_id, literal) if pattern.match(t))
+        else:
+            terms = tokens
+        return self._store.postings(index_id, terms)
 
+    def _find_matching_documents(
+        self,
+        index_id: str,
+        tokens: List[str],
+        term_postings: Dict[str, Postings],
+        query_type: QueryType
+    ) -> Set[int]:
+        """Trouve les documents (doc_num) correspondant aux tokens."""
         if not tokens:
             # Retourner tous les documents de l'index
-            return set(
-                doc.id for doc in self._documents.values()
-                if doc.index_id == index_id
-            )
+            return set(self._store.all_doc_nums(index_id))
 
-        if query_type == QueryType.MATCH:
-            # OR: union de tous les tokens
+        if query_type in (QueryType.MATCH, QueryType.PREFIX, QueryType.WILDCARD):
+            # OR: union des postings
             result = set()
-            for token in tokens:
-                if token in inv_idx:
-                    result.update(inv_idx[token])
+            for postings in term_postings.values():
+                result.update(postings)
             return result
 
         elif query_type in (QueryType.MATCH_PHRASE, QueryType.MULTI_MATCH):
-            # AND: intersection (simplifié)
-            if not tokens:
-                return set()
-
-            result = None
-            for token in tokens:
-                if token in inv_idx:
-                    if result is None:
-                        result = inv_idx[token].copy()
-                    else:
-                        result &= inv_idx[token]
-                else:
+            # AND: intersection (simplifié), en partant de la liste la plus courte
+            lists = []
+            for token in dict.fromkeys(tokens):
+                if token not in term_postings:
                     return set()
+                lists.append(term_postings[token])
+            lists.sort(key=len)
 
-            return result or set()
-
-        elif query_type == QueryType.PREFIX:
-            # Préfixe: trouve tous les tokens commençant par
-            result = set()
-            for token in tokens:
-                for idx_token in inv_idx:
-                    if idx_token.startswith(token):
-                        result.update(inv_idx[idx_token])
-            return result
-
-        elif query_type == QueryType.WILDCARD:
-            # Wildcard simplifié (* = n'importe quoi)
-            import fnmatch
-            result = set()
-            for token in tokens:
-                pattern = token.replace('*', '.*')
-                for idx_token in inv_idx:
-                    if re.match(pattern, idx_token):
-                        result.update(inv_idx[idx_token])
+            result = set(lists[0])
+            for postings in lists[1:]:
+                result.intersection_update(postings)
+                if not result:
+                    break
             return result
 
         return set()
@@ -795,52 +905,29 @@ class SearchService:
         index_id: str,
         fuzziness: int
     ) -> List[str]:
-        """Applique la recherche floue aux tokens."""
-        if index_id not in self._inverted_index:
-            return tokens
-
-        inv_idx = self._inverted_index[index_id]
+        """Applique la recherche floue aux tokens (automate de Levenshtein sur le dictionnaire)."""
         expanded = list(tokens)
+        seen = set(tokens)
 
         for token in tokens:
-            # Trouver les tokens similaires
-            for idx_token in inv_idx:
-                if self._levenshtein_distance(token, idx_token) <= fuzziness:
-                    if idx_token not in expanded:
-                        expanded.append(idx_token)
+            for term, _ in self._store.fuzzy_terms(index_id, token, fuzziness):
+                if term not in seen:
+                    seen.add(term)
+                    expanded.append(term)
 
         return expanded
 
-    def _levenshtein_distance(self, s1: str, s2: str) -> int:
-        """Calcule la distance de Levenshtein entre deux chaînes."""
-        if len(s1) < len(s2):
-            return self._levenshtein_distance(s2, s1)
-
-        if len(s2) == 0:
-            return len(s1)
-
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-
-        return previous_row[-1]
-
     def _apply_filters(
         self,
-        doc_ids: Set[str],
+        doc_nums: Set[int],
+        documents: Dict[int, IndexedDocument],
         filters: Dict[str, Any]
-    ) -> Set[str]:
+    ) -> Set[int]:
         """Applique les filtres exacts."""
         result = set()
 
-        for doc_id in doc_ids:
-            doc = self._documents.get(doc_id)
+        for doc_num in doc_nums:
+            doc = documents.get(doc_num)
             if not doc:
                 continue
 
@@ -857,20 +944,21 @@ class SearchService:
                         break
 
             if match:
-                result.add(doc_id)
+                result.add(doc_num)
 
         return result
 
     def _apply_range_filters(
         self,
-        doc_ids: Set[str],
+        doc_nums: Set[int],
+        documents: Dict[int, IndexedDocument],
         range_filters: Dict[str, Tuple[Any, Any]]
-    ) -> Set[str]:
+    ) -> Set[int]:
         """Applique les filtres de plage."""
         result = set()
 
-        for doc_id in doc_ids:
-            doc = self._documents.get(doc_id)
+        for doc_num in doc_nums:
+            doc = documents.get(doc_num)
             if not doc:
                 continue
 
@@ -881,6 +969,9 @@ class SearchService:
                     match = False
                     break
 
+                bound = min_val if min_val is not None else max_val
+                doc_value = self._comparable(doc_value, bound)
+
                 if min_val is not None and doc_value < min_val:
                     match = False
                     break
@@ -889,54 +980,55 @@ class SearchService:
                     break
 
             if match:
-                result.add(doc_id)
+                result.add(doc_num)
 
         return result
 
+    def _comparable(self, value: Any, bound: Any) -> Any:
+        """Reconvertit une valeur stockée en JSON (Decimal, dates) vers le type de la borne."""
+        if not isinstance(value, str) or isinstance(bound, str) or bound is None:
+            return value
+        try:
+            if isinstance(bound, datetime):
+                return datetime.fromisoformat(value)
+            if isinstance(bound, date):
+                return date.fromisoformat(value[:10])
+            if isinstance(bound, (Decimal, int, float)):
+                return Decimal(value)
+        except (ValueError, InvalidOperation):
+            pass
+        return value
+
     def _score_documents(
         self,
-        doc_ids: Set[str],
-        query_tokens: List[str],
-        query_fields: List[str],
+        doc_nums: Set[int],
+        term_postings: Dict[str, Postings],
         index: IndexDefinition
-    ) -> List[Tuple[str, float]]:
-        """Score les documents (TF-IDF simplifié)."""
-        total_docs = index.document_count or 1
-        scores = []
-
-        for doc_id in doc_ids:
-            doc = self._documents.get(doc_id)
-            if not doc:
-                continue
-
-            score = 0.0
-            for token in query_tokens:
-                # Term Frequency
-                tf = doc.tokens.count(token)
-
-                # Inverse Document Frequency
-                if self._inverted_index.get(index.id, {}).get(token):
-                    df = len(self._inverted_index[index.id][token])
-                    idf = 1 + (total_docs / (1 + df))
-                else:
-                    idf = 1
-
-                score += tf * idf
-
-                # Boost si présent dans un champ spécifique
-                for mapping in index.field_mappings:
-                    if mapping.name in doc.fields:
-                        field_value = str(doc.fields[mapping.name]).lower()
-                        if token in field_value:
-                            score += mapping.boost
+    ) -> List[Tuple[int, float]]:
+        """Score BM25 calculé sur les postings (tf et longueur des documents)."""
+        total_docs = max(index.document_count, 1)
+        avg_length = (index.total_length / total_docs) or 1.0
+        k1, b = self.BM25_K1, self.BM25_B
+
+        scores: Dict[int, float] = dict.fromkeys(doc_nums, 0.0)
+        for postings in term_postings.values():
+            df = len(postings)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+            # Parcourir le plus petit des deux ensembles
+            if len(postings) <= len(scores):
+                candidates = (n for n in postings if n in scores)
+            else:
+                candidates = (n for n in scores if n in postings)
 
-            scores.append((doc_id, score))
+            for doc_num in candidates:
+                tf, length = postings[doc_num]
+                scores[doc_num] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
 
-        return scores
+        return list(scores.items())
 
-    def _get_sort_value(self, doc_id: str, field: str) -> Any:
+    def _get_sort_value(self, doc: Optional[IndexedDocument], field: str) -> Any:
         """Récupère la valeur de tri d'un document."""
-        doc = self._documents.get(doc_id)
         if doc:
             return doc.fields.get(field, "")
         return ""
@@ -1015,18 +1107,15 @@ class SearchService:
         if not query_text:
             return []
 
-        suggestions = []
         query_lower = query_text.lower()
 
-        # Chercher des termes similaires
-        for term, freq in sorted(self._term_frequencies.items(), key=lambda x: x[1], reverse=True):
-            if term.startswith(query_lower) or self._levenshtein_distance(term, query_lower) <= 2:
-                if term != query_lower:
-                    suggestions.append(term)
-                    if len(suggestions) >= 5:
-                        break
+        # Termes commençant par la requête ou proches, par fréquence documentaire
+        frequencies = dict(self._store.terms(index_id, query_lower))
+        fuzzy_terms = [t for t, _ in self._store.fuzzy_terms(index_id, query_lower, 2) if t not in frequencies]
+        frequencies.update(self._store.document_frequencies(index_id, fuzzy_terms))
+        frequencies.pop(query_lower, None)
 
-        return suggestions
+        return sorted(frequencies, key=lambda term: (-frequencies[term], term))[:5]
 
     def _record_search(
         self,
@@ -1055,7 +1144,7 @@ class SearchService:
         index_id: str,
         limit: int = 10
     ) -> List[Suggestion]:
-        """Autocomplétion basée sur un préfixe."""
+        """Autocomplétion basée sur un préfixe (plage du dictionnaire des termes)."""
         if not prefix or len(prefix) < 2:
             return []
 
@@ -1063,18 +1152,16 @@ class SearchService:
         if not index:
             return []
 
-        prefix_lower = prefix.lower()
-        suggestions = []
-
-        # Rechercher dans les termes indexés
-        for term, freq in self._term_frequencies.items():
-            if term.startswith(prefix_lower):
-                suggestions.append(Suggestion(
-                    text=term,
-                    score=freq,
-                    suggestion_type=SuggestionType.COMPLETION,
-                    frequency=freq,
-                ))
+        prefix_lower = self._normalize(prefix)
+        suggestions = [
+            Suggestion(
+                text=term,
+                score=freq,
+                suggestion_type=SuggestionType.COMPLETION,
+                frequency=freq,
+            )
+            for term, freq in self._store.terms(index_id, prefix_lower)
+        ]
 
         # Trier par fréquence
         suggestions.sort(key=lambda x: x.frequency, reverse=True)
@@ -1090,19 +1177,10 @@ class SearchService:
         corrections = []
 
         for token in tokens:
-            best_match = None
-            best_distance = float('inf')
-
-            for term in self._term_frequencies:
-                distance = self._levenshtein_distance(token, term)
-                if 0 < distance <= 2 and distance < best_distance:
-                    best_distance = distance
-                    best_match = term
-
-            if best_match:
-                corrections.append(best_match)
-            else:
-                corrections.append(token)
+            # Terme le plus proche (puis premier dans l'ordre du dictionnaire)
+            candidates = [(distance, term) for term, distance in self._store.fuzzy_terms(index_id, token, 2)
+                          if distance > 0]
+            corrections.append(min(candidates)[1] if candidates else token)
 
         corrected = " ".join(corrections)
         if corrected != query_text.lower():
@@ -1133,40 +1211,21 @@ class SearchService:
 
         # En production, lancer en background
         # Ici, simuler immédiatement
-        self._perform_reindex(job)
+        self._perform_reindex(job, index)
 
         return job
 
-    def _perform_reindex(self, job: ReindexJob) -> None:
-        """Effectue la réindexation."""
-        index = self.get_index(job.index_id)
-        if not index:
-            return
-
-        # Reconstruire l'index inversé
-        self._inverted_index[job.index_id] = {}
-
-        docs_to_reindex = [
-            d for d in self._documents.values()
-            if d.index_id == job.index_id
-        ]
-
-        for doc in docs_to_reindex:
-            try:
-                # Re-tokeniser
-                doc.tokens = self._tokenize(doc._all_text, index.default_analyzer)
-                doc.tokens = self._expand_synonyms(doc.tokens, index.synonyms)
-
-                # Reconstruire l'index inversé
-                self._add_to_inverted_index(job.index_id, doc)
-
-                job.processed_documents += 1
-            except Exception:
-                job.failed_documents += 1
+    def _perform_reindex(self, job: ReindexJob, index: IndexDefinition) -> None:
+        """Effectue la réindexation (tokens et postings reconstruits)."""
+        job.processed_documents, job.failed_documents = self._store.reindex(
+            index, lambda doc: self._analyze(doc._all_text, index)
+        )
 
         job.completed_at = datetime.now()
         index.status = IndexStatus.ACTIVE
         index.last_reindex_at = datetime.now()
+        self._store.save_index(index)
+        self._store.commit()
 
     def get_reindex_job(self, job_id: str) -> Optional[ReindexJob]:
         """Récupère un job de réindexation."""
@@ -1207,6 +1266,6 @@ class SearchService:
 # FACTORY
 # ============================================================
 
-def create_search_service(tenant_id: str) -> SearchService:
-    """Crée une instance du service Search."""
-    return SearchService(tenant_id=tenant_id)
+def create_search_service(tenant_id: str, db: Optional[Session] = None) -> SearchService:
+    """Crée une instance du service Search (persistant si db est fourni)."""
+    return SearchService(tenant_id=tenant_id, db=db)
@@ -8,6 +8,8 @@ Gestion des webhooks sortants:
 - Logs de livraison
 - Monitoring santé endpoints
 - Rotation des secrets
+- File de livraison persistante et moteur asynchrone
+- Protection SSRF des URLs d'endpoint
 """
 
 from .service import (
@@ -28,7 +30,17 @@ from .service import (
     # Service
     WebhookService,
     create_webhook_service,
+    sign_payload,
+    validate_endpoint_url,
 )
+from .store import (
+    WebhookStore,
+    DeliveryQueue,
+    MemoryWebhookStore,
+    SQLWebhookStore,
+    SQLDeliveryQueue,
+)
+from .delivery import EndpointCircuit, WebhookDeliveryEngine
 
 __all__ = [
     "WebhookEvent",
@@ -43,4 +55,13 @@ __all__ = [
     "HealthCheck",
     "WebhookService",
     "create_webhook_service",
+    "sign_payload",
+    "validate_endpoint_url",
+    "WebhookStore",
+    "DeliveryQueue",
+    "MemoryWebhookStore",
+    "SQLWebhookStore",
+    "SQLDeliveryQueue",
+    "EndpointCircuit",
+    "WebhookDeliveryEngine",
 ]
@@ -0,0 +1,457 @@
+"""
+Moteur de livraison Webhooks - GAP-053
+
+WebhookDeliveryEngine vide la file de livraison (DeliveryQueue):
+- au plus `workers` envois simultanés, partageant un client HTTP
+  keep-alive (httpx); un lot attend d'abord la place de son endpoint,
+  puis une place globale: un endpoint lent n'immobilise pas les autres
+- concurrence bornée par endpoint (max_concurrency) et disjoncteur:
+  après failure_threshold échecs consécutifs, l'endpoint n'est plus
+  appelé pendant reset_timeout secondes, puis une seule requête de test
+  décide de sa réouverture; les livraisons sont reportées sans compter
+  de tentative
+- retry avec backoff exponentiel: retry_delay_seconds * 2^(tentative - 1),
+  jusqu'à max_retries tentatives
+- regroupement des payloads d'un même événement par endpoint quand
+  l'abonné l'accepte (batch_max_size > 1)
+- protection SSRF: l'URL et les adresses auxquelles son hôte se résout
+  sont revérifiées avant chaque envoi (app.core.url_safety)
+
+Usage:
+    Lifespan de l'application: start_delivery_engine() / stop_delivery_engine()
+    (WEBHOOK_DELIVERY_ENABLED=false pour le confier à un worker dédié)
+
+    Worker dédié:
+        queue = SQLDeliveryQueue(SessionLocal)
+        async with WebhookDeliveryEngine(queue) as engine:
+            await engine.run()
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import httpx
+
+from app.core.url_safety import UnresolvableHostError, check_resolved_url_async
+
+from .service import (
+    DeliveryAttempt,
+    DeliveryStatus,
+    WebhookEndpoint,
+    WebhookStatus,
+    sign_payload,
+)
+from .store import DeliveryQueue
+
+logger = logging.getLogger(__name__)
+
+# Workers d'envoi simultanés (tous endpoints confondus)
+WEBHOOK_DELIVERY_WORKERS = int(os.environ.get("WEBHOOK_DELIVERY_WORKERS", "32"))
+
+# Livraisons réservées par lecture de la file
+WEBHOOK_CLAIM_SIZE = int(os.environ.get("WEBHOOK_CLAIM_SIZE", "500"))
+
+# Durée de réservation d'une livraison (au-delà, un autre worker la reprend)
+WEBHOOK_LEASE_SECONDS = int(os.environ.get("WEBHOOK_LEASE_SECONDS", "300"))
+
+# Taille maximale conservée d'une réponse
+_MAX_RESPONSE_BODY = 1000
+
+
+class EndpointCircuit:
+    """Limite de concurrence et disjoncteur d'un endpoint (par processus)."""
+
+    def __init__(self, max_concurrency: int, failure_threshold: int, reset_timeout: float):
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """True si une requête peut partir (circuit fermé, ou requête de test)."""
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        self._probing = True
+        return True
+
+    def retry_in(self) -> float:
+        """Secondes avant la prochaine requête de test."""
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 1.0)
+
+    def record(self, success: bool) -> None:
+        if success:
+            self.failures = 0
+            self.opened_at = None
+        else:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class WebhookDeliveryEngine:
+    """Livraison asynchrone des webhooks depuis une DeliveryQueue."""
+
+    def __init__(
+        self,
+        queue: DeliveryQueue,
+        workers: int = WEBHOOK_DELIVERY_WORKERS,
+        claim_size: int = WEBHOOK_CLAIM_SIZE,
+        lease_seconds: int = WEBHOOK_LEASE_SECONDS,
+        poll_interval: float = 1.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.claim_size = claim_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._client = client
+        self._insecure_client: Optional[httpx.AsyncClient] = None
+        self._owns_client = client is None
+        self._circuits: Dict[str, EndpointCircuit] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._stopping = False
+
+    async def __aenter__(self) -> "WebhookDeliveryEngine":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # ========================================
+    # CYCLE DE VIE
+    # ========================================
+
+    def _http_client(self, verify_ssl: bool) -> httpx.AsyncClient:
+        """Client partagé (keep-alive); un second client sans vérification TLS si nécessaire."""
+        limits = httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers)
+        if not verify_ssl and self._owns_client:
+            if self._insecure_client is None:
+                self._insecure_client = httpx.AsyncClient(limits=limits, verify=False)
+            return self._insecure_client
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=limits)
+        return self._client
+
+    async def close(self) -> None:
+        """Arrête run() et ferme les clients HTTP."""
+        self._stopping = True
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._insecure_client is not None:
+            await self._insecure_client.aclose()
+            self._insecure_client = None
+
+    def stop(self) -> None:
+        """Demande l'arrêt de run() après le cycle en cours."""
+        self._stopping = True
+
+    # ========================================
+    # BOUCLE DE LIVRAISON
+    # ========================================
+
+    async def run(self) -> None:
+        """Livre en continu jusqu'à stop() / close()."""
+        self._stopping = False
+        while not self._stopping:
+            try:
+                processed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Webhook delivery cycle failed")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> int:
+        """Réserve les livraisons échues, les livre; retourne le nombre traité."""
+        attempts = await asyncio.to_thread(self.queue.claim_due, self.claim_size, self.lease_seconds)
+        if not attempts:
+            return 0
+        await self.deliver(attempts)
+        return len(attempts)
+
+    async def drain(self) -> int:
+        """Livre jusqu'à ce qu'aucune livraison ne soit échue; retourne le total traité."""
+        total = 0
+        while processed := await self.run_once():
+            total += processed
+        return total
+
+    async def claim_and_deliver(self, attempt_ids: List[str]) -> List[DeliveryAttempt]:
+        """
+        Réserve puis livre des livraisons données, hors cycle (livraison manuelle).
+
+        Les livraisons déjà réservées par un moteur, ou terminées, sont
+        ignorées: seules les livraisons effectivement envoyées sont retournées.
+        """
+        attempts = await asyncio.to_thread(self.queue.claim, attempt_ids, self.lease_seconds)
+        if attempts:
+            await self.deliver(attempts)
+        return attempts
+
+    async def deliver(self, attempts: List[DeliveryAttempt]) -> None:
+        """Livre des livraisons déjà réservées (regroupées par endpoint et événement)."""
+        endpoints = await asyncio.to_thread(
+            self.queue.get_endpoints, {a.endpoint_id for a in attempts}
+        )
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        await asyncio.gather(*(
+            self._deliver_batch(endpoint, batch)
+            for endpoint, batch in self._batches(attempts, endpoints)
+        ))
+
+    def _batches(
+        self,
+        attempts: List[DeliveryAttempt],
+        endpoints: Dict[str, WebhookEndpoint],
+    ) -> List[Tuple[Optional[WebhookEndpoint], List[DeliveryAttempt]]]:
+        groups: Dict[Tuple[str, object], List[DeliveryAttempt]] = defaultdict(list)
+        for attempt in attempts:
+            groups[(attempt.endpoint_id, attempt.event)].append(attempt)
+
+        batches = []
+        for (endpoint_id, _event), group in groups.items():
+            endpoint = endpoints.get(endpoint_id)
+            size = max(1, endpoint.batch_max_size) if endpoint else 1
+            for i in range(0, len(group), size):
+                batches.append((endpoint, group[i:i + size]))
+        return batches
+
+    def _circuit(self, endpoint: WebhookEndpoint) -> EndpointCircuit:
+        circuit = self._circuits.get(endpoint.id)
+        if circuit is None:
+            circuit = EndpointCircuit(endpoint.max_concurrency, self.failure_threshold, self.reset_timeout)
+            self._circuits[endpoint.id] = circuit
+        return circuit
+
+    async def _deliver_batch(self, endpoint: Optional[WebhookEndpoint], batch: List[DeliveryAttempt]) -> None:
+        try:
+            await self._send_batch(endpoint, batch)
+        except Exception:
+            # La réservation expirera: la livraison sera reprise
+            logger.exception("Webhook batch delivery failed")
+
+    async def _send_batch(self, endpoint: Optional[WebhookEndpoint], batch: List[DeliveryAttempt]) -> None:
+        if endpoint is None:
+            now = datetime.now()
+            for attempt in batch:
+                attempt.status = DeliveryStatus.FAILED
+                attempt.error_message = "Endpoint non trouvé"
+                attempt.completed_at = now
+            await asyncio.to_thread(self.queue.record_results, batch[0].endpoint_id, batch)
+            return
+
+        if endpoint.status in (WebhookStatus.PAUSED, WebhookStatus.DISABLED):
+            until = datetime.now() + timedelta(seconds=endpoint.retry_delay_seconds)
+            await asyncio.to_thread(self.queue.postpone, [a.id for a in batch], until)
+            return
+
+        circuit = self._circuit(endpoint)
+        async with circuit.semaphore, self._slots:
+            allowed = circuit.allow()
+            if allowed:
+                circuit.record(await self._post(endpoint, batch))
+
+        if not allowed:
+            until = datetime.now() + timedelta(seconds=circuit.retry_in())
+            await asyncio.to_thread(self.queue.postpone, [a.id for a in batch], until)
+            return
+
+        await asyncio.to_thread(self.queue.record_results, endpoint.id, batch)
+
+    # ========================================
+    # ENVOI HTTP
+    # ========================================
+
+    def _request(self, endpoint: WebhookEndpoint, batch: List[DeliveryAttempt]) -> Tuple[str, Dict[str, str]]:
+        """Corps et en-têtes signés (un payload, ou une enveloppe de lot)."""
+        first = batch[0]
+        if len(batch) == 1:
+            body = first.request_body
+            webhook_id = first.payload_id
+        else:
+            webhook_id = str(uuid4())
+            body = (
+                f'{{"id": {json.dumps(webhook_id)}, "event": {json.dumps(first.event.value)}, '
+                f'"batch": true, "count": {len(batch)}, '
+                f'"deliveries": [{", ".join(a.request_body for a in batch)}]}}'
+            )
+
+        headers = {
+            "Content-Type": "application/json",
+            "X-Webhook-ID": webhook_id,
+            "X-Webhook-Event": first.event.value,
+            "X-Webhook-Timestamp": first.scheduled_at.isoformat(),
+            "X-Webhook-Signature": sign_payload(body, endpoint.secret, endpoint.signature_version),
+            **endpoint.custom_headers,
+        }
+        if len(batch) > 1:
+            headers["X-Webhook-Batch-Size"] = str(len(batch))
+        return body, headers
+
+    async def _post(self, endpoint: WebhookEndpoint, batch: List[DeliveryAttempt]) -> bool:
+        """Envoie le lot et applique le résultat à chaque livraison; True si succès."""
+        body, headers = self._request(endpoint, batch)
+        started_at = datetime.now()
+        start = time.perf_counter()
+        status_code: Optional[int] = None
+        response_body: Optional[str] = None
+        error: Optional[str] = None
+
+        error = await url_error(endpoint.url)
+        if error is None:
+            try:
+                response = await self._http_client(endpoint.verify_ssl).post(
+                    endpoint.url,
+                    content=body.encode(),
+                    headers=headers,
+                    timeout=endpoint.timeout_seconds,
+                )
+                status_code = response.status_code
+                response_body = response.text[:_MAX_RESPONSE_BODY]
+                if not response.is_success:
+                    error = f"HTTP {status_code}"
+            except httpx.TimeoutException:
+                error = "Timeout"
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        completed_at = datetime.now()
+        success = error is None
+
+        for attempt in batch:
+            attempt.request_url = endpoint.url
+            attempt.request_headers = headers
+            attempt.started_at = started_at
+            attempt.completed_at = completed_at
+            attempt.response_status_code = status_code
+            attempt.response_body = response_body
+            attempt.response_time_ms = elapsed_ms
+            attempt.error_message = error
+            if success:
+                attempt.status = DeliveryStatus.DELIVERED
+                attempt.next_retry_at = None
+            elif attempt.attempt_number < endpoint.max_retries:
+                delay = endpoint.retry_delay_seconds * (2 ** (attempt.attempt_number - 1))
+                attempt.status = DeliveryStatus.RETRYING
+                attempt.next_retry_at = completed_at + timedelta(seconds=delay)
+                attempt.attempt_number += 1
+            else:
+                attempt.status = DeliveryStatus.FAILED
+                attempt.next_retry_at = None
+
+        if not success:
+            logger.warning(
+                f"Webhook delivery failed: {endpoint.url}",
+                extra={"endpoint_id": endpoint.id, "count": len(batch), "error": error}
+            )
+        return success
+
+    async def probe(self, endpoint: WebhookEndpoint) -> Tuple[Optional[int], int, Optional[str]]:
+        """
+        Requête HEAD de test vers l'endpoint (client et validation d'URL des livraisons).
+
+        Returns:
+            (code HTTP, durée en ms, erreur); toute réponse sous 500 est
+            considérée comme saine (un 405 prouve que l'endpoint répond)
+        """
+        start = time.perf_counter()
+        status_code: Optional[int] = None
+        error = await url_error(endpoint.url)
+        if error is None:
+            try:
+                response = await self._http_client(endpoint.verify_ssl).head(
+                    endpoint.url,
+                    headers=endpoint.custom_headers,
+                    timeout=endpoint.timeout_seconds,
+                )
+                status_code = response.status_code
+                if status_code >= 500:
+                    error = f"HTTP {status_code}"
+            except httpx.TimeoutException:
+                error = "Timeout"
+            except httpx.HTTPError as e:
+                error = f"{type(e).__name__}: {e}"
+        return status_code, int((time.perf_counter() - start) * 1000), error
+
+
+async def url_error(url: str) -> Optional[str]:
+    """Motif de refus d'une URL d'endpoint (adresses résolues comprises), None si elle peut être appelée."""
+    try:
+        is_safe, reason = await check_resolved_url_async(url)
+    except UnresolvableHostError as e:
+        return str(e)
+    if not is_safe:
+        logger.warning(f"Webhook URL bloquée (SSRF): {url} - {reason}")
+        return f"URL non autorisée: {reason}"
+    return None
+
+
+# ============================================================
+# MOTEUR DU PROCESSUS (lifespan de l'application)
+# ============================================================
+
+# Livraison dans chaque processus de l'application; false si un worker
+# dédié consomme la file (réservation SKIP LOCKED: plusieurs moteurs
+# peuvent tourner sans doublon)
+WEBHOOK_DELIVERY_ENABLED = os.environ.get("WEBHOOK_DELIVERY_ENABLED", "true").lower() == "true"
+
+_engine: Optional[WebhookDeliveryEngine] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def start_delivery_engine(queue: Optional[DeliveryQueue] = None, **options) -> WebhookDeliveryEngine:
+    """Démarre la livraison en tâche de fond sur la boucle courante (SQLDeliveryQueue par défaut)."""
+    global _engine, _task
+    if _engine is None:
+        if queue is None:
+            from app.core.database import SessionLocal
+
+            from .store import SQLDeliveryQueue
+            queue = SQLDeliveryQueue(SessionLocal)
+        _engine = WebhookDeliveryEngine(queue, **options)
+        _task = asyncio.create_task(_engine.run(), name="webhook-delivery")
+    return _engine
+
+
+async def stop_delivery_engine(timeout: float = 10.0) -> None:
+    """Arrête la tâche après le cycle en cours (annulée au-delà de timeout) et ferme les clients HTTP."""
+    global _engine, _task
+    if _engine is None:
+        return
+    _engine.stop()
+    try:
+        await asyncio.wait_for(_task, timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Webhook delivery stopped before the end of the current cycle")
+    await _engine.close()
+    _engine = _task = None
@@ -0,0 +1,102 @@
+"""
+Modèles Webhooks - GAP-053
+
+Persistance des webhooks sortants, partagée par tous les workers:
+- webhook_endpoints: configuration et statistiques des endpoints
+- webhook_deliveries: file de livraison durable; une ligne par
+  (endpoint, payload), réutilisée d'une tentative à l'autre. Les lignes
+  terminées (delivered / failed) servent de journal de livraison.
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
+
+from app.core.types import JSON, UniversalUUID
+from app.db import Base
+
+
+class WebhookEndpointRecord(Base):
+    """Endpoint webhook d'un tenant."""
+    __tablename__ = "webhook_endpoints"
+
+    id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(50), nullable=False)
+
+    name = Column(String(200), nullable=False)
+    url = Column(Text, nullable=False)
+    # Valeurs WebhookEvent abonnées
+    events = Column(JSON, nullable=False, default=list)
+
+    # Sécurité
+    secret = Column(String(200), nullable=False, default="")
+    signature_version = Column(String(10), nullable=False, default="v1")
+    verify_ssl = Column(Boolean, nullable=False, default=True)
+    custom_headers = Column(JSON, nullable=False, default=dict)
+
+    status = Column(String(20), nullable=False, default="active")
+
+    # Livraison
+    max_retries = Column(Integer, nullable=False, default=5)
+    retry_delay_seconds = Column(Integer, nullable=False, default=60)
+    timeout_seconds = Column(Integer, nullable=False, default=30)
+    max_concurrency = Column(Integer, nullable=False, default=4)
+    batch_max_size = Column(Integer, nullable=False, default=1)
+
+    # Statistiques
+    total_deliveries = Column(Integer, nullable=False, default=0)
+    successful_deliveries = Column(Integer, nullable=False, default=0)
+    failed_deliveries = Column(Integer, nullable=False, default=0)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    last_delivery_at = Column(DateTime)
+    last_success_at = Column(DateTime)
+    last_failure_at = Column(DateTime)
+
+    description = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_webhook_endpoints_tenant', 'tenant_id', 'status'),
+    )
+
+
+class WebhookDeliveryRecord(Base):
+    """
+    Livraison d'un payload à un endpoint (file durable).
+
+    Une ligne est à livrer quand status est pending / retrying, que
+    next_attempt_at est échu et qu'aucun worker ne la détient
+    (locked_until vide ou expiré).
+    """
+    __tablename__ = "webhook_deliveries"
+
+    id = Column(UniversalUUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(String(50), nullable=False)
+    endpoint_id = Column(UniversalUUID(), nullable=False)
+    payload_id = Column(String(36), nullable=False)
+    event = Column(String(100), nullable=False)
+
+    status = Column(String(20), nullable=False, default="pending")
+    attempt_number = Column(Integer, nullable=False, default=1)
+
+    # Corps JSON du payload (signé à l'envoi)
+    body = Column(Text, nullable=False)
+
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime)
+
+    # Dernière tentative
+    response_status_code = Column(Integer)
+    response_time_ms = Column(Integer, nullable=False, default=0)
+    error_message = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('idx_webhook_deliveries_due', 'status', 'next_attempt_at'),
+        Index('idx_webhook_deliveries_payload', 'tenant_id', 'payload_id'),
+        Index('idx_webhook_deliveries_endpoint', 'endpoint_id', 'status'),
+    )
@@ -8,6 +8,15 @@ Gestion des webhooks sortants:
 - Logs de livraison
 - Monitoring santé endpoints
 - Rotation des secrets
+
+Endpoints et livraisons sont conservés par un WebhookStore (store.py):
+en mémoire par défaut, en base avec WebhookService(tenant_id, db=...).
+trigger() ne fait qu'alimenter la file de livraison; l'envoi HTTP est
+fait par WebhookDeliveryEngine (delivery.py).
+
+Les URLs d'endpoint visant le réseau interne (boucle locale, RFC1918,
+metadata cloud) sont refusées à la création et à la modification, puis
+revérifiées par le moteur avant chaque envoi.
 """
 from __future__ import annotations
 
@@ -15,12 +24,22 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 from uuid import uuid4
 import hashlib
 import hmac
 import json
 
+from sqlalchemy.orm import Session
+
+from app.core.url_safety import UnresolvableHostError, check_resolved_url
+
+from .store import MemoryWebhookStore, SQLWebhookStore, WebhookStore
+
+if TYPE_CHECKING:
+    from .delivery import WebhookDeliveryEngine
+    from .store import DeliveryQueue
+
 
 # ============================================================
 # ÉNUMÉRATIONS
@@ -129,10 +148,12 @@ class WebhookEndpoint:
     # État
     status: WebhookStatus = WebhookStatus.ACTIVE
 
-    # Configuration retry
+    # Configuration livraison
     max_retries: int = 5
     retry_delay_seconds: int = 60
     timeout_seconds: int = 30
+    max_concurrency: int = 4  # Requêtes simultanées vers l'endpoint
+    batch_max_size: int = 1  # Payloads d'un même événement par requête (1 = pas de lot)
 
     # Statistiques
     total_deliveries: int = 0
@@ -200,6 +221,7 @@ class DeliveryAttempt:
     tenant_id: str
     endpoint_id: str
     payload_id: str
+    event: Optional[WebhookEvent] = None
 
     # État
     status: DeliveryStatus = DeliveryStatus.PENDING
@@ -228,6 +250,9 @@ class DeliveryAttempt:
     # Retry
     next_retry_at: Optional[datetime] = None
 
+    # Réservation par un worker de livraison
+    locked_until: Optional[datetime] = None
+
 
 @dataclass
 class WebhookLog:
@@ -280,6 +305,40 @@ class HealthCheck:
     checked_at: datetime = field(default_factory=datetime.now)
 
 
+# ============================================================
+# SIGNATURE
+# ============================================================
+
+def sign_payload(payload: str, secret: str, version: SignatureVersion) -> str:
+    """Signe un payload."""
+    if version == SignatureVersion.V1_HMAC_SHA256:
+        signature = hmac.new(
+            secret.encode(),
+            payload.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return f"v1={signature}"
+    elif version == SignatureVersion.V2_HMAC_SHA512:
+        signature = hmac.new(
+            secret.encode(),
+            payload.encode(),
+            hashlib.sha512
+        ).hexdigest()
+        return f"v2={signature}"
+    return ""
+
+
+def validate_endpoint_url(url: str) -> None:
+    """Refuse (ValueError) une URL d'endpoint visant le réseau interne."""
+    try:
+        is_safe, error = check_resolved_url(url)
+    except UnresolvableHostError:
+        # Hôte pas encore résolu: ses adresses sont vérifiées avant chaque envoi
+        return
+    if not is_safe:
+        raise ValueError(f"URL non autorisée: {error}")
+
+
 # ============================================================
 # SERVICE PRINCIPAL
 # ============================================================
@@ -287,20 +346,24 @@ class HealthCheck:
 class WebhookService:
     """Service de gestion des webhooks."""
 
-    def __init__(self, tenant_id: str):
+    def __init__(
+        self,
+        tenant_id: str,
+        db: Optional[Session] = None,
+        store: Optional[WebhookStore] = None,
+    ):
         self.tenant_id = tenant_id
+        self.db = db
 
-        # Stockage en mémoire (à remplacer par DB)
-        self._endpoints: Dict[str, WebhookEndpoint] = {}
-        self._payloads: Dict[str, WebhookPayload] = {}
-        self._delivery_attempts: Dict[str, DeliveryAttempt] = {}
-        self._logs: List[WebhookLog] = []
+        # Endpoints et file de livraison
+        self._store: WebhookStore = (
+            store or (SQLWebhookStore(db, tenant_id) if db is not None else MemoryWebhookStore())
+        )
+
+        # Historique des secrets et health checks (mémoire)
         self._secrets: Dict[str, List[WebhookSecret]] = {}
         self._health_checks: Dict[str, List[HealthCheck]] = {}
 
-        # Queue de livraison (en production: Redis/RabbitMQ)
-        self._delivery_queue: List[str] = []
-
     # ========================================
     # GESTION DES ENDPOINTS
     # ========================================
@@ -312,9 +375,11 @@ class WebhookService:
         events: List[WebhookEvent],
         **kwargs
     ) -> WebhookEndpoint:
-        """Crée un endpoint webhook."""
+        """Crée un endpoint webhook (ValueError si l'URL n'est pas autorisée)."""
         import secrets as py_secrets
 
+        validate_endpoint_url(url)
+
         # Générer le secret
         secret = py_secrets.token_urlsafe(32)
 
@@ -331,10 +396,13 @@ class WebhookService:
             max_retries=kwargs.get("max_retries", 5),
             retry_delay_seconds=kwargs.get("retry_delay_seconds", 60),
             timeout_seconds=kwargs.get("timeout_seconds", 30),
+            max_concurrency=kwargs.get("max_concurrency", 4),
+            batch_max_size=kwargs.get("batch_max_size", 1),
             description=kwargs.get("description"),
         )
 
-        self._endpoints[endpoint.id] = endpoint
+        self._store.save_endpoint(endpoint)
+        self._store.commit()
 
         # Initialiser le secret dans l'historique
         self._secrets[endpoint.id] = [WebhookSecret(
@@ -349,7 +417,7 @@ class WebhookService:
 
     def get_endpoint(self, endpoint_id: str) -> Optional[WebhookEndpoint]:
         """Récupère un endpoint."""
-        endpoint = self._endpoints.get(endpoint_id)
+        endpoint = self._store.get_endpoint(endpoint_id)
         if endpoint and endpoint.tenant_id == self.tenant_id:
             return endpoint
         return None
@@ -361,7 +429,7 @@ class WebhookService:
     ) -> List[WebhookEndpoint]:
         """Liste les endpoints."""
         endpoints = [
-            e for e in self._endpoints.values()
+            e for e in self._store.list_endpoints()
             if e.tenant_id == self.tenant_id
         ]
 
@@ -377,11 +445,14 @@ class WebhookService:
         endpoint_id: str,
         **kwargs
     ) -> Optional[WebhookEndpoint]:
-        """Met à jour un endpoint."""
+        """Met à jour un endpoint (ValueError si la nouvelle URL n'est pas autorisée)."""
         endpoint = self.get_endpoint(endpoint_id)
         if not endpoint:
             return None
 
+        if "url" in kwargs:
+            validate_endpoint_url(kwargs["url"])
+
         if "name" in kwargs:
             endpoint.name = kwargs["name"]
         if "url" in kwargs:
@@ -396,8 +467,14 @@ class WebhookService:
             endpoint.max_retries = kwargs["max_retries"]
         if "verify_ssl" in kwargs:
             endpoint.verify_ssl = kwargs["verify_ssl"]
+        if "max_concurrency" in kwargs:
+            endpoint.max_concurrency = kwargs["max_concurrency"]
+        if "batch_max_size" in kwargs:
+            endpoint.batch_max_size = kwargs["batch_max_size"]
 
         endpoint.updated_at = datetime.now()
+        self._store.save_endpoint(endpoint)
+        self._store.commit()
         return endpoint
 
     def delete_endpoint(self, endpoint_id: str) -> bool:
@@ -406,7 +483,8 @@ class WebhookService:
         if not endpoint:
             return False
 
-        del self._endpoints[endpoint_id]
+        self._store.delete_endpoint(endpoint_id)
+        self._store.commit()
 
         # Nettoyer les secrets
         if endpoint_id in self._secrets:
@@ -422,6 +500,8 @@ class WebhookService:
 
         endpoint.status = WebhookStatus.PAUSED
         endpoint.updated_at = datetime.now()
+        self._store.save_endpoint(endpoint)
+        self._store.commit()
         return True
 
     def resume_endpoint(self, endpoint_id: str) -> bool:
@@ -433,6 +513,8 @@ class WebhookService:
         endpoint.status = WebhookStatus.ACTIVE
         endpoint.consecutive_failures = 0
         endpoint.updated_at = datetime.now()
+        self._store.save_endpoint(endpoint)
+        self._store.commit()
         return True
 
     # ========================================
@@ -446,21 +528,7 @@ class WebhookService:
         version: SignatureVersion
     ) -> str:
         """Signe un payload."""
-        if version == SignatureVersion.V1_HMAC_SHA256:
-            signature = hmac.new(
-                secret.encode(),
-                payload.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            return f"v1={signature}"
-        elif version == SignatureVersion.V2_HMAC_SHA512:
-            signature = hmac.new(
-                secret.encode(),
-                payload.encode(),
-                hashlib.sha512
-            ).hexdigest()
-            return f"v2={signature}"
-        return ""
+        return sign_payload(payload, secret, version)
 
     def verify_signature(
         self,
@@ -513,6 +581,8 @@ class WebhookService:
         # Mettre à jour l'endpoint
         endpoint.secret = new_secret
         endpoint.updated_at = datetime.now()
+        self._store.save_endpoint(endpoint)
+        self._store.commit()
 
         return new_secret
 
@@ -528,7 +598,8 @@ class WebhookService:
     ) -> List[str]:
         """
         Déclenche un événement webhook.
-        Retourne les IDs des livraisons créées.
+        Retourne les IDs des livraisons créées (mises en file, livrées
+        par WebhookDeliveryEngine).
         """
         # Créer le payload
         payload = WebhookPayload(
@@ -542,205 +613,132 @@ class WebhookService:
             actor_email=kwargs.get("actor_email"),
         )
 
-        self._payloads[payload.id] = payload
-
         # Trouver les endpoints abonnés
         endpoints = self.list_endpoints(status=WebhookStatus.ACTIVE, event=event)
+        if not endpoints:
+            return []
 
-        delivery_ids = []
-        for endpoint in endpoints:
-            # Créer une tentative de livraison
-            attempt = self._create_delivery_attempt(endpoint, payload)
-            delivery_ids.append(attempt.id)
+        payload_json = json.dumps(payload.to_dict())
+        attempts = [
+            self._create_delivery_attempt(endpoint, payload, payload_json)
+            for endpoint in endpoints
+        ]
 
-            # Ajouter à la queue
-            self._delivery_queue.append(attempt.id)
+        # Ajouter à la file de livraison
+        self._store.enqueue(attempts)
+        self._store.commit()
 
-        return delivery_ids
+        return [attempt.id for attempt in attempts]
 
     def _create_delivery_attempt(
         self,
         endpoint: WebhookEndpoint,
-        payload: WebhookPayload
+        payload: WebhookPayload,
+        payload_json: str
     ) -> DeliveryAttempt:
-        """Crée une tentative de livraison."""
-        payload_json = json.dumps(payload.to_dict())
-        signature = self._sign_payload(
-            payload_json, endpoint.secret, endpoint.signature_version
-        )
-
-        headers = {
-            "Content-Type": "application/json",
-            "X-Webhook-ID": payload.id,
-            "X-Webhook-Event": payload.event.value,
-            "X-Webhook-Timestamp": payload.timestamp.isoformat(),
-            "X-Webhook-Signature": signature,
-            **endpoint.custom_headers,
-        }
-
-        attempt = DeliveryAttempt(
+        """Crée une livraison (signée au moment de l'envoi)."""
+        return DeliveryAttempt(
             id=str(uuid4()),
             tenant_id=self.tenant_id,
             endpoint_id=endpoint.id,
             payload_id=payload.id,
+            event=payload.event,
             request_url=endpoint.url,
-            request_headers=headers,
             request_body=payload_json,
+            scheduled_at=payload.timestamp,
         )
 
-        self._delivery_attempts[attempt.id] = attempt
-        return attempt
+    def delivery_queue(self) -> "DeliveryQueue":
+        """File de livraison à donner à WebhookDeliveryEngine."""
+        from sqlalchemy.orm import sessionmaker
+
+        from .store import SQLDeliveryQueue
+
+        if isinstance(self._store, SQLWebhookStore):
+            return SQLDeliveryQueue(sessionmaker(bind=self.db.get_bind()))
+        return self._store
 
-    def deliver(self, attempt_id: str) -> DeliveryAttempt:
+    async def deliver(
+        self,
+        attempt_id: str,
+        engine: Optional["WebhookDeliveryEngine"] = None
+    ) -> DeliveryAttempt:
         """
-        Effectue la livraison d'un webhook.
-        En production: utiliser httpx/aiohttp avec async.
+        Livre immédiatement une livraison, hors cycle du moteur.
+
+        La livraison est d'abord réservée comme par le moteur de fond:
+        ValueError si elle est déjà en cours d'envoi ou terminée.
+        Sans engine, un moteur temporaire (un worker, client HTTP dédié)
+        est utilisé puis fermé.
         """
-        attempt = self._delivery_attempts.get(attempt_id)
+        from .delivery import WebhookDeliveryEngine
+
+        attempt = self._store.get_attempt(attempt_id)
         if not attempt or attempt.tenant_id != self.tenant_id:
             raise ValueError(f"Tentative {attempt_id} non trouvée")
 
-        endpoint = self.get_endpoint(attempt.endpoint_id)
-        if not endpoint:
-            attempt.status = DeliveryStatus.FAILED
-            attempt.error_message = "Endpoint non trouvé"
-            return attempt
-
-        attempt.started_at = datetime.now()
-        attempt.status = DeliveryStatus.PENDING
-
-        # Simuler l'envoi (en production: vraie requête HTTP)
-        try:
-            # Simulation succès/échec
-            import random
-            start_time = datetime.now()
-
-            # 95% de succès en simulation
-            if random.random() < 0.95:
-                attempt.response_status_code = 200
-                attempt.response_body = '{"status": "ok"}'
-                attempt.status = DeliveryStatus.DELIVERED
-
-                # Mettre à jour stats endpoint
-                endpoint.successful_deliveries += 1
-                endpoint.last_success_at = datetime.now()
-                endpoint.consecutive_failures = 0
-            else:
-                attempt.response_status_code = 500
-                attempt.error_message = "Internal Server Error"
-                attempt.status = DeliveryStatus.FAILED
-
-                endpoint.failed_deliveries += 1
-                endpoint.last_failure_at = datetime.now()
-                endpoint.consecutive_failures += 1
-
-                # Planifier retry si pas dépassé
-                if attempt.attempt_number < endpoint.max_retries:
-                    delay = endpoint.retry_delay_seconds * (2 ** (attempt.attempt_number - 1))
-                    attempt.next_retry_at = datetime.now() + timedelta(seconds=delay)
-                    attempt.status = DeliveryStatus.RETRYING
-
-            attempt.response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-
-        except Exception as e:
-            attempt.status = DeliveryStatus.FAILED
-            attempt.error_message = str(e)
-            endpoint.failed_deliveries += 1
-            endpoint.consecutive_failures += 1
-
-        attempt.completed_at = datetime.now()
-        endpoint.total_deliveries += 1
-        endpoint.last_delivery_at = datetime.now()
-
-        # Marquer comme failing si trop d'échecs
-        if endpoint.consecutive_failures >= 5:
-            endpoint.status = WebhookStatus.FAILING
-
-        # Logger
-        self._log_delivery(attempt, endpoint)
-
-        return attempt
-
-    def retry(self, attempt_id: str) -> DeliveryAttempt:
-        """Réessaie une livraison."""
-        original = self._delivery_attempts.get(attempt_id)
+        if engine is not None:
+            delivered = await engine.claim_and_deliver([attempt_id])
+        else:
+            async with WebhookDeliveryEngine(self.delivery_queue(), workers=1) as engine:
+                delivered = await engine.claim_and_deliver([attempt_id])
+
+        if not delivered:
+            raise ValueError(f"Tentative {attempt_id} déjà en cours de livraison ou terminée")
+        return delivered[0]
+
+    async def retry(
+        self,
+        attempt_id: str,
+        engine: Optional["WebhookDeliveryEngine"] = None
+    ) -> DeliveryAttempt:
+        """Réessaie une livraison immédiatement."""
+        original = self._store.get_attempt(attempt_id)
         if not original or original.tenant_id != self.tenant_id:
             raise ValueError(f"Tentative {attempt_id} non trouvée")
 
-        endpoint = self.get_endpoint(original.endpoint_id)
-        if not endpoint:
+        if not self.get_endpoint(original.endpoint_id):
             raise ValueError("Endpoint non trouvé")
 
-        # Créer nouvelle tentative
-        new_attempt = DeliveryAttempt(
-            id=str(uuid4()),
-            tenant_id=self.tenant_id,
-            endpoint_id=original.endpoint_id,
-            payload_id=original.payload_id,
-            attempt_number=original.attempt_number + 1,
-            request_url=original.request_url,
-            request_headers=original.request_headers,
-            request_body=original.request_body,
-        )
-
-        self._delivery_attempts[new_attempt.id] = new_attempt
-        return self.deliver(new_attempt.id)
-
-    def _log_delivery(
-        self,
-        attempt: DeliveryAttempt,
-        endpoint: WebhookEndpoint
-    ) -> None:
-        """Enregistre un log de livraison."""
-        payload = self._payloads.get(attempt.payload_id)
-        if not payload:
-            return
-
-        log = WebhookLog(
-            id=str(uuid4()),
-            tenant_id=self.tenant_id,
-            endpoint_id=endpoint.id,
-            event=payload.event,
-            success=(attempt.status == DeliveryStatus.DELIVERED),
-            attempts=attempt.attempt_number,
-            final_status_code=attempt.response_status_code,
-            delivered_at=attempt.completed_at if attempt.status == DeliveryStatus.DELIVERED else None,
-            total_duration_ms=attempt.response_time_ms,
-        )
-
-        self._logs.append(log)
+        self._store.reschedule(attempt_id, datetime.now())
+        self._store.commit()
+        return await self.deliver(attempt_id, engine)
 
     # ========================================
     # HEALTH CHECK
     # ========================================
 
-    def check_health(self, endpoint_id: str) -> HealthCheck:
-        """Vérifie la santé d'un endpoint."""
+    async def check_health(
+        self,
+        endpoint_id: str,
+        engine: Optional["WebhookDeliveryEngine"] = None
+    ) -> HealthCheck:
+        """
+        Vérifie la santé d'un endpoint (requête HEAD de WebhookDeliveryEngine.probe).
+
+        Sans engine, un moteur temporaire est utilisé puis fermé.
+        """
+        from .delivery import WebhookDeliveryEngine
+
         endpoint = self.get_endpoint(endpoint_id)
         if not endpoint:
             raise ValueError(f"Endpoint {endpoint_id} non trouvé")
 
-        # Simuler un health check
-        import random
-        start_time = datetime.now()
+        if engine is not None:
+            status_code, response_time_ms, error = await engine.probe(endpoint)
+        else:
+            async with WebhookDeliveryEngine(self.delivery_queue(), workers=1) as engine:
+                status_code, response_time_ms, error = await engine.probe(endpoint)
 
         health = HealthCheck(
             id=str(uuid4()),
             endpoint_id=endpoint_id,
+            is_healthy=error is None,
+            status_code=status_code,
+            response_time_ms=response_time_ms,
+            error_message=error,
         )
 
-        # 90% de succès en simulation
-        if random.random() < 0.90:
-            health.is_healthy = True
-            health.status_code = 200
-        else:
-            health.is_healthy = False
-            health.status_code = 503
-            health.error_message = "Service Unavailable"
-
-        health.response_time_ms = int((datetime.now() - start_time).total_seconds() * 1000) + random.randint(10, 200)
-        health.checked_at = datetime.now()
-
         # Stocker
         if endpoint_id not in self._health_checks:
             self._health_checks[endpoint_id] = []
@@ -771,38 +769,49 @@ class WebhookService:
         success: Optional[bool] = None,
         limit: int = 100
     ) -> List[WebhookLog]:
-        """Récupère les logs."""
-        logs = [l for l in self._logs if l.tenant_id == self.tenant_id]
-
-        if endpoint_id:
-            logs = [l for l in logs if l.endpoint_id == endpoint_id]
-        if event:
-            logs = [l for l in logs if l.event == event]
-        if success is not None:
-            logs = [l for l in logs if l.success == success]
+        """Récupère les logs (livraisons terminées)."""
+        if success is None:
+            statuses = [DeliveryStatus.DELIVERED, DeliveryStatus.FAILED]
+        else:
+            statuses = [DeliveryStatus.DELIVERED if success else DeliveryStatus.FAILED]
 
-        return sorted(logs, key=lambda x: x.created_at, reverse=True)[:limit]
+        attempts = self._store.list_attempts(
+            statuses, endpoint_id=endpoint_id, event=event, limit=limit
+        )
+        logs = [
+            WebhookLog(
+                id=a.id,
+                tenant_id=a.tenant_id,
+                endpoint_id=a.endpoint_id,
+                event=a.event,
+                success=(a.status == DeliveryStatus.DELIVERED),
+                attempts=a.attempt_number,
+                final_status_code=a.response_status_code,
+                created_at=a.scheduled_at,
+                delivered_at=a.completed_at if a.status == DeliveryStatus.DELIVERED else None,
+                total_duration_ms=a.response_time_ms,
+            )
+            for a in attempts
+            if a.tenant_id == self.tenant_id
+        ]
+        return sorted(logs, key=lambda x: x.created_at, reverse=True)
 
     def get_delivery_attempts(
         self,
         payload_id: str
     ) -> List[DeliveryAttempt]:
-        """Récupère les tentatives de livraison pour un payload."""
+        """Récupère les livraisons d'un payload."""
         attempts = [
-            a for a in self._delivery_attempts.values()
-            if a.tenant_id == self.tenant_id and a.payload_id == payload_id
+            a for a in self._store.list_attempts(list(DeliveryStatus), payload_id=payload_id)
+            if a.tenant_id == self.tenant_id
         ]
         return sorted(attempts, key=lambda x: x.attempt_number)
 
     def get_pending_retries(self) -> List[DeliveryAttempt]:
         """Récupère les livraisons en attente de retry."""
-        now = datetime.now()
         return [
-            a for a in self._delivery_attempts.values()
-            if (a.tenant_id == self.tenant_id and
-                a.status == DeliveryStatus.RETRYING and
-                a.next_retry_at and
-                a.next_retry_at <= now)
+            a for a in self._store.list_attempts([DeliveryStatus.RETRYING], due_before=datetime.now())
+            if a.tenant_id == self.tenant_id
         ]
 
     def get_statistics(
@@ -829,6 +838,7 @@ class WebhookService:
             "failed_deliveries": failed,
             "success_rate": (successful / total_deliveries * 100) if total_deliveries > 0 else 100.0,
             "pending_retries": len(self.get_pending_retries()),
+            "queued_deliveries": self._store.count_due(),
         }
 
 
@@ -836,6 +846,6 @@ class WebhookService:
 # FACTORY
 # ============================================================
 
-def create_webhook_service(tenant_id: str) -> WebhookService:
+def create_webhook_service(tenant_id: str, db: Optional[Session] = None) -> WebhookService:
     """Crée une instance du service Webhook."""
-    return WebhookService(tenant_id=tenant_id)
+    return WebhookService(tenant_id=tenant_id, db=db)
@@ -0,0 +1,590 @@
+"""
+Stockage Webhooks - GAP-053
+
+Deux implémentations de WebhookStore, utilisées par WebhookService:
+- MemoryWebhookStore: dictionnaires en mémoire (tests, usage sans base)
+- SQLWebhookStore: tables webhook_endpoints / webhook_deliveries
+
+Le moteur de livraison (delivery.py) consomme la file via l'interface
+DeliveryQueue, indépendante du tenant: MemoryWebhookStore l'implémente
+directement, SQLDeliveryQueue ouvre une session courte par opération
+(réservation FOR UPDATE SKIP LOCKED, écriture des résultats par lot).
+"""
+from __future__ import annotations
+
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Query, Session
+
+from .models import WebhookDeliveryRecord, WebhookEndpointRecord
+
+if TYPE_CHECKING:
+    from .service import DeliveryAttempt, DeliveryStatus, WebhookEndpoint, WebhookEvent
+
+# Échecs consécutifs au-delà desquels un endpoint passe en FAILING
+FAILING_THRESHOLD = 5
+
+# Statuts à livrer
+_DUE_STATUSES = ("pending", "retrying")
+
+
+@dataclass
+class EndpointOutcome:
+    """Bilan des livraisons d'un lot pour un endpoint (statistiques à appliquer)."""
+    successes: int = 0
+    failures: int = 0
+    # Échecs après le dernier succès du lot (tout le lot s'il n'y a aucun succès)
+    trailing_failures: int = 0
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+
+    @classmethod
+    def from_attempts(cls, attempts: Iterable["DeliveryAttempt"]) -> "EndpointOutcome":
+        from .service import DeliveryStatus
+
+        outcome = cls()
+        for attempt in attempts:
+            if attempt.status == DeliveryStatus.DELIVERED:
+                outcome.successes += 1
+                outcome.trailing_failures = 0
+                outcome.last_success_at = attempt.completed_at
+            else:
+                outcome.failures += 1
+                outcome.trailing_failures += 1
+                outcome.last_failure_at = attempt.completed_at
+        return outcome
+
+    def apply(self, endpoint: "WebhookEndpoint") -> None:
+        """Applique le bilan à un WebhookEndpoint en mémoire."""
+        from .service import WebhookStatus
+
+        endpoint.total_deliveries += self.successes + self.failures
+        endpoint.successful_deliveries += self.successes
+        endpoint.failed_deliveries += self.failures
+        endpoint.last_delivery_at = self.last_success_at or self.last_failure_at
+        if self.last_success_at:
+            endpoint.last_success_at = self.last_success_at
+            endpoint.consecutive_failures = self.trailing_failures
+        else:
+            endpoint.consecutive_failures += self.failures
+        if self.last_failure_at:
+            endpoint.last_failure_at = self.last_failure_at
+        if endpoint.consecutive_failures >= FAILING_THRESHOLD and endpoint.status == WebhookStatus.ACTIVE:
+            endpoint.status = WebhookStatus.FAILING
+
+
+# ============================================================
+# INTERFACES
+# ============================================================
+
+class DeliveryQueue(ABC):
+    """File de livraison consommée par WebhookDeliveryEngine (tous tenants)."""
+
+    @abstractmethod
+    def claim_due(self, limit: int, lease_seconds: int) -> List["DeliveryAttempt"]:
+        """Réserve jusqu'à limit livraisons échues pour lease_seconds."""
+
+    @abstractmethod
+    def claim(self, attempt_ids: Iterable[str], lease_seconds: int) -> List["DeliveryAttempt"]:
+        """
+        Réserve des livraisons données, même non échues (livraison manuelle).
+
+        Seules les livraisons encore à livrer et non réservées par un autre
+        worker sont retournées.
+        """
+
+    @abstractmethod
+    def get_endpoints(self, endpoint_ids: Iterable[str]) -> Dict[str, "WebhookEndpoint"]:
+        """Endpoints par id."""
+
+    @abstractmethod
+    def record_results(self, endpoint_id: str, attempts: List["DeliveryAttempt"]) -> None:
+        """Enregistre l'issue des livraisons et met à jour les statistiques de l'endpoint."""
+
+    @abstractmethod
+    def postpone(self, attempt_ids: List[str], until: datetime) -> None:
+        """Libère des livraisons sans compter de tentative (circuit ouvert, endpoint en pause)."""
+
+
+class WebhookStore(ABC):
+    """Stockage des endpoints et de la file de livraison d'un tenant."""
+
+    @abstractmethod
+    def save_endpoint(self, endpoint: "WebhookEndpoint") -> None: ...
+
+    @abstractmethod
+    def get_endpoint(self, endpoint_id: str) -> Optional["WebhookEndpoint"]: ...
+
+    @abstractmethod
+    def list_endpoints(self) -> List["WebhookEndpoint"]: ...
+
+    @abstractmethod
+    def delete_endpoint(self, endpoint_id: str) -> None: ...
+
+    @abstractmethod
+    def enqueue(self, attempts: List["DeliveryAttempt"]) -> None:
+        """Ajoute des livraisons à la file."""
+
+    @abstractmethod
+    def get_attempt(self, attempt_id: str) -> Optional["DeliveryAttempt"]: ...
+
+    @abstractmethod
+    def list_attempts(
+        self,
+        statuses: Iterable["DeliveryStatus"],
+        endpoint_id: Optional[str] = None,
+        payload_id: Optional[str] = None,
+        event: Optional["WebhookEvent"] = None,
+        due_before: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List["DeliveryAttempt"]:
+        """Livraisons filtrées, les plus récentes d'abord."""
+
+    @abstractmethod
+    def reschedule(self, attempt_id: str, at: datetime) -> None:
+        """Remet une livraison dans la file (status pending) à la date donnée, sans lever sa réservation."""
+
+    @abstractmethod
+    def count_due(self) -> int:
+        """Nombre de livraisons à livrer."""
+
+    def commit(self) -> None:
+        pass
+
+
+# ============================================================
+# MÉMOIRE
+# ============================================================
+
+class MemoryWebhookStore(WebhookStore, DeliveryQueue):
+    """Stockage en mémoire; sert aussi de file au moteur de livraison."""
+
+    def __init__(self):
+        self._endpoints: Dict[str, "WebhookEndpoint"] = {}
+        self._attempts: Dict[str, "DeliveryAttempt"] = {}
+        self._lock = threading.Lock()
+
+    # ---------------- Endpoints ----------------
+
+    def save_endpoint(self, endpoint: "WebhookEndpoint") -> None:
+        self._endpoints[endpoint.id] = endpoint
+
+    def get_endpoint(self, endpoint_id: str) -> Optional["WebhookEndpoint"]:
+        return self._endpoints.get(endpoint_id)
+
+    def list_endpoints(self) -> List["WebhookEndpoint"]:
+        return list(self._endpoints.values())
+
+    def delete_endpoint(self, endpoint_id: str) -> None:
+        from .service import DeliveryStatus
+
+        self._endpoints.pop(endpoint_id, None)
+        # Les livraisons en attente n'ont plus de destination
+        with self._lock:
+            for attempt in self._attempts.values():
+                if attempt.endpoint_id == endpoint_id and attempt.status.value in _DUE_STATUSES:
+                    attempt.status = DeliveryStatus.FAILED
+                    attempt.error_message = "Endpoint supprimé"
+
+    def get_endpoints(self, endpoint_ids: Iterable[str]) -> Dict[str, "WebhookEndpoint"]:
+        return {i: self._endpoints[i] for i in endpoint_ids if i in self._endpoints}
+
+    # ---------------- File ----------------
+
+    def enqueue(self, attempts: List["DeliveryAttempt"]) -> None:
+        with self._lock:
+            for attempt in attempts:
+                self._attempts[attempt.id] = attempt
+
+    def get_attempt(self, attempt_id: str) -> Optional["DeliveryAttempt"]:
+        return self._attempts.get(attempt_id)
+
+    def list_attempts(self, statuses, endpoint_id=None, payload_id=None, event=None,
+                      due_before=None, limit=None) -> List["DeliveryAttempt"]:
+        statuses = set(statuses)
+        attempts = [
+            a for a in self._attempts.values()
+            if a.status in statuses
+            and (endpoint_id is None or a.endpoint_id == endpoint_id)
+            and (payload_id is None or a.payload_id == payload_id)
+            and (event is None or a.event == event)
+            and (due_before is None or _due_at(a) <= due_before)
+        ]
+        attempts.sort(key=lambda a: a.completed_at or a.scheduled_at, reverse=True)
+        return attempts[:limit] if limit else attempts
+
+    def reschedule(self, attempt_id: str, at: datetime) -> None:
+        from .service import DeliveryStatus
+
+        with self._lock:
+            attempt = self._attempts[attempt_id]
+            attempt.status = DeliveryStatus.PENDING
+            attempt.next_retry_at = at
+
+    def count_due(self) -> int:
+        now = datetime.now()
+        return sum(1 for a in self._attempts.values() if _is_due(a, now))
+
+    def claim_due(self, limit: int, lease_seconds: int) -> List["DeliveryAttempt"]:
+        now = datetime.now()
+        with self._lock:
+            due = sorted((a for a in self._attempts.values() if _is_due(a, now)), key=_due_at)[:limit]
+            for attempt in due:
+                attempt.locked_until = now + timedelta(seconds=lease_seconds)
+        return due
+
+    def claim(self, attempt_ids: Iterable[str], lease_seconds: int) -> List["DeliveryAttempt"]:
+        now = datetime.now()
+        with self._lock:
+            claimed = [
+                a for a in (self._attempts.get(i) for i in attempt_ids)
+                if a is not None and _is_claimable(a, now)
+            ]
+            for attempt in claimed:
+                attempt.locked_until = now + timedelta(seconds=lease_seconds)
+        return claimed
+
+    def record_results(self, endpoint_id: str, attempts: List["DeliveryAttempt"]) -> None:
+        with self._lock:
+            for attempt in attempts:
+                attempt.locked_until = None
+            endpoint = self._endpoints.get(endpoint_id)
+            if endpoint:
+                EndpointOutcome.from_attempts(attempts).apply(endpoint)
+
+    def postpone(self, attempt_ids: List[str], until: datetime) -> None:
+        with self._lock:
+            for attempt_id in attempt_ids:
+                attempt = self._attempts[attempt_id]
+                attempt.next_retry_at = until
+                attempt.locked_until = None
+
+
+def _due_at(attempt: "DeliveryAttempt") -> datetime:
+    return attempt.next_retry_at or attempt.scheduled_at
+
+
+def _is_claimable(attempt: "DeliveryAttempt", now: datetime) -> bool:
+    return (
+        attempt.status.value in _DUE_STATUSES
+        and (attempt.locked_until is None or attempt.locked_until <= now)
+    )
+
+
+def _is_due(attempt: "DeliveryAttempt", now: datetime) -> bool:
+    return _is_claimable(attempt, now) and _due_at(attempt) <= now
+
+
+# ============================================================
+# BASE DE DONNÉES
+# ============================================================
+
+def _to_endpoint(record: WebhookEndpointRecord) -> "WebhookEndpoint":
+    from .service import SignatureVersion, WebhookEndpoint, WebhookEvent, WebhookStatus
+
+    return WebhookEndpoint(
+        id=str(record.id),
+        tenant_id=record.tenant_id,
+        name=record.name,
+        url=record.url,
+        events={WebhookEvent(e) for e in record.events or []},
+        secret=record.secret,
+        signature_version=SignatureVersion(record.signature_version),
+        verify_ssl=record.verify_ssl,
+        custom_headers=dict(record.custom_headers or {}),
+        status=WebhookStatus(record.status),
+        max_retries=record.max_retries,
+        retry_delay_seconds=record.retry_delay_seconds,
+        timeout_seconds=record.timeout_seconds,
+        max_concurrency=record.max_concurrency,
+        batch_max_size=record.batch_max_size,
+        total_deliveries=record.total_deliveries,
+        successful_deliveries=record.successful_deliveries,
+        failed_deliveries=record.failed_deliveries,
+        last_delivery_at=record.last_delivery_at,
+        last_success_at=record.last_success_at,
+        last_failure_at=record.last_failure_at,
+        consecutive_failures=record.consecutive_failures,
+        description=record.description,
+        created_at=record.created_at,
+        updated_at=record.updated_at,
+    )
+
+
+def _to_attempt(record: WebhookDeliveryRecord) -> "DeliveryAttempt":
+    from .service import DeliveryAttempt, DeliveryStatus, WebhookEvent
+
+    return DeliveryAttempt(
+        id=str(record.id),
+        tenant_id=record.tenant_id,
+        endpoint_id=str(record.endpoint_id),
+        payload_id=record.payload_id,
+        event=WebhookEvent(record.event),
+        status=DeliveryStatus(record.status),
+        attempt_number=record.attempt_number,
+        request_body=record.body,
+        response_status_code=record.response_status_code,
+        response_time_ms=record.response_time_ms,
+        error_message=record.error_message,
+        scheduled_at=record.created_at,
+        completed_at=record.completed_at,
+        next_retry_at=record.next_attempt_at,
+        locked_until=record.locked_until,
+    )
+
+
+def _attempt_values(attempt: "DeliveryAttempt") -> dict:
+    """Colonnes de résultat d'une livraison (écriture groupée par clé primaire)."""
+    return {
+        "id": uuid.UUID(attempt.id),
+        "status": attempt.status.value,
+        "attempt_number": attempt.attempt_number,
+        "next_attempt_at": _due_at(attempt),
+        "locked_until": None,
+        "response_status_code": attempt.response_status_code,
+        "response_time_ms": attempt.response_time_ms,
+        "error_message": attempt.error_message,
+        "completed_at": attempt.completed_at,
+    }
+
+
+def _uuid(value: str) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class SQLWebhookStore(WebhookStore):
+    """Endpoints et file de livraison persistants, filtrés par tenant."""
+
+    def __init__(self, db: Session, tenant_id: str):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # ---------------- Endpoints ----------------
+
+    def _endpoint_query(self):
+        return self.db.query(WebhookEndpointRecord).filter(WebhookEndpointRecord.tenant_id == self.tenant_id)
+
+    def save_endpoint(self, endpoint: "WebhookEndpoint") -> None:
+        record = self._endpoint_query().filter(WebhookEndpointRecord.id == uuid.UUID(endpoint.id)).first()
+        if record is None:
+            record = WebhookEndpointRecord(
+                id=uuid.UUID(endpoint.id), tenant_id=self.tenant_id, created_at=endpoint.created_at
+            )
+            self.db.add(record)
+        record.name = endpoint.name
+        record.url = endpoint.url
+        record.events = sorted(e.value for e in endpoint.events)
+        record.secret = endpoint.secret
+        record.signature_version = endpoint.signature_version.value
+        record.verify_ssl = endpoint.verify_ssl
+        record.custom_headers = endpoint.custom_headers
+        record.status = endpoint.status.value
+        record.max_retries = endpoint.max_retries
+        record.retry_delay_seconds = endpoint.retry_delay_seconds
+        record.timeout_seconds = endpoint.timeout_seconds
+        record.max_concurrency = endpoint.max_concurrency
+        record.batch_max_size = endpoint.batch_max_size
+        record.consecutive_failures = endpoint.consecutive_failures
+        record.description = endpoint.description
+        record.updated_at = endpoint.updated_at
+        self.db.flush()
+
+    def get_endpoint(self, endpoint_id: str) -> Optional["WebhookEndpoint"]:
+        key = _uuid(endpoint_id)
+        if key is None:
+            return None
+        record = self._endpoint_query().filter(WebhookEndpointRecord.id == key).first()
+        return _to_endpoint(record) if record else None
+
+    def list_endpoints(self) -> List["WebhookEndpoint"]:
+        return [_to_endpoint(r) for r in self._endpoint_query().all()]
+
+    def delete_endpoint(self, endpoint_id: str) -> None:
+        key = uuid.UUID(endpoint_id)
+        self._endpoint_query().filter(WebhookEndpointRecord.id == key).delete(synchronize_session=False)
+        # Les livraisons en attente n'ont plus de destination
+        self.db.query(WebhookDeliveryRecord).filter(
+            WebhookDeliveryRecord.endpoint_id == key,
+            WebhookDeliveryRecord.status.in_(_DUE_STATUSES),
+        ).update({"status": "failed", "error_message": "Endpoint supprimé"}, synchronize_session=False)
+
+    # ---------------- File ----------------
+
+    def _delivery_query(self):
+        return self.db.query(WebhookDeliveryRecord).filter(WebhookDeliveryRecord.tenant_id == self.tenant_id)
+
+    def enqueue(self, attempts: List["DeliveryAttempt"]) -> None:
+        self.db.add_all([
+            WebhookDeliveryRecord(
+                id=uuid.UUID(a.id),
+                tenant_id=a.tenant_id,
+                endpoint_id=uuid.UUID(a.endpoint_id),
+                payload_id=a.payload_id,
+                event=a.event.value,
+                status=a.status.value,
+                attempt_number=a.attempt_number,
+                body=a.request_body,
+                next_attempt_at=_due_at(a),
+                created_at=a.scheduled_at,
+            )
+            for a in attempts
+        ])
+        self.db.flush()
+
+    def get_attempt(self, attempt_id: str) -> Optional["DeliveryAttempt"]:
+        key = _uuid(attempt_id)
+        if key is None:
+            return None
+        record = self._delivery_query().filter(WebhookDeliveryRecord.id == key).first()
+        return _to_attempt(record) if record else None
+
+    def list_attempts(self, statuses, endpoint_id=None, payload_id=None, event=None,
+                      due_before=None, limit=None) -> List["DeliveryAttempt"]:
+        query = self._delivery_query().filter(WebhookDeliveryRecord.status.in_([s.value for s in statuses]))
+        if endpoint_id:
+            key = _uuid(endpoint_id)
+            if key is None:
+                return []
+            query = query.filter(WebhookDeliveryRecord.endpoint_id == key)
+        if payload_id:
+            query = query.filter(WebhookDeliveryRecord.payload_id == payload_id)
+        if event:
+            query = query.filter(WebhookDeliveryRecord.event == event.value)
+        if due_before:
+            query = query.filter(WebhookDeliveryRecord.next_attempt_at <= due_before)
+        query = query.order_by(WebhookDeliveryRecord.created_at.desc())
+        if limit:
+            query = query.limit(limit)
+        return [_to_attempt(r) for r in query.all()]
+
+    def reschedule(self, attempt_id: str, at: datetime) -> None:
+        self._delivery_query().filter(WebhookDeliveryRecord.id == uuid.UUID(attempt_id)).update(
+            {"status": "pending", "next_attempt_at": at},
+            synchronize_session=False,
+        )
+
+    def count_due(self) -> int:
+        now = datetime.now()
+        return self._delivery_query().filter(*_due_filter(now)).count()
+
+    def commit(self) -> None:
+        self.db.commit()
+
+
+def _claimable_filter(now: datetime) -> tuple:
+    return (
+        WebhookDeliveryRecord.status.in_(_DUE_STATUSES),
+        or_(WebhookDeliveryRecord.locked_until.is_(None), WebhookDeliveryRecord.locked_until <= now),
+    )
+
+
+def _due_filter(now: datetime) -> tuple:
+    return (*_claimable_filter(now), WebhookDeliveryRecord.next_attempt_at <= now)
+
+
+class SQLDeliveryQueue(DeliveryQueue):
+    """
+    File de livraison en base, partagée entre workers et tenants.
+
+    Chaque opération ouvre sa propre session courte (session_factory) et
+    la valide aussitôt: aucun verrou n'est gardé pendant les envois HTTP.
+    Une livraison réservée dont le worker a disparu redevient disponible
+    à l'expiration de locked_until.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self.session_factory = session_factory
+
+    def claim_due(self, limit: int, lease_seconds: int) -> List["DeliveryAttempt"]:
+        now = datetime.now()
+        query = (
+            lambda db: db.query(WebhookDeliveryRecord)
+            .filter(*_due_filter(now))
+            .order_by(WebhookDeliveryRecord.next_attempt_at)
+            .limit(limit)
+        )
+        return self._lock(query, now, lease_seconds)
+
+    def claim(self, attempt_ids: Iterable[str], lease_seconds: int) -> List["DeliveryAttempt"]:
+        keys = [k for k in (_uuid(i) for i in set(attempt_ids)) if k is not None]
+        if not keys:
+            return []
+        now = datetime.now()
+        query = (
+            lambda db: db.query(WebhookDeliveryRecord)
+            .filter(WebhookDeliveryRecord.id.in_(keys), *_claimable_filter(now))
+        )
+        return self._lock(query, now, lease_seconds)
+
+    def _lock(self, query: Callable[[Session], Query], now: datetime, lease_seconds: int) -> List["DeliveryAttempt"]:
+        """Réserve les lignes de query (FOR UPDATE SKIP LOCKED) jusqu'à now + lease_seconds."""
+        with self.session_factory() as db:
+            records = query(db).with_for_update(skip_locked=True).all()
+            locked_until = now + timedelta(seconds=lease_seconds)
+            for record in records:
+                record.locked_until = locked_until
+            attempts = [_to_attempt(r) for r in records]
+            db.commit()
+        return attempts
+
+    def get_endpoints(self, endpoint_ids: Iterable[str]) -> Dict[str, "WebhookEndpoint"]:
+        keys = [k for k in (_uuid(i) for i in set(endpoint_ids)) if k is not None]
+        if not keys:
+            return {}
+        with self.session_factory() as db:
+            records = db.query(WebhookEndpointRecord).filter(WebhookEndpointRecord.id.in_(keys)).all()
+            return {str(r.id): _to_endpoint(r) for r in records}
+
+    def record_results(self, endpoint_id: str, attempts: List["DeliveryAttempt"]) -> None:
+        outcome = EndpointOutcome.from_attempts(attempts)
+        endpoint = WebhookEndpointRecord
+        with self.session_factory() as db:
+            db.execute(update(WebhookDeliveryRecord), [_attempt_values(a) for a in attempts])
+
+            # Statistiques: incréments atomiques, sans relire l'endpoint
+            values = {
+                "total_deliveries": endpoint.total_deliveries + outcome.successes + outcome.failures,
+                "successful_deliveries": endpoint.successful_deliveries + outcome.successes,
+                "failed_deliveries": endpoint.failed_deliveries + outcome.failures,
+                "last_delivery_at": outcome.last_success_at or outcome.last_failure_at,
+            }
+            if outcome.last_success_at:
+                values["last_success_at"] = outcome.last_success_at
+                values["consecutive_failures"] = outcome.trailing_failures
+            else:
+                values["consecutive_failures"] = endpoint.consecutive_failures + outcome.failures
+            if outcome.last_failure_at:
+                values["last_failure_at"] = outcome.last_failure_at
+            key = uuid.UUID(endpoint_id)
+            db.execute(update(endpoint).where(endpoint.id == key).values(**values))
+            if outcome.failures:
+                db.execute(
+                    update(endpoint)
+                    .where(and_(
+                        endpoint.id == key,
+                        endpoint.status == "active",
+                        endpoint.consecutive_failures >= FAILING_THRESHOLD,
+                    ))
+                    .values(status="failing")
+                )
+            db.commit()
+
+    def postpone(self, attempt_ids: List[str], until: datetime) -> None:
+        if not attempt_ids:
+            return
+        with self.session_factory() as db:
+            db.execute(
+                update(WebhookDeliveryRecord)
+                .where(WebhookDeliveryRecord.id.in_([uuid.UUID(i) for i in attempt_ids]))
+                .values(next_attempt_at=until, locked_until=None)
+            )
+            db.commit()
@@ -8,6 +8,6 @@ Conformité : AZA-NF-003, Architecture cible
 Règle : "Aucune logique de gestion d'erreur dans le code métier"
 """
 
-from .engine import OrchestrationEngine, execute_dag, ExecutionResult
+from .engine import OrchestrationEngine, execute_dag, ExecutionResult, DAGValidationError
 
-__all__ = ["OrchestrationEngine", "execute_dag", "ExecutionResult"]
+__all__ = ["OrchestrationEngine", "execute_dag", "ExecutionResult", "DAGValidationError"]
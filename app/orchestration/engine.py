@@ -4,16 +4,23 @@ Moteur d'orchestration DAG AZALSCORE
 Interprète les workflows déclaratifs (DAG JSON) et orchestre l'exécution
 des sous-programmes avec gestion centralisée des erreurs.
 
+Les dépendances sont déduites des références {{step_id.field}} (inputs et
+condition). Les steps indépendants s'exécutent en parallèle sur un pool de
+threads : la durée d'un DAG tend vers celle de son chemin critique.
+
 Conformité : AZA-NF-003, Charte Développeur
 Principe : "Le code métier est pur, le moteur gère tout le reste"
 """
 from __future__ import annotations
 
 
+import contextvars
 import json
 import re
 import time
-from typing import Dict, Any, List, Optional, Set
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
@@ -23,6 +30,12 @@ from app.registry.loader import load_program, Program, RegistryError
 
 logger = logging.getLogger(__name__)
 
+VARIABLE_PATTERN = re.compile(r'\{\{([^}]+)\}\}')
+
+
+class DAGValidationError(ValueError):
+    """DAG invalide (id de step manquant ou dupliqué, cycle de dépendances)"""
+
 
 class StepStatus(Enum):
     """Statut d'un step dans l'exécution"""
@@ -67,6 +80,8 @@ class ExecutionResult:
     completed_at: Optional[datetime] = None
     duration_ms: Optional[int] = None
     error: Optional[str] = None
+    critical_path: List[str] = field(default_factory=list)
+    critical_path_ms: Optional[int] = None
 
 
 class OrchestrationEngine:
@@ -75,14 +90,19 @@ class OrchestrationEngine:
 
     Responsabilités :
     1. Parser le DAG JSON
-    2. Résoudre les dépendances entre steps
-    3. Exécuter les steps dans l'ordre correct
+    2. Résoudre les dépendances entre steps (tri topologique, cycles)
+    3. Exécuter chaque step dès que ses dépendances sont terminées,
+       les steps indépendants en parallèle
     4. Gérer retry/timeout/fallback de manière déclarative
-    5. Tracer toutes les exécutions
+    5. Tracer toutes les exécutions (dont le chemin critique)
     6. Gérer les erreurs de manière centralisée
     """
 
-    def __init__(self):
+    MAX_PARALLEL_STEPS = 8
+    MAX_TRACE_ENTRIES = 100
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or self.MAX_PARALLEL_STEPS
         self.execution_trace: List[Dict[str, Any]] = []
 
     def execute_dag(
@@ -126,39 +146,25 @@ class OrchestrationEngine:
             started_at=started_at
         )
 
-        # Résolution du DAG (ordre d'exécution)
-        execution_order = self._resolve_dag(steps_config)
+        # Résolution du DAG (dépendances et ordre d'exécution)
+        try:
+            dependencies = self._resolve_dependencies(steps_config)
+            execution_order = self._resolve_dag(steps_config)
+        except DAGValidationError as e:
+            logger.error("Orchestration: Invalid DAG %s: %s", module_id, e)
+            dependencies, execution_order = {}, []
+            result.status = ExecutionStatus.FAILED
+            result.error = f"Invalid DAG: {e}"
 
         logger.info("Orchestration: Executing DAG %s with %s steps", module_id, len(steps_config))
 
-        # Exécution des steps dans l'ordre
-        for step_config in execution_order:
-            step_id = step_config["id"]
-
-            # Vérification de la condition (si présente)
-            if "condition" in step_config:
-                if not self._evaluate_condition(step_config["condition"], result.context):
-                    logger.info("Step %s skipped (condition false)", step_id)
-                    result.steps[step_id] = StepResult(
-                        step_id=step_id,
-                        status=StepStatus.SKIPPED
-                    )
-                    continue
-
-            # Exécution du step avec retry/timeout/fallback
-            step_result = self._execute_step(step_config, result.context)
-            result.steps[step_id] = step_result
-
-            # Mise à jour du contexte avec les résultats
-            if step_result.status == StepStatus.COMPLETED and step_result.output:
-                result.context[step_id] = step_result.output
+        # Exécution des steps (parallèle entre steps indépendants)
+        if execution_order:
+            self._run_steps(execution_order, dependencies, result)
 
-            # Gestion de l'échec
-            if step_result.status == StepStatus.FAILED:
-                logger.error("Step %s failed: %s", step_id, step_result.error)
-                result.status = ExecutionStatus.FAILED
-                result.error = f"Step {step_id} failed: {step_result.error}"
-                break  # Arrêt de l'exécution
+        result.critical_path, result.critical_path_ms = self._critical_path(
+            execution_order, dependencies, result.steps
+        )
 
         # Finalisation
         completed_at = datetime.utcnow()
@@ -170,31 +176,237 @@ class OrchestrationEngine:
 
         logger.info(
             "Orchestration: DAG %s completed in %sms "
-            "with status %s",
-            module_id, result.duration_ms, result.status.value
+            "with status %s (critical path: %s, %sms)",
+            module_id, result.duration_ms, result.status.value,
+            " -> ".join(result.critical_path), result.critical_path_ms
         )
+        self._trace(result)
 
         return result
 
+    def _run_steps(
+        self,
+        execution_order: List[Dict[str, Any]],
+        dependencies: Dict[str, Set[str]],
+        result: ExecutionResult
+    ) -> None:
+        """
+        Exécute chaque step dès que ses dépendances sont terminées
+
+        Les conditions sont évaluées et les steps soumis depuis le thread
+        appelant, dans l'ordre topologique ; seuls les sous-programmes
+        tournent dans le pool. Chaque step reçoit une copie du contexte, qui
+        contient déjà les sorties de toutes ses dépendances.
+
+        Au premier échec, plus aucun step n'est lancé ; les steps déjà en
+        cours sont attendus et leurs résultats conservés.
+
+        Args:
+            execution_order: Steps en ordre topologique
+            dependencies: Dépendances de chaque step
+            result: Résultat en cours (steps, contexte, statut)
+        """
+        steps_by_id = {step["id"]: step for step in execution_order}
+        position = {step["id"]: index for index, step in enumerate(execution_order)}
+        waiting_on = {step_id: set(deps) for step_id, deps in dependencies.items()}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for step_id, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(step_id)
+
+        ready = [step["id"] for step in execution_order if not waiting_on[step["id"]]]
+        running: Dict[Future, str] = {}
+
+        def release(step_id: str) -> None:
+            for dependent in dependents[step_id]:
+                waiting_on[dependent].discard(step_id)
+                if not waiting_on[dependent]:
+                    ready.append(dependent)
+            ready.sort(key=position.__getitem__)
+
+        workers = min(self.max_workers, len(execution_order))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dag-step") as executor:
+            while ready or running:
+                while ready and result.status == ExecutionStatus.RUNNING:
+                    step_id = ready.pop(0)
+                    step_config = steps_by_id[step_id]
+
+                    # Vérification de la condition (si présente)
+                    if "condition" in step_config:
+                        if not self._evaluate_condition(step_config["condition"], result.context):
+                            logger.info("Step %s skipped (condition false)", step_id)
+                            result.steps[step_id] = StepResult(
+                                step_id=step_id,
+                                status=StepStatus.SKIPPED
+                            )
+                            release(step_id)
+                            continue
+
+                    # Exécution du step avec retry/timeout/fallback, dans une copie du
+                    # contexte appelant (correlation_id, tenant_id pour les logs)
+                    future = executor.submit(
+                        contextvars.copy_context().run,
+                        self._execute_step, step_config, dict(result.context)
+                    )
+                    running[future] = step_id
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in sorted(done, key=lambda f: position[running[f]]):
+                    step_id = running.pop(future)
+                    step_result = future.result()
+                    result.steps[step_id] = step_result
+
+                    # Mise à jour du contexte avec les résultats
+                    if step_result.status == StepStatus.COMPLETED and step_result.output:
+                        result.context[step_id] = step_result.output
+
+                    # Gestion de l'échec : arrêt des lancements
+                    if step_result.status == StepStatus.FAILED:
+                        logger.error("Step %s failed: %s", step_id, step_result.error)
+                        if result.status == ExecutionStatus.RUNNING:
+                            result.status = ExecutionStatus.FAILED
+                            result.error = f"Step {step_id} failed: {step_result.error}"
+                    else:
+                        release(step_id)
+
+    def _critical_path(
+        self,
+        execution_order: List[Dict[str, Any]],
+        dependencies: Dict[str, Set[str]],
+        steps: Dict[str, StepResult]
+    ) -> Tuple[List[str], Optional[int]]:
+        """
+        Chemin critique : chaîne de dépendances de plus longue durée
+        parmi les steps exécutés
+
+        Returns:
+            (ids des steps du chemin, durée cumulée en ms)
+        """
+        longest: Dict[str, Tuple[float, List[str]]] = {}
+        for step in execution_order:
+            step_id = step["id"]
+            step_result = steps.get(step_id)
+            if step_result is None:
+                continue
+            duration = 0.0
+            if step_result.started_at and step_result.completed_at:
+                duration = (step_result.completed_at - step_result.started_at).total_seconds()
+            before, path = max(
+                (longest[dep] for dep in dependencies.get(step_id, ()) if dep in longest),
+                key=lambda item: item[0],
+                default=(0.0, [])
+            )
+            longest[step_id] = (before + duration, path + [step_id])
+
+        if not longest:
+            return [], None
+        total, path = max(longest.values(), key=lambda item: item[0])
+        return path, int(total * 1000)
+
+    def _trace(self, result: ExecutionResult) -> None:
+        """Ajoute l'exécution à la trace du moteur (MAX_TRACE_ENTRIES dernières)"""
+        self.execution_trace.append({
+            "module_id": result.module_id,
+            "status": result.status.value,
+            "started_at": result.started_at.isoformat() if result.started_at else None,
+            "duration_ms": result.duration_ms,
+            "critical_path": result.critical_path,
+            "critical_path_ms": result.critical_path_ms,
+            "steps": {
+                step_id: {"status": step.status.value, "duration_ms": step.duration_ms}
+                for step_id, step in result.steps.items()
+            },
+        })
+        del self.execution_trace[:-self.MAX_TRACE_ENTRIES]
+
     def _resolve_dag(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Résout le DAG pour déterminer l'ordre d'exécution
 
         Le DAG est implicite : l'ordre est déduit des dépendances
-        (références {{step_id.field}} dans les inputs)
+        (références {{step_id.field}} dans les inputs et la condition)
 
         Args:
             steps: Liste des steps du DAG
 
         Returns:
-            Liste des steps ordonnés pour l'exécution
+            Liste des steps en ordre topologique (l'ordre déclaré est
+            conservé entre steps indépendants)
+
+        Raises:
+            DAGValidationError: id manquant ou dupliqué, cycle de dépendances
+        """
+        dependencies = self._resolve_dependencies(steps)
+        position = {step["id"]: index for index, step in enumerate(steps)}
+        remaining = {step_id: set(deps) for step_id, deps in dependencies.items()}
+        ordered: List[Dict[str, Any]] = []
+
+        while remaining:
+            ready = sorted(
+                (step_id for step_id, deps in remaining.items() if not deps),
+                key=position.__getitem__
+            )
+            if not ready:
+                raise DAGValidationError(f"Dependency cycle: {self._find_cycle(remaining)}")
+            for step_id in ready:
+                ordered.append(steps[position[step_id]])
+                del remaining[step_id]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+        return ordered
+
+    def _resolve_dependencies(self, steps: List[Dict[str, Any]]) -> Dict[str, Set[str]]:
+        """
+        Dépendances de chaque step : steps référencés par {{step_id...}}
+        dans ses inputs ou sa condition ({{context...}} n'en est pas une)
 
-        Note:
-            Pour l'instant, on respecte l'ordre déclaré.
-            Une future version pourrait paralléliser les steps indépendants.
+        Raises:
+            DAGValidationError: id manquant ou dupliqué
         """
-        # NOTE: Phase 2 - Résolution topologique (détection cycles, parallélisation)
-        return steps
+        step_ids: Set[str] = set()
+        for step in steps:
+            step_id = step.get("id")
+            if not step_id:
+                raise DAGValidationError("Step without id")
+            if step_id in step_ids:
+                raise DAGValidationError(f"Duplicate step id: {step_id}")
+            step_ids.add(step_id)
+
+        dependencies: Dict[str, Set[str]] = {}
+        for step in steps:
+            references = self._references(step.get("inputs", {}))
+            references |= self._references(step.get("condition"))
+            dependencies[step["id"]] = references & step_ids
+        return dependencies
+
+    def _references(self, value: Any) -> Set[str]:
+        """Premiers segments des variables {{...}} d'une valeur (récursif)"""
+        if isinstance(value, str):
+            return {match.strip().split('.')[0] for match in VARIABLE_PATTERN.findall(value)}
+        if isinstance(value, dict):
+            values = value.values()
+        elif isinstance(value, list):
+            values = value
+        else:
+            return set()
+        references: Set[str] = set()
+        for item in values:
+            references |= self._references(item)
+        return references
+
+    @staticmethod
+    def _find_cycle(remaining: Dict[str, Set[str]]) -> str:
+        """Un cycle parmi les steps restants (ex: "a -> b -> a")"""
+        path: List[str] = []
+        step_id = next(iter(remaining))
+        while step_id not in path:
+            path.append(step_id)
+            step_id = min(remaining[step_id])
+        return " -> ".join(path[path.index(step_id):] + [step_id])
 
     def _evaluate_condition(self, condition: str, context: Dict[str, Any]) -> bool:
         """
@@ -6,6 +6,8 @@ Tests unitaires pour le moteur d'orchestration DAG.
 from __future__ import annotations
 
 import json
+import threading
+import time
 import pytest
 from datetime import datetime
 from unittest.mock import Mock, patch, MagicMock
@@ -461,6 +463,202 @@ class TestDAGExecution:
         assert result.steps["low_action"].status == StepStatus.SKIPPED
 
 
+def program(func):
+    """Sous-programme de test a partir d'une fonction inputs -> output."""
+    return Mock(execute=Mock(side_effect=func))
+
+
+class TestDAGScheduling:
+    """Tests de resolution des dependances et d'execution parallele."""
+
+    def test_dependencies_inferred_from_references(self, engine, conditional_dag):
+        """Test dependances deduites des inputs et des conditions."""
+        dependencies = engine._resolve_dependencies(conditional_dag["steps"])
+
+        assert dependencies == {
+            "check_value": set(),
+            "high_value_action": {"check_value"},
+            "low_value_action": {"check_value"},
+        }
+
+    @patch('app.orchestration.engine.load_program')
+    def test_topological_order(self, mock_load, engine):
+        """Test step consommateur declare avant son producteur."""
+        programs = {
+            "test.total@1.0.0": program(lambda inputs: {"total": int(inputs["value"]) * 2}),
+            "test.value@1.0.0": program(lambda inputs: {"value": 21}),
+        }
+        mock_load.side_effect = programs.__getitem__
+        dag = {
+            "module_id": "test.order",
+            "steps": [
+                {"id": "total", "use": "test.total@1.0.0", "inputs": {"value": "{{value.value}}"}},
+                {"id": "value", "use": "test.value@1.0.0", "inputs": {}},
+            ]
+        }
+
+        result = engine.execute_dag(dag, context={})
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert result.context["total"] == {"total": 42}
+        assert [s["id"] for s in engine._resolve_dag(dag["steps"])] == ["value", "total"]
+
+    @patch('app.orchestration.engine.load_program')
+    def test_cycle_fails_without_execution(self, mock_load, engine):
+        """Test detection de cycle."""
+        dag = {
+            "module_id": "test.cycle",
+            "steps": [
+                {"id": "a", "use": "test.op@1.0.0", "inputs": {"x": "{{b.x}}"}},
+                {"id": "b", "use": "test.op@1.0.0", "inputs": {"x": "{{a.x}}"}},
+            ]
+        }
+
+        result = engine.execute_dag(dag, context={})
+
+        assert result.status == ExecutionStatus.FAILED
+        assert "a -> b -> a" in result.error
+        assert result.steps == {}
+        mock_load.assert_not_called()
+
+    def test_duplicate_step_id_fails(self, engine):
+        """Test id de step duplique."""
+        dag = {"module_id": "test.dup", "steps": [{"id": "a", "use": "x"}, {"id": "a", "use": "y"}]}
+
+        result = engine.execute_dag(dag, context={})
+
+        assert result.status == ExecutionStatus.FAILED
+        assert "Duplicate step id" in result.error
+
+    @patch('app.orchestration.engine.load_program')
+    def test_independent_steps_run_concurrently(self, mock_load, engine):
+        """Test steps independants en parallele (barriere a 3 threads)."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(inputs):
+            barrier.wait()
+            return {"value": inputs["n"]}
+
+        programs = {
+            "test.fetch@1.0.0": program(fetch),
+            "test.sum@1.0.0": program(lambda inputs: {"sum": sum(int(v) for v in inputs["values"])}),
+        }
+        mock_load.side_effect = programs.__getitem__
+        dag = {
+            "module_id": "test.parallel",
+            "steps": [
+                *({"id": f"fetch{n}", "use": "test.fetch@1.0.0", "inputs": {"n": n}} for n in (1, 2, 3)),
+                {
+                    "id": "sum",
+                    "use": "test.sum@1.0.0",
+                    "inputs": {"values": ["{{fetch1.value}}", "{{fetch2.value}}", "{{fetch3.value}}"]}
+                },
+            ]
+        }
+
+        result = engine.execute_dag(dag, context={})
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert result.context["sum"] == {"sum": 6}
+
+    @patch('app.orchestration.engine.load_program')
+    def test_critical_path_recorded(self, mock_load, engine):
+        """Test chemin critique dans le resultat et la trace."""
+        def slow(inputs):
+            time.sleep(0.05)
+            return {"value": 1}
+
+        programs = {
+            "test.slow@1.0.0": program(slow),
+            "test.fast@1.0.0": program(lambda inputs: {"value": 2}),
+        }
+        mock_load.side_effect = programs.__getitem__
+        dag = {
+            "module_id": "test.critical",
+            "steps": [
+                {"id": "fast", "use": "test.fast@1.0.0", "inputs": {}},
+                {"id": "slow", "use": "test.slow@1.0.0", "inputs": {}},
+                {"id": "merge", "use": "test.fast@1.0.0", "inputs": {"a": "{{fast.value}}", "b": "{{slow.value}}"}},
+            ]
+        }
+
+        result = engine.execute_dag(dag, context={})
+
+        assert result.critical_path == ["slow", "merge"]
+        assert result.critical_path_ms >= 50
+        assert engine.execution_trace[-1]["critical_path"] == ["slow", "merge"]
+
+    @patch('app.orchestration.engine.load_program')
+    def test_failure_stops_dependents_only_after_running_steps(self, mock_load):
+        """Test echec : les dependants ne sont pas lances, les steps en cours terminent."""
+        started = threading.Event()
+
+        def fail(inputs):
+            started.wait(timeout=5)
+            raise Exception("boom")
+
+        def sibling(inputs):
+            started.set()
+            return {"ok": True}
+
+        programs = {
+            "test.fail@1.0.0": program(fail),
+            "test.sibling@1.0.0": program(sibling),
+            "test.after@1.0.0": program(lambda inputs: {}),
+        }
+        mock_load.side_effect = programs.__getitem__
+        dag = {
+            "module_id": "test.failure",
+            "steps": [
+                {"id": "fail", "use": "test.fail@1.0.0", "inputs": {}},
+                {"id": "sibling", "use": "test.sibling@1.0.0", "inputs": {}},
+                {"id": "after", "use": "test.after@1.0.0", "inputs": {"x": "{{fail.x}}"}},
+            ]
+        }
+
+        result = OrchestrationEngine(max_workers=2).execute_dag(dag, context={})
+
+        assert result.status == ExecutionStatus.FAILED
+        assert "boom" in result.error
+        assert result.steps["sibling"].status == StepStatus.COMPLETED
+        assert "after" not in result.steps
+
+    @patch('app.orchestration.engine.load_program')
+    def test_steps_inherit_caller_context(self, mock_load, engine):
+        """Test correlation_id / tenant_id propages aux threads des steps."""
+        from app.core.logging_config import correlation_id_var, tenant_id_var
+
+        def capture(inputs):
+            return {"correlation_id": correlation_id_var.get(), "tenant_id": tenant_id_var.get()}
+
+        mock_load.return_value = program(capture)
+        dag = {
+            "module_id": "test.context",
+            "steps": [{"id": f"step{n}", "use": "test.capture@1.0.0", "inputs": {}} for n in (1, 2)]
+        }
+
+        tokens = (correlation_id_var.set("corr-42"), tenant_id_var.set("tenant-ctx"))
+        try:
+            result = engine.execute_dag(dag, context={})
+        finally:
+            correlation_id_var.reset(tokens[0])
+            tenant_id_var.reset(tokens[1])
+
+        assert result.status == ExecutionStatus.COMPLETED
+        for step_id in ("step1", "step2"):
+            assert result.context[step_id] == {"correlation_id": "corr-42", "tenant_id": "tenant-ctx"}
+
+    @patch('app.orchestration.engine.load_program')
+    def test_single_worker_is_serial(self, mock_load, multi_step_dag):
+        """Test max_workers=1 : execution sequentielle."""
+        mock_load.return_value = program(lambda inputs: {"result": 1})
+
+        result = OrchestrationEngine(max_workers=1).execute_dag(multi_step_dag, context={})
+
+        assert result.status == ExecutionStatus.COMPLETED
+        assert list(result.steps) == ["calculate", "apply_discount"]
+
+
 class TestExecutionResult:
     """Tests de ExecutionResult."""
 
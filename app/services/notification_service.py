@@ -25,15 +25,18 @@ import json
 import logging
 import os
 import re
+import time
 import uuid
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Optional, Callable, Union
+from typing import Any, Iterable, Optional, Callable, Union
 from collections import defaultdict
 import threading
 
+from app.core.url_safety import BLOCKED_HOSTS, BLOCKED_NETWORKS, check_url
+
 logger = logging.getLogger(__name__)
 
 
@@ -250,6 +253,9 @@ class NotificationBatch:
 class NotificationProvider(ABC):
     """Interface pour les providers de notification."""
 
+    # Envois simultanés conseillés (send_batch)
+    max_concurrency: int = 10
+
     @abstractmethod
     async def send(
         self,
@@ -264,8 +270,147 @@ class NotificationProvider(ABC):
         pass
 
 
+@dataclass
+class _PooledSMTPConnection:
+    smtp: Any
+    messages: int = 0
+    last_used: float = 0.0
+
+
+class SMTPConnectionPool:
+    """
+    Pool de connexions SMTP asynchrones (aiosmtplib).
+
+    Une connexion (connexion TCP, STARTTLS, login) sert jusqu'à
+    max_messages_per_connection messages, puis est fermée proprement (QUIT);
+    les connexions inactives depuis plus de idle_timeout secondes sont
+    renouvelées. Au plus max_connections envois simultanés.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        max_connections: int = 5,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle: list[_PooledSMTPConnection] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> None:
+        """Les connexions appartiennent à une boucle d'événements: repartir à zéro si elle change."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            for conn in self._idle:
+                conn.smtp.close()
+            self._idle = []
+            self._semaphore = asyncio.Semaphore(self.max_connections)
+            self._loop = loop
+
+    async def _connect(self) -> _PooledSMTPConnection:
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        return _PooledSMTPConnection(smtp)
+
+    async def _checkout(self) -> tuple[_PooledSMTPConnection, bool]:
+        """Connexion inactive encore valide, sinon nouvelle connexion. Retourne (connexion, réutilisée)."""
+        now = time.monotonic()
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.smtp.is_connected and now - conn.last_used < self.idle_timeout:
+                return conn, True
+            await self._release(conn, quit=conn.smtp.is_connected)
+        return await self._connect(), False
+
+    async def _release(self, conn: _PooledSMTPConnection, quit: bool = True) -> None:
+        try:
+            if quit:
+                await conn.smtp.quit()
+        except Exception:
+            pass
+        finally:
+            conn.smtp.close()
+
+    async def send_message(self, message: Any, sender: str, recipients: list[str]) -> None:
+        """
+        Envoie un message sur une connexion du pool.
+
+        Une connexion réutilisée que le serveur a fermée entre-temps est
+        remplacée une fois, de manière transparente.
+        """
+        import aiosmtplib
+
+        self._bind_loop()
+        async with self._semaphore:
+            conn, reused = await self._checkout()
+            try:
+                await self._send_on(conn, message, sender, recipients)
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as e:
+                if not reused:
+                    raise
+                logger.debug(f"SMTP connection lost, reconnecting: {e}")
+                await self._send_on(await self._connect(), message, sender, recipients)
+
+    async def _send_on(self, conn: _PooledSMTPConnection, message: Any, sender: str, recipients: list[str]) -> None:
+        import aiosmtplib
+
+        try:
+            await conn.smtp.send_message(message, sender=sender, recipients=recipients)
+        except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+            # Refus du serveur (destinataire, contenu): la session reste utilisable
+            try:
+                await conn.smtp.rset()
+            except Exception:
+                await self._release(conn, quit=False)
+                raise
+            await self._checkin(conn)
+            raise
+        except Exception:
+            await self._release(conn, quit=False)
+            raise
+        await self._checkin(conn)
+
+    async def _checkin(self, conn: _PooledSMTPConnection) -> None:
+        conn.messages += 1
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages_per_connection:
+            await self._release(conn)
+        else:
+            self._idle.append(conn)
+
+    async def close(self) -> None:
+        """Ferme les connexions inactives (QUIT)."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._release(conn)
+
+
 class SMTPEmailProvider(NotificationProvider):
-    """Provider email SMTP."""
+    """Provider email SMTP (asynchrone, connexions réutilisées via SMTPConnectionPool)."""
 
     def __init__(
         self,
@@ -276,6 +421,8 @@ class SMTPEmailProvider(NotificationProvider):
         from_email: str,
         from_name: str = "AZALSCORE",
         use_tls: bool = True,
+        max_connections: int = 5,
+        max_messages_per_connection: int = 100,
     ):
         self.host = host
         self.port = port
@@ -284,49 +431,55 @@ class SMTPEmailProvider(NotificationProvider):
         self.from_email = from_email
         self.from_name = from_name
         self.use_tls = use_tls
+        self.max_concurrency = max_connections
+        self._pool = SMTPConnectionPool(
+            host,
+            port,
+            username=username,
+            password=password,
+            use_tls=use_tls,
+            max_connections=max_connections,
+            max_messages_per_connection=max_messages_per_connection,
+        )
+
+    def _build_message(self, notification: Notification):
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        from email.utils import make_msgid
+
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = notification.content.subject or "Notification"
+        msg['From'] = f"{self.from_name} <{self.from_email}>"
+        msg['To'] = notification.recipient.email
+        msg['Message-ID'] = make_msgid(domain=self.from_email.rpartition("@")[2] or None)
+
+        # Plain text
+        if notification.content.body:
+            msg.attach(MIMEText(notification.content.body, 'plain'))
+
+        # HTML
+        if notification.content.html_body:
+            msg.attach(MIMEText(notification.content.html_body, 'html'))
+
+        return msg
 
     async def send(
         self,
         notification: Notification
     ) -> tuple[bool, Optional[str], Optional[str]]:
         try:
-            import smtplib
-            from email.mime.text import MIMEText
-            from email.mime.multipart import MIMEMultipart
-
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = notification.content.subject or "Notification"
-            msg['From'] = f"{self.from_name} <{self.from_email}>"
-            msg['To'] = notification.recipient.email
-
-            # Plain text
-            if notification.content.body:
-                part1 = MIMEText(notification.content.body, 'plain')
-                msg.attach(part1)
-
-            # HTML
-            if notification.content.html_body:
-                part2 = MIMEText(notification.content.html_body, 'html')
-                msg.attach(part2)
-
-            # Envoi
-            with smtplib.SMTP(self.host, self.port) as server:
-                if self.use_tls:
-                    server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(
-                    self.from_email,
-                    [notification.recipient.email],
-                    msg.as_string()
-                )
-
-            message_id = f"smtp_{uuid.uuid4().hex[:8]}"
-            return True, message_id, None
+            msg = self._build_message(notification)
+            await self._pool.send_message(msg, self.from_email, [notification.recipient.email])
+            return True, msg['Message-ID'], None
 
         except Exception as e:
             logger.error(f"SMTP send error: {e}")
             return False, None, str(e)
 
+    async def close(self) -> None:
+        """Ferme les connexions SMTP du pool."""
+        await self._pool.close()
+
 
 class SendGridProvider(NotificationProvider):
     """Provider SendGrid."""
@@ -491,19 +644,9 @@ class FCMPushProvider(NotificationProvider):
 class WebhookProvider(NotificationProvider):
     """Provider Webhook avec protection SSRF."""
 
-    # Liste des hôtes/réseaux bloqués (protection SSRF)
-    # nosec B104 - Ce sont des hôtes BLOQUÉS, pas des bindings
-    BLOCKED_HOSTS = {
-        "localhost", "127.0.0.1", "0.0.0.0", "::1",  # nosec B104
-        "metadata.google.internal", "169.254.169.254",
-    }
-
-    BLOCKED_NETWORKS = [
-        "10.", "172.16.", "172.17.", "172.18.", "172.19.",
-        "172.20.", "172.21.", "172.22.", "172.23.", "172.24.",
-        "172.25.", "172.26.", "172.27.", "172.28.", "172.29.",
-        "172.30.", "172.31.", "192.168.",
-    ]
+    # Hôtes/réseaux bloqués (protection SSRF, app.core.url_safety)
+    BLOCKED_HOSTS = BLOCKED_HOSTS
+    BLOCKED_NETWORKS = BLOCKED_NETWORKS
 
     def __init__(
         self,
@@ -517,29 +660,7 @@ class WebhookProvider(NotificationProvider):
 
     def _is_safe_url(self, url: str) -> tuple[bool, str]:
         """Vérifie si l'URL est sûre (protection SSRF)."""
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-
-            # Vérifier le schéma
-            if parsed.scheme not in ("http", "https"):
-                return False, f"Schéma non autorisé: {parsed.scheme}"
-
-            # Vérifier l'hôte
-            host = parsed.hostname or ""
-            host_lower = host.lower()
-
-            if host_lower in self.BLOCKED_HOSTS:
-                return False, f"Hôte bloqué: {host}"
-
-            # Vérifier les réseaux privés
-            for network in self.BLOCKED_NETWORKS:
-                if host.startswith(network):
-                    return False, f"Réseau privé non autorisé: {host}"
-
-            return True, ""
-        except Exception as e:
-            return False, f"URL invalide: {str(e)}"
+        return check_url(url)
 
     def _generate_signature(self, payload: str, timestamp: str) -> str:
         """Génère une signature HMAC pour le webhook."""
@@ -787,20 +908,102 @@ class InAppProvider(NotificationProvider):
 # TEMPLATE ENGINE
 # =============================================================================
 
+_PLACEHOLDER_RE = re.compile(r"\{\{([^{}]*)\}\}")
+_MISSING = object()
+
+# Champs de NotificationTemplate contenant du texte à rendre
+_TEMPLATE_FIELDS = (
+    "email_subject",
+    "email_body",
+    "email_text",
+    "sms_body",
+    "push_title",
+    "push_body",
+    "webhook_payload",
+    "slack_message",
+    "in_app_title",
+    "in_app_body",
+)
+
+
+class _CompiledString:
+    """Chaîne de template découpée une fois: littéraux et noms de variables alternés."""
+
+    __slots__ = ("source", "literals", "keys")
+
+    def __init__(self, source: str):
+        parts = _PLACEHOLDER_RE.split(source)
+        self.source = source
+        self.literals = parts[0::2]
+        self.keys = parts[1::2]
+
+    def render(self, variables: dict) -> str:
+        if not self.keys:
+            return self.source
+        out = [self.literals[0]]
+        for key, literal in zip(self.keys, self.literals[1:]):
+            value = variables.get(key, _MISSING)
+            # Variable absente: le placeholder est conservé tel quel
+            out.append(f"{{{{{key}}}}}" if value is _MISSING else str(value))
+            out.append(literal)
+        return "".join(out)
+
+
+@dataclass
+class CompiledTemplate:
+    """Forme compilée d'un NotificationTemplate (un _CompiledString par champ renseigné)."""
+    sources: tuple
+    fields: dict[str, _CompiledString]
+
+    @classmethod
+    def compile(cls, template: NotificationTemplate) -> "CompiledTemplate":
+        sources = tuple(getattr(template, name) for name in _TEMPLATE_FIELDS)
+        return cls(
+            sources=sources,
+            fields={
+                name: _CompiledString(source)
+                for name, source in zip(_TEMPLATE_FIELDS, sources)
+                if source
+            },
+        )
+
+    def render(self, name: str, variables: dict) -> Optional[str]:
+        compiled = self.fields.get(name)
+        return compiled.render(variables) if compiled else None
+
+
 class TemplateEngine:
-    """Moteur de templates pour les notifications."""
+    """
+    Moteur de templates pour les notifications.
+
+    Chaque template est analysé une seule fois en CompiledTemplate, mis en
+    cache par template_id; le rendu est alors un seul passage linéaire.
+    La forme compilée est reconstruite si les textes du template changent.
+    """
 
     def __init__(self):
         self._templates: dict[str, NotificationTemplate] = {}
+        self._compiled: dict[str, CompiledTemplate] = {}
 
     def register_template(self, template: NotificationTemplate) -> None:
-        """Enregistre un template."""
+        """Enregistre (et compile) un template."""
         self._templates[template.template_id] = template
+        self._compiled[template.template_id] = CompiledTemplate.compile(template)
 
     def get_template(self, template_id: str) -> Optional[NotificationTemplate]:
         """Récupère un template."""
         return self._templates.get(template_id)
 
+    def get_compiled(self, template: NotificationTemplate) -> CompiledTemplate:
+        """Forme compilée du template, recompilée si ses textes ont changé."""
+        compiled = self._compiled.get(template.template_id)
+        if compiled is None or compiled.sources != tuple(
+            getattr(template, name) for name in _TEMPLATE_FIELDS
+        ):
+            compiled = CompiledTemplate.compile(template)
+            self._compiled[template.template_id] = compiled
+        return compiled
+
     def render(
         self,
         template: NotificationTemplate,
@@ -810,39 +1013,31 @@ class TemplateEngine:
     ) -> NotificationContent:
         """Rend un template avec les variables fournies."""
         content = NotificationContent()
-
-        # Fonction de rendu simple (en production, utiliser Jinja2)
-        def render_string(template_str: Optional[str]) -> Optional[str]:
-            if not template_str:
-                return None
-            result = template_str
-            for key, value in variables.items():
-                placeholder = f"{{{{{key}}}}}"
-                result = result.replace(placeholder, str(value))
-            return result
+        compiled = self.get_compiled(template)
+        render_string = compiled.render
 
         if channel == NotificationChannel.EMAIL:
-            content.subject = render_string(template.email_subject)
-            content.html_body = render_string(template.email_body)
-            content.body = render_string(template.email_text) or content.html_body or ""
+            content.subject = render_string("email_subject", variables)
+            content.html_body = render_string("email_body", variables)
+            content.body = render_string("email_text", variables) or content.html_body or ""
 
         elif channel == NotificationChannel.SMS:
-            content.short_message = render_string(template.sms_body)
+            content.short_message = render_string("sms_body", variables)
             content.body = content.short_message or ""
 
         elif channel == NotificationChannel.PUSH:
-            content.title = render_string(template.push_title)
-            content.body = render_string(template.push_body) or ""
+            content.title = render_string("push_title", variables)
+            content.body = render_string("push_body", variables) or ""
 
         elif channel == NotificationChannel.SLACK:
-            content.body = render_string(template.slack_message) or ""
+            content.body = render_string("slack_message", variables) or ""
 
         elif channel == NotificationChannel.IN_APP:
-            content.title = render_string(template.in_app_title)
-            content.body = render_string(template.in_app_body) or ""
+            content.title = render_string("in_app_title", variables)
+            content.body = render_string("in_app_body", variables) or ""
 
         elif channel == NotificationChannel.WEBHOOK:
-            payload_str = render_string(template.webhook_payload)
+            payload_str = render_string("webhook_payload", variables)
             if payload_str:
                 try:
                     content.data = json.loads(payload_str)
@@ -965,6 +1160,9 @@ class NotificationService:
         # Queue de retry
         self._retry_queue: list[Notification] = []
 
+        # Lots (send_batch)
+        self._batches: dict[str, NotificationBatch] = {}
+
         self._lock = threading.Lock()
 
     # -------------------------------------------------------------------------
@@ -1023,6 +1221,122 @@ class NotificationService:
         if not template:
             raise ValueError(f"Template not found: {template_id}")
 
+        notifications = []
+
+        for notification in self._build_notifications(
+            template, recipient, variables, tenant_id, channels, priority, category, metadata
+        ):
+            # Envoyer
+            notification = await self._send_notification(notification)
+            notifications.append(notification)
+
+            # Enregistrer dans l'historique
+            self._store_notification(notification)
+
+        return notifications
+
+    async def send_batch(
+        self,
+        template_id: str,
+        recipients: Iterable[tuple[NotificationRecipient, dict]],
+        tenant_id: str,
+        channels: Optional[list[NotificationChannel]] = None,
+        priority: NotificationPriority = NotificationPriority.NORMAL,
+        category: Optional[NotificationCategory] = None,
+        metadata: Optional[dict] = None,
+        concurrency: Optional[int] = None,
+    ) -> NotificationBatch:
+        """
+        Envoie un template à un grand nombre de destinataires (relances, diffusions).
+
+        Les notifications sont rendues au fil de l'eau dans une file bornée,
+        vidée par `concurrency` envois simultanés (par défaut: max_concurrency
+        des providers concernés, soit la taille du pool SMTP pour l'email).
+        Préférences, quiet hours et throttling s'appliquent comme pour send().
+
+        Args:
+            recipients: Itérable de (destinataire, variables du template)
+
+        Returns:
+            Le lot, avec ses compteurs d'envois réussis / échoués
+        """
+        template = self._template_engine.get_template(template_id)
+        if not template:
+            raise ValueError(f"Template not found: {template_id}")
+
+        if concurrency is None:
+            providers = [self._providers.get(c) for c in (channels or template.channels)]
+            concurrency = max((p.max_concurrency for p in providers if p), default=1)
+        concurrency = max(concurrency, 1)
+
+        batch = NotificationBatch(
+            batch_id=str(uuid.uuid4()),
+            tenant_id=tenant_id,
+            template_id=template_id,
+            status="processing",
+            created_at=datetime.utcnow(),
+            total_count=0,
+        )
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+
+        queue: asyncio.Queue[Optional[Notification]] = asyncio.Queue(maxsize=concurrency * 4)
+        batch_metadata = {**(metadata or {}), "batch_id": batch.batch_id}
+
+        async def worker() -> None:
+            while True:
+                notification = await queue.get()
+                if notification is None:
+                    return
+                try:
+                    notification = await self._send_notification(notification)
+                except Exception as e:
+                    notification.status = NotificationStatus.FAILED
+                    notification.error_message = str(e)
+                    notification.failed_at = datetime.utcnow()
+                self._store_notification(notification)
+                if notification.status == NotificationStatus.SENT:
+                    batch.sent_count += 1
+                else:
+                    batch.failed_count += 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for recipient, variables in recipients:
+                for notification in self._build_notifications(
+                    template, recipient, variables, tenant_id, channels, priority, category, batch_metadata
+                ):
+                    batch.total_count += 1
+                    await queue.put(notification)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            batch.status = "failed"
+            raise
+
+        batch.status = "completed"
+        batch.completed_at = datetime.utcnow()
+        logger.info(
+            f"Notification batch completed: {batch.batch_id}",
+            extra={"total": batch.total_count, "sent": batch.sent_count, "failed": batch.failed_count}
+        )
+        return batch
+
+    def _build_notifications(
+        self,
+        template: NotificationTemplate,
+        recipient: NotificationRecipient,
+        variables: dict,
+        tenant_id: str,
+        channels: Optional[list[NotificationChannel]],
+        priority: NotificationPriority,
+        category: Optional[NotificationCategory],
+        metadata: Optional[dict],
+    ) -> list[Notification]:
+        """Notifications à envoyer pour un destinataire (préférences, throttling, rendu)."""
         # Déterminer les canaux
         target_channels = channels or template.channels
         actual_category = category or template.category
@@ -1066,10 +1380,10 @@ class NotificationService:
             )
 
             # Créer la notification
-            notification = Notification(
+            notifications.append(Notification(
                 notification_id=str(uuid.uuid4()),
                 tenant_id=tenant_id,
-                template_id=template_id,
+                template_id=template.template_id,
                 category=actual_category,
                 channel=channel,
                 priority=priority,
@@ -1078,14 +1392,7 @@ class NotificationService:
                 recipient=recipient,
                 content=content,
                 metadata=metadata or {},
-            )
-
-            # Envoyer
-            notification = await self._send_notification(notification)
-            notifications.append(notification)
-
-            # Enregistrer dans l'historique
-            self._store_notification(notification)
+            ))
 
         return notifications
 
@@ -1268,6 +1575,10 @@ class NotificationService:
         """Récupère une notification."""
         return self._notifications.get(notification_id)
 
+    def get_batch(self, batch_id: str) -> Optional[NotificationBatch]:
+        """Récupère un lot envoyé par send_batch."""
+        return self._batches.get(batch_id)
+
     def get_user_notifications(
         self,
         user_id: str,
@@ -1412,6 +1723,9 @@ def initialize_notification_service(
                 password=email_config.get("password", ""),
                 from_email=email_config.get("from_email", ""),
                 from_name=email_config.get("from_name", "AZALSCORE"),
+                use_tls=email_config.get("use_tls", True),
+                max_connections=email_config.get("max_connections", 5),
+                max_messages_per_connection=email_config.get("max_messages_per_connection", 100),
             )
         service.register_provider(NotificationChannel.EMAIL, provider)
 
@@ -7,6 +7,7 @@ pip install stripe
 from __future__ import annotations
 
 
+import importlib.util
 import os
 import re
 from datetime import datetime
@@ -14,11 +15,8 @@ from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
 from sqlalchemy.orm import Session
 
-try:
-    import stripe
-    STRIPE_AVAILABLE = True
-except ImportError:
-    STRIPE_AVAILABLE = False
+# Le SDK Stripe (~250 ms d'import) n'est charge qu'au premier appel
+STRIPE_AVAILABLE = importlib.util.find_spec("stripe") is not None
 
 from app.core.logging_config import get_logger
 
@@ -35,9 +33,25 @@ STRIPE_API_KEY = (
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 STRIPE_LIVE_MODE = os.getenv("STRIPE_LIVE_MODE", "false").lower() == "true"
 
-if STRIPE_AVAILABLE and STRIPE_API_KEY:
-    stripe.api_key = STRIPE_API_KEY
-    stripe.api_version = "2023-10-16"
+
+
+class _LazyStripe:
+    """Module stripe importe et configure au premier acces d'attribut."""
+
+    _module = None
+
+    def __getattr__(self, name: str):
+        module = type(self)._module
+        if module is None:
+            import stripe as module
+            if STRIPE_API_KEY:
+                module.api_key = STRIPE_API_KEY
+                module.api_version = "2023-10-16"
+            type(self)._module = module
+        return getattr(module, name)
+
+
+stripe = _LazyStripe()
 
 
 # ============================================================
@@ -21,6 +21,8 @@ from collections import defaultdict
 import uuid
 import re
 
+from app.core.url_safety import BLOCKED_HOSTS, BLOCKED_NETWORKS, check_url
+
 logger = logging.getLogger(__name__)
 
 
@@ -405,49 +407,13 @@ class CreateRecordHandler(ActionHandler):
 class HttpRequestHandler(ActionHandler):
     """Handler pour les requêtes HTTP avec protection SSRF"""
 
-    # Liste des hôtes/réseaux interdits (SSRF protection)
-    # nosec B104 - Ce sont des hôtes BLOQUÉS, pas des bindings
-    BLOCKED_HOSTS = {
-        "localhost", "127.0.0.1", "0.0.0.0", "::1",  # nosec B104
-        "metadata.google.internal", "169.254.169.254",  # Cloud metadata
-    }
-
-    BLOCKED_NETWORKS = [
-        "10.", "172.16.", "172.17.", "172.18.", "172.19.",
-        "172.20.", "172.21.", "172.22.", "172.23.", "172.24.",
-        "172.25.", "172.26.", "172.27.", "172.28.", "172.29.",
-        "172.30.", "172.31.", "192.168.",  # Réseaux privés
-    ]
+    # Hôtes/réseaux bloqués (protection SSRF, app.core.url_safety)
+    BLOCKED_HOSTS = BLOCKED_HOSTS
+    BLOCKED_NETWORKS = BLOCKED_NETWORKS
 
     def _is_safe_url(self, url: str) -> tuple[bool, str]:
         """Vérifie si l'URL est sûre (protection SSRF)"""
-        try:
-            from urllib.parse import urlparse
-            parsed = urlparse(url)
-
-            # Vérifier le schéma
-            if parsed.scheme not in ("http", "https"):
-                return False, f"Schéma non autorisé: {parsed.scheme}"
-
-            # Vérifier l'hôte
-            host = parsed.hostname or ""
-            host_lower = host.lower()
-
-            if host_lower in self.BLOCKED_HOSTS:
-                return False, f"Hôte bloqué: {host}"
-
-            # Vérifier les réseaux privés
-            for network in self.BLOCKED_NETWORKS:
-                if host.startswith(network):
-                    return False, f"Réseau privé non autorisé: {host}"
-
-            # Vérifier les adresses IPv6 locales
-            if host.startswith("[") and ("::1" in host or "fe80:" in host.lower()):
-                return False, f"Adresse IPv6 locale non autorisée: {host}"
-
-            return True, ""
-        except Exception as e:
-            return False, f"URL invalide: {str(e)}"
+        return check_url(url)
 
     async def execute(
         self,
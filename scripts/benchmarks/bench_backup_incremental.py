@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark des sauvegardes incrémentales
+================================================
+Sauvegarde complète d'une table SQLite de --rows lignes, puis modifie
+--changed-pct % des lignes (et en supprime --deleted) et compare:
+- full        : nouvelle sauvegarde complète
+- incremental : lignes modifiées depuis le marqueur updated_at + clés
+                supprimées
+- restore     : relecture de la chaîne complète + incrémentale
+
+Usage:
+    python scripts/benchmarks/bench_backup_incremental.py
+    python scripts/benchmarks/bench_backup_incremental.py --rows 1000000 --changed-pct 0.5
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.modules.backup.models import Backup, BackupConfig, BackupType, RestoreLog  # noqa: E402
+from app.modules.backup.schemas import BackupConfigCreate, BackupCreate, RestoreRequest  # noqa: E402
+from app.modules.backup.service import BackupService  # noqa: E402
+
+TENANT = "bench"
+
+
+def build_database(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    for model in (BackupConfig, Backup, RestoreLog):
+        model.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE invoices (id INTEGER PRIMARY KEY, tenant_id TEXT, number TEXT, "
+            "customer TEXT, amount TEXT, notes TEXT, updated_at TEXT)"
+        ))
+        conn.execute(text("CREATE INDEX ix_invoices_tenant_updated ON invoices (tenant_id, updated_at)"))
+        batch = 10_000
+        for start in range(0, rows, batch):
+            conn.execute(
+                text("INSERT INTO invoices (tenant_id, number, customer, amount, notes, updated_at) "
+                     "VALUES (:t, :n, :c, :a, :o, :u)"),
+                [
+                    {"t": TENANT, "n": f"F-{i:08d}", "c": f"Client {i % 997}", "a": f"{i % 10000}.50",
+                     "o": "Facture mensuelle - conditions 30 jours fin de mois",
+                     "u": f"2026-01-01 00:{i // 60 % 60:02d}:{i % 60:02d}.{i:06d}"}
+                    for i in range(start, min(start + batch, rows))
+                ],
+            )
+    return engine
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sauvegardes incrémentales")
+    parser.add_argument("--rows", type=int, default=200_000, help="Lignes de la table invoices")
+    parser.add_argument("--changed-pct", type=float, default=1.0, help="Pourcentage de lignes modifiées")
+    parser.add_argument("--deleted", type=int, default=100, help="Lignes supprimées")
+    args = parser.parse_args()
+    # Les tables de la liste blanche absentes de la base sont ignorées
+    logging.getLogger("app.modules.backup.service").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = build_database(os.path.join(workdir, "bench.sqlite"), args.rows)
+        db = sessionmaker(bind=engine)()
+        service = BackupService(db, TENANT)
+        service.create_config(BackupConfigCreate(storage_path=workdir, max_backups=10))
+
+        service.create_backup(BackupCreate(backup_type=BackupType.FULL))
+        step = max(1, int(100 / args.changed_pct))
+        db.execute(text(
+            "UPDATE invoices SET amount = '0.00', updated_at = '2026-02-01 00:00:00.000000' "
+            "WHERE id % :step = 0"
+        ), {"step": step})
+        db.execute(text("DELETE FROM invoices WHERE id IN (SELECT id FROM invoices LIMIT :n OFFSET 7)"),
+                   {"n": args.deleted})
+        db.commit()
+
+        incremental, incremental_time = timed(
+            lambda: service.create_backup(BackupCreate(backup_type=BackupType.INCREMENTAL))
+        )
+        full, full_time = timed(lambda: service.create_backup(BackupCreate(backup_type=BackupType.FULL)))
+        restore_log, restore_time = timed(lambda: service.restore_backup(
+            RestoreRequest(backup_id=str(incremental.id)), restored_by="bench"
+        ))
+
+        print(f"{args.rows} lignes, {args.changed_pct} % modifiées, {args.deleted} supprimées")
+        print(f"{'sauvegarde':<14}{'durée s':>9}{'lignes':>10}{'suppr.':>8}{'taille Ko':>11}")
+        print("-" * 52)
+        for name, item, elapsed in (("full", full, full_time), ("incremental", incremental, incremental_time)):
+            print(f"{name:<14}{elapsed:>9.2f}{item.records_count:>10}{item.deleted_count:>8}"
+                  f"{item.file_size / 1024:>11.0f}")
+        print(f"{'restore chaîne':<14}{restore_time:>9.2f}{restore_log.records_restored:>10}")
+
+        db.close()
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark des sauvegardes en flux
+==========================================
+Sauvegarde --rows lignes d'une table SQLite (fichier temporaire) et mesure
+durée, taille et pic mémoire Python (tracemalloc):
+- monolithic : format historique (fetchall, json.dumps du tenant entier,
+               gzip puis un seul appel AES-GCM)
+- stream     : BackupService (curseur yield_per, blocs compressés et
+               chiffrés un par un, checksum à l'écriture)
+
+Puis restaure une seule table dans chaque format.
+
+Usage:
+    python scripts/benchmarks/bench_backup_stream.py
+    python scripts/benchmarks/bench_backup_stream.py --rows 500000 --chunk-rows 10000
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.modules.backup.models import Backup, BackupConfig, RestoreLog  # noqa: E402
+from app.modules.backup.schemas import BackupConfigCreate, BackupCreate  # noqa: E402
+from app.modules.backup.service import BackupService  # noqa: E402
+from app.modules.backup.stream import BackupStreamReader  # noqa: E402
+
+TENANT = "bench"
+
+
+def build_database(path: str, rows: int):
+    engine = create_engine(f"sqlite:///{path}")
+    for model in (BackupConfig, Backup, RestoreLog):
+        model.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE invoices (id INTEGER PRIMARY KEY, tenant_id TEXT, number TEXT, "
+            "customer TEXT, amount TEXT, notes TEXT)"
+        ))
+        conn.execute(text("CREATE TABLE support_tickets (id INTEGER PRIMARY KEY, tenant_id TEXT, subject TEXT)"))
+        batch = 10_000
+        for start in range(0, rows, batch):
+            conn.execute(
+                text("INSERT INTO invoices (tenant_id, number, customer, amount, notes) "
+                     "VALUES (:t, :n, :c, :a, :o)"),
+                [
+                    {"t": TENANT, "n": f"F-{i:08d}", "c": f"Client {i % 997}",
+                     "a": f"{i % 10000}.50", "o": "Facture mensuelle - conditions 30 jours fin de mois"}
+                    for i in range(start, min(start + batch, rows))
+                ],
+            )
+        conn.execute(
+            text("INSERT INTO support_tickets (tenant_id, subject) VALUES (:t, :s)"),
+            [{"t": TENANT, "s": f"Ticket {i}"} for i in range(100)],
+        )
+    return engine
+
+
+def monolithic_backup(service: BackupService, path: str) -> None:
+    """Format historique: tout le tenant en mémoire, un seul bloc chiffré."""
+    data = {}
+    for table in ("invoices", "support_tickets"):
+        result = service.db.execute(
+            text(f"SELECT * FROM {table} WHERE tenant_id = :t"), {"t": TENANT}  # nosec B608
+        )
+        columns = result.keys()
+        data[table] = [dict(zip(columns, row, strict=False)) for row in result.fetchall()]
+    data_bytes = gzip.compress(json.dumps(data, default=str, ensure_ascii=False).encode("utf-8"))
+    hashlib.sha256(data_bytes).hexdigest()
+    nonce = secrets.token_bytes(12)
+    ciphertext = AESGCM(service._get_encryption_key()).encrypt(nonce, data_bytes, None)
+    with open(path, "wb") as f:
+        f.write(nonce)
+        f.write(ciphertext)
+
+
+def monolithic_restore(service: BackupService, path: str, table: str) -> int:
+    with open(path, "rb") as f:
+        nonce = f.read(12)
+        ciphertext = f.read()
+    data_bytes = AESGCM(service._get_encryption_key()).decrypt(nonce, ciphertext, None)
+    return len(json.loads(gzip.decompress(data_bytes))[table])
+
+
+def stream_restore(service: BackupService, path: str, table: str) -> int:
+    with BackupStreamReader(path, service._get_encryption_key()) as reader:
+        return sum(len(rows) for _, rows in reader.iter_table(table))
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark sauvegardes en flux")
+    parser.add_argument("--rows", type=int, default=200_000, help="Lignes de la table invoices")
+    parser.add_argument("--chunk-rows", type=int, default=BackupService.BACKUP_CHUNK_ROWS, help="Lignes par bloc")
+    args = parser.parse_args()
+    # Les tables de la liste blanche absentes de la base sont signalées en warning
+    logging.getLogger("app.modules.backup.service").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = build_database(os.path.join(workdir, "bench.sqlite"), args.rows)
+        db = sessionmaker(bind=engine)()
+        BackupService.BACKUP_CHUNK_ROWS = args.chunk_rows
+        service = BackupService(db, TENANT)
+        service.create_config(BackupConfigCreate(storage_path=workdir))
+        legacy_path = os.path.join(workdir, "legacy.azals.bak")
+
+        _, legacy_time, legacy_peak = measure(lambda: monolithic_backup(service, legacy_path))
+        backup, stream_time, stream_peak = measure(lambda: service.create_backup(BackupCreate()))
+
+        print(f"{args.rows} lignes, blocs de {args.chunk_rows} lignes")
+        print(f"{'opération':<30}{'durée s':>9}{'pic Mo':>9}{'taille Mo':>11}")
+        print("-" * 59)
+        print(f"{'backup monolithic':<30}{legacy_time:>9.2f}{legacy_peak / 2**20:>9.1f}"
+              f"{os.path.getsize(legacy_path) / 2**20:>11.1f}")
+        print(f"{'backup stream':<30}{stream_time:>9.2f}{stream_peak / 2**20:>9.1f}"
+              f"{backup.file_size / 2**20:>11.1f}")
+
+        for name, func, path in (
+            ("monolithic", monolithic_restore, legacy_path),
+            ("stream", stream_restore, backup.file_path),
+        ):
+            count, elapsed, peak = measure(lambda f=func, p=path: f(service, p, "support_tickets"))
+            assert count == 100
+            print(f"{'restore 1 table ' + name:<30}{elapsed:>9.2f}{peak / 2**20:>9.1f}{'':>11}")
+
+        db.close()
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
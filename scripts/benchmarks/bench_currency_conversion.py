@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark des conversions multi-devises
+================================================
+Convertit --amounts montants repartis sur --currencies devises vers EUR
+(une partie par taux inverse, une partie par triangulation via USD)
+dans une base SQLite, et compare:
+- per-amount : convert() par montant, jusqu'a 4 requetes de taux chacun
+- matrix     : convert_multiple() (taux de la date precharges en une
+               requete, paires resolues une fois en memoire)
+
+Usage:
+    python scripts/benchmarks/bench_currency_conversion.py
+    python scripts/benchmarks/bench_currency_conversion.py --amounts 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.modules.currency.models import CurrencyConfig, ExchangeRate  # noqa: E402
+from app.modules.currency.service import ISO_4217_CURRENCIES, CurrencyService  # noqa: E402
+
+TENANT = "bench"
+RATE_DATE = date(2026, 1, 30)
+
+
+def build_database(currencies: list[str]):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (ExchangeRate, CurrencyConfig):
+        model.__table__.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+    # 30 jours d'historique: EUR/xxx pour la moitie, USD/xxx pour l'autre
+    for day in range(30):
+        for i, code in enumerate(currencies):
+            base = "EUR" if i % 2 == 0 or code == "USD" else "USD"
+            rate = Decimal("1.5") + Decimal(i) / 10 + Decimal(day) / 1000
+            db.add(ExchangeRate(
+                tenant_id=TENANT, base_currency_id=uuid4(), quote_currency_id=uuid4(),
+                base_currency_code=base, quote_currency_code=code, rate=rate,
+                inverse_rate=(1 / rate).quantize(Decimal("0.000000000001")),
+                rate_date=RATE_DATE - timedelta(days=day),
+            ))
+    config = CurrencyService(db=db, tenant_id=TENANT).get_config()
+    config.pivot_currency_code = "USD"
+    config.allow_triangulation = True
+    db.commit()
+    return engine, db
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark conversions multi-devises")
+    parser.add_argument("--amounts", type=int, default=10_000, help="Montants a convertir")
+    parser.add_argument("--currencies", type=int, default=20, help="Devises distinctes")
+    args = parser.parse_args()
+
+    currencies = ["USD"] + [c for c in ISO_4217_CURRENCIES if c not in ("EUR", "USD")][:args.currencies - 1]
+    engine, db = build_database(currencies)
+    queries = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        queries[0] += 1
+
+    amounts = [
+        {"amount": Decimal(i % 5000) + Decimal("0.37"), "currency": currencies[i % len(currencies)]}
+        for i in range(args.amounts)
+    ]
+
+    print(f"{args.amounts} montants, {len(currencies)} devises -> EUR")
+    print(f"{'conversion':<14}{'durée s':>9}{'requêtes':>10}{'total EUR':>18}")
+    print("-" * 51)
+
+    service = CurrencyService(db=db, tenant_id=TENANT)
+    service.get_config()
+    queries[0] = 0
+    start = time.perf_counter()
+    total = sum(
+        service.convert(Decimal(str(item["amount"])), item["currency"], "EUR", RATE_DATE).converted_amount
+        for item in amounts
+    )
+    print(f"{'per-amount':<14}{time.perf_counter() - start:>9.2f}{queries[0]:>10}{total:>18}")
+
+    service = CurrencyService(db=db, tenant_id=TENANT)
+    service.get_config()
+    queries[0] = 0
+    start = time.perf_counter()
+    _, total = service.convert_multiple(amounts, "EUR", RATE_DATE)
+    print(f"{'matrix':<14}{time.perf_counter() - start:>9.2f}{queries[0]:>10}{total:>18}")
+
+    db.close()
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
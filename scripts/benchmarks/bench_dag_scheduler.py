@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de l'ordonnanceur DAG
+========================================
+Exécute un DAG de --branches branches indépendantes de --depth steps
+(chaque step simule une E/S de --latency-ms), suivies d'un step
+d'agrégation, et compare:
+- serial   : OrchestrationEngine(max_workers=1), un step à la fois
+- parallel : OrchestrationEngine() (steps indépendants en parallèle)
+
+Usage:
+    python scripts/benchmarks/bench_dag_scheduler.py
+    python scripts/benchmarks/bench_dag_scheduler.py --branches 8 --depth 3
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from app.orchestration.engine import ExecutionStatus, OrchestrationEngine  # noqa: E402
+
+
+class _IOProgram:
+    """Sous-programme simulant un appel externe."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def execute(self, inputs):
+        time.sleep(self.latency)
+        return {"value": sum(int(v) for v in inputs.get("values", [])) + 1}
+
+
+def build_dag(branches: int, depth: int) -> dict:
+    steps = []
+    for b in range(branches):
+        for d in range(depth):
+            inputs = {"values": [f"{{{{b{b}_{d - 1}.value}}}}"]} if d else {}
+            steps.append({"id": f"b{b}_{d}", "use": "bench.io@1.0.0", "inputs": inputs})
+    steps.append({
+        "id": "aggregate",
+        "use": "bench.io@1.0.0",
+        "inputs": {"values": [f"{{{{b{b}_{depth - 1}.value}}}}" for b in range(branches)]},
+    })
+    return {"module_id": "bench.dag", "version": "1.0.0", "steps": steps}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ordonnanceur DAG")
+    parser.add_argument("--branches", type=int, default=6, help="Branches indépendantes")
+    parser.add_argument("--depth", type=int, default=3, help="Steps par branche")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Durée d'un step")
+    args = parser.parse_args()
+
+    dag = build_dag(args.branches, args.depth)
+    program = _IOProgram(args.latency_ms / 1000)
+
+    print(f"{len(dag['steps'])} steps ({args.branches} branches x {args.depth} + agrégation), "
+          f"{args.latency_ms:.0f} ms par step")
+    print(f"{'ordonnancement':<16}{'durée ms':>10}{'chemin critique ms':>20}")
+    print("-" * 46)
+
+    with patch("app.orchestration.engine.load_program", return_value=program):
+        for name, engine in (("serial", OrchestrationEngine(max_workers=1)), ("parallel", OrchestrationEngine())):
+            result = engine.execute_dag(dag, context={})
+            assert result.status == ExecutionStatus.COMPLETED, result.error
+            assert result.context["aggregate"]["value"] == args.branches * args.depth + 1
+            print(f"{name:<16}{result.duration_ms:>10}{result.critical_path_ms:>20}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
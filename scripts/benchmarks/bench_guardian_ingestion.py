@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de l'ingestion des erreurs GUARDIAN
+=====================================================
+Simule une rafale de --errors reponses en erreur (401 d'un client defaillant,
+quelques routes) dans une base SQLite, et compare:
+- per-request : ancien middleware, lecture de GuardianConfig puis
+                GuardianService.detect_error() a chaque erreur
+- queued      : GuardianErrorQueue.record() dans la requete, puis un
+                report par lots (flush_guardian_errors)
+
+Usage:
+    python scripts/benchmarks/bench_guardian_ingestion.py
+    python scripts/benchmarks/bench_guardian_ingestion.py --errors 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.modules.guardian.ingestion import (  # noqa: E402
+    GuardianConfigCache,
+    GuardianErrorQueue,
+    flush_guardian_errors,
+)
+from app.modules.guardian.models import (  # noqa: E402
+    Environment,
+    ErrorDetection,
+    ErrorSeverity,
+    ErrorSource,
+    ErrorType,
+    GuardianAlert,
+    GuardianConfig,
+)
+from app.modules.guardian.schemas import ErrorDetectionCreate  # noqa: E402
+from app.modules.guardian.service import GuardianService  # noqa: E402
+
+TENANT = "bench"
+
+
+def build_database():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (GuardianConfig, ErrorDetection, GuardianAlert):
+        model.__table__.create(bind=engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    db.add(GuardianConfig(tenant_id=TENANT, is_enabled=True, auto_correction_enabled=False))
+    db.commit()
+    db.close()
+    return engine, Session
+
+
+def make_error(route: str) -> ErrorDetectionCreate:
+    return ErrorDetectionCreate(
+        severity=ErrorSeverity.MINOR,
+        source=ErrorSource.API_ERROR,
+        error_type=ErrorType.AUTHENTICATION,
+        environment=Environment.SANDBOX,
+        error_message=f"HTTP 401 on GET {route}",
+        module="orders",
+        route=route,
+        http_status=401,
+        http_method="GET",
+    )
+
+
+def legacy_record(Session, route: str) -> None:
+    """Ancien middleware: une session et des ecritures par erreur."""
+    db = Session()
+    try:
+        config = db.query(GuardianConfig).filter(GuardianConfig.tenant_id == TENANT).first()
+        if config and config.is_enabled:
+            GuardianService(db, TENANT).detect_error(make_error(route))
+    finally:
+        db.close()
+
+
+def occurrences(Session) -> int:
+    db = Session()
+    try:
+        return sum(row.occurrence_count for row in db.query(ErrorDetection).all())
+    finally:
+        db.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ingestion GUARDIAN")
+    parser.add_argument("--errors", type=int, default=5_000, help="Erreurs de la rafale")
+    parser.add_argument("--routes", type=int, default=5, help="Routes distinctes")
+    args = parser.parse_args()
+
+    routes = [f"/api/v1/orders/r{i}/{{order_id}}" for i in range(args.routes)]
+    burst = [routes[i % args.routes] for i in range(args.errors)]
+
+    print(f"{args.errors} erreurs 401 sur {args.routes} routes")
+    print(f"{'ingestion':<14}{'requête ms':>12}{'report ms':>11}{'requêtes SQL':>14}")
+    print("-" * 51)
+
+    for name in ("per-request", "queued"):
+        engine, Session = build_database()
+        queries = [0]
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            queries[0] += 1
+
+        start = time.perf_counter()
+        if name == "per-request":
+            for route in burst:
+                legacy_record(Session, route)
+            in_request = time.perf_counter() - start
+            flushed = 0.0
+        else:
+            queue = GuardianErrorQueue()
+            for route in burst:
+                queue.record((TENANT, route, "GET", 401, None), lambda r=route: make_error(r))
+            in_request = time.perf_counter() - start
+            start = time.perf_counter()
+            flush_guardian_errors(queue, Session, GuardianConfigCache())
+            flushed = time.perf_counter() - start
+
+        assert occurrences(Session) == args.errors
+        print(f"{name:<14}{in_request * 1000:>12.1f}{flushed * 1000:>11.1f}{queries[0]:>14}")
+        engine.dispose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
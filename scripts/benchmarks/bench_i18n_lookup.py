@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark des traductions I18N
+=======================================
+Traduit --lookups cles (t() et tp(), une partie en fallback anglais) dans
+une base SQLite de --keys cles, et compare:
+- per-lookup : ancienne resolution, requete(s) SQL a chaque appel
+- bundle     : I18NService.t() / tp() servis depuis le cache des bundles
+               du processus (un chargement par namespace et langue)
+
+Usage:
+    python scripts/benchmarks/bench_i18n_lookup.py
+    python scripts/benchmarks/bench_i18n_lookup.py --lookups 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.cache import MemoryCache  # noqa: E402
+from app.modules.i18n.cache import TranslationBundleCache  # noqa: E402
+from app.modules.i18n.models import (  # noqa: E402
+    Language,
+    Translation,
+    TranslationCache,
+    TranslationKey,
+    TranslationNamespace,
+)
+from app.modules.i18n.service import I18NService  # noqa: E402
+
+TENANT = "bench"
+
+
+def build_database(keys: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Language, TranslationNamespace, TranslationKey, Translation, TranslationCache):
+        model.__table__.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+    ns = TranslationNamespace(id=uuid4(), tenant_id=TENANT, code="common", name="Common")
+    fr = Language(id=uuid4(), tenant_id=TENANT, code="fr", name="French", native_name="Francais")
+    en = Language(id=uuid4(), tenant_id=TENANT, code="en", name="English", native_name="English")
+    db.add_all([ns, fr, en])
+    for i in range(keys):
+        plural = i % 10 == 0
+        key = TranslationKey(id=uuid4(), tenant_id=TENANT, namespace_id=ns.id, key=f"key.{i}",
+                             supports_plural=plural)
+        db.add(key)
+        db.add(Translation(id=uuid4(), tenant_id=TENANT, translation_key_id=key.id, language_id=en.id,
+                           language_code="en", value=f"Value {i}"))
+        # 1 cle sur 5 sans traduction francaise (fallback anglais)
+        if i % 5:
+            db.add(Translation(
+                id=uuid4(), tenant_id=TENANT, translation_key_id=key.id, language_id=fr.id,
+                language_code="fr", value=f"Valeur {i} {{count}}",
+                plural_values={"one": "{count} valeur", "other": "{count} valeurs"} if plural else {},
+            ))
+    db.commit()
+    return engine, db
+
+
+def legacy_lookup(service: I18NService, key: str, count: int) -> str:
+    """Ancienne resolution: requetes SQL a chaque appel."""
+    if count is not None:
+        tk = service.key_repo.get_by_full_key("common", key)
+        if tk and tk.supports_plural:
+            lang = service.language_repo.get_by_code("fr")
+            trans = service.translation_repo.get_by_key_language(tk.id, lang.id) if lang else None
+            if trans and trans.plural_values:
+                form = service._get_plural_form(count, "fr")
+                value = trans.plural_values.get(form, trans.plural_values.get("other", trans.value))
+                return service._interpolate(value, {"count": count})
+    value = service.translation_repo.get_value("common", key, "fr", fallback_language_code="en")
+    params = {} if count is None else {"count": count}
+    return service._interpolate(value, params) if value else key
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark traductions I18N")
+    parser.add_argument("--lookups", type=int, default=20_000, help="Appels t() / tp()")
+    parser.add_argument("--keys", type=int, default=2_000, help="Cles du namespace")
+    args = parser.parse_args()
+
+    engine, db = build_database(args.keys)
+    queries = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        queries[0] += 1
+
+    # 1 appel sur 3 en tp()
+    lookups = [(f"key.{(i * 7) % args.keys}", i % 4 if i % 3 == 0 else None) for i in range(args.lookups)]
+
+    print(f"{args.lookups} traductions, {args.keys} cles")
+    print(f"{'resolution':<14}{'durée s':>9}{'requêtes':>10}{'µs / appel':>12}")
+    print("-" * 45)
+
+    service = I18NService(db, TENANT, bundle_cache=TranslationBundleCache(MemoryCache()))
+    queries[0] = 0
+    start = time.perf_counter()
+    expected = [legacy_lookup(service, key, n) for key, n in lookups]
+    elapsed = time.perf_counter() - start
+    print(f"{'per-lookup':<14}{elapsed:>9.2f}{queries[0]:>10}{elapsed / args.lookups * 1e6:>12.1f}")
+
+    queries[0] = 0
+    start = time.perf_counter()
+    results = [service.tp(key, n, "fr") if n is not None else service.t(key, "fr") for key, n in lookups]
+    elapsed = time.perf_counter() - start
+    print(f"{'bundle':<14}{elapsed:>9.2f}{queries[0]:>10}{elapsed / args.lookups * 1e6:>12.1f}")
+
+    assert results == expected, "Resultats differents entre les deux resolutions"
+
+    db.close()
+    engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
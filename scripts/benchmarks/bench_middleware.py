@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de la chaîne de middlewares HTTP
+===================================================
+Mesure le surcoût par couche (µs/requête) des middlewares chauds de
+app/main.py sur un petit endpoint JSON, en appelant l'application ASGI
+directement (sans serveur ni réseau).
+
+Pour chaque couche:
+- bare      : endpoint seul
+- <couche>  : endpoint + la couche seule
+- stack     : toutes les couches, dans l'ordre de app/main.py
+- basehttp  : couche BaseHTTPMiddleware « no-op » de référence, pour
+              comparer au coût d'une couche ASGI pure
+
+Le surcoût affiché est la différence de médiane (p50) et de p99 avec bare.
+
+Usage:
+    python scripts/benchmarks/bench_middleware.py
+    python scripts/benchmarks/bench_middleware.py --requests 20000 --warmup 2000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion n'est ouverte: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.core.compression import CompressionMiddleware  # noqa: E402
+from app.core.core_auth_middleware import CoreAuthMiddleware  # noqa: E402
+from app.core.error_middleware import ErrorHandlingMiddleware  # noqa: E402
+from app.core.metrics import MetricsMiddleware  # noqa: E402
+from app.core.middleware import TenantMiddleware  # noqa: E402
+from app.modules.iam.rbac_middleware import RBACMiddleware  # noqa: E402
+
+BENCH_PATH = "/v1/bench/items"
+
+
+async def _endpoint(request):
+    return JSONResponse({"id": 1, "name": "item", "price": "12.50"})
+
+
+class _NoopBaseHTTPMiddleware(BaseHTTPMiddleware):
+    """Référence: couche BaseHTTPMiddleware qui ne fait rien."""
+
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+# Ordre d'exécution de app/main.py (premier = plus externe)
+STACK = [
+    ("error", ErrorHandlingMiddleware, {}),
+    ("compression", CompressionMiddleware, {"minimum_size": 1024, "compress_level": 6}),
+    ("metrics", MetricsMiddleware, {}),
+    ("rbac", RBACMiddleware, {}),
+    ("core_auth", CoreAuthMiddleware, {}),
+    ("tenant", TenantMiddleware, {}),
+]
+
+
+def build_app(layers):
+    """Construit une application ASGI avec les couches données (externe d'abord)."""
+    app = Starlette(routes=[Route(BENCH_PATH, _endpoint)])
+    asgi = app
+    for _, cls, kwargs in reversed(layers):
+        asgi = cls(asgi, **kwargs)
+    return asgi
+
+
+def _scope():
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": BENCH_PATH,
+        "raw_path": BENCH_PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench.local"),
+            (b"x-tenant-id", b"bench-tenant"),
+            (b"accept-encoding", b"gzip"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench.local", 80),
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    return None
+
+
+async def measure(app, requests: int, warmup: int) -> list[float]:
+    """Retourne les durées par requête en microsecondes."""
+    for _ in range(warmup):
+        await app(_scope(), _receive, _send)
+
+    samples = []
+    perf = time.perf_counter
+    for _ in range(requests):
+        start = perf()
+        await app(_scope(), _receive, _send)
+        samples.append((perf() - start) * 1_000_000)
+    return samples
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(requests: int, warmup: int) -> list[tuple[str, float, float]]:
+    scenarios = [("bare", [])]
+    scenarios += [(name, [(name, cls, kwargs)]) for name, cls, kwargs in STACK]
+    scenarios.append(("basehttp", [("basehttp", _NoopBaseHTTPMiddleware, {})]))
+    scenarios.append(("stack", STACK))
+
+    results = []
+    for name, layers in scenarios:
+        samples = await measure(build_app(layers), requests, warmup)
+        results.append((name, statistics.median(samples), percentile(samples, 99)))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark des middlewares HTTP AZALS")
+    parser.add_argument("--requests", type=int, default=10_000, help="Requêtes mesurées par scénario")
+    parser.add_argument("--warmup", type=int, default=1_000, help="Requêtes de chauffe par scénario")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.warmup))
+    bare_p50, bare_p99 = results[0][1], results[0][2]
+
+    print(f"{'scénario':<14}{'p50 µs':>10}{'p99 µs':>10}{'Δp50 µs':>10}{'Δp99 µs':>10}")
+    print("-" * 54)
+    for name, p50, p99 in results:
+        print(f"{name:<14}{p50:>10.1f}{p99:>10.1f}{p50 - bare_p50:>10.1f}{p99 - bare_p99:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
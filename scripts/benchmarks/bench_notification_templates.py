@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark du rendu des templates de notification
+=========================================================
+Compare le coût de TemplateEngine.render sur N notifications réparties
+sur tous les canaux (email, SMS, push, Slack, in-app, webhook):
+- replace  : rendu historique (un str.replace par variable et par champ)
+- compiled : templates compilés une fois en segments (cache par template_id)
+
+Le script vérifie d'abord que les deux rendus produisent le même contenu.
+
+Usage:
+    python scripts/benchmarks/bench_notification_templates.py
+    python scripts/benchmarks/bench_notification_templates.py --count 100000 --variables 20
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.services.notification_service import (  # noqa: E402
+    NotificationCategory,
+    NotificationChannel,
+    NotificationContent,
+    NotificationTemplate,
+    TemplateEngine,
+)
+
+CHANNELS = [
+    NotificationChannel.EMAIL,
+    NotificationChannel.SMS,
+    NotificationChannel.PUSH,
+    NotificationChannel.SLACK,
+    NotificationChannel.IN_APP,
+    NotificationChannel.WEBHOOK,
+]
+
+
+def replace_render(
+    template: NotificationTemplate,
+    channel: NotificationChannel,
+    variables: dict,
+) -> NotificationContent:
+    """Rendu historique: un passage str.replace par variable et par champ."""
+    content = NotificationContent()
+
+    def render_string(template_str: Optional[str]) -> Optional[str]:
+        if not template_str:
+            return None
+        result = template_str
+        for key, value in variables.items():
+            result = result.replace(f"{{{{{key}}}}}", str(value))
+        return result
+
+    if channel == NotificationChannel.EMAIL:
+        content.subject = render_string(template.email_subject)
+        content.html_body = render_string(template.email_body)
+        content.body = render_string(template.email_text) or content.html_body or ""
+    elif channel == NotificationChannel.SMS:
+        content.short_message = render_string(template.sms_body)
+        content.body = content.short_message or ""
+    elif channel == NotificationChannel.PUSH:
+        content.title = render_string(template.push_title)
+        content.body = render_string(template.push_body) or ""
+    elif channel == NotificationChannel.SLACK:
+        content.body = render_string(template.slack_message) or ""
+    elif channel == NotificationChannel.IN_APP:
+        content.title = render_string(template.in_app_title)
+        content.body = render_string(template.in_app_body) or ""
+    elif channel == NotificationChannel.WEBHOOK:
+        payload_str = render_string(template.webhook_payload)
+        if payload_str:
+            try:
+                content.data = json.loads(payload_str)
+            except json.JSONDecodeError:
+                content.data = {"raw": payload_str}
+    return content
+
+
+def build_template(variable_count: int) -> NotificationTemplate:
+    """Template réaliste: chaque champ référence une partie des variables."""
+    names = [f"var{i}" for i in range(variable_count)]
+    placeholders = " ".join(f"{{{{{name}}}}}" for name in names)
+    paragraph = f"<p>Bonjour {{{{var0}}}}, voici le détail de votre compte: {placeholders}.</p>"
+    return NotificationTemplate(
+        template_id="bench",
+        name="Benchmark",
+        tenant_id="bench",
+        category=NotificationCategory.REMINDER,
+        channels=CHANNELS,
+        email_subject="Facture {{var1}} - {{var2}}",
+        email_body="<html><body>" + paragraph * 10 + "</body></html>",
+        email_text=paragraph * 5,
+        sms_body="Facture {{var1}} de {{var2}} EUR échue le {{var3}}",
+        push_title="Facture {{var1}}",
+        push_body="Montant {{var2}} EUR, échéance {{var3}}",
+        webhook_payload=json.dumps({name: f"{{{{{name}}}}}" for name in names}),
+        slack_message="*Facture {{var1}}*: " + placeholders,
+        in_app_title="Facture {{var1}}",
+        in_app_body=paragraph,
+    )
+
+
+def timed(render, template: NotificationTemplate, variables: list[dict], count: int) -> float:
+    """Retourne la latence moyenne par notification en microsecondes."""
+    start = time.perf_counter()
+    for i in range(count):
+        render(template, CHANNELS[i % len(CHANNELS)], variables[i % len(variables)])
+    return (time.perf_counter() - start) * 1_000_000 / count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark rendu templates de notification")
+    parser.add_argument("--count", type=int, default=100_000, help="Nombre de notifications rendues")
+    parser.add_argument("--variables", type=int, default=20, help="Nombre de variables par template")
+    args = parser.parse_args()
+
+    template = build_template(max(args.variables, 4))
+    variables = [
+        {f"var{i}": f"valeur-{n}-{i}" for i in range(max(args.variables, 4))}
+        for n in range(1000)
+    ]
+    engine = TemplateEngine()
+    engine.register_template(template)
+
+    mismatches = [
+        channel for channel in CHANNELS
+        if replace_render(template, channel, variables[0]) != engine.render(template, channel, variables[0])
+    ]
+    if mismatches:
+        print(f"ÉCHEC: rendus divergents pour {[c.value for c in mismatches]}")
+        return 1
+
+    replace_us = timed(replace_render, template, variables, args.count)
+    compiled_us = timed(engine.render, template, variables, args.count)
+
+    print(f"{args.count} notifications, {len(CHANNELS)} canaux, {args.variables} variables — rendus identiques")
+    print(f"{'mode':<10}{'µs/notif':>12}{'total s':>10}{'gain':>8}")
+    print("-" * 40)
+    for name, value in (("replace", replace_us), ("compiled", compiled_us)):
+        print(f"{name:<10}{value:>12.2f}{value * args.count / 1_000_000:>10.2f}{replace_us / value:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de l'import produits Odoo
+============================================
+Importe --products produits depuis un faux serveur Odoo XML-RPC local
+(latence simulée --latency-ms par appel) dans une base SQLite, et compare:
+- legacy   : un seul search_read, puis recherche + INSERT/UPDATE ORM par
+             produit dans un savepoint
+- pipeline : ProductImportService (pages lues en parallèle par curseur
+             d'ID, INSERT ... ON CONFLICT par page)
+
+Chaque variante est exécutée deux fois: création puis mise à jour.
+
+Usage:
+    python scripts/benchmarks/bench_odoo_import.py
+    python scripts/benchmarks/bench_odoo_import.py --products 50000 --workers 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.modules.inventory.models import Product  # noqa: E402
+from app.modules.odoo_import.models import (  # noqa: E402
+    OdooConnectionConfig,
+    OdooFieldMapping,
+    OdooImportHistory,
+)
+from app.modules.odoo_import.services.products import ProductImportService  # noqa: E402
+
+TENANT = "bench"
+
+
+class _Handler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+def start_odoo(products: int, latency: float) -> _Server:
+    """Faux Odoo: product.product avec search, search_count, read, search_read."""
+    records = [
+        {"id": i, "name": f"Produit {i}", "default_code": f"P-{i:07d}", "list_price": 10.0 + i % 100,
+         "standard_price": 5.0, "barcode": f"{i:013d}", "active": True, "type": "product"}
+        for i in range(1, products + 1)
+    ]
+
+    def execute_kw(db, uid, password, model, method, args, kwargs):
+        time.sleep(latency)
+        if method == "search_count":
+            return len(records)
+        if method == "search":
+            after = next((term[2] for term in args[0] if term[0] == "id"), 0)
+            return [r["id"] for r in records[after:after + kwargs["limit"]]]
+        if method == "read":
+            return [records[i - 1] for i in args[0]]
+        if method == "search_read":
+            return records
+        raise ValueError(method)
+
+    server = _Server(("127.0.0.1", 0), requestHandler=_Handler, allow_none=True, logRequests=False)
+    server.register_function(lambda: {"server_version": "17.0"}, "version")
+    server.register_function(lambda db, user, password, ctx: 2, "authenticate")
+    server.register_function(execute_kw, "execute_kw")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_import(service: ProductImportService, config: OdooConnectionConfig) -> int:
+    """Ancien import: tout en mémoire, une recherche et une écriture par produit."""
+    connector = service._get_connector(config)
+    mapper = service._get_mapper(config.id)
+    fields = mapper.get_odoo_fields("product.product")
+    mapped = mapper.map_records(
+        "product.product",
+        connector.search_read("product.product", [("active", "in", [True, False])], fields),
+        TENANT,
+    )
+    columns = set(Product.__table__.columns.keys())
+    for row in mapped:
+        savepoint = service.db.begin_nested()
+        existing = service.db.query(Product).filter(
+            Product.tenant_id == TENANT, Product.code == row["code"]
+        ).first()
+        values = {k: v for k, v in row.items() if k in columns}
+        if existing:
+            for key, value in values.items():
+                setattr(existing, key, value)
+        else:
+            service.db.add(Product(**values))
+        savepoint.commit()
+    service.db.commit()
+    return len(mapped)
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark import produits Odoo")
+    parser.add_argument("--products", type=int, default=10_000, help="Produits côté Odoo")
+    parser.add_argument("--page-size", type=int, default=ProductImportService.IMPORT_PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=ProductImportService.IMPORT_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latence par appel XML-RPC")
+    args = parser.parse_args()
+    logging.getLogger("app.modules.odoo_import").setLevel(logging.ERROR)
+
+    server = start_odoo(args.products, args.latency_ms / 1000)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{args.products} produits, pages de {args.page_size}, {args.workers} lectures "
+          f"simultanées, latence {args.latency_ms:.0f} ms")
+    print(f"{'import':<22}{'durée s':>9}{'pic Mo':>9}")
+    print("-" * 40)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in ("legacy", "pipeline"):
+            engine = create_engine(f"sqlite:///{os.path.join(workdir, name + '.sqlite')}")
+            for model in (Product, OdooConnectionConfig, OdooImportHistory, OdooFieldMapping):
+                model.__table__.create(bind=engine)
+            db = sessionmaker(bind=engine)()
+            service = ProductImportService(db, TENANT)
+            service.IMPORT_PAGE_SIZE = args.page_size
+            service.IMPORT_WORKERS = args.workers
+            config = OdooConnectionConfig(
+                tenant_id=TENANT, name="bench", odoo_url=url, odoo_database="odoo",
+                username="admin", encrypted_credential=service._encrypt_credential("secret"),
+            )
+            db.add(config)
+            db.commit()
+
+            for phase in ("création", "mise à jour"):
+                if name == "legacy":
+                    elapsed, peak = measure(lambda s=service, c=config: legacy_import(s, c))
+                else:
+                    elapsed, peak = measure(lambda s=service, c=config: s.import_products(c.id, full_sync=True))
+                assert db.query(Product).count() == args.products
+                print(f"{name + ' ' + phase:<22}{elapsed:>9.2f}{peak / 2**20:>9.1f}")
+
+            db.close()
+            engine.dispose()
+
+    server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+AZALS - Test de charge du rate limiting plateforme
+===================================================
+Envoie --rate requêtes/s (charge ouverte: les requêtes partent à heure fixe,
+qu'elles aient fini ou non) à PlatformRateLimitMiddleware devant un endpoint
+ASGI minimal, pendant --duration secondes, et mesure en parallèle la latence
+de la boucle d'événements (retard d'un asyncio.sleep(1 ms) témoin).
+
+Scénarios:
+- legacy    : ancienne implémentation (6 appels synchrones au backend par
+              requête: 3 vérifications + 3 incréments), boucle bloquée
+- async     : un appel asynchrone par requête (script Lua unique)
+- prefilter : async + pré-filtre local, un appel toutes les --sync-every
+
+Sans --redis-url, Redis est simulé par le backend mémoire plus --rtt-ms de
+latence réseau par appel (time.sleep pour legacy, asyncio.sleep sinon).
+
+Usage:
+    python scripts/benchmarks/bench_platform_rate_limit.py
+    python scripts/benchmarks/bench_platform_rate_limit.py --rate 5000 --duration 5 --rtt-ms 0.3
+    python scripts/benchmarks/bench_platform_rate_limit.py --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion n'est ouverte: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from app.core.rate_limiter import (  # noqa: E402
+    MemoryPlatformRateLimiterBackend,
+    MemoryRateLimiterBackend,
+    PlatformRateLimitMiddleware,
+    RateLimiter,
+    RedisPlatformRateLimiterBackend,
+    RedisRateLimiterBackend,
+)
+
+# Limites hors d'atteinte: on mesure le coût de la vérification, pas les rejets
+LIMITS = {"ip_limit": 10 ** 9, "tenant_limit": 10 ** 9, "global_limit": 10 ** 9}
+
+
+class SlowSyncBackend(MemoryRateLimiterBackend):
+    """Backend synchrone avec latence réseau simulée (bloquante)."""
+
+    def __init__(self, rtt: float):
+        super().__init__()
+        self.rtt = rtt
+
+    def get_count(self, key, window_seconds):
+        time.sleep(self.rtt)
+        return super().get_count(key, window_seconds)
+
+    def increment(self, key, window_seconds):
+        time.sleep(self.rtt)
+        return super().increment(key, window_seconds)
+
+
+class SlowAsyncBackend(MemoryPlatformRateLimiterBackend):
+    """Backend asynchrone avec latence réseau simulée (non bloquante)."""
+
+    def __init__(self, rtt: float):
+        super().__init__()
+        self.rtt = rtt
+
+    async def hit(self, keys, limits, costs, window_seconds, strict=True, now_ms=None):
+        await asyncio.sleep(self.rtt)
+        return await super().hit(keys, limits, costs, window_seconds, strict, now_ms)
+
+
+class LegacyPlatformRateLimitMiddleware:
+    """Référence: séquence d'appels de l'ancien middleware (synchrone)."""
+
+    def __init__(self, app, limiter: RateLimiter, window_seconds: int = 60):
+        self.app = app
+        self.limiter = limiter
+        self.window = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        headers = dict(scope["headers"])
+        client_ip = headers[b"x-forwarded-for"].decode()
+        tenant_id = headers[b"x-tenant-id"].decode()
+        self.limiter.check_rate("platform:ip", client_ip, LIMITS["ip_limit"], self.window)
+        self.limiter.check_rate("platform:tenant", tenant_id, LIMITS["tenant_limit"], self.window)
+        self.limiter.check_rate("platform:global", "all", LIMITS["global_limit"], self.window)
+        self.limiter.record_attempt("platform:ip", client_ip, self.window)
+        self.limiter.record_attempt("platform:tenant", tenant_id, self.window)
+        self.limiter.record_attempt("platform:global", "all", self.window)
+        await self.app(scope, receive, send)
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _scope(rng: random.Random, ips: int, tenants: int) -> dict:
+    ip = rng.randrange(ips)
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/v1/items",
+        "raw_path": b"/v1/items",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench.local"),
+            (b"x-forwarded-for", f"10.0.{ip // 256}.{ip % 256}".encode()),
+            (b"x-tenant-id", f"tenant-{rng.randrange(tenants)}".encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench.local", 80),
+    }
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    return None
+
+
+async def _probe_loop_lag(stop: asyncio.Event, samples: list[float]) -> None:
+    """Retard (ms) d'un réveil programmé toutes les 1 ms."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        samples.append((time.perf_counter() - start) * 1000 - 1)
+
+
+async def run_load(app, rate: int, duration: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    latencies: list[float] = []
+    lag: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe_loop_lag(stop, lag))
+    tasks = set()
+
+    async def one(scheduled: float):
+        await app(_scope(rng, 5000, 50), _receive, _send)
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+
+    start = time.perf_counter()
+    sent = 0
+    total = int(rate * duration)
+    while sent < total:
+        now = time.perf_counter()
+        due = min(int((now - start) * rate) + 1, total)
+        while sent < due:
+            task = asyncio.create_task(one(start + sent / rate))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            sent += 1
+        await asyncio.sleep(0.0005)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+
+    latencies.sort()
+    lag.sort()
+    return {
+        "achieved": total / elapsed,
+        "req_p50": statistics.median(latencies),
+        "req_p99": latencies[int(len(latencies) * 0.99) - 1],
+        "lag_p50": statistics.median(lag),
+        "lag_p99": lag[int(len(lag) * 0.99) - 1],
+        "lag_max": lag[-1],
+    }
+
+
+def build_scenarios(args):
+    rtt = args.rtt_ms / 1000
+    if args.redis_url:
+        import redis
+        import redis.asyncio as aioredis
+
+        def legacy_backend():
+            return RedisRateLimiterBackend(redis.from_url(args.redis_url, decode_responses=True))
+
+        def async_backend():
+            return RedisPlatformRateLimiterBackend(aioredis.from_url(args.redis_url))
+    else:
+        def legacy_backend():
+            return SlowSyncBackend(rtt)
+
+        def async_backend():
+            return SlowAsyncBackend(rtt)
+
+    return [
+        ("legacy", lambda: LegacyPlatformRateLimitMiddleware(_endpoint, RateLimiter(legacy_backend()))),
+        ("async", lambda: PlatformRateLimitMiddleware(_endpoint, backend=async_backend(), **LIMITS)),
+        ("prefilter", lambda: PlatformRateLimitMiddleware(
+            _endpoint, backend=async_backend(), local_sync_every=args.sync_every, **LIMITS
+        )),
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Test de charge du rate limiting plateforme")
+    parser.add_argument("--rate", type=int, default=5000, help="Requêtes par seconde (charge ouverte)")
+    parser.add_argument("--duration", type=float, default=3.0, help="Durée par scénario (s)")
+    parser.add_argument("--rtt-ms", type=float, default=0.2, help="Latence Redis simulée par appel (ms)")
+    parser.add_argument("--sync-every", type=int, default=20, help="Synchronisation du pré-filtre local")
+    parser.add_argument("--redis-url", default=None, help="Redis réel au lieu de la latence simulée")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    target = args.redis_url or f"mémoire + {args.rtt_ms} ms/appel"
+    print(f"{args.rate} req/s pendant {args.duration} s, backend: {target}")
+    print(f"{'scénario':<12}{'req/s':>9}{'req p50':>10}{'req p99':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+    print("-" * 71)
+    for name, factory in build_scenarios(args):
+        result = asyncio.run(run_load(factory(), args.rate, args.duration, args.seed))
+        print(
+            f"{name:<12}{result['achieved']:>9.0f}{result['req_p50']:>10.2f}{result['req_p99']:>10.2f}"
+            f"{result['lag_p50']:>10.2f}{result['lag_p99']:>10.2f}{result['lag_max']:>10.2f}"
+        )
+    print("(latences en ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
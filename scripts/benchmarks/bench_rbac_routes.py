@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark du lookup des routes RBAC
+============================================
+Compare la latence de résolution d'une route par RBACMiddleware:
+- scan     : parcours linéaire historique (un re.match par pattern)
+- index    : RouteIndex compilé (alternation par méthode), mémo vidé
+- memo     : RouteIndex avec mémo chaud (chemins déjà vus)
+
+Les chemins de test sont dérivés des patterns de ROUTE_PERMISSIONS,
+PUBLIC_ROUTES et AUTHENTICATED_ONLY_ROUTES, plus des chemins inconnus.
+Le script vérifie d'abord que l'index renvoie exactement les mêmes
+résultats que le parcours linéaire.
+
+Usage:
+    python scripts/benchmarks/bench_rbac_routes.py
+    python scripts/benchmarks/bench_rbac_routes.py --rounds 20
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion n'est ouverte: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+from app.modules.iam.rbac_middleware import (  # noqa: E402
+    AUTHENTICATED_ONLY_ROUTES,
+    PUBLIC_ROUTES,
+    ROUTE_PERMISSIONS,
+    RouteIndex,
+)
+
+# Valeurs concrètes pour les fragments de regex utilisés dans les patterns
+_SAMPLES = [
+    (r"[0-9a-fA-F-]+", str(uuid.UUID(int=0x1234))),
+    (r"[0-9a-zA-Z_-]+", "code_42"),
+    (r"[a-zA-Z_]+", "invoice"),
+    (r"[^/]+", "segment"),
+    (r"\d+", "42"),
+    (r".*", "x/y"),
+    (r"(/.*)?", "/ready"),
+    (r"/?", ""),
+    (r"\.", "."),
+]
+
+
+def pattern_to_path(pattern: str) -> str:
+    """Produit un chemin concret qui matche (en général) le pattern."""
+    path = pattern.lstrip("^").rstrip("$")
+    for fragment, value in _SAMPLES:
+        path = path.replace(fragment, value)
+    return path
+
+
+def scan_public(path: str) -> bool:
+    return any(re.match(pattern, path) for pattern in PUBLIC_ROUTES)
+
+
+def scan_authenticated_only(path: str) -> bool:
+    return any(re.match(pattern, path) for pattern in AUTHENTICATED_ONLY_ROUTES)
+
+
+def scan_permission(method: str, path: str):
+    for (route_method, pattern), permission in ROUTE_PERMISSIONS.items():
+        if route_method == method and re.match(pattern, path):
+            return permission
+    return None
+
+
+def scan_lookup(method: str, path: str):
+    """Reproduit la séquence de lookups d'une requête (version linéaire)."""
+    if scan_public(path):
+        return "public"
+    if scan_authenticated_only(path):
+        return "authenticated"
+    return scan_permission(method, path)
+
+
+def index_lookup(index: RouteIndex, method: str, path: str):
+    """Même séquence via l'index compilé."""
+    if index.is_public(path):
+        return "public"
+    if index.is_authenticated_only(path):
+        return "authenticated"
+    return index.find_permission(method, path)
+
+
+def build_requests() -> list[tuple[str, str]]:
+    requests = [(method, pattern_to_path(pattern)) for method, pattern in ROUTE_PERMISSIONS]
+    requests += [("GET", pattern_to_path(pattern)) for pattern in PUBLIC_ROUTES + AUTHENTICATED_ONLY_ROUTES]
+    requests += [("GET", f"/v1/unknown/{i}") for i in range(50)]
+    return requests
+
+
+def timed(func, requests, rounds: int) -> float:
+    """Retourne la latence moyenne par lookup en microsecondes."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for method, path in requests:
+            func(method, path)
+    return (time.perf_counter() - start) * 1_000_000 / (rounds * len(requests))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark lookup routes RBAC")
+    parser.add_argument("--rounds", type=int, default=10, help="Nombre de passes sur l'ensemble des chemins")
+    args = parser.parse_args()
+
+    requests = build_requests()
+    index = RouteIndex()
+
+    mismatches = [
+        (method, path) for method, path in requests
+        if scan_lookup(method, path) != index_lookup(index, method, path)
+    ]
+    if mismatches:
+        print(f"ÉCHEC: {len(mismatches)} divergences index/scan, ex: {mismatches[:3]}")
+        return 1
+
+    def index_cold(method, path):
+        index._memo.clear()
+        return index_lookup(index, method, path)
+
+    scan_us = timed(scan_lookup, requests, args.rounds)
+    cold_us = timed(index_cold, requests, args.rounds)
+    warm_us = timed(lambda method, path: index_lookup(index, method, path), requests, args.rounds)
+
+    routes = len(ROUTE_PERMISSIONS) + len(PUBLIC_ROUTES) + len(AUTHENTICATED_ONLY_ROUTES)
+    print(f"{routes} patterns, {len(requests)} chemins, {args.rounds} passes — résultats identiques")
+    print(f"{'mode':<8}{'µs/lookup':>12}{'gain':>10}")
+    print("-" * 30)
+    for name, value in (("scan", scan_us), ("index", cold_us), ("memo", warm_us)):
+        print(f"{name:<8}{value:>12.2f}{scan_us / value:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
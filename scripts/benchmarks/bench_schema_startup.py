@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de la vérification du schéma au démarrage
+============================================================
+Charge tous les modèles ORM, puis simule --workers démarrages sur une base
+SQLite déjà créée, et compare:
+- full        : création des tables (checkfirst) + validation à chaque démarrage
+- fingerprint : empreinte de Base.metadata comparée à celle enregistrée,
+                vérification complète sautée si identique
+
+Sur PostgreSQL, chaque checkfirst est une requête sur le catalogue.
+
+Usage:
+    python scripts/benchmarks/bench_schema_startup.py
+    python scripts/benchmarks/bench_schema_startup.py --workers 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+os.environ.setdefault("CORS_ORIGINS", "https://app.example.com")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+
+import app.main  # noqa: E402,F401  (enregistre tous les modèles)
+from app.db import Base  # noqa: E402
+from app.db.schema_startup import StartupTimings, ensure_schema  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark vérification du schéma au démarrage")
+    parser.add_argument("--workers", type=int, default=4, help="Démarrages simulés par mode")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/schema.db")
+        queries = [0]
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count(conn, cursor, statement, parameters, context, executemany):
+            queries[0] += 1
+
+        # Premier déploiement: création complète et empreinte enregistrée
+        ensure_schema(engine, Base, mode="full")
+
+        print(f"{len(Base.metadata.tables)} tables, {args.workers} démarrages par mode")
+        print(f"{'mode':<14}{'ms / démarrage':>16}{'requêtes SQL':>14}  phases (ms)")
+        print("-" * 72)
+
+        for mode in ("full", "fingerprint"):
+            queries[0] = 0
+            elapsed = 0.0
+            for _ in range(args.workers):
+                timings = StartupTimings()
+                start = time.perf_counter()
+                result = ensure_schema(engine, Base, mode=mode, timings=timings)
+                elapsed += time.perf_counter() - start
+            assert result.skipped == (mode == "fingerprint")
+            phases = {k: v for k, v in timings.as_dict().items() if k != "total"}
+            print(f"{mode:<14}{elapsed / args.workers * 1000:>16.1f}{queries[0] // args.workers:>14}  {phases}")
+
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
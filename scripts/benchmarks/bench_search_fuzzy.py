@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de la recherche floue sur le dictionnaire des termes
+=====================================================================
+Vocabulaire synthétique (syllabes, nombres) de --terms termes; requêtes =
+termes existants altérés d'une ou deux fautes (substitution, insertion,
+suppression).
+
+Mesures:
+- construction du TermDictionary (chargement du vocabulaire en cache)
+- TermDictionary.fuzzy() à distance 1 et 2 (p50 / p99)
+- parcours exhaustif avec calcul de distance (ancienne implémentation),
+  sur --scan-queries requêtes seulement
+
+Usage:
+    python scripts/benchmarks/bench_search_fuzzy.py
+    python scripts/benchmarks/bench_search_fuzzy.py --terms 100000 --queries 500
+"""
+
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from app.modules.search.fuzzy import TermDictionary  # noqa: E402
+
+CONSONANTS = "bcdfglmnprstv"
+VOWELS = "aeiou"
+
+
+def make_vocabulary(count: int, rng: random.Random) -> list[str]:
+    syllables = [c + v for c in CONSONANTS for v in VOWELS]
+    syllables += [c + v + e for c in CONSONANTS for v in VOWELS for e in "nrsl"]
+    terms: set[str] = set()
+    while len(terms) < count:
+        term = "".join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.2:
+            term += str(rng.randint(0, 999))
+        terms.add(term)
+    return sorted(terms)
+
+
+def misspell(term: str, errors: int, rng: random.Random) -> str:
+    for _ in range(errors):
+        pos = rng.randrange(len(term) + 1)
+        op = rng.choice("sid") if len(term) > 1 else "i"
+        if op == "s" and pos < len(term):
+            term = term[:pos] + rng.choice(string.ascii_lowercase) + term[pos + 1:]
+        elif op == "d" and pos < len(term):
+            term = term[:pos] + term[pos + 1:]
+        else:
+            term = term[:pos] + rng.choice(string.ascii_lowercase) + term[pos:]
+    return term
+
+
+def levenshtein(s1: str, s2: str) -> int:
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+def timed(queries: list[str], lookup) -> tuple[list[float], float]:
+    """Latences (ms) et nombre moyen de termes trouvés."""
+    latencies = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        found += len(lookup(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies, found / len(queries)
+
+
+def report(name: str, latencies: list[float], found: float) -> float:
+    p50 = statistics.median(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(f"{name:<22}{p50:>12.2f}{p99:>12.2f}{found:>12.1f}")
+    return p50
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark recherche floue (automate de Levenshtein)")
+    parser.add_argument("--terms", type=int, default=500_000, help="Taille du vocabulaire")
+    parser.add_argument("--queries", type=int, default=200, help="Requêtes par distance")
+    parser.add_argument("--scan-queries", type=int, default=3, help="Requêtes pour le parcours exhaustif")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.terms, rng)
+
+    start = time.perf_counter()
+    dictionary = TermDictionary(vocabulary)
+    build = time.perf_counter() - start
+
+    print(f"{len(dictionary)} termes, construction du dictionnaire {build:.2f} s")
+    print(f"{'mode':<22}{'p50 ms':>12}{'p99 ms':>12}{'termes':>12}")
+    print("-" * 58)
+
+    results = {}
+    for distance in (1, 2):
+        queries = [misspell(term, distance, rng) for term in rng.sample(vocabulary, args.queries)]
+        results[distance] = report(f"automate d={distance}",
+                                   *timed(queries, lambda q: dictionary.fuzzy(q, distance)))
+
+    queries = [misspell(term, 2, rng) for term in rng.sample(vocabulary, args.scan_queries)]
+    scan = report("parcours d=2", *timed(queries, lambda q: [t for t in vocabulary if levenshtein(q, t) <= 2]))
+
+    print("-" * 58)
+    print(f"automate vs parcours (d=2): {scan / results[2]:.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+AZALS - Benchmark de la livraison des webhooks
+===============================================
+Livre --deliveries webhooks (répartis sur --endpoints endpoints) vers un
+récepteur HTTP local (asyncio, HTTP/1.1 keep-alive, --latency-ms de temps
+de traitement par requête) et mesure le débit:
+- sequential : un envoi à la fois, nouvelle connexion par requête
+               (comportement d'un envoi synchrone par livraison), mesuré
+               sur les --sequential-limit premières livraisons
+- engine     : WebhookDeliveryEngine, client keep-alive partagé,
+               --workers envois simultanés, --per-endpoint par endpoint
+- batch      : engine + regroupement par endpoint (--batch-size payloads)
+
+La file est en mémoire (MemoryWebhookStore): on mesure le moteur et le
+transport HTTP, pas la base. Le récepteur écoute sur la boucle locale,
+refusée par la protection SSRF des endpoints: la validation d'URL est
+désactivée pour le benchmark.
+
+Usage:
+    python scripts/benchmarks/bench_webhook_delivery.py
+    python scripts/benchmarks/bench_webhook_delivery.py --deliveries 20000 --workers 64 --latency-ms 5
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+# Aucune connexion n'est ouverte: valeurs factices pour charger la configuration
+os.environ.setdefault("ENVIRONMENT", "test")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+os.environ.setdefault("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx")
+
+import httpx  # noqa: E402
+
+from app.modules.webhooks import (  # noqa: E402
+    DeliveryStatus,
+    WebhookDeliveryEngine,
+    WebhookEvent,
+    WebhookService,
+)
+from app.modules.webhooks import delivery as webhook_delivery  # noqa: E402
+from app.modules.webhooks import service as webhook_service  # noqa: E402
+
+
+async def _allow_url(url: str) -> tuple[bool, str]:
+    return True, ""
+
+
+# Récepteur sur 127.0.0.1: validation SSRF désactivée (benchmark uniquement)
+webhook_service.check_resolved_url = lambda url: (True, "")
+webhook_delivery.check_resolved_url_async = _allow_url
+
+
+class HTTPSink:
+    """Récepteur HTTP/1.1 minimal: lit la requête, répond 200 après latency secondes."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+        self.connections = 0
+        self.writers: list[asyncio.StreamWriter] = []
+        self.server = None
+        self.port = None
+
+    async def start(self) -> "HTTPSink":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        for writer in self.writers:
+            writer.close()
+        self.server.close()
+        await asyncio.sleep(0)
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.writers.append(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                keep_alive = True
+                for line in head.split(b"\r\n")[1:]:
+                    name, _, value = line.partition(b":")
+                    name = name.strip().lower()
+                    if name == b"content-length":
+                        length = int(value)
+                    elif name == b"connection" and value.strip().lower() == b"close":
+                        keep_alive = False
+                if length:
+                    await reader.readexactly(length)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                self.requests += 1
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: 15\r\n\r\n{\"status\":\"ok\"}"
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def build_service(sink: HTTPSink, args, batch_size: int) -> WebhookService:
+    service = WebhookService("bench")
+    for i in range(args.endpoints):
+        service.create_endpoint(
+            f"endpoint-{i}",
+            f"http://127.0.0.1:{sink.port}/hooks/{i}",
+            [WebhookEvent.INVOICE_CREATED],
+            max_concurrency=args.per_endpoint,
+            batch_max_size=batch_size,
+        )
+    per_endpoint = args.deliveries // args.endpoints
+    for i in range(per_endpoint):
+        service.trigger(WebhookEvent.INVOICE_CREATED, {"number": f"F-{i:06d}", "amount": "1250.00"})
+    return service
+
+
+async def run_sequential(sink: HTTPSink, args) -> tuple[float, int]:
+    service = build_service(sink, args, batch_size=1)
+    queue = service.delivery_queue()
+    attempts = queue.claim_due(args.sequential_limit, 300)
+    endpoints = queue.get_endpoints({a.endpoint_id for a in attempts})
+
+    start = time.perf_counter()
+    for attempt in attempts:
+        async with httpx.AsyncClient() as client:
+            await client.post(
+                endpoints[attempt.endpoint_id].url,
+                content=attempt.request_body.encode(),
+                headers={"Content-Type": "application/json", "Connection": "close"},
+            )
+    return time.perf_counter() - start, len(attempts)
+
+
+async def run_engine(sink: HTTPSink, args, batch_size: int) -> tuple[float, int]:
+    service = build_service(sink, args, batch_size=batch_size)
+
+    start = time.perf_counter()
+    async with WebhookDeliveryEngine(service.delivery_queue(), workers=args.workers) as engine:
+        await engine.drain()
+    elapsed = time.perf_counter() - start
+
+    delivered = len(service._store.list_attempts([DeliveryStatus.DELIVERED]))
+    return elapsed, delivered
+
+
+async def main_async(args) -> int:
+    sink = await HTTPSink(args.latency_ms / 1000).start()
+    scenarios = [
+        ("sequential", lambda: run_sequential(sink, args)),
+        ("engine", lambda: run_engine(sink, args, 1)),
+        (f"batch x{args.batch_size}", lambda: run_engine(sink, args, args.batch_size)),
+    ]
+
+    print(f"{args.deliveries} livraisons, {args.endpoints} endpoints, latence récepteur {args.latency_ms} ms")
+    print(f"{'mode':<14}{'livrés':>8}{'requêtes':>10}{'conn.':>7}{'durée s':>9}{'livr./s':>10}")
+    print("-" * 58)
+    try:
+        for name, scenario in scenarios:
+            if name == "sequential" and args.skip_sequential:
+                continue
+            requests, connections = sink.requests, sink.connections
+            elapsed, delivered = await scenario()
+            print(
+                f"{name:<14}{delivered:>8}{sink.requests - requests:>10}{sink.connections - connections:>7}"
+                f"{elapsed:>9.2f}{delivered / elapsed:>10.0f}"
+            )
+    finally:
+        await sink.stop()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark livraison webhooks")
+    parser.add_argument("--deliveries", type=int, default=5000, help="Nombre total de livraisons")
+    parser.add_argument("--endpoints", type=int, default=10, help="Nombre d'endpoints abonnés")
+    parser.add_argument("--workers", type=int, default=32, help="Envois simultanés du moteur")
+    parser.add_argument("--per-endpoint", type=int, default=8, help="Envois simultanés par endpoint")
+    parser.add_argument("--batch-size", type=int, default=50, help="Payloads par requête (scénario batch)")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Temps de traitement du récepteur")
+    parser.add_argument("--sequential-limit", type=int, default=200, help="Livraisons mesurées en séquentiel")
+    parser.add_argument("--skip-sequential", action="store_true", help="Ne pas lancer le scénario séquentiel")
+    args = parser.parse_args()
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
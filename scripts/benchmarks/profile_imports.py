@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+AZALS - Profil des imports au démarrage
+=======================================
+Lance `python -X importtime -c "import app.main"` dans un sous-processus et
+affiche:
+- le temps total d'import et la RSS du processus après import
+- les modules les plus coûteux (temps propre et cumulé)
+- les paquets externes importés par app.* (temps cumulé)
+- le temps propre agrégé par paquet (externes, app.*, app.modules.*)
+
+Avec --fork (Linux), compare aussi la mémoire privée d'un worker:
+- cold    : le worker importe app.main lui-même (sans préchargement)
+- preload : le maître importe app.main, gc.freeze(), puis fork
+            (GUNICORN_PRELOAD=true, voir scripts/deploy/gunicorn.conf.py)
+
+Usage:
+    python scripts/benchmarks/profile_imports.py
+    python scripts/benchmarks/profile_imports.py --top 40 --fork
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Aucune connexion externe: valeurs factices pour charger la configuration
+ENV = {
+    **os.environ,
+    "ENVIRONMENT": os.environ.get("ENVIRONMENT", "test"),
+    "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite:///./bench.db"),
+    "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-only-key-minimum-32-characters-xx"),
+    "CORS_ORIGINS": os.environ.get("CORS_ORIGINS", "https://app.example.com"),
+}
+
+RSS_SNIPPET = """
+import resource, sys
+import app.main
+print(f"RSS_KB={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}", file=sys.stderr)
+"""
+
+# Mémoire privée (pages non partagées) d'un worker, après un parcours GC
+# qui touche tous les objets comme le ferait le GC d'un worker en service
+FORK_SNIPPET = """
+import gc, os, sys
+
+def private_kb():
+    total = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                total += int(line.split()[1])
+    return total
+
+mode = sys.argv[1]
+if mode == "preload":
+    import app.main
+    gc.freeze()
+pid = os.fork()
+if pid == 0:
+    if mode == "cold":
+        import app.main
+    gc.collect()
+    print(f"PRIVATE_KB={private_kb()}", file=sys.stderr, flush=True)
+    os._exit(0)
+os.waitpid(pid, 0)
+"""
+
+
+def run(code: str, *args: str, importtime: bool = False) -> str:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", code, *args]
+    result = subprocess.run(command, cwd=ROOT, env=ENV, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        raise SystemExit(result.returncode)
+    return result.stderr
+
+
+def parse_importtime(output: str) -> list[tuple[str, int, int, int]]:
+    """Lignes `import time: self | cumulative | module` -> (module, self, cumul, profondeur)."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def package_of(module: str) -> str:
+    parts = module.split(".")
+    if parts[0] != "app":
+        return parts[0]
+    if len(parts) > 2 and parts[1] == "modules":
+        return ".".join(parts[:3])
+    return ".".join(parts[:2])
+
+
+def value_of(output: str, key: str) -> int:
+    for line in output.splitlines():
+        if line.startswith(f"{key}="):
+            return int(line.split("=", 1)[1])
+    raise SystemExit(f"{key} absent de la sortie")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profil des imports de app.main")
+    parser.add_argument("--top", type=int, default=25, help="Modules / paquets affichés")
+    parser.add_argument("--fork", action="store_true", help="Mémoire privée d'un worker (Linux)")
+    args = parser.parse_args()
+
+    rows = parse_importtime(run("import app.main", importtime=True))
+    total_ms = sum(r[1] for r in rows) / 1000
+    rss_mb = value_of(run(RSS_SNIPPET), "RSS_KB") / 1024
+
+    print(f"{len(rows)} modules importés, {total_ms:.0f} ms (somme des temps propres), RSS {rss_mb:.0f} Mo")
+
+    print(f"\n{'module':<60}{'propre ms':>11}{'cumulé ms':>11}")
+    print("-" * 82)
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{name:<60}{self_us / 1000:>11.1f}{cumulative_us / 1000:>11.1f}")
+
+    # Paquets hors app.* (stdlib comprise) importés directement par l'application
+    external = defaultdict(int)
+    for i, (name, _, cumulative_us, depth) in enumerate(rows):
+        parent = next((r[0] for r in rows[i + 1:] if r[3] < depth), "")
+        if not name.startswith("app") and "." not in name and parent.startswith("app"):
+            external[name] = max(external[name], cumulative_us)
+
+    print(f"\n{'paquet externe (importé par app.*)':<60}{'cumulé ms':>11}")
+    print("-" * 71)
+    for name, cumulative_us in sorted(external.items(), key=lambda i: i[1], reverse=True)[:args.top]:
+        print(f"{name:<60}{cumulative_us / 1000:>11.1f}")
+
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[package_of(name)] += self_us
+
+    print(f"\n{'paquet':<60}{'propre ms':>11}")
+    print("-" * 71)
+    for name, self_us in sorted(packages.items(), key=lambda i: i[1], reverse=True)[:args.top]:
+        print(f"{name:<60}{self_us / 1000:>11.1f}")
+
+    if args.fork:
+        if not Path("/proc/self/smaps_rollup").exists():
+            print("\n--fork: /proc/self/smaps_rollup indisponible (Linux uniquement)")
+            return 0
+        print(f"\n{'worker':<14}{'mémoire privée Mo':>20}")
+        print("-" * 34)
+        for mode in ("cold", "preload"):
+            private_mb = value_of(run(FORK_SNIPPET, mode), "PRIVATE_KB") / 1024
+            print(f"{mode:<14}{private_mb:>20.0f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
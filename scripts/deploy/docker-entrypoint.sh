@@ -46,13 +46,5 @@ python scripts/deploy/init_production.py || {
 echo "[INIT] Démarrage de Gunicorn..."
 PORT=${PORT:-80}
 echo "[INIT] Port d'écoute: $PORT"
-exec gunicorn app.main:app \
-    --worker-class uvicorn.workers.UvicornWorker \
-    --bind 0.0.0.0:$PORT \
-    --workers ${GUNICORN_WORKERS:-4} \
-    --threads ${GUNICORN_THREADS:-2} \
-    --timeout 120 \
-    --keep-alive 5 \
-    --access-logfile - \
-    --error-logfile - \
-    --capture-output
+# Workers, threads, timeouts et préchargement: scripts/deploy/gunicorn.conf.py
+exec gunicorn app.main:app -c scripts/deploy/gunicorn.conf.py
@@ -0,0 +1,47 @@
+"""
+AZALS - Configuration Gunicorn
+==============================
+Mode préchargement (GUNICORN_PRELOAD=true, défaut): le maître importe
+app.main (modèles ORM, routeurs, schémas Pydantic) une seule fois avant
+de forker. Les workers partagent ces pages en copie sur écriture au lieu
+de refaire chacun ~10 s d'imports et de garder leur propre copie.
+
+- pre_fork  : gc.freeze() déplace les objets importés dans la génération
+              permanente; le GC des workers ne les parcourt plus et ne
+              salit donc plus leurs pages (en-têtes d'objets).
+- post_fork : le pool SQLAlchemy créé à l'import est abandonné sans fermer
+              les connexions du parent; chaque worker ouvre les siennes.
+
+Le lifespan FastAPI (connexion DB, flushers en arrière-plan) s'exécute
+dans chaque worker, après le fork.
+
+Usage:
+    gunicorn app.main:app -c scripts/deploy/gunicorn.conf.py
+"""
+
+import gc
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '80')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+timeout = 120
+keepalive = 5
+accesslog = "-"
+errorlog = "-"
+capture_output = True
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.core.database import engine
+
+        engine.dispose(close=False)
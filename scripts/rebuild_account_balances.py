@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+AZALS ACCOUNTING - Reconstruction / contrôle des soldes matérialisés
+=====================================================================
+
+Reconstruit la table accounting_account_balances à partir des lignes
+d'écritures, ou vérifie sa cohérence (--check, aucune écriture).
+
+Usage:
+    python scripts/rebuild_account_balances.py --tenant TENANT_ID
+    python scripts/rebuild_account_balances.py --tenant TENANT_ID --fiscal-year UUID
+    python scripts/rebuild_account_balances.py --all --check
+
+Code retour:
+    0 = OK, 1 = erreur, 2 = écarts détectés (--check)
+"""
+
+import argparse
+import os
+import sys
+from uuid import UUID
+
+# Ajouter le chemin de l'application
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(tenant_ids: list[str] | None, fiscal_year_id: UUID | None, check_only: bool) -> int:
+    """Reconstruit ou contrôle les soldes des tenants donnés (None = tous)."""
+    # Import après path setup
+    from app.core.database import SessionLocal
+    from app.modules.accounting.balances import AccountBalanceService
+    from app.modules.accounting.models import AccountingJournalEntry
+
+    db = SessionLocal()
+
+    try:
+        if tenant_ids is None:
+            tenant_ids = [
+                row[0] for row in db.query(AccountingJournalEntry.tenant_id).distinct().all()
+            ]
+
+        exit_code = 0
+        for tenant_id in tenant_ids:
+            service = AccountBalanceService(db, tenant_id)
+
+            if check_only:
+                discrepancies = service.check_consistency(fiscal_year_id)
+                print(f"[BALANCES] {tenant_id}: {len(discrepancies)} écart(s)")
+                for d in discrepancies[:20]:
+                    print(
+                        f"[BALANCES]   {d.period} {d.account_number}: "
+                        f"table D={d.stored_debit} C={d.stored_credit} / "
+                        f"lignes D={d.actual_debit} C={d.actual_credit}"
+                    )
+                if discrepancies:
+                    exit_code = 2
+            else:
+                rows = service.rebuild(fiscal_year_id)
+                print(f"[BALANCES] {tenant_id}: {rows} solde(s) reconstruit(s)")
+
+        return exit_code
+
+    except Exception as e:
+        print(f"[BALANCES] ❌ ERREUR: {e}")
+        db.rollback()
+        return 1
+
+    finally:
+        db.close()
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(
+        description="AZALS Accounting - Reconstruction des soldes par compte et période"
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--tenant", type=str, help="Tenant ID")
+    target.add_argument("--all", action="store_true", help="Tous les tenants ayant des écritures")
+    parser.add_argument("--fiscal-year", type=UUID, default=None, help="Limiter à un exercice")
+    parser.add_argument("--check", action="store_true", help="Contrôler sans reconstruire")
+
+    args = parser.parse_args()
+
+    tenant_ids = None if args.all else [args.tenant]
+    sys.exit(run(tenant_ids, args.fiscal_year, args.check))
+
+
+if __name__ == "__main__":
+    main()
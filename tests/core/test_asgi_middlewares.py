@@ -0,0 +1,237 @@
+"""
+Tests des middlewares ASGI purs de la chaîne HTTP
+==================================================
+
+Teste:
+- ErrorHandlingMiddleware: conversion des exceptions en réponses JSON
+- CompressionMiddleware: compression en un bloc et en flux (gzip, brotli, deflate)
+- MetricsMiddleware / TenantMiddleware: transparence pour les réponses streaming
+- Propagation de request.state entre couches
+"""
+
+import asyncio
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import BROTLI_AVAILABLE, CompressionMiddleware
+from app.core.error_middleware import ErrorHandlingMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.middleware import TenantMiddleware
+
+
+async def _large_json(request):
+    return JSONResponse({"rows": [{"id": i, "label": "ligne comptable"} for i in range(200)]})
+
+
+async def _small_text(request):
+    return PlainTextResponse("ok")
+
+
+async def _stream(request):
+    async def chunks():
+        for i in range(5):
+            yield f"chunk-{i};".encode()
+    return StreamingResponse(chunks(), media_type="text/csv")
+
+
+async def _large_stream(request):
+    async def chunks():
+        for i in range(2000):
+            yield f"{i};FACTURE-{i:06d};1250.00;EUR\n".encode()
+    return StreamingResponse(chunks(), media_type="text/csv")
+
+
+async def _value_error(request):
+    raise ValueError("Montant invalide")
+
+
+async def _tenant_echo(request):
+    return JSONResponse({"tenant_id": request.state.tenant_id})
+
+
+def make_client(*middlewares) -> TestClient:
+    """Application Starlette avec les middlewares donnés (externe d'abord), comme app.add_middleware."""
+    app = Starlette(
+        routes=[
+            Route("/v1/large", _large_json),
+            Route("/v1/small", _small_text),
+            Route("/v1/stream", _stream),
+            Route("/v1/large-stream", _large_stream),
+            Route("/v1/error", _value_error),
+            Route("/v1/tenant", _tenant_echo),
+        ],
+        middleware=[Middleware(middleware, **kwargs) for middleware, kwargs in middlewares],
+    )
+    # Accept-Encoding par défaut fixé: le décodeur brotli de httpx dépend du paquet installé
+    return TestClient(app, raise_server_exceptions=False, headers={"Accept-Encoding": "gzip"})
+
+
+def collect_messages(app, path: str, accept_encoding: str) -> list[dict]:
+    """Appelle l'application ASGI directement et retourne les messages envoyés, tels quels."""
+    messages = []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"testserver"), (b"accept-encoding", accept_encoding.encode())],
+    }
+
+    requests = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        # Pas de déconnexion client: StreamingResponse attend ici jusqu'à la fin du flux
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+# ============================================================================
+# ERROR HANDLING
+# ============================================================================
+
+class TestErrorHandlingMiddleware:
+
+    def test_value_error_becomes_400(self):
+        client = make_client((ErrorHandlingMiddleware, {}))
+        response = client.get("/v1/error")
+
+        assert response.status_code == 400
+        assert response.json()["message"] == "Montant invalide"
+
+    def test_normal_response_untouched(self):
+        client = make_client((ErrorHandlingMiddleware, {}))
+        response = client.get("/v1/small")
+
+        assert response.status_code == 200
+        assert response.text == "ok"
+
+
+# ============================================================================
+# COMPRESSION
+# ============================================================================
+
+class TestCompressionMiddleware:
+
+    @pytest.fixture
+    def client(self):
+        return make_client((CompressionMiddleware, {"minimum_size": 512}))
+
+    def test_large_json_is_gzipped(self, client):
+        response = client.get("/v1/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert len(response.json()["rows"]) == 200
+
+    def test_small_response_not_compressed(self, client):
+        response = client.get("/v1/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.text == "ok"
+
+    def test_no_accept_encoding(self, client):
+        response = client.get("/v1/large", headers={"Accept-Encoding": "identity"})
+
+        assert "Content-Encoding" not in response.headers
+
+    def test_deflate_fallback(self, client):
+        response = client.get("/v1/large", headers={"Accept-Encoding": "deflate"})
+
+        assert response.headers["Content-Encoding"] == "deflate"
+
+    def test_streaming_response_is_gzipped(self, client):
+        response = client.get("/v1/large-stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert response.text.startswith("0;FACTURE-000000;")
+        assert response.text.count("\n") == 2000
+
+    def test_small_stream_not_compressed(self, client):
+        response = client.get("/v1/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in response.headers
+        assert response.text == "".join(f"chunk-{i};" for i in range(5))
+
+    def test_stream_is_flushed_incrementally(self):
+        """Avec un petit flush_size, plusieurs blocs compressés sont émis et décodables au fil de l'eau."""
+        app = CompressionMiddleware(Route("/v1/large-stream", _large_stream), minimum_size=512, flush_size=4096)
+        messages = collect_messages(app, "/v1/large-stream", "gzip")
+
+        bodies = [m["body"] for m in messages if m["type"] == "http.response.body"]
+        decoder = zlib.decompressobj(31)
+        decoded = [decoder.decompress(body) for body in bodies]
+
+        # Des données décodables arrivent avant le dernier bloc (flush intermédiaire)
+        assert any(decoded[:-1])
+        assert b"".join(decoded).count(b"\n") == 2000
+
+    @pytest.mark.skipif(not BROTLI_AVAILABLE, reason="brotli non installé")
+    @pytest.mark.parametrize("path,endpoint", [("/v1/large", _large_json), ("/v1/large-stream", _large_stream)])
+    def test_brotli_preferred(self, path, endpoint):
+        from app.core.compression import brotli
+
+        app = CompressionMiddleware(Route(path, endpoint), minimum_size=512)
+        messages = collect_messages(app, path, "gzip, deflate, br")
+
+        headers = dict(messages[0]["headers"])
+        body = b"".join(m["body"] for m in messages if m["type"] == "http.response.body")
+        assert headers[b"content-encoding"] == b"br"
+        assert len(brotli.decompress(body)) > len(body)
+
+    def test_refused_encoding_is_skipped(self, client):
+        response = client.get("/v1/large", headers={"Accept-Encoding": "br;q=0, gzip;q=0, deflate"})
+
+        assert response.headers["Content-Encoding"] == "deflate"
+
+
+# ============================================================================
+# CHAÎNE COMPLÈTE
+# ============================================================================
+
+class TestMiddlewareChain:
+
+    @pytest.fixture
+    def client(self):
+        return make_client(
+            (ErrorHandlingMiddleware, {}),
+            (CompressionMiddleware, {"minimum_size": 512}),
+            (MetricsMiddleware, {}),
+            (TenantMiddleware, {}),
+        )
+
+    def test_streaming_response_passes_through(self, client):
+        response = client.get("/v1/stream", headers={"X-Tenant-ID": "tenant-a", "Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert response.text == "".join(f"chunk-{i};" for i in range(5))
+
+    def test_tenant_state_visible_to_endpoint(self, client):
+        response = client.get("/v1/tenant", headers={"X-Tenant-ID": "tenant-a"})
+
+        assert response.json() == {"tenant_id": "tenant-a"}
+
+    def test_missing_tenant_rejected(self, client):
+        response = client.get("/v1/tenant")
+
+        assert response.status_code == 401
+
+    def test_gzip_body_decodes(self, client):
+        response = client.get("/v1/large", headers={"X-Tenant-ID": "tenant-a", "Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(response.json()["rows"]) == 200
@@ -0,0 +1,182 @@
+"""
+Tests unitaires pour le cache de contexte d'authentification
+=============================================================
+
+Teste:
+- Mise en cache / lecture par token et tenant
+- Expiration (TTL et exp du JWT) et éviction LRU
+- Invalidation via token_blacklist, désactivation User, statut Tenant
+- Rebinding des informations d'audit par requête
+"""
+
+import time
+import uuid
+
+import pytest
+
+from app.core.auth_context_cache import AuthContextCache, CachedUser
+from app.core.models import User, UserRole
+from app.core.saas_context import SaaSContext
+from app.core.token_blacklist import TokenBlacklist, blacklist_token
+from app.modules.tenants.models import Tenant, TenantStatus
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+@pytest.fixture
+def cache():
+    """Cache isolé installé comme singleton."""
+    AuthContextCache.reset_instance()
+    TokenBlacklist.reset_instance()
+    instance = AuthContextCache(ttl=60, max_size=100)
+    AuthContextCache._instance = instance
+    yield instance
+    AuthContextCache.reset_instance()
+    TokenBlacklist.reset_instance()
+
+
+def make_context(tenant_id: str = "TENANT_A", user_id: uuid.UUID | None = None) -> SaaSContext:
+    return SaaSContext(
+        tenant_id=tenant_id,
+        user_id=user_id or uuid.uuid4(),
+        role=UserRole.ADMIN,
+        permissions={"commercial.*"},
+        ip_address="10.0.0.1",
+        correlation_id="first-request",
+    )
+
+
+def make_user(context: SaaSContext) -> CachedUser:
+    return CachedUser(
+        id=context.user_id,
+        tenant_id=context.tenant_id,
+        email="user@example.com",
+        role=context.role,
+    )
+
+
+def claims(jti: str | None = None, exp_in: float = 3600) -> dict:
+    return {"jti": jti or str(uuid.uuid4()), "exp": time.time() + exp_in}
+
+
+# ============================================================================
+# LECTURE / ÉCRITURE
+# ============================================================================
+
+class TestCacheReadWrite:
+
+    def test_miss_then_hit(self, cache):
+        ctx = make_context()
+        assert cache.get("token-1", "TENANT_A") is None
+
+        cache.put("token-1", "TENANT_A", ctx, make_user(ctx), claims())
+        entry = cache.get("token-1", "TENANT_A")
+
+        assert entry is not None
+        assert entry.context == ctx
+        assert entry.user.id == ctx.user_id
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_is_scoped_by_tenant(self, cache):
+        ctx = make_context()
+        cache.put("token-1", "TENANT_A", ctx, None, claims())
+
+        assert cache.get("token-1", "TENANT_B") is None
+
+    def test_bind_replaces_audit_fields(self, cache):
+        ctx = make_context()
+        entry = cache.put("token-1", "TENANT_A", ctx, None, claims())
+
+        bound = entry.bind("10.0.0.2", "pytest", "second-request")
+
+        assert bound.ip_address == "10.0.0.2"
+        assert bound.correlation_id == "second-request"
+        assert bound.user_id == ctx.user_id
+        assert bound.permissions == ctx.permissions
+
+    def test_disabled_when_ttl_zero(self):
+        disabled = AuthContextCache(ttl=0)
+        ctx = make_context()
+
+        assert disabled.put("token-1", "TENANT_A", ctx, None, claims()) is None
+        assert disabled.get("token-1", "TENANT_A") is None
+
+
+# ============================================================================
+# EXPIRATION / ÉVICTION
+# ============================================================================
+
+class TestCacheExpiration:
+
+    def test_entry_expires_with_jwt(self, cache):
+        ctx = make_context()
+        cache.put("token-1", "TENANT_A", ctx, None, claims(exp_in=0.05))
+        assert cache.get("token-1", "TENANT_A") is not None
+
+        time.sleep(0.1)
+
+        assert cache.get("token-1", "TENANT_A") is None
+        assert len(cache) == 0
+
+    def test_expired_jwt_not_cached(self, cache):
+        ctx = make_context()
+        assert cache.put("token-1", "TENANT_A", ctx, None, claims(exp_in=-1)) is None
+
+    def test_lru_eviction(self):
+        small = AuthContextCache(ttl=60, max_size=2)
+        for i in range(3):
+            small.put(f"token-{i}", "TENANT_A", make_context(), None, claims())
+
+        assert len(small) == 2
+        assert small.get("token-0", "TENANT_A") is None
+        assert small.get("token-2", "TENANT_A") is not None
+
+
+# ============================================================================
+# INVALIDATION
+# ============================================================================
+
+class TestCacheInvalidation:
+
+    def test_blacklisted_token_is_invalidated(self, cache):
+        ctx = make_context()
+        token_claims = claims()
+        cache.put("token-1", "TENANT_A", ctx, None, token_claims)
+
+        blacklist_token(token_claims["jti"], token_claims["exp"])
+
+        assert cache.get("token-1", "TENANT_A") is None
+        assert len(cache) == 0
+
+    def test_blacklisted_token_is_not_cached(self, cache):
+        ctx = make_context()
+        token_claims = claims()
+        blacklist_token(token_claims["jti"], token_claims["exp"])
+
+        assert cache.put("token-1", "TENANT_A", ctx, None, token_claims) is None
+
+    def test_user_deactivation_invalidates(self, cache):
+        user_id = uuid.uuid4()
+        cache.put("token-1", "TENANT_A", make_context(user_id=user_id), None, claims())
+        cache.put("token-2", "TENANT_A", make_context(user_id=user_id), None, claims())
+        cache.put("token-3", "TENANT_A", make_context(), None, claims())
+
+        user = User(id=user_id, tenant_id="TENANT_A", email="u@example.com", password_hash="x", is_active=1)
+        user.is_active = 0
+
+        assert cache.get("token-1", "TENANT_A") is None
+        assert cache.get("token-2", "TENANT_A") is None
+        assert cache.get("token-3", "TENANT_A") is not None
+
+    def test_tenant_status_change_invalidates(self, cache):
+        cache.put("token-1", "TENANT_A", make_context("TENANT_A"), None, claims())
+        cache.put("token-2", "TENANT_B", make_context("TENANT_B"), None, claims())
+
+        tenant = Tenant(tenant_id="TENANT_A", name="A", email="a@example.com", status=TenantStatus.ACTIVE)
+        tenant.status = TenantStatus.SUSPENDED
+
+        assert cache.get("token-1", "TENANT_A") is None
+        assert cache.get("token-2", "TENANT_B") is not None
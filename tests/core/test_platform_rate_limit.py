@@ -0,0 +1,160 @@
+"""
+Tests du rate limiting plateforme
+=================================
+
+Teste:
+- Fenêtre glissante (sous-intervalles d'une seconde) du backend mémoire,
+  miroir du script Lua Redis
+- Vérification atomique des trois limites (IP, tenant, global)
+- Pré-filtre local: synchronisation toutes les N requêtes, blocage local
+- PlatformRateLimitMiddleware: 429 / 503, Retry-After, repli si le backend échoue
+"""
+
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.rate_limiter import (
+    AsyncPlatformRateLimiterBackend,
+    LocalTokenBucketPreFilter,
+    MemoryPlatformRateLimiterBackend,
+    PlatformRateDecision,
+    PlatformRateLimitMiddleware,
+)
+
+T0 = 1_700_000_000_000  # ms, début d'un sous-intervalle
+
+
+def hit(backend, keys, limits, now_ms, costs=None, strict=True):
+    costs = costs or [1] * len(keys)
+    return asyncio.run(backend.hit(keys, limits, costs, 60, strict=strict, now_ms=now_ms))
+
+
+class CountingBackend(AsyncPlatformRateLimiterBackend):
+    """Backend mémoire qui compte les appels et les coûts reçus."""
+
+    def __init__(self):
+        self.inner = MemoryPlatformRateLimiterBackend()
+        self.calls = []
+
+    async def hit(self, keys, limits, costs, window_seconds, strict=True, now_ms=None):
+        self.calls.append((list(costs), strict))
+        return await self.inner.hit(keys, limits, costs, window_seconds, strict, now_ms)
+
+
+class BrokenBackend(AsyncPlatformRateLimiterBackend):
+
+    async def hit(self, keys, limits, costs, window_seconds, strict=True, now_ms=None):
+        raise ConnectionError("redis down")
+
+
+class TestSlidingWindow:
+
+    def test_rolls_per_second(self):
+        backend = MemoryPlatformRateLimiterBackend()
+        for offset in (0, 10_000, 20_000):
+            assert hit(backend, ["k"], [3], T0 + offset).allowed
+
+        rejected = hit(backend, ["k"], [3], T0 + 59_999)
+        assert not rejected.allowed
+        assert rejected.retry_after_ms == 1
+        # La première requête sort de la fenêtre, pas les deux autres
+        assert hit(backend, ["k"], [3], T0 + 60_000).allowed
+        assert not hit(backend, ["k"], [3], T0 + 60_001).allowed
+
+    def test_rejection_is_atomic_across_limits(self):
+        backend = MemoryPlatformRateLimiterBackend()
+        keys = ["ip:a", "tenant:t", "global"]
+        assert hit(backend, keys, [10, 1, 100], T0).allowed
+
+        decision = hit(backend, keys, [10, 1, 100], T0 + 5)
+        assert (decision.allowed, decision.rejected) == (False, 1)
+        assert decision.counts == (1, 1, 1)
+        # Rien n'a été compté sur les autres limites
+        assert hit(backend, ["ip:a", "global"], [1, 1], T0 + 10).counts == (1, 1)
+
+    def test_sync_mode_adds_costs_and_reports_excess(self):
+        backend = MemoryPlatformRateLimiterBackend()
+
+        decision = hit(backend, ["ip", "global"], [5, 100], T0, costs=[7, 7], strict=False)
+
+        assert (decision.allowed, decision.rejected, decision.counts) == (False, 0, (7, 7))
+        assert decision.retry_after_ms == 60_000
+
+
+class TestLocalPreFilter:
+
+    def test_syncs_every_n_requests(self):
+        prefilter = LocalTokenBucketPreFilter(sync_every=10, max_staleness=3600)
+        keys, limits = ["ip", "global"], [1000, 1000]
+        synced = []
+
+        for _ in range(35):
+            assert prefilter.check(keys, limits, 60, now=0.0).allowed
+            if prefilter.due(keys, now=0.0):
+                synced.append(prefilter.take_pending(keys, now=0.0))
+
+        assert synced == [[10, 10]] * 3
+
+    def test_local_bucket_and_backend_block(self):
+        prefilter = LocalTokenBucketPreFilter(sync_every=100)
+        keys, limits = ["ip", "global"], [2, 1000]
+
+        assert prefilter.check(keys, limits, 60, now=0.0).allowed
+        assert prefilter.check(keys, limits, 60, now=0.0).allowed
+        empty = prefilter.check(keys, limits, 60, now=0.0)
+        assert (empty.allowed, empty.rejected, empty.retry_after_ms) == (False, 0, 30_001)
+        assert prefilter.check(keys, limits, 60, now=30.0).allowed
+
+        # Dépassement global signalé par le backend lors d'une synchronisation
+        keys, limits = ["ip-b", "global"], [1000, 1000]
+        prefilter.apply(keys, PlatformRateDecision(False, 1, retry_after_ms=5000), now=30.0)
+        assert prefilter.check(keys, limits, 60, now=34.0).rejected == 1
+        assert prefilter.check(keys, limits, 60, now=35.5).allowed
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+def make_client(**kwargs) -> TestClient:
+    app = Starlette(routes=[Route("/items", _ok)])
+    return TestClient(PlatformRateLimitMiddleware(app, **kwargs))
+
+
+class TestMiddleware:
+
+    def test_ip_tenant_and_global_limits(self):
+        client = make_client(ip_limit=2, tenant_limit=3, global_limit=5, backend=MemoryPlatformRateLimiterBackend())
+        ip_a = {"X-Forwarded-For": "10.0.0.1", "X-Tenant-ID": "t1"}
+        ip_b = {"X-Forwarded-For": "10.0.0.2", "X-Tenant-ID": "t1"}
+
+        assert [client.get("/items", headers=ip_a).status_code for _ in range(3)] == [200, 200, 429]
+        response = client.get("/items", headers=ip_b)
+        assert response.status_code == 200
+        tenant = client.get("/items", headers=ip_b)
+        assert tenant.status_code == 429
+        assert "Tenant" in tenant.json()["detail"]
+        assert int(tenant.headers["Retry-After"]) >= 59
+
+        assert client.get("/items", headers={"X-Forwarded-For": "10.0.0.3"}).status_code == 200
+        assert client.get("/items", headers={"X-Forwarded-For": "10.0.0.4"}).status_code == 200
+        assert client.get("/items", headers={"X-Forwarded-For": "10.0.0.5"}).status_code == 503
+
+    def test_prefilter_batches_backend_calls(self):
+        backend = CountingBackend()
+        client = make_client(ip_limit=1000, backend=backend, local_sync_every=5)
+
+        for _ in range(20):
+            assert client.get("/items", headers={"X-Forwarded-For": "10.0.0.1"}).status_code == 200
+
+        assert backend.calls == [([5, 5], False)] * 4
+
+    def test_backend_failure_falls_back_to_memory(self):
+        client = make_client(ip_limit=1, backend=BrokenBackend())
+        headers = {"X-Forwarded-For": "10.0.0.1"}
+
+        assert [client.get("/items", headers=headers).status_code for _ in range(2)] == [200, 429]
@@ -0,0 +1,186 @@
+"""
+Tests du generateur de sequences
+================================
+
+Teste:
+- Mode verrouille: numeros continus, lots next_references()
+- Types a numerotation legale: jamais de blocs
+- Mode par blocs: reservation par processus, partage entre processus
+- Reset annuel et invalidation des blocs a la modification du format
+- Reservation d'un bloc sans bloquer les autres sequences du processus
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.sequences import SequenceConfig, SequenceGenerator
+
+TENANT = "tenant-seq"
+YEAR = datetime.utcnow().year
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    SequenceConfig.__table__.create(bind=engine, checkfirst=True)
+    return engine
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "sequences.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    engine = make_engine(db_path)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def stored_number(db, entity_type):
+    db.expire_all()
+    return db.query(SequenceConfig).filter_by(tenant_id=TENANT, entity_type=entity_type).one().current_number
+
+
+class TestLockedSequences:
+
+    def test_next_reference_is_continuous(self, db):
+        generator = SequenceGenerator(db, TENANT, block_size=0)
+
+        refs = [generator.next_reference("CLIENT") for _ in range(3)]
+
+        assert refs == ["CLI-0001", "CLI-0002", "CLI-0003"]
+
+    def test_batch_takes_one_increment(self, db):
+        generator = SequenceGenerator(db, TENANT)
+
+        first = generator.next_reference("FACTURE_VENTE")
+        batch = generator.next_references("FACTURE_VENTE", 3)
+        db.commit()
+
+        assert first == f"FV-{YEAR}-00001"
+        assert batch == [f"FV-{YEAR}-00002", f"FV-{YEAR}-00003", f"FV-{YEAR}-00004"]
+        assert stored_number(db, "FACTURE_VENTE") == 4
+
+    def test_gapless_types_ignore_block_size(self, db):
+        generator = SequenceGenerator(db, TENANT, block_size=100)
+
+        generator.next_reference("PIECE_COMPTABLE")
+        db.rollback()
+        ref = generator.next_reference("PIECE_COMPTABLE")
+        db.commit()
+
+        # Le rollback annule le numero: pas de trou
+        assert ref == f"PC-{YEAR}-00001"
+        assert stored_number(db, "PIECE_COMPTABLE") == 1
+
+    def test_invalid_count(self, db):
+        with pytest.raises(ValueError):
+            SequenceGenerator(db, TENANT).next_references("CLIENT", 0)
+
+
+class TestBlockSequences:
+
+    def test_block_reserved_once_and_committed(self, db):
+        generator = SequenceGenerator(db, TENANT, block_size=10)
+
+        refs = [generator.next_reference("TICKET") for _ in range(3)]
+        db.rollback()
+
+        assert refs == [f"TIC-{YEAR}-00001", f"TIC-{YEAR}-00002", f"TIC-{YEAR}-00003"]
+        # Le bloc est reserve hors transaction de l'appelant
+        assert stored_number(db, "TICKET") == 10
+
+    def test_processes_get_disjoint_blocks(self, db, db_path):
+        other_engine = make_engine(db_path)
+        other_db = sessionmaker(bind=other_engine)()
+        try:
+            first = SequenceGenerator(db, TENANT, block_size=10)
+            second = SequenceGenerator(other_db, TENANT, block_size=10)
+
+            a1 = first.next_reference("CLIENT")
+            b1 = second.next_reference("CLIENT")
+            a2 = first.next_reference("CLIENT")
+        finally:
+            other_db.close()
+            other_engine.dispose()
+
+        assert (a1, a2, b1) == ("CLI-0001", "CLI-0002", "CLI-0011")
+        assert stored_number(db, "CLIENT") == 20
+
+    def test_batch_larger_than_block(self, db):
+        generator = SequenceGenerator(db, TENANT, block_size=5)
+
+        generator.next_reference("DEVIS")
+        batch = generator.next_references("DEVIS", 12)
+
+        assert len(set(batch)) == 12
+        assert batch[0] == f"DEV-{YEAR}-00002"
+        assert batch[-1] == f"DEV-{YEAR}-00013"
+        # Reste du bloc (4) puis un seul bloc de 8
+        assert stored_number(db, "DEVIS") == 13
+
+    def test_yearly_reset_on_reservation(self, db):
+        db.add(SequenceConfig(
+            tenant_id=TENANT, entity_type="INTERVENTION", prefix="INT", include_year=True,
+            padding=4, separator="-", current_year=YEAR - 1, current_number=57, reset_yearly=True
+        ))
+        db.commit()
+
+        ref = SequenceGenerator(db, TENANT, block_size=10).next_reference("INTERVENTION")
+
+        assert ref == f"INT-{YEAR}-0001"
+
+    def test_update_config_drops_local_blocks(self, db):
+        generator = SequenceGenerator(db, TENANT, block_size=10)
+        generator.next_reference("PROJET")
+
+        generator.update_config("PROJET", prefix="PJ")
+        ref = generator.next_reference("PROJET")
+
+        assert ref == f"PJ-{YEAR}-0011"
+
+    def test_reservation_does_not_block_other_sequences(self, engine, db, monkeypatch):
+        generator = SequenceGenerator(db, TENANT, block_size=10)
+        generator.next_reference("DEVIS")
+        reserve_block = SequenceGenerator._reserve_block
+        entered, release = threading.Event(), threading.Event()
+
+        def slow_reserve(self, engine, entity_type, year, size):
+            if entity_type == "TICKET":
+                entered.set()
+                release.wait(5)
+            return reserve_block(self, engine, entity_type, year, size)
+
+        monkeypatch.setattr(SequenceGenerator, "_reserve_block", slow_reserve)
+        other_db = sessionmaker(bind=engine)()
+        worker = threading.Thread(
+            target=lambda: SequenceGenerator(other_db, TENANT, block_size=10).next_reference("TICKET")
+        )
+        worker.start()
+        try:
+            assert entered.wait(5)
+            # Bloc local d'une autre sequence, reservation d'une troisieme
+            devis = generator.next_reference("DEVIS")
+            projet = generator.next_reference("PROJET")
+            still_reserving = worker.is_alive()
+        finally:
+            release.set()
+            worker.join(5)
+            other_db.close()
+
+        assert still_reserving
+        assert devis == f"DEV-{YEAR}-00002"
+        assert projet.endswith("0001")
+        assert stored_number(db, "TICKET") == 10
@@ -0,0 +1,62 @@
+"""
+Tests de la validation des URLs sortantes (protection SSRF)
+===========================================================
+"""
+
+import pytest
+
+from app.core import url_safety
+from app.core.url_safety import UnresolvableHostError, check_resolved_url, check_url
+
+
+class TestCheckUrl:
+
+    @pytest.mark.parametrize("url", [
+        "http://localhost/api",
+        "http://127.0.0.2/api",
+        "http://0.0.0.0/api",
+        "http://10.1.2.3/api",
+        "http://172.31.0.1/api",
+        "http://192.168.0.10/api",
+        "http://169.254.169.254/latest/meta-data",
+        "http://metadata.google.internal/computeMetadata",
+        "http://[::1]/api",
+        "http://[fe80::1]/api",
+        "http://[fd00::1]/api",
+        "http://[::ffff:127.0.0.1]/api",
+        "ftp://example.com/file",
+        "https:///no-host",
+    ])
+    def test_blocks_internal_targets(self, url):
+        is_safe, error = check_url(url)
+        assert is_safe is False
+        assert error
+
+    @pytest.mark.parametrize("url", [
+        "https://api.example.com/webhook",
+        "http://93.184.216.34:8080/hooks",
+        "https://[2606:2800:220:1::1]/hooks",
+    ])
+    def test_allows_public_targets(self, url):
+        assert check_url(url) == (True, "")
+
+
+class TestCheckResolvedUrl:
+
+    def test_blocks_any_private_address(self, monkeypatch):
+        monkeypatch.setattr(url_safety, "resolve_host", lambda host, port=None: ["93.184.216.34", "10.0.0.7"])
+        is_safe, error = check_resolved_url("https://hooks.example.com/in")
+        assert is_safe is False
+        assert "10.0.0.7" in error
+
+    def test_allows_public_addresses(self, monkeypatch):
+        monkeypatch.setattr(url_safety, "resolve_host", lambda host, port=None: ["93.184.216.34"])
+        assert check_resolved_url("https://hooks.example.com/in") == (True, "")
+
+    def test_unresolvable_host_raises(self, monkeypatch):
+        def unresolvable(host, port=None):
+            raise UnresolvableHostError(f"Hôte introuvable: {host}")
+
+        monkeypatch.setattr(url_safety, "resolve_host", unresolvable)
+        with pytest.raises(UnresolvableHostError):
+            check_resolved_url("https://nowhere.example.com/in")
@@ -0,0 +1,3 @@
+"""
+Tests du module Accounting (balance, grand livre, reporting).
+"""
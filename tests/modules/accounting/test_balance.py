@@ -0,0 +1,285 @@
+"""
+Tests de la balance et des soldes matérialisés
+===============================================
+
+Teste:
+- Soldes d'ouverture, mouvements et clôture par compte
+- Filtres exercice / période et statut des écritures
+- Pagination et balance complète (per_page=None)
+- Calcul en une seule requête, quel que soit le nombre de comptes
+- Maintenance incrémentale des soldes (comptabilisation, annulation)
+- Reconstruction et contrôle de cohérence
+- Reconstruction automatique d'une table des soldes créée vide
+"""
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.models import User
+from app.modules.accounting.balances import AccountBalanceService
+from app.modules.accounting.models import (
+    AccountingAccountBalance,
+    AccountingFiscalYear,
+    AccountingJournalEntry,
+    AccountingJournalEntryLine,
+    AccountType,
+    ChartOfAccounts,
+    EntryStatus,
+)
+from app.modules.accounting.service import AccountingService
+
+TENANT = "tenant-balance"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine, tables=[
+        User.__table__,
+        AccountingFiscalYear.__table__,
+        ChartOfAccounts.__table__,
+        AccountingJournalEntry.__table__,
+        AccountingJournalEntryLine.__table__,
+        AccountingAccountBalance.__table__,
+    ])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def fiscal_year(db):
+    fy = AccountingFiscalYear(
+        tenant_id=TENANT, name="Exercice 2024", code="FY2024",
+        start_date=datetime(2024, 1, 1), end_date=datetime(2024, 12, 31)
+    )
+    db.add(fy)
+    db.commit()
+    return fy
+
+
+def add_account(db, number: str, label: str, opening_debit="0.00", opening_credit="0.00", tenant_id=TENANT):
+    db.add(ChartOfAccounts(
+        tenant_id=tenant_id, account_number=number, account_label=label,
+        account_type=AccountType.ASSET, account_class=number[0],
+        opening_balance_debit=Decimal(opening_debit), opening_balance_credit=Decimal(opening_credit),
+        is_active=True
+    ))
+
+
+def add_entry(db, fiscal_year, period: str, lines, status=EntryStatus.POSTED, tenant_id=TENANT):
+    entry = AccountingJournalEntry(
+        tenant_id=tenant_id, entry_number=f"OD-{uuid.uuid4().hex[:8]}", piece_number="P1",
+        journal_code="OD", fiscal_year_id=fiscal_year.id,
+        entry_date=datetime.strptime(period, "%Y-%m"), period=period, label="Test",
+        status=status, is_balanced=True
+    )
+    db.add(entry)
+    db.flush()
+    for i, (account, debit, credit) in enumerate(lines, start=1):
+        db.add(AccountingJournalEntryLine(
+            tenant_id=tenant_id, entry_id=entry.id, line_number=i,
+            account_number=account, account_label=account,
+            debit=Decimal(debit), credit=Decimal(credit)
+        ))
+    db.commit()
+
+
+@pytest.fixture
+def ledger(db, fiscal_year):
+    add_account(db, "411000", "Clients", opening_debit="100.00")
+    add_account(db, "512000", "Banque")
+    add_account(db, "706000", "Prestations de services")
+    add_entry(db, fiscal_year, "2024-01", [("411000", "1200.00", "0"), ("706000", "0", "1200.00")])
+    add_entry(db, fiscal_year, "2024-02", [("512000", "1200.00", "0"), ("411000", "0", "1200.00")])
+    add_entry(db, fiscal_year, "2024-02", [("512000", "50.00", "0"), ("706000", "0", "50.00")],
+              status=EntryStatus.DRAFT)
+    # Autre tenant, même compte: ne doit jamais apparaître
+    add_account(db, "411000", "Clients", tenant_id="other")
+    add_entry(db, fiscal_year, "2024-01", [("411000", "999.00", "0")], tenant_id="other")
+    # Écritures insérées directement: alimenter les soldes matérialisés
+    AccountBalanceService(db, TENANT).rebuild()
+    AccountBalanceService(db, "other").rebuild()
+    return fiscal_year
+
+
+def by_account(entries):
+    return {e.account_number: e for e in entries}
+
+
+class TestBalance:
+
+    def test_opening_movements_closing(self, db, ledger):
+        entries, total = AccountingService(db, TENANT).get_balance(ledger.id)
+        balance = by_account(entries)
+
+        assert total == 3
+        assert [e.account_number for e in entries] == ["411000", "512000", "706000"]
+        assert balance["411000"].opening_debit == Decimal("100.00")
+        assert balance["411000"].period_debit == Decimal("1200.00")
+        assert balance["411000"].period_credit == Decimal("1200.00")
+        assert balance["411000"].closing_debit == Decimal("1300.00")
+        # Les brouillons ne sont pas pris en compte
+        assert balance["512000"].period_debit == Decimal("1200.00")
+        assert balance["706000"].closing_credit == Decimal("1200.00")
+
+    def test_period_filter(self, db, ledger):
+        entries, _ = AccountingService(db, TENANT).get_balance(ledger.id, period="2024-01")
+        balance = by_account(entries)
+
+        assert balance["411000"].period_debit == Decimal("1200.00")
+        assert balance["411000"].period_credit == Decimal("0.00")
+        assert balance["512000"].period_debit == Decimal("0.00")
+
+    def test_pagination(self, db, ledger):
+        service = AccountingService(db, TENANT)
+
+        page_2, total = service.get_balance(ledger.id, page=2, per_page=2)
+        beyond, total_beyond = service.get_balance(ledger.id, page=5, per_page=2)
+
+        assert total == 3
+        assert [e.account_number for e in page_2] == ["706000"]
+        assert beyond == []
+        assert total_beyond == 3
+
+    def test_full_balance_in_one_query(self, db, engine, fiscal_year):
+        for i in range(300):
+            add_account(db, f"6{i:05d}", f"Compte {i}")
+        add_entry(db, fiscal_year, "2024-03", [(f"6{i:05d}", "10.00", "0") for i in range(300)])
+        AccountBalanceService(db, TENANT).rebuild()
+        fiscal_year_id = fiscal_year.id
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            entries, total = AccountingService(db, TENANT).get_balance(fiscal_year_id, per_page=None)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert total == 300
+        assert len(entries) == 300
+        assert all(e.period_debit == Decimal("10.00") for e in entries)
+        assert len(statements) == 1
+
+
+class TestMaterializedBalances:
+
+    def test_post_and_cancel_update_balances(self, db, ledger):
+        service = AccountingService(db, TENANT)
+        add_entry(db, ledger, "2024-03", [("512000", "300.00", "0"), ("706000", "0", "300.00")],
+                  status=EntryStatus.DRAFT)
+        entry = db.query(AccountingJournalEntry).filter_by(tenant_id=TENANT, period="2024-03").one()
+
+        service.post_journal_entry(entry.id, uuid.uuid4())
+        posted = by_account(service.get_balance(ledger.id, period="2024-03")[0])
+
+        service.cancel_journal_entry(entry.id)
+        cancelled = by_account(service.get_balance(ledger.id, period="2024-03")[0])
+
+        assert posted["512000"].period_debit == Decimal("300.00")
+        assert posted["706000"].period_credit == Decimal("300.00")
+        assert cancelled["512000"].period_debit == Decimal("0.00")
+        assert AccountBalanceService(db, TENANT).check_consistency() == []
+
+    def test_validate_keeps_balances(self, db, ledger):
+        service = AccountingService(db, TENANT)
+        entry = db.query(AccountingJournalEntry).filter_by(tenant_id=TENANT, period="2024-01").one()
+
+        service.validate_journal_entry(entry.id, uuid.uuid4())
+
+        assert by_account(service.get_balance(ledger.id)[0])["411000"].period_debit == Decimal("1200.00")
+        assert AccountBalanceService(db, TENANT).check_consistency() == []
+
+    def test_ledger_and_summary_read_balances(self, db, ledger):
+        service = AccountingService(db, TENANT)
+
+        ledger_accounts, total = service.get_ledger(fiscal_year_id=ledger.id)
+        summary = service.get_summary(ledger.id)
+
+        assert total == 3
+        assert by_account(ledger_accounts)["512000"].balance == Decimal("1200.00")
+        # Tous les comptes du jeu sont typés ASSET: 0 (411) + 1200 (512) - 1200 (706)
+        assert summary.total_assets == Decimal("0.00")
+
+    def test_consistency_check_detects_and_rebuild_fixes(self, db, ledger):
+        balances = AccountBalanceService(db, TENANT)
+        # Écriture insérée sans passer par le service: la table est en retard
+        add_entry(db, ledger, "2024-04", [("512000", "75.00", "0"), ("411000", "0", "75.00")])
+
+        discrepancies = balances.check_consistency(ledger.id)
+        balances.rebuild(ledger.id)
+
+        assert {(d.period, d.account_number) for d in discrepancies} == {("2024-04", "512000"), ("2024-04", "411000")}
+        assert discrepancies[0].stored_debit == Decimal("0.00")
+        assert balances.check_consistency(ledger.id) == []
+
+    def test_rebuild_is_scoped_to_tenant(self, db, ledger):
+        AccountBalanceService(db, TENANT).rebuild()
+
+        other_rows = db.query(AccountingAccountBalance).filter_by(tenant_id="other").count()
+
+        assert other_rows == 1
+
+
+class TestUninitializedBalances:
+    """Table des soldes créée au démarrage, sans l'alimentation de la migration."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        # Fichier: la reconstruction est commitée sur une connexion dédiée
+        engine = create_engine(f"sqlite:///{tmp_path / 'balances.db'}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine, tables=[
+            User.__table__,
+            AccountingFiscalYear.__table__,
+            ChartOfAccounts.__table__,
+            AccountingJournalEntry.__table__,
+            AccountingJournalEntryLine.__table__,
+            AccountingAccountBalance.__table__,
+        ])
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def ledger(self, db, fiscal_year):
+        add_account(db, "411000", "Clients")
+        add_account(db, "706000", "Prestations de services")
+        add_entry(db, fiscal_year, "2024-01", [("411000", "1200.00", "0"), ("706000", "0", "1200.00")])
+        return fiscal_year
+
+    def test_read_rebuilds_missing_balances(self, db, ledger):
+        service = AccountingService(db, TENANT)
+
+        balance = by_account(service.get_balance(ledger.id)[0])
+        db.rollback()
+
+        assert balance["411000"].period_debit == Decimal("1200.00")
+        # Commitée indépendamment de la transaction de l'appelant
+        assert db.query(AccountingAccountBalance).filter_by(tenant_id=TENANT).count() == 2
+        assert AccountBalanceService(db, TENANT).ensure_initialized() is False
+
+    def test_posting_rebuilds_before_applying(self, db, ledger):
+        add_entry(db, ledger, "2024-02", [("411000", "300.00", "0"), ("706000", "0", "300.00")],
+                  status=EntryStatus.DRAFT)
+        entry = db.query(AccountingJournalEntry).filter_by(tenant_id=TENANT, period="2024-02").one()
+
+        AccountingService(db, TENANT).post_journal_entry(entry.id, uuid.uuid4())
+
+        assert AccountBalanceService(db, TENANT).check_consistency() == []
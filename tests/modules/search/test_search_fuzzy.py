@@ -0,0 +1,165 @@
+"""
+Tests de la recherche floue du module Search
+============================================
+
+Teste:
+- TermDictionary.fuzzy() contre un calcul de distance exhaustif
+- Maintien du dictionnaire trié (ajouts / retraits)
+- Recherche floue, suggestions et "vouliez-vous dire" (mémoire et base)
+- Cache du vocabulaire en base: mises à jour entre sessions, rollback
+"""
+
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.search import index as search_index
+from app.modules.search.fuzzy import TermDictionary
+from app.modules.search.models import SearchDocumentRecord, SearchIndexRecord, SearchPosting
+from app.modules.search.service import (
+    AnalyzerType,
+    FieldMapping,
+    FieldType,
+    QueryType,
+    SearchQuery,
+    SearchService,
+)
+
+TENANT = "tenant-fuzzy"
+
+MAPPINGS = [FieldMapping(name="name", field_type=FieldType.TEXT)]
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+@pytest.fixture
+def vocabulary():
+    rng = random.Random(42)
+    return sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(1, 7))) for _ in range(2000)})
+
+
+class TestTermDictionary:
+
+    @pytest.mark.parametrize("max_distance", [0, 1, 2])
+    def test_matches_exhaustive_scan(self, vocabulary, max_distance):
+        dictionary = TermDictionary(vocabulary)
+
+        for word in ["", "a", "abc", "eeeee", "badcab", "zz"] + vocabulary[::97]:
+            expected = [(t, levenshtein(word, t)) for t in vocabulary if levenshtein(word, t) <= max_distance]
+            assert dictionary.fuzzy(word, max_distance) == expected
+
+    def test_distance_capped(self, vocabulary):
+        dictionary = TermDictionary(vocabulary)
+
+        assert dictionary.fuzzy("abc", 5) == dictionary.fuzzy("abc", 2)
+
+    def test_add_and_discard_keep_order(self, vocabulary):
+        rng = random.Random(7)
+        dictionary = TermDictionary(vocabulary[:500])
+        expected = set(vocabulary[:500])
+
+        for term in rng.sample(vocabulary, 400):
+            assert dictionary.add(term) == (term not in expected)
+            expected.add(term)
+        for term in rng.sample(sorted(expected), 300):
+            assert dictionary.discard(term)
+            expected.discard(term)
+
+        rebuilt = TermDictionary(expected)
+        assert list(dictionary) == sorted(expected)
+        assert dictionary.fuzzy("abca", 2) == rebuilt.fuzzy("abca", 2)
+        assert dictionary.prefix("ab") == [t for t in sorted(expected) if t.startswith("ab")]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (SearchIndexRecord, SearchDocumentRecord, SearchPosting):
+        model.__table__.create(bind=engine)
+    search_index._vocabularies.clear()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def service(request, Session):
+    if request.param == "memory":
+        return SearchService(TENANT)
+    return SearchService(TENANT, db=Session())
+
+
+@pytest.fixture
+def clients(service):
+    index = service.create_index("clients", "client", MAPPINGS, default_analyzer=AnalyzerType.STANDARD)
+    for entity_id, name in [("c1", "Dupont"), ("c2", "Dupond"), ("c3", "Durand"), ("c4", "Martin Dupont")]:
+        service.index_document(index.id, entity_id, {"name": name})
+    return index
+
+
+class TestFuzzySearch:
+
+    def test_fuzzy_query(self, service, clients):
+        exact = service.search(clients.id, SearchQuery("dupon", query_type=QueryType.MATCH))
+        fuzzy = service.search(clients.id, SearchQuery("dupon", query_type=QueryType.MATCH, fuzziness=1))
+
+        assert exact.total_hits == 0
+        assert sorted(hit.entity_id for hit in fuzzy.hits) == ["c1", "c2", "c4"]
+
+    def test_did_you_mean(self, service, clients):
+        assert service.did_you_mean("dupomt", clients.id) == "dupont"
+        assert service.did_you_mean("xyzxyz", clients.id) is None
+
+    def test_suggestions_ranked_by_frequency(self, service, clients):
+        assert service._generate_suggestions("dupon", clients.id) == ["dupont", "dupond"]
+
+
+class TestVocabularyCache:
+
+    def test_updates_from_other_sessions(self, Session):
+        reader = SearchService(TENANT, db=Session())
+        writer = SearchService(TENANT, db=Session())
+        index = writer.create_index("clients", "client", MAPPINGS, default_analyzer=AnalyzerType.STANDARD)
+        writer.index_document(index.id, "c1", {"name": "Dupont"})
+
+        before = reader.did_you_mean("dupond", index.id)
+        writer.index_document(index.id, "c2", {"name": "Dupons"})
+        writer.delete_document(index.id, "c1")
+        after = reader.did_you_mean("dupond", index.id)
+
+        assert (before, after) == ("dupont", "dupons")
+
+    def test_rolled_back_terms_not_cached(self, Session):
+        service = SearchService(TENANT, db=Session())
+        index = service.create_index("clients", "client", MAPPINGS, default_analyzer=AnalyzerType.STANDARD)
+        service.index_document(index.id, "c1", {"name": "Dupont"})
+        service.did_you_mean("dupond", index.id)
+
+        db = Session()
+        pending = SearchService(TENANT, db=db)
+        definition = pending.get_index(index.id)
+        doc = pending._build_document(definition, "c2", {"name": "Dupons"}, None)
+        pending._store.write_documents(definition, [doc], [])
+        assert [t for t, _ in pending._store.fuzzy_terms(index.id, "dupond", 1)] == ["dupons", "dupont"]
+        db.rollback()
+
+        assert [t for t, _ in service._store.fuzzy_terms(index.id, "dupond", 1)] == ["dupont"]
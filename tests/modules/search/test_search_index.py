@@ -0,0 +1,297 @@
+"""
+Tests de l'index inversé du module Search
+=========================================
+
+Teste (stockage mémoire et base):
+- Indexation, mise à jour et suppression via la table entity_id -> doc_num
+- Requêtes match / AND / préfixe / wildcard sur le dictionnaire des termes
+- Scoring BM25 sur les postings
+- Persistance entre instances et réindexation
+- Indexation incrémentale sur événements d'entités (dont entités métier
+  enregistrées au démarrage), cache des types indexés et file d'indexation
+"""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.commercial.models import Customer, CustomerType
+from app.modules.search import events
+from app.modules.search.entities import default_search_entities, register_default_search_entities
+from app.modules.search.index import SQLSearchStore, decode_postings, encode_postings
+from app.modules.search.models import SearchDocumentRecord, SearchIndexRecord, SearchPosting
+from app.modules.search.service import (
+    AnalyzerType,
+    FieldMapping,
+    FieldType,
+    QueryType,
+    SearchQuery,
+    SearchService,
+)
+
+TENANT = "tenant-search"
+
+MAPPINGS = [
+    FieldMapping(name="name", field_type=FieldType.TEXT, boost=2.0),
+    FieldMapping(name="description", field_type=FieldType.TEXT),
+    FieldMapping(name="category", field_type=FieldType.KEYWORD),
+    FieldMapping(name="price", field_type=FieldType.DECIMAL),
+]
+
+PRODUCTS = {
+    "p1": {"name": "Ordinateur portable", "description": "Portable 15 pouces pour bureau",
+           "category": "info", "price": Decimal("899.00")},
+    "p2": {"name": "Souris sans fil", "description": "Souris ergonomique pour ordinateur",
+           "category": "info", "price": Decimal("29.90")},
+    "p3": {"name": "Chaise de bureau", "description": "Chaise ergonomique",
+           "category": "mobilier", "price": Decimal("249.00")},
+}
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (SearchIndexRecord, SearchDocumentRecord, SearchPosting):
+        model.__table__.create(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def Session(engine):
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(params=["memory", "sql"])
+def service(request, Session):
+    if request.param == "memory":
+        return SearchService(TENANT)
+    return SearchService(TENANT, db=Session())
+
+
+@pytest.fixture
+def products(service):
+    index = service.create_index("products", "product", MAPPINGS, default_analyzer=AnalyzerType.STANDARD)
+    for entity_id, fields in PRODUCTS.items():
+        service.index_document(index.id, entity_id, dict(fields))
+    return index
+
+
+def entity_ids(result):
+    return [hit.entity_id for hit in result.hits]
+
+
+class TestPostingsCodec:
+
+    def test_roundtrip(self):
+        postings = {0: (1, 5), 3: (2, 7), 130: (1, 300), 70000: (4, 12)}
+
+        data = encode_postings(postings)
+
+        assert decode_postings(data) == postings
+        assert len(data) < 20
+
+
+class TestSearchIndex:
+
+    def test_match_and_bm25_ranking(self, service, products):
+        result = service.search(products.id, SearchQuery("ordinateur", query_type=QueryType.MATCH))
+
+        # "ordinateur" est dans le nom (boosté) de p1, dans la description de p2
+        assert entity_ids(result) == ["p1", "p2"]
+        assert result.hits[0].score > result.hits[1].score > 0
+
+    def test_and_query(self, service, products):
+        result = service.search(products.id, SearchQuery("ergonomique chaise"))
+
+        assert entity_ids(result) == ["p3"]
+
+    def test_prefix_and_wildcard(self, service, products):
+        prefix = service.search(products.id, SearchQuery("ergo", query_type=QueryType.PREFIX))
+        wildcard = service.search(products.id, SearchQuery("s*ris", query_type=QueryType.WILDCARD))
+
+        assert sorted(entity_ids(prefix)) == ["p2", "p3"]
+        assert entity_ids(wildcard) == ["p2"]
+
+    def test_match_all_with_filters(self, service, products):
+        result = service.search(products.id, SearchQuery(
+            "", filters={"category": "info"}, range_filters={"price": (Decimal("100"), None)}
+        ))
+
+        assert entity_ids(result) == ["p1"]
+
+    def test_update_replaces_postings(self, service, products):
+        first = service._find_document(products.id, "p2")
+
+        service.index_document(products.id, "p2", {"name": "Clavier", "description": "Clavier mécanique"})
+
+        assert service.search(products.id, SearchQuery("souris")).total_hits == 0
+        assert entity_ids(service.search(products.id, SearchQuery("clavier"))) == ["p2"]
+        updated = service._find_document(products.id, "p2")
+        assert (updated.doc_num, updated.version) == (first.doc_num, 2)
+        assert service.get_index(products.id).document_count == 3
+
+    def test_delete_document(self, service, products):
+        assert service.delete_document(products.id, "p3")
+
+        assert service.search(products.id, SearchQuery("chaise")).total_hits == 0
+        assert service.get_index(products.id).document_count == 2
+        assert service.suggest("cha", products.id) == []
+
+    def test_suggest_uses_term_dictionary(self, service, products):
+        suggestions = service.suggest("erg", products.id)
+
+        assert [s.text for s in suggestions] == ["ergonomique"]
+        assert suggestions[0].frequency == 2
+
+    def test_reindex_applies_new_synonyms(self, service, products):
+        service.update_synonyms(products.id, {"souris": ["mouse"]})
+
+        job = service.start_reindex(products.id)
+
+        assert job.processed_documents == 3
+        assert entity_ids(service.search(products.id, SearchQuery("mouse"))) == ["p2"]
+
+
+class TestPersistence:
+
+    def test_index_survives_new_instance(self, Session, products):
+        other = SearchService(TENANT, db=Session())
+
+        index = other.get_index_by_name("products")
+        result = other.search(index.id, SearchQuery("bureau", query_type=QueryType.MATCH))
+
+        assert index.document_count == 3
+        assert sorted(entity_ids(result)) == ["p1", "p3"]
+        assert SearchService("other-tenant", db=Session()).get_index(index.id) is None
+
+    def test_save_index_scoped_to_tenant(self, Session, products):
+        other = SQLSearchStore(Session(), "other-tenant")
+        hijacked = SearchService(TENANT, db=Session()).get_index(products.id)
+        hijacked.name = "hijacked"
+
+        with pytest.raises(IntegrityError):
+            other.save_index(hijacked)
+
+        assert SearchService(TENANT, db=Session()).get_index(products.id).name == "products"
+
+    @pytest.fixture
+    def service(self, Session):
+        return SearchService(TENANT, db=Session())
+
+
+Base = declarative_base()
+
+
+class Product(Base):
+    __tablename__ = "search_test_products"
+
+    id = Column(Integer, primary_key=True)
+    tenant_id = Column(String(50), nullable=False)
+    name = Column(String(100), nullable=False)
+
+
+class TestEntityEvents:
+
+    @pytest.fixture
+    def registered(self, engine, Session):
+        Product.__table__.create(bind=engine)
+        events.register_search_entity(Product, "product", lambda p: {"name": p.name}, session_factory=Session)
+        events.get_indexed_types_cache().invalidate()
+        yield
+        events.unregister_search_entity(Product)
+        events.get_indexed_types_cache().invalidate()
+
+    def test_changes_indexed_after_commit(self, Session, registered):
+        search = SearchService(TENANT, db=Session())
+        index = search.create_index("products", "product", MAPPINGS[:1])
+        db = Session()
+
+        product = Product(id=1, tenant_id=TENANT, name="Imprimante laser")
+        db.add(product)
+        db.commit()
+        created = search.search(index.id, SearchQuery("imprimante")).total_hits
+
+        product.name = "Scanner"
+        db.flush()
+        db.rollback()
+        after_rollback = search.search(index.id, SearchQuery("scanner")).total_hits
+
+        db.delete(db.get(Product, 1))
+        db.commit()
+        deleted = search.search(index.id, SearchQuery("imprimante")).total_hits
+
+        assert (created, after_rollback, deleted) == (1, 0, 0)
+
+    def test_unindexed_tenant_skipped_without_session(self, Session, registered, monkeypatch):
+        opened = []
+
+        def counting_session():
+            opened.append(1)
+            return Session()
+
+        monkeypatch.setattr(events, "_session_factory", counting_session)
+        db = Session()
+        db.add(Product(id=1, tenant_id=TENANT, name="Imprimante laser"))
+        db.commit()
+        db.add(Product(id=2, tenant_id=TENANT, name="Scanner"))
+        db.commit()
+        assert len(opened) == 1
+
+        # Cache invalidé à la création de l'index
+        search = SearchService(TENANT, db=Session())
+        index = search.create_index("products", "product", MAPPINGS[:1])
+        db.get(Product, 2).name = "Scanner couleur"
+        db.commit()
+
+        assert len(opened) == 2
+        assert search.search(index.id, SearchQuery("scanner")).total_hits == 1
+
+    def test_changes_queued_when_flusher_running(self, Session, registered, monkeypatch):
+        queue = events.SearchChangeQueue()
+        flusher = events.SearchIndexingFlusher(queue, interval=60)
+        monkeypatch.setattr(events, "_queue", queue)
+        monkeypatch.setattr(events, "_flusher", flusher)
+        search = SearchService(TENANT, db=Session())
+        index = search.create_index("products", "product", MAPPINGS[:1])
+
+        db = Session()
+        db.add(Product(id=1, tenant_id=TENANT, name="Imprimante laser"))
+        db.commit()
+        queued = (len(queue), search.search(index.id, SearchQuery("imprimante")).total_hits)
+
+        assert flusher.flush() == 1
+        assert queued == (1, 0)
+        assert search.search(index.id, SearchQuery("imprimante")).total_hits == 1
+
+    def test_default_entities_indexed(self, engine, Session):
+        Customer.__table__.create(bind=engine)
+        entities = default_search_entities()
+        register_default_search_entities(entities, session_factory=Session)
+        try:
+            search = SearchService(TENANT, db=Session())
+            index = search.create_index("customers", "customer", [
+                FieldMapping(name="name", field_type=FieldType.TEXT),
+                FieldMapping(name="city", field_type=FieldType.TEXT),
+                FieldMapping(name="type", field_type=FieldType.KEYWORD),
+            ])
+            db = Session()
+            db.add(Customer(tenant_id=TENANT, code="C001", name="Boulangerie Martin",
+                            city="Lyon", type=CustomerType.CUSTOMER))
+            db.commit()
+            result = search.search(index.id, SearchQuery("boulangerie lyon"))
+        finally:
+            for model, _, _ in entities:
+                events.unregister_search_entity(model)
+
+        assert result.total_hits == 1
+        assert result.hits[0].source["type"] == CustomerType.CUSTOMER.value
+        assert "email" not in result.hits[0].source
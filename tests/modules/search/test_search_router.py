@@ -0,0 +1,87 @@
+"""
+Tests du router API Search
+==========================
+
+Index du tenant, recherche et autocomplétion (service en mémoire).
+"""
+
+from uuid import uuid4
+from unittest.mock import Mock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_current_user
+from app.core.dependencies_v2 import get_saas_context, get_saas_core
+from app.modules.search.router import get_search_service, router
+from app.modules.search.service import AnalyzerType, FieldMapping, FieldType, SearchService
+
+TENANT = "tenant-search"
+
+
+@pytest.fixture
+def service():
+    service = SearchService(TENANT)
+    index = service.create_index("products", "product", [
+        FieldMapping(name="name", field_type=FieldType.TEXT),
+        FieldMapping(name="category", field_type=FieldType.KEYWORD, facetable=True),
+    ], default_analyzer=AnalyzerType.STANDARD)
+    service.index_document(index.id, "p1", {"name": "Imprimante laser", "category": "info"})
+    service.index_document(index.id, "p2", {"name": "Imprimante jet d'encre", "category": "info"})
+    service.index_document(index.id, "p3", {"name": "Chaise de bureau", "category": "mobilier"})
+    service.index = index
+    return service
+
+
+@pytest.fixture
+def client(service):
+    user = Mock()
+    user.id = uuid4()
+    user.tenant_id = TENANT
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_search_service] = lambda: service
+    # Permissions accordées
+    app.dependency_overrides[get_saas_context] = lambda: Mock()
+    app.dependency_overrides[get_saas_core] = lambda: Mock(authorize=Mock(return_value=True))
+    return TestClient(app)
+
+
+def test_list_indexes(client, service):
+    response = client.get("/search/indexes")
+
+    assert response.status_code == 200
+    assert [(i["id"], i["document_count"]) for i in response.json()] == [(service.index.id, 3)]
+
+
+def test_search(client, service):
+    response = client.post(f"/search/indexes/{service.index.id}/query", json={
+        "query_text": "imprimante", "query_type": "match", "facets": ["category"],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_hits"] == 2
+    assert sorted(hit["entity_id"] for hit in body["hits"]) == ["p1", "p2"]
+    assert body["facets"]["category"] == [{"value": "info", "count": 2}]
+
+
+def test_suggest(client, service):
+    response = client.get(f"/search/indexes/{service.index.id}/suggest", params={"q": "impr"})
+
+    assert response.status_code == 200
+    assert [s["text"] for s in response.json()] == ["imprimante"]
+
+
+def test_unknown_index(client):
+    assert client.post("/search/indexes/unknown/query", json={"query_text": "x"}).status_code == 404
+    assert client.get("/search/indexes/unknown/suggest", params={"q": "impr"}).status_code == 404
+
+
+def test_permission_denied(client):
+    client.app.dependency_overrides[get_saas_core] = lambda: Mock(authorize=Mock(return_value=False))
+
+    assert client.get("/search/indexes").status_code == 403
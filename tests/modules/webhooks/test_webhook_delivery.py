@@ -0,0 +1,393 @@
+"""
+Tests du moteur de livraison Webhooks
+=====================================
+
+Teste (stockage mémoire et base, transport HTTP simulé):
+- Livraison signée depuis la file, statistiques et logs des endpoints
+- Retry avec backoff exponentiel jusqu'à max_retries
+- Concurrence bornée par endpoint et disjoncteur
+- Regroupement des payloads d'un même événement par endpoint
+- File durable partagée entre instances (SQLWebhookStore / SQLDeliveryQueue)
+- Moteur de fond du lifespan (start_delivery_engine / stop_delivery_engine)
+- Protection SSRF (création, modification, avant chaque envoi), livraison
+  manuelle réservée et health check réel
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.webhooks import (
+    DeliveryStatus,
+    SQLDeliveryQueue,
+    WebhookDeliveryEngine,
+    WebhookEvent,
+    WebhookService,
+    WebhookStatus,
+    sign_payload,
+)
+from app.core import url_safety
+from app.modules.webhooks.delivery import start_delivery_engine, stop_delivery_engine
+from app.modules.webhooks.models import WebhookDeliveryRecord, WebhookEndpointRecord
+
+TENANT = "tenant-webhooks"
+
+# Résolution DNS simulée (hôte -> adresses), adresse publique par défaut
+DNS = {}
+
+
+@pytest.fixture(autouse=True)
+def fake_dns(monkeypatch):
+    DNS.clear()
+    monkeypatch.setattr(url_safety, "resolve_host", lambda host, port=None: DNS.get(host, ["93.184.216.34"]))
+    yield DNS
+
+
+class Sink:
+    """Récepteur HTTP simulé: enregistre les requêtes, répond status_code."""
+
+    def __init__(self, status_code: int = 200, delay: float = 0.0):
+        self.status_code = status_code
+        self.delay = delay
+        self.requests: list[httpx.Request] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return httpx.Response(self.status_code, json={"status": "ok"})
+        finally:
+            self.in_flight -= 1
+
+
+def make_engine(service: WebhookService, sink: Sink, **kwargs) -> WebhookDeliveryEngine:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(sink))
+    return WebhookDeliveryEngine(service.delivery_queue(), client=client, **kwargs)
+
+
+def trigger_invoices(service: WebhookService, count: int) -> list[str]:
+    return [
+        delivery_id
+        for i in range(count)
+        for delivery_id in service.trigger(WebhookEvent.INVOICE_CREATED, {"number": f"F-{i:04d}"})
+    ]
+
+
+class TestWebhookDeliveryEngine:
+
+    async def test_delivers_signed_payload(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+        [delivery_id] = trigger_invoices(service, 1)
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            assert await engine.drain() == 1
+
+        [request] = sink.requests
+        body = request.content.decode()
+        assert request.headers["X-Webhook-Signature"] == sign_payload(
+            body, endpoint.secret, endpoint.signature_version
+        )
+        assert json.loads(body)["data"] == {"number": "F-0000"}
+        attempt = service.get_delivery_attempts(json.loads(body)["id"])[0]
+        assert (attempt.id, attempt.status, attempt.response_status_code) == (delivery_id, DeliveryStatus.DELIVERED, 200)
+        assert service.get_endpoint(endpoint.id).successful_deliveries == 1
+        assert [log.success for log in service.get_logs()] == [True]
+
+    async def test_retries_with_backoff_until_max_retries(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint(
+            "ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED],
+            max_retries=3, retry_delay_seconds=60,
+        )
+        [delivery_id] = trigger_invoices(service, 1)
+        sink = Sink(status_code=503)
+
+        async with make_engine(service, sink) as engine:
+            await engine.drain()
+            attempt = service._store.get_attempt(delivery_id)
+            assert attempt.status == DeliveryStatus.RETRYING
+            assert attempt.attempt_number == 2
+            delay = attempt.next_retry_at - attempt.completed_at
+            assert delay == timedelta(seconds=60)
+
+            # Deuxième échec: délai doublé
+            attempt.next_retry_at = datetime.now()
+            await engine.drain()
+            assert attempt.next_retry_at - attempt.completed_at == timedelta(seconds=120)
+
+            attempt.next_retry_at = datetime.now()
+            await engine.drain()
+
+        assert len(sink.requests) == 3
+        assert (attempt.status, attempt.attempt_number, attempt.error_message) == (DeliveryStatus.FAILED, 3, "HTTP 503")
+        assert service.get_endpoint(endpoint.id).failed_deliveries == 3
+
+    async def test_limits_concurrency_per_endpoint(self):
+        service = WebhookService(TENANT)
+        service.create_endpoint("A", "https://a.example.com/hooks", [WebhookEvent.INVOICE_CREATED], max_concurrency=2)
+        service.create_endpoint("B", "https://b.example.com/hooks", [WebhookEvent.INVOICE_CREATED], max_concurrency=5)
+        trigger_invoices(service, 20)
+        sink = Sink(delay=0.01)
+
+        async with make_engine(service, sink, workers=10) as engine:
+            assert await engine.drain() == 40
+
+        assert len(sink.requests) == 40
+        assert 2 < sink.max_in_flight <= 7
+
+    async def test_circuit_breaker_postpones_deliveries(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint(
+            "ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED], max_concurrency=1,
+        )
+        trigger_invoices(service, 5)
+        sink = Sink(status_code=500)
+
+        async with make_engine(service, sink, workers=1, failure_threshold=2, reset_timeout=60) as engine:
+            await engine.drain()
+
+        assert len(sink.requests) == 2
+        attempts = service._store.list_attempts(list(DeliveryStatus))
+        pending = [a for a in attempts if a.status == DeliveryStatus.PENDING]
+        assert len(pending) == 3
+        assert all(a.attempt_number == 1 and a.next_retry_at > datetime.now() for a in pending)
+        assert service.get_endpoint(endpoint.id).total_deliveries == 2
+
+    async def test_batches_same_event_per_endpoint(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint(
+            "ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED], batch_max_size=10,
+        )
+        trigger_invoices(service, 25)
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            await engine.drain()
+
+        sizes = sorted(int(r.headers["X-Webhook-Batch-Size"]) if "X-Webhook-Batch-Size" in r.headers else 1
+                       for r in sink.requests)
+        assert sizes == [5, 10, 10]
+        batch = json.loads(next(r for r in sink.requests if "X-Webhook-Batch-Size" in r.headers).content)
+        assert batch["event"] == "invoice.created"
+        assert len(batch["deliveries"]) == batch["count"]
+        assert service.get_endpoint(endpoint.id).successful_deliveries == 25
+
+    async def test_paused_endpoint_is_postponed(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+        trigger_invoices(service, 1)
+        service.pause_endpoint(endpoint.id)
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            await engine.drain()
+
+        assert sink.requests == []
+        assert service.get_statistics()["queued_deliveries"] == 0
+        [attempt] = service._store.list_attempts([DeliveryStatus.PENDING])
+        assert attempt.next_retry_at > datetime.now()
+
+    async def test_manual_deliver(self):
+        service = WebhookService(TENANT)
+        service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+        [delivery_id] = trigger_invoices(service, 1)
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            attempt = await service.deliver(delivery_id, engine)
+
+        assert attempt.status == DeliveryStatus.DELIVERED
+        assert len(sink.requests) == 1
+        with pytest.raises(ValueError):
+            await service.deliver("unknown")
+
+    async def test_manual_deliver_skips_attempt_claimed_by_engine(self):
+        service = WebhookService(TENANT)
+        service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+        [delivery_id] = trigger_invoices(service, 1)
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            # Réservée par le moteur de fond, pas encore envoyée
+            [claimed] = service.delivery_queue().claim_due(10, 300)
+            with pytest.raises(ValueError, match="déjà en cours"):
+                await service.deliver(delivery_id, engine)
+            await engine.deliver([claimed])
+            with pytest.raises(ValueError, match="terminée"):
+                await service.deliver(delivery_id, engine)
+
+        assert len(sink.requests) == 1
+
+    async def test_check_health_probes_endpoint(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+
+        async with make_engine(service, Sink(status_code=405)) as engine:
+            health = await service.check_health(endpoint.id, engine)
+        assert (health.is_healthy, health.status_code) == (True, 405)
+
+        sink = Sink(status_code=503)
+        async with make_engine(service, sink) as engine:
+            health = await service.check_health(endpoint.id, engine)
+        assert (health.is_healthy, health.status_code, health.error_message) == (False, 503, "HTTP 503")
+        assert [r.method for r in sink.requests] == ["HEAD"]
+        assert len(service.get_health_history(endpoint.id)) == 2
+
+
+class TestEndpointUrlSafety:
+
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1:8080/hooks",
+        "http://localhost/hooks",
+        "http://10.0.0.1/hooks",
+        "http://192.168.1.1/hooks",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/hooks",
+        "http://[::ffff:10.0.0.1]/hooks",
+        "file:///etc/passwd",
+    ])
+    def test_create_rejects_internal_url(self, url):
+        service = WebhookService(TENANT)
+        with pytest.raises(ValueError, match="URL non autorisée"):
+            service.create_endpoint("ERP", url, [WebhookEvent.INVOICE_CREATED])
+        assert service.list_endpoints() == []
+
+    def test_create_rejects_host_resolving_to_private_network(self, fake_dns):
+        fake_dns["erp.internal.example.com"] = ["93.184.216.34", "172.16.0.4"]
+        with pytest.raises(ValueError, match="172.16.0.4"):
+            WebhookService(TENANT).create_endpoint(
+                "ERP", "https://erp.internal.example.com/hooks", [WebhookEvent.INVOICE_CREATED]
+            )
+
+    def test_update_rejects_internal_url(self):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+
+        with pytest.raises(ValueError, match="URL non autorisée"):
+            service.update_endpoint(endpoint.id, name="Metadata", url="http://169.254.169.254/")
+
+        reloaded = service.get_endpoint(endpoint.id)
+        assert (reloaded.name, reloaded.url) == ("ERP", "https://erp.example.com/hooks")
+
+    async def test_url_rechecked_before_each_send(self, fake_dns):
+        service = WebhookService(TENANT)
+        endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+        [delivery_id] = trigger_invoices(service, 1)
+        # Le nom DNS vise désormais le réseau interne
+        fake_dns["erp.example.com"] = ["127.0.0.1"]
+        sink = Sink()
+
+        async with make_engine(service, sink) as engine:
+            await engine.drain()
+            health = await service.check_health(endpoint.id, engine)
+
+        assert sink.requests == []
+        attempt = service._store.get_attempt(delivery_id)
+        assert attempt.status == DeliveryStatus.RETRYING
+        assert attempt.error_message.startswith("URL non autorisée")
+        assert not health.is_healthy and health.error_message.startswith("URL non autorisée")
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # Base fichier: une connexion par thread (asyncio.to_thread), comme en
+    # production; une connexion partagée (StaticPool) mêle les transactions
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'webhooks.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    for model in (WebhookEndpointRecord, WebhookDeliveryRecord):
+        model.__table__.create(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class TestSQLWebhookStore:
+
+    async def test_queue_is_shared_between_instances(self, session_factory):
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            endpoint = service.create_endpoint(
+                "ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED], max_retries=2,
+            )
+            delivery_ids = trigger_invoices(service, 3)
+
+        sink = Sink()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(sink))
+        async with WebhookDeliveryEngine(SQLDeliveryQueue(session_factory), client=client) as engine:
+            assert await engine.drain() == 3
+            assert await engine.drain() == 0
+        # Livrées: plus réservables pour une livraison manuelle
+        assert SQLDeliveryQueue(session_factory).claim(delivery_ids, 300) == []
+
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            reloaded = service.get_endpoint(endpoint.id)
+            assert reloaded.events == {WebhookEvent.INVOICE_CREATED}
+            assert (reloaded.total_deliveries, reloaded.successful_deliveries) == (3, 3)
+            logs = service.get_logs(endpoint_id=endpoint.id)
+            assert sorted(log.id for log in logs) == sorted(delivery_ids)
+            assert all(log.success and log.final_status_code == 200 for log in logs)
+            assert WebhookService("other-tenant", db=db).get_endpoint(endpoint.id) is None
+
+    async def test_failures_mark_endpoint_failing(self, session_factory):
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            endpoint = service.create_endpoint(
+                "ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED], max_retries=1,
+            )
+            trigger_invoices(service, 6)
+
+        sink = Sink(status_code=500)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(sink))
+        async with WebhookDeliveryEngine(SQLDeliveryQueue(session_factory), client=client, workers=1) as engine:
+            await engine.drain()
+
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            reloaded = service.get_endpoint(endpoint.id)
+            assert reloaded.status == WebhookStatus.FAILING
+            assert reloaded.consecutive_failures == 5
+            assert len(service.get_logs(success=False)) == 5
+            assert len(service._store.list_attempts([DeliveryStatus.PENDING])) == 1
+
+
+class TestLifespanEngine:
+
+    async def test_triggered_webhook_delivered_in_background(self, session_factory):
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            endpoint = service.create_endpoint("ERP", "https://erp.example.com/hooks", [WebhookEvent.INVOICE_CREATED])
+
+        sink = Sink()
+        client = httpx.AsyncClient(transport=httpx.MockTransport(sink))
+        await start_delivery_engine(SQLDeliveryQueue(session_factory), client=client, poll_interval=0.01)
+        try:
+            # Déclenché après le démarrage: livré par la boucle de fond, sans drain()
+            with session_factory() as db:
+                [delivery_id] = trigger_invoices(WebhookService(TENANT, db=db), 1)
+            for _ in range(500):
+                if sink.requests:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await stop_delivery_engine()
+
+        assert len(sink.requests) == 1
+        with session_factory() as db:
+            service = WebhookService(TENANT, db=db)
+            assert service.get_endpoint(endpoint.id).successful_deliveries == 1
+            [log] = service.get_logs(endpoint_id=endpoint.id)
+            assert (log.id, log.success) == (delivery_id, True)
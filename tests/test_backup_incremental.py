@@ -0,0 +1,246 @@
+"""
+Tests des sauvegardes incrémentales et différentielles
+======================================================
+
+- Marqueur par table (updated_at) et lignes modifiées / supprimées seules
+- Recouvrement sous le marqueur (transactions commitées en retard)
+- Tables sans updated_at recopiées en entier, sauf tables en insertion seule
+- Chaînage incrémentale -> précédente, différentielle -> complète
+- Restauration par relecture de la chaîne, complète ou d'une table
+- Rétention: les sauvegardes parentes d'une incrémentale sont conservées
+"""
+
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.backup.models import Backup, BackupConfig, BackupStatus, BackupType, RestoreLog
+from app.modules.backup.schemas import BackupConfigCreate, BackupCreate, RestoreRequest
+from app.modules.backup.service import BackupService
+from app.modules.backup.stream import BackupStreamReader, RemovedKeys, pack_keys, unpack_keys
+
+TENANT = "tenant-backup"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (BackupConfig, Backup, RestoreLog):
+        model.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE invoices (id INTEGER PRIMARY KEY, tenant_id TEXT, number TEXT, updated_at TEXT)"))
+        # Pas de clé ni de colonne de suivi: recopiée en entier à chaque sauvegarde
+        conn.execute(text("CREATE TABLE email_logs (tenant_id TEXT, subject TEXT)"))
+        # Lignes modifiables sans updated_at: recopiée en entier
+        conn.execute(text("CREATE TABLE support_tickets (id INTEGER PRIMARY KEY, tenant_id TEXT, status TEXT, created_at TEXT)"))
+        # Insertion seule: suivie par created_at
+        conn.execute(text("CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, tenant_id TEXT, action TEXT, created_at TEXT)"))
+        conn.execute(
+            text("INSERT INTO invoices (tenant_id, number, updated_at) VALUES (:t, :n, :u)"),
+            # Une heure d'écart: au-delà du recouvrement du marqueur
+            [{"t": TENANT, "n": f"F-{i:04d}", "u": f"2026-01-{1 + i // 24:02d} {i % 24:02d}:00:00.000000"}
+             for i in range(50)],
+        )
+        conn.execute(
+            text("INSERT INTO email_logs (tenant_id, subject) VALUES (:t, :s)"),
+            [{"t": TENANT, "s": f"Relance {i}"} for i in range(4)],
+        )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def service(db, tmp_path):
+    service = BackupService(db, TENANT)
+    service.create_config(BackupConfigCreate(storage_path=str(tmp_path)))
+    return service
+
+
+def backup(service, backup_type=BackupType.INCREMENTAL) -> Backup:
+    return service.create_backup(BackupCreate(backup_type=backup_type))
+
+
+def restore(service, backup, tables=None) -> RestoreLog:
+    return service.restore_backup(
+        RestoreRequest(backup_id=str(backup.id), tables_to_restore=tables), restored_by="tests"
+    )
+
+
+def change_invoices(db):
+    db.execute(text(
+        "UPDATE invoices SET updated_at = '2026-02-01 0' || id || ':00:00.000000' WHERE id IN (1, 2, 3)"
+    ))
+    db.execute(
+        text("INSERT INTO invoices (tenant_id, number, updated_at) VALUES (:t, :n, :u)"),
+        [{"t": TENANT, "n": f"F-NEW-{i}", "u": f"2026-02-01 0{i}:00:00.000000"} for i in (4, 5)],
+    )
+    db.execute(text("DELETE FROM invoices WHERE id = 10"))
+    db.commit()
+
+
+class TestIncrementalBackup:
+
+    def test_incremental_contains_changes_only(self, service):
+        full = backup(service, BackupType.FULL)
+        change_invoices(service.db)
+
+        incremental = backup(service)
+
+        assert incremental.status == BackupStatus.COMPLETED
+        assert incremental.backup_type == BackupType.INCREMENTAL
+        assert (incremental.parent_backup_id, incremental.base_backup_id) == (full.id, full.id)
+        # 3 modifiées + 2 insérées + la ligne au marqueur (>=), email_logs recopiée
+        assert incremental.records_count == 6 + 4
+        assert incremental.deleted_count == 1
+        assert incremental.watermarks["invoices"] == {
+            "column": "updated_at", "value": "2026-02-01 05:00:00.000000", "snapshot": False,
+        }
+        assert incremental.watermarks["email_logs"]["snapshot"] is True
+        assert incremental.file_size < full.file_size
+
+        with BackupStreamReader(incremental.file_path, service._get_encryption_key()) as reader:
+            [(_, deleted)] = list(reader.iter_table("invoices/deleted"))
+        assert deleted == [[10, 10]]
+
+    def test_incremental_and_differential_chains(self, service):
+        full = backup(service, BackupType.FULL)
+        change_invoices(service.db)
+        first = backup(service)
+        service.db.execute(text("UPDATE invoices SET updated_at = '2026-03-01 00:00:00.000000' WHERE id = 4"))
+        service.db.commit()
+
+        second = backup(service)
+        differential = backup(service, BackupType.DIFFERENTIAL)
+
+        assert (second.parent_backup_id, second.base_backup_id) == (first.id, full.id)
+        assert second.records_count == 2 + 4
+        assert second.deleted_count == 0
+        assert (differential.parent_backup_id, differential.base_backup_id) == (full.id, full.id)
+        assert differential.records_count == 7 + 4
+        assert differential.deleted_count == 1
+
+    def test_without_reference_becomes_full(self, service):
+        first = backup(service)
+
+        assert first.backup_type == BackupType.FULL
+        assert first.parent_backup_id is None
+        assert first.records_count == 54
+
+    def test_late_commit_below_watermark_is_included(self, service):
+        backup(service, BackupType.FULL)
+        change_invoices(service.db)
+        first = backup(service)
+        # Transaction ouverte avant la sauvegarde, commitée après: valeur
+        # antérieure au marqueur (05:00), dans le recouvrement
+        service.db.execute(text("UPDATE invoices SET updated_at = '2026-02-01 04:50:00.000000' WHERE id = 20"))
+        service.db.commit()
+
+        second = backup(service)
+
+        assert first.watermarks["invoices"]["value"] == "2026-02-01 05:00:00.000000"
+        # id 20 + la ligne au marqueur relue (remplacée par clé à la restauration)
+        assert second.records_count == 2 + 4
+
+    def test_mutable_table_without_updated_at_is_snapshot(self, service):
+        service.db.execute(
+            text("INSERT INTO support_tickets (tenant_id, status, created_at) VALUES (:t, 'open', :c)"),
+            [{"t": TENANT, "c": f"2026-01-01 0{i}:00:00.000000"} for i in range(3)],
+        )
+        service.db.execute(
+            text("INSERT INTO audit_logs (tenant_id, action, created_at) VALUES (:t, 'create', :c)"),
+            [{"t": TENANT, "c": f"2026-01-01 0{i}:00:00.000000"} for i in range(3)],
+        )
+        service.db.commit()
+        backup(service, BackupType.FULL)
+        service.db.execute(text("UPDATE support_tickets SET status = 'closed' WHERE id = 1"))
+        service.db.execute(text(
+            "INSERT INTO audit_logs (tenant_id, action, created_at) VALUES (:t, 'update', '2026-01-01 09:00:00.000000')"
+        ), {"t": TENANT})
+        service.db.commit()
+
+        incremental = backup(service)
+
+        assert incremental.watermarks["support_tickets"]["snapshot"] is True
+        assert incremental.watermarks["audit_logs"] == {
+            "column": "created_at", "value": "2026-01-01 09:00:00.000000", "snapshot": False,
+        }
+        with BackupStreamReader(incremental.file_path, service._get_encryption_key()) as reader:
+            tickets = [row for _, rows in reader.iter_table("support_tickets") for row in rows]
+            audit = [row for _, rows in reader.iter_table("audit_logs") for row in rows]
+        assert sorted(row[2] for row in tickets) == ["closed", "open", "open"]
+        # Nouvelle entrée + celle au marqueur (02:00, dans le recouvrement)
+        assert sorted(row[0] for row in audit) == [3, 4]
+
+    def test_restore_replays_chain(self, service):
+        backup(service, BackupType.FULL)
+        change_invoices(service.db)
+        backup(service)
+        service.db.execute(text("UPDATE invoices SET updated_at = '2026-03-01 00:00:00.000000' WHERE id = 4"))
+        service.db.commit()
+        last = backup(service)
+
+        restore_log = restore(service, last)
+
+        assert restore_log.status == BackupStatus.COMPLETED
+        assert set(restore_log.tables_restored) == {"invoices", "email_logs", "support_tickets", "audit_logs"}
+        # invoices: complète + deux incrémentales; email_logs: dernier snapshot seul
+        assert restore_log.records_restored == (50 + 6 + 2) + 4
+
+        restore_log = restore(service, last, ["email_logs"])
+        assert (restore_log.tables_restored, restore_log.records_restored) == (["email_logs"], 4)
+
+    def test_restore_fails_on_broken_chain(self, service):
+        full = backup(service, BackupType.FULL)
+        change_invoices(service.db)
+        incremental = backup(service)
+        os.remove(full.file_path)
+
+        restore_log = restore(service, incremental)
+
+        assert restore_log.status == BackupStatus.FAILED
+        assert "Chaîne de sauvegarde incomplète" in restore_log.error_message
+
+    def test_retention_keeps_chain_parents(self, service):
+        service.get_config().max_backups = 1
+        full = backup(service, BackupType.FULL)
+        incremental = backup(service)
+        service.db.refresh(full)
+
+        assert (full.status, incremental.status) == (BackupStatus.COMPLETED, BackupStatus.COMPLETED)
+        assert os.path.exists(full.file_path)
+
+        replacement = backup(service, BackupType.FULL)
+        service.db.refresh(full)
+        service.db.refresh(incremental)
+        assert replacement.status == BackupStatus.COMPLETED
+        assert (full.status, incremental.status) == (BackupStatus.DELETED, BackupStatus.DELETED)
+
+
+class TestBackupKeys:
+
+    def test_integer_keys_are_packed_in_ranges(self):
+        packed = pack_keys([1, 2, 3, 7, 8, "a-uuid"])
+
+        assert packed == [[1, 3], [7, 8], ["a-uuid"]]
+        assert list(unpack_keys(packed)) == [1, 2, 3, 7, 8, "a-uuid"]
+
+    @pytest.mark.parametrize("previous, current, removed", [
+        ([1, 2, 3, 4, 6], [2, 4, 5], [1, 3, 6]),
+        (["b", "a", "c"], ["c", "a"], ["b"]),
+        ([1, 2], [], [1, 2]),
+    ])
+    def test_removed_keys(self, previous, current, removed):
+        diff = RemovedKeys(iter(previous))
+        for key in current:
+            diff.seen(key)
+
+        assert sorted(diff.finish()) == removed
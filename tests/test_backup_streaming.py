@@ -0,0 +1,206 @@
+"""
+Tests des sauvegardes en flux
+=============================
+
+- Sauvegarde découpée en blocs chiffrés, checksum calculé à l'écriture
+- Restauration complète (checksum vérifié) et d'une seule table
+- Détection des blocs altérés, déplacés ou supprimés
+- Lecture des sauvegardes au format historique
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import secrets
+import struct
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.backup.models import Backup, BackupConfig, BackupStatus, RestoreLog
+from app.modules.backup.schemas import BackupConfigCreate, BackupCreate, RestoreRequest
+from app.modules.backup.service import BackupService
+from app.modules.backup.stream import (
+    BackupFormatError,
+    BackupStreamReader,
+    BackupStreamWriter,
+    is_stream_backup,
+)
+
+TENANT = "tenant-backup"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (BackupConfig, Backup, RestoreLog):
+        model.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE invoices (id INTEGER PRIMARY KEY, tenant_id TEXT, number TEXT, amount TEXT)"))
+        conn.execute(text("CREATE TABLE support_tickets (id INTEGER PRIMARY KEY, tenant_id TEXT, subject TEXT)"))
+        conn.execute(
+            text("INSERT INTO invoices (tenant_id, number, amount) VALUES (:t, :n, '100.00')"),
+            [{"t": TENANT if i % 5 else "other-tenant", "n": f"F-{i:04d}"} for i in range(1, 301)],
+        )
+        conn.execute(
+            text("INSERT INTO support_tickets (tenant_id, subject) VALUES (:t, :s)"),
+            [{"t": TENANT, "s": f"Ticket {i}"} for i in range(7)],
+        )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def service(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(BackupService, "BACKUP_CHUNK_ROWS", 100)
+    service = BackupService(db, TENANT)
+    service.create_config(BackupConfigCreate(storage_path=str(tmp_path)))
+    return service
+
+
+def restore(service, backup, tables=None):
+    return service.restore_backup(
+        RestoreRequest(backup_id=str(backup.id), tables_to_restore=tables), restored_by="tests"
+    )
+
+
+class TestStreamingBackup:
+
+    def test_backup_is_written_in_chunks(self, service):
+        backup = service.create_backup(BackupCreate())
+
+        assert backup.status == BackupStatus.COMPLETED
+        assert is_stream_backup(backup.file_path)
+        with open(backup.file_path, "rb") as f:
+            assert backup.file_checksum == hashlib.sha256(f.read()).hexdigest()
+        assert {"invoices", "support_tickets"} <= set(backup.tables_included)
+        assert backup.records_count == 240 + 7
+
+        with BackupStreamReader(backup.file_path, service._get_encryption_key()) as reader:
+            assert (reader.index["invoices"].chunks, reader.index["invoices"].rows) == (3, 240)
+            chunks = list(reader.iter_table("invoices"))
+        columns, rows = chunks[0]
+        assert columns == ["id", "tenant_id", "number", "amount"]
+        assert [len(rows) for _, rows in chunks] == [100, 100, 40]
+        assert {row[1] for _, rows in chunks for row in rows} == {TENANT}
+
+    def test_full_restore_verifies_checksum(self, service):
+        backup = service.create_backup(BackupCreate())
+
+        restore_log = restore(service, backup)
+
+        assert restore_log.status == BackupStatus.COMPLETED
+        assert {"invoices", "support_tickets"} <= set(restore_log.tables_restored)
+        assert restore_log.records_restored == 247
+        assert backup.restore_count == 1
+
+        backup.file_checksum = "0" * 64
+        restore_log = restore(service, backup)
+        assert restore_log.status == BackupStatus.FAILED
+        assert "Checksum" in restore_log.error_message
+
+    def test_single_table_restore_skips_other_tables(self, service, monkeypatch):
+        backup = service.create_backup(BackupCreate())
+        decoded = []
+        original = BackupStreamReader._decode_chunk
+        monkeypatch.setattr(
+            BackupStreamReader, "_decode_chunk",
+            lambda self, payload: decoded.append(payload) or original(self, payload),
+        )
+
+        restore_log = restore(service, backup, ["support_tickets"])
+
+        assert restore_log.status == BackupStatus.COMPLETED
+        assert (restore_log.tables_restored, restore_log.records_restored) == (["support_tickets"], 7)
+        assert len(decoded) == 1
+
+        restore_log = restore(service, backup, ["unknown_table"])
+        assert restore_log.status == BackupStatus.FAILED
+
+    def test_legacy_backup_is_still_restorable(self, service):
+        data = {"invoices": [{"id": 1}, {"id": 2}], "users": [{"id": 3}]}
+        compressed = gzip.compress(json.dumps(data).encode())
+        ciphertext, nonce = service._encrypt_data(compressed)
+        path = f"{service.get_config().storage_path}/legacy.azals.bak"
+        with open(path, "wb") as f:
+            f.write(nonce + ciphertext)
+        backup = Backup(
+            tenant_id=TENANT, reference="BKP-LEGACY", status=BackupStatus.COMPLETED, file_path=path,
+            file_checksum=hashlib.sha256(compressed).hexdigest(), is_compressed=True,
+            encryption_iv=base64.b64encode(nonce).decode(), restore_count=0,
+        )
+        service.db.add(backup)
+        service.db.commit()
+
+        restore_log = restore(service, backup, ["invoices"])
+
+        assert restore_log.status == BackupStatus.COMPLETED
+        assert (restore_log.tables_restored, restore_log.records_restored) == (["invoices"], 2)
+
+
+class TestBackupStreamFormat:
+
+    @pytest.fixture
+    def key(self):
+        return secrets.token_bytes(32)
+
+    @pytest.fixture
+    def path(self, tmp_path, key):
+        path = str(tmp_path / "stream.azals.bak")
+        with BackupStreamWriter(path, key) as writer:
+            writer.write_chunk("a", ["id"], [(1,), (2,)])
+            writer.write_chunk("a", ["id"], [(3,)])
+            writer.write_chunk("b", ["id"], [(4,)])
+        return path
+
+    def test_roundtrip(self, path, key):
+        with BackupStreamReader(path, key) as reader:
+            assert [(t, rows) for t, _, rows in reader.iter_all()] == [
+                ("a", [[1], [2]]), ("a", [[3]]), ("b", [[4]])
+            ]
+            assert list(reader.iter_table("b")) == [(["id"], [[4]])]
+
+    def test_tampered_chunk_is_rejected(self, path, key):
+        with open(path, "r+b") as f:
+            f.seek(60)
+            byte = f.read(1)
+            f.seek(60)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+        with BackupStreamReader(path, key) as reader, pytest.raises(BackupFormatError):
+            list(reader.iter_table("a"))
+
+    def test_wrong_key_is_rejected(self, path):
+        with BackupStreamReader(path, secrets.token_bytes(32)) as reader, pytest.raises(BackupFormatError):
+            list(reader.iter_all())
+
+    def test_removed_chunk_is_detected(self, path, key):
+        with open(path, "rb") as f:
+            data = f.read()
+        header_size, frame_size = 22, 23
+        # Longueur du premier bloc de "a": en-tête + nom + ciphertext
+        _, _, name_len, size, _ = struct.unpack(">BIHI12s", data[header_size:header_size + frame_size])
+        first = header_size + frame_size + name_len + size
+        # Le deuxième bloc (seq=1) prend la place du premier
+        with open(path, "wb") as f:
+            f.write(data[:header_size] + data[first:])
+
+        with BackupStreamReader(path, key) as reader, pytest.raises(BackupFormatError):
+            list(reader.iter_all())
+
+    def test_failed_write_leaves_no_file(self, tmp_path, key):
+        path = tmp_path / "failed.azals.bak"
+        with pytest.raises(RuntimeError), BackupStreamWriter(str(path), key) as writer:
+            writer.write_chunk("a", ["id"], [(1,)])
+            raise RuntimeError("échec lecture")
+
+        assert list(tmp_path.iterdir()) == []
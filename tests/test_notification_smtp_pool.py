@@ -0,0 +1,201 @@
+"""
+Tests de l'envoi email SMTP mutualisé
+=====================================
+
+Teste, contre un serveur SMTP local minimal (asyncio):
+- Réutilisation des connexions du pool (un login par connexion)
+- Rotation après max_messages_per_connection messages
+- Reconnexion transparente quand le serveur a fermé une connexion inactive
+- NotificationService.send_batch: envoi concurrent borné, échecs isolés
+"""
+
+import asyncio
+from email.message import EmailMessage
+
+import pytest
+
+from app.services.notification_service import (
+    NotificationCategory,
+    NotificationChannel,
+    NotificationRecipient,
+    NotificationService,
+    NotificationStatus,
+    NotificationTemplate,
+    SMTPConnectionPool,
+    SMTPEmailProvider,
+)
+
+REJECTED = "rejected@example.com"
+
+
+class SMTPStub:
+    """Serveur SMTP en mémoire: EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET, QUIT."""
+
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+        self.messages: list[str] = []
+        self.writers: list[asyncio.StreamWriter] = []
+        self.server = None
+        self.port = None
+
+    async def start(self) -> "SMTPStub":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        self.drop_all()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop_all(self) -> None:
+        """Ferme côté serveur toutes les connexions ouvertes."""
+        for writer in self.writers:
+            writer.close()
+        self.writers = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.writers.append(writer)
+
+        def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+
+        reply("220 stub ESMTP")
+        try:
+            while True:
+                line = (await reader.readline()).decode().rstrip("\r\n")
+                if not line:
+                    return
+                command = line.split(" ", 1)[0].upper()
+                if command == "EHLO":
+                    writer.write(b"250-stub\r\n250 AUTH PLAIN LOGIN\r\n")
+                elif command == "AUTH":
+                    self.logins += 1
+                    reply("235 Authentication successful")
+                elif command == "MAIL":
+                    reply("250 OK")
+                elif command == "RCPT":
+                    reply("550 No such user" if REJECTED in line else "250 OK")
+                elif command == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    body = []
+                    while (data := await reader.readline()) != b".\r\n":
+                        body.append(data.decode())
+                    self.messages.append("".join(body))
+                    reply("250 OK queued")
+                elif command in ("RSET", "NOOP"):
+                    reply("250 OK")
+                elif command == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    return
+                else:
+                    reply("502 Command not implemented")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def smtp_stub():
+    stub = await SMTPStub().start()
+    yield stub
+    await stub.stop()
+
+
+def make_provider(stub: SMTPStub, **kwargs) -> SMTPEmailProvider:
+    return SMTPEmailProvider(
+        host="127.0.0.1",
+        port=stub.port,
+        username="azals",
+        password="secret",
+        from_email="noreply@azalscore.test",
+        use_tls=False,
+        **kwargs,
+    )
+
+
+def make_service(provider: SMTPEmailProvider) -> NotificationService:
+    service = NotificationService()
+    service.register_provider(NotificationChannel.EMAIL, provider)
+    service.register_template(NotificationTemplate(
+        template_id="invoice_reminder",
+        name="Relance facture",
+        tenant_id="tenant-1",
+        category=NotificationCategory.REMINDER,
+        channels=[NotificationChannel.EMAIL],
+        email_subject="Facture {{number}}",
+        email_text="Bonjour {{name}}, la facture {{number}} est échue.",
+    ))
+    return service
+
+
+def recipients(count: int, rejected: int = -1):
+    for i in range(count):
+        email = REJECTED if i == rejected else f"client{i}@example.com"
+        yield NotificationRecipient(email=email), {"name": f"Client {i}", "number": f"F-{i:04d}"}
+
+
+class TestSMTPConnectionPool:
+
+    async def test_batch_reuses_pooled_connections(self, smtp_stub):
+        service = make_service(make_provider(smtp_stub, max_connections=3))
+
+        batch = await service.send_batch("invoice_reminder", recipients(50), "tenant-1")
+
+        assert (batch.status, batch.total_count, batch.sent_count, batch.failed_count) == ("completed", 50, 50, 0)
+        assert len(smtp_stub.messages) == 50
+        assert smtp_stub.connections <= 3
+        assert smtp_stub.logins == smtp_stub.connections
+        assert "Subject: Facture F-0007" in "".join(smtp_stub.messages)
+        assert service.get_batch(batch.batch_id) is batch
+
+    async def test_connection_rotates_after_max_messages(self, smtp_stub):
+        provider = make_provider(smtp_stub, max_connections=1, max_messages_per_connection=4)
+        service = make_service(provider)
+
+        batch = await service.send_batch("invoice_reminder", recipients(10), "tenant-1")
+        await provider.close()
+
+        assert batch.sent_count == 10
+        assert smtp_stub.connections == 3
+
+    async def test_reconnects_after_server_drop(self, smtp_stub):
+        provider = make_provider(smtp_stub, max_connections=1)
+        service = make_service(provider)
+        await service.send_batch("invoice_reminder", recipients(2), "tenant-1")
+
+        smtp_stub.drop_all()
+        await asyncio.sleep(0.05)
+        batch = await service.send_batch("invoice_reminder", recipients(2), "tenant-1")
+
+        assert batch.sent_count == 2
+        assert smtp_stub.connections == 2
+
+    async def test_rejected_recipient_does_not_break_session(self, smtp_stub):
+        service = make_service(make_provider(smtp_stub, max_connections=1))
+
+        batch = await service.send_batch("invoice_reminder", recipients(5, rejected=2), "tenant-1")
+
+        assert (batch.sent_count, batch.failed_count) == (4, 1)
+        assert smtp_stub.connections == 1
+        failed = [n for n in service._notifications.values() if n.status != NotificationStatus.SENT]
+        assert [n.recipient.email for n in failed] == [REJECTED]
+        assert failed[0].error_message
+
+    async def test_pool_close_quits_idle_connections(self, smtp_stub):
+        pool = SMTPConnectionPool("127.0.0.1", smtp_stub.port, use_tls=False, max_connections=2)
+        message = EmailMessage()
+        message["Subject"] = "test"
+        message.set_content("body")
+        await pool.send_message(message, "a@example.com", ["b@example.com"])
+        assert len(pool._idle) == 1
+
+        await pool.close()
+
+        assert pool._idle == []
+        assert smtp_stub.logins == 0
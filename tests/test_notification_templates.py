@@ -0,0 +1,72 @@
+"""
+Tests du moteur de templates de notification
+============================================
+
+- Rendu compilé identique au remplacement de placeholders historique
+- Placeholders inconnus conservés, accolades littérales préservées
+- Cache des formes compilées et recompilation après modification
+"""
+
+from app.services.notification_service import (
+    NotificationCategory,
+    NotificationChannel,
+    NotificationTemplate,
+    TemplateEngine,
+)
+
+
+def make_template(**fields) -> NotificationTemplate:
+    return NotificationTemplate(
+        template_id="invoice_due",
+        name="Facture échue",
+        tenant_id="tenant-1",
+        category=NotificationCategory.REMINDER,
+        channels=[NotificationChannel.EMAIL, NotificationChannel.WEBHOOK],
+        **fields,
+    )
+
+
+class TestTemplateEngine:
+
+    def test_renders_every_placeholder(self):
+        engine = TemplateEngine()
+        template = make_template(
+            email_subject="Facture {{number}}",
+            email_text="Bonjour {{name}}, la facture {{number}} de {{amount}} EUR est échue.",
+        )
+        engine.register_template(template)
+
+        content = engine.render(template, NotificationChannel.EMAIL, {"name": "Alice", "number": "F-1", "amount": 42})
+
+        assert content.subject == "Facture F-1"
+        assert content.body == "Bonjour Alice, la facture F-1 de 42 EUR est échue."
+
+    def test_unknown_placeholders_and_braces_are_kept(self):
+        engine = TemplateEngine()
+        template = make_template(email_text="{{{name}}} {{missing}} {{ name }} {}")
+
+        content = engine.render(template, NotificationChannel.EMAIL, {"name": "Alice"})
+
+        assert content.body == "{Alice} {{missing}} {{ name }} {}"
+
+    def test_webhook_payload_is_parsed(self):
+        engine = TemplateEngine()
+        template = make_template(webhook_payload='{"invoice": "{{number}}"}')
+
+        content = engine.render(template, NotificationChannel.WEBHOOK, {"number": "F-1"})
+
+        assert content.data == {"invoice": "F-1"}
+
+    def test_compiled_form_is_cached_and_refreshed(self):
+        engine = TemplateEngine()
+        template = make_template(email_text="Bonjour {{name}}")
+        engine.register_template(template)
+        compiled = engine.get_compiled(template)
+
+        assert engine.get_compiled(template) is compiled
+
+        template.email_text = "Au revoir {{name}}"
+        content = engine.render(template, NotificationChannel.EMAIL, {"name": "Alice"})
+
+        assert content.body == "Au revoir Alice"
+        assert engine.get_compiled(template) is not compiled
@@ -0,0 +1,252 @@
+"""
+Tests du pipeline d'import Odoo
+===============================
+
+Contre un faux serveur Odoo XML-RPC (SimpleXMLRPCServer, multi-thread):
+- Lecture paginée par curseur d'ID, en parallèle, restituée dans l'ordre
+- Import produits par INSERT ... ON CONFLICT (création puis mise à jour)
+- Delta write_date / create_date
+- Isolation des erreurs: un produit invalide n'annule pas sa page
+- Indexation de recherche des produits importés
+"""
+
+import threading
+from datetime import datetime
+from socketserver import ThreadingMixIn
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.modules.inventory.models import Product
+from app.modules.odoo_import.connector import OdooConnector
+from app.modules.odoo_import.models import (
+    OdooConnectionConfig,
+    OdooFieldMapping,
+    OdooImportHistory,
+    OdooImportStatus,
+)
+from app.modules.odoo_import.pipeline import OdooPagedReader
+from app.modules.odoo_import.services.products import ProductImportService
+from app.modules.search import events
+from app.modules.search.entities import default_search_entities
+from app.modules.search.models import SearchDocumentRecord, SearchIndexRecord, SearchPosting
+from app.modules.search.service import FieldMapping, FieldType, SearchQuery, SearchService
+
+TENANT = "tenant-odoo"
+
+
+class _Handler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingMixIn, SimpleXMLRPCServer):
+    daemon_threads = True
+
+
+class FakeOdoo:
+    """Sous-ensemble de l'API XML-RPC d'Odoo (search, search_count, read)."""
+
+    def __init__(self, records):
+        self.records = {model: {r["id"]: r for r in rows} for model, rows in records.items()}
+        self.calls = []
+        self._lock = threading.Lock()
+        self.server = _Server(("127.0.0.1", 0), requestHandler=_Handler, allow_none=True, logRequests=False)
+        self.server.register_function(lambda: {"server_version": "17.0"}, "version")
+        self.server.register_function(lambda db, user, password, ctx: 2, "authenticate")
+        self.server.register_function(self.execute_kw, "execute_kw")
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def execute_kw(self, db, uid, password, model, method, args, kwargs):
+        with self._lock:
+            self.calls.append((model, method, kwargs.get("limit")))
+        rows = self.records.get(model, {})
+        if method == "read":
+            ids, fields = args[0], kwargs.get("fields")
+            return [{k: v for k, v in rows[i].items() if not fields or k in fields or k == "id"} for i in ids]
+        matches = sorted(i for i, row in rows.items() if self._match(row, list(args[0])))
+        if method == "search_count":
+            return len(matches)
+        if method == "search":
+            return matches[:kwargs["limit"]] if kwargs.get("limit") else matches
+        raise ValueError(f"Méthode non supportée: {method}")
+
+    def _match(self, row, domain):
+        def term():
+            item = domain.pop(0)
+            if item == "|":
+                left, right = term(), term()
+                return left or right
+            field, op, value = item
+            current = row.get(field, True if field == "active" else None)
+            return {
+                "=": lambda: current == value,
+                ">": lambda: current is not None and current > value,
+                ">=": lambda: current is not None and current >= value,
+                "in": lambda: current in value,
+            }[op]()
+
+        result = True
+        while domain:
+            result = term() and result
+        return result
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def odoo_product(i, **extra):
+    return {
+        "id": i,
+        "name": f"Produit {i}",
+        "default_code": f"P-{i:04d}",
+        "list_price": 10.0 + i,
+        "active": True,
+        "write_date": "2026-01-01 00:00:00",
+        "create_date": "2026-01-01 00:00:00",
+        **extra,
+    }
+
+
+@pytest.fixture
+def odoo():
+    server = FakeOdoo({"product.product": [odoo_product(i) for i in range(1, 26)]})
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    for model in (Product, OdooConnectionConfig, OdooImportHistory, OdooFieldMapping):
+        model.__table__.create(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def service(db, odoo):
+    service = ProductImportService(db, TENANT)
+    service.IMPORT_PAGE_SIZE = 4
+    service.IMPORT_WORKERS = 3
+    config = OdooConnectionConfig(
+        tenant_id=TENANT,
+        name="Odoo test",
+        odoo_url=odoo.url,
+        odoo_database="odoo",
+        username="admin",
+        encrypted_credential=service._encrypt_credential("secret"),
+    )
+    db.add(config)
+    db.commit()
+    service.config = config
+    return service
+
+
+def connectors(odoo, count):
+    result = []
+    for _ in range(count):
+        connector = OdooConnector(odoo.url, "odoo", "admin", "secret")
+        connector.connect()
+        result.append(connector)
+    return result
+
+
+class TestOdooPagedReader:
+
+    def test_pages_in_id_order(self, odoo):
+        reader = OdooPagedReader(connectors(odoo, 3), page_size=4)
+
+        pages = list(reader.iter_pages("product.product", [("active", "=", True)], ["name"]))
+
+        assert [len(page) for page in pages] == [4] * 6 + [1]
+        assert [row["id"] for page in pages for row in page] == list(range(1, 26))
+        assert reader.count("product.product", []) == 25
+        # Curseur d'ID: blocs de page_size x connecteurs
+        assert [limit for _, method, limit in odoo.calls if method == "search"] == [12, 12, 12]
+
+    def test_requires_connector(self):
+        with pytest.raises(ValueError):
+            OdooPagedReader([])
+
+
+class TestProductImport:
+
+    def test_full_import_then_update(self, service, odoo):
+        history = service.import_products(service.config.id, full_sync=True)
+
+        assert history.status == OdooImportStatus.SUCCESS
+        assert (history.total_records, history.created_count, history.updated_count) == (25, 25, 0)
+        products = service.db.execute(select(Product).order_by(Product.code)).scalars().all()
+        assert len(products) == 25
+        assert (products[0].code, products[0].name, float(products[0].sale_price)) == ("P-0001", "Produit 1", 11.0)
+
+        odoo.records["product.product"][1]["name"] = "Produit renommé"
+        history = service.import_products(service.config.id, full_sync=True)
+
+        assert (history.created_count, history.updated_count) == (0, 25)
+        service.db.expire_all()
+        assert service.db.execute(
+            select(Product.name).where(Product.code == "P-0001")
+        ).scalar_one() == "Produit renommé"
+        assert service.db.query(Product).count() == 25
+
+    def test_delta_import(self, service, odoo):
+        service.import_products(service.config.id, full_sync=True)
+        service.config.products_last_sync_at = datetime(2026, 2, 1)
+        service.db.commit()
+        odoo.records["product.product"][3]["write_date"] = "2026-02-02 10:00:00"
+        odoo.records["product.product"][30] = odoo_product(30, create_date="2026-02-03 00:00:00")
+
+        history = service.import_products(service.config.id)
+
+        assert history.is_delta_sync is True
+        assert (history.total_records, history.created_count, history.updated_count) == (2, 1, 1)
+
+    def test_invalid_product_is_isolated(self, service, odoo):
+        # name NOT NULL: le lot échoue, puis seul ce produit est rejeté
+        odoo.records["product.product"][6]["name"] = False
+
+        history = service.import_products(service.config.id, full_sync=True)
+
+        assert history.status == OdooImportStatus.PARTIAL
+        assert (history.created_count, history.error_count) == (24, 1)
+        assert history.error_details[0]["code"] == "P-0006"
+        assert service.db.query(Product).count() == 24
+
+    def test_imported_products_searchable(self, service, odoo):
+        engine = service.db.get_bind()
+        for model in (SearchIndexRecord, SearchDocumentRecord, SearchPosting):
+            model.__table__.create(bind=engine)
+        Session = sessionmaker(bind=engine)
+        to_fields = next(fields for model, _, fields in default_search_entities() if model is Product)
+        events.register_search_entity(Product, "product", to_fields, session_factory=Session)
+        try:
+            search = SearchService(TENANT, db=Session())
+            index = search.create_index("products", "product", [
+                FieldMapping(name="name", field_type=FieldType.TEXT),
+                FieldMapping(name="code", field_type=FieldType.KEYWORD),
+            ])
+            odoo.records["product.product"][7]["name"] = "Perceuse visseuse"
+
+            service.import_products(service.config.id, full_sync=True)
+            result = search.search(index.id, SearchQuery("perceuse"))
+        finally:
+            events.unregister_search_entity(Product)
+            events.get_indexed_types_cache().invalidate()
+
+        assert [hit.source["code"] for hit in result.hits] == ["P-0007"]
+        assert search.get_index(index.id).document_count == 25
@@ -0,0 +1,106 @@
+"""
+AZALSCORE - Tests de l'index compilé des routes RBAC
+=====================================================
+
+Vérifie que RouteIndex donne les mêmes résultats que le parcours linéaire
+historique de ROUTE_PERMISSIONS / PUBLIC_ROUTES / AUTHENTICATED_ONLY_ROUTES,
+et qu'il est reconstruit lors de l'enregistrement de nouvelles routes.
+"""
+
+import re
+
+import pytest
+
+from app.modules.iam.rbac_matrix import Action, Module
+from app.modules.iam.rbac_middleware import (
+    AUTHENTICATED_ONLY_ROUTES,
+    PUBLIC_ROUTES,
+    ROUTE_PERMISSIONS,
+    RouteIndex,
+    get_route_index,
+    register_public_route,
+    register_route_permission,
+)
+
+
+def linear_permission(method: str, path: str):
+    for (route_method, pattern), permission in ROUTE_PERMISSIONS.items():
+        if route_method == method and re.match(pattern, path):
+            return permission
+    return None
+
+
+@pytest.fixture
+def index():
+    return RouteIndex()
+
+
+@pytest.fixture
+def restore_routes():
+    """Restaure les tables de routes après un test qui en enregistre."""
+    permissions = dict(ROUTE_PERMISSIONS)
+    public = list(PUBLIC_ROUTES)
+    yield
+    ROUTE_PERMISSIONS.clear()
+    ROUTE_PERMISSIONS.update(permissions)
+    PUBLIC_ROUTES[:] = public
+    get_route_index().invalidate()
+
+
+class TestRouteIndexEquivalence:
+
+    @pytest.mark.parametrize("method,path", [
+        ("GET", "/api/iam/users"),
+        ("GET", "/api/iam/users/42"),
+        ("DELETE", "/api/iam/users/42/roles/7"),
+        ("GET", "/v1/iam/users/123e4567-e89b-12d3-a456-426614174000"),
+        ("PUT", "/v1/iam/roles/123e4567-e89b-12d3-a456-426614174000"),
+        ("POST", "/api/v1/commercial/customers/123e4567-e89b-12d3-a456-426614174000/convert"),
+        ("GET", "/v1/unknown/route"),
+        ("TRACE", "/api/iam/users"),
+    ])
+    def test_same_permission_as_linear_scan(self, index, method, path):
+        assert index.find_permission(method, path) is linear_permission(method, path)
+
+    def test_all_declared_routes_first_match_wins(self, index):
+        for method, pattern in ROUTE_PERMISSIONS:
+            path = pattern.rstrip("$").replace("/?", "").replace(r"\d+", "42").replace("[0-9a-fA-F-]+", "abc-123")
+            assert index.find_permission(method, path) is linear_permission(method, path), (method, pattern)
+
+    @pytest.mark.parametrize("path", ["/health", "/health/ready", "/docs", "/static/app.js", "/", "/v1/iam/users"])
+    def test_public_routes(self, index, path):
+        expected = any(re.match(pattern, path) for pattern in PUBLIC_ROUTES)
+        assert index.is_public(path) is expected
+
+    @pytest.mark.parametrize("path", ["/v1/iam/me", "/v1/me/preferences", "/v1/cockpit/dashboard/", "/v1/iam/users"])
+    def test_authenticated_only_routes(self, index, path):
+        expected = any(re.match(pattern, path) for pattern in AUTHENTICATED_ONLY_ROUTES)
+        assert index.is_authenticated_only(path) is expected
+
+
+class TestRouteIndexRebuild:
+
+    def test_register_route_permission_rebuilds(self, restore_routes):
+        index = get_route_index()
+        assert index.find_permission("GET", "/v1/custom/widgets") is None
+
+        register_route_permission("GET", r"/v1/custom/widgets/?$", Module.SETTINGS, Action.READ)
+
+        permission = index.find_permission("GET", "/v1/custom/widgets")
+        assert permission is not None
+        assert permission.module == Module.SETTINGS
+
+    def test_register_public_route_rebuilds(self, restore_routes):
+        index = get_route_index()
+        assert index.is_public("/api/custom-public/ping") is False
+
+        register_public_route(r"^/api/custom-public/.*$")
+
+        assert index.is_public("/api/custom-public/ping") is True
+
+    def test_memo_is_bounded(self):
+        index = RouteIndex()
+        for i in range(RouteIndex.MEMO_SIZE + 100):
+            index.find_permission("GET", f"/v1/unknown/{i}")
+
+        assert len(index._memo) == RouteIndex.MEMO_SIZE
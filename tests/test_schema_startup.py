@@ -0,0 +1,159 @@
+"""
+Tests de la vérification du schéma au démarrage (empreinte de Base.metadata).
+
+SQLite en mémoire, avec une base déclarative dédiée.
+"""
+
+import pytest
+from sqlalchemy import Column, ForeignKey, Index, String, create_engine, event, inspect
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import StaticPool
+
+from app.core.types import UniversalUUID
+from app.db.schema_startup import (
+    StartupTimings,
+    compute_metadata_fingerprint,
+    ensure_schema,
+    read_fingerprint,
+)
+
+
+def make_base(extra_column: bool = False, reverse: bool = False):
+    """Base déclarative de deux tables (ordre de déclaration variable)."""
+
+    class Base(DeclarativeBase):
+        pass
+
+    def customer():
+        attrs = {
+            "__tablename__": "customers",
+            "id": Column(UniversalUUID(), primary_key=True),
+            "name": Column(String(100), nullable=False),
+        }
+        if extra_column:
+            attrs["email"] = Column(String(255))
+        return type("Customer", (Base,), attrs)
+
+    def order():
+        return type("Order", (Base,), {
+            "__tablename__": "orders",
+            "id": Column(UniversalUUID(), primary_key=True),
+            "customer_id": Column(UniversalUUID(), ForeignKey("customers.id", ondelete="CASCADE")),
+            "reference": Column(String(50)),
+            "__table_args__": (Index("idx_orders_reference", "reference", unique=True),),
+        })
+
+    if reverse:
+        order()
+        customer()
+    else:
+        customer()
+        order()
+    return Base
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    captured = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    return captured
+
+
+@pytest.fixture(autouse=True)
+def schema_valid(monkeypatch):
+    """Validation UUID (requêtes PostgreSQL) remplacée par un compteur d'appels."""
+    calls = []
+
+    def validate(engine, base, strict=False):
+        calls.append(base)
+        return True
+
+    monkeypatch.setattr("app.core.schema_validator.validate_schema_on_startup", validate)
+    return calls
+
+
+class TestFingerprint:
+
+    def test_deterministic_and_order_independent(self, engine):
+        first = compute_metadata_fingerprint(make_base().metadata, engine.dialect)
+
+        assert compute_metadata_fingerprint(make_base().metadata, engine.dialect) == first
+        assert compute_metadata_fingerprint(make_base(reverse=True).metadata, engine.dialect) == first
+
+    def test_changes_with_model(self, engine):
+        assert (
+            compute_metadata_fingerprint(make_base().metadata, engine.dialect)
+            != compute_metadata_fingerprint(make_base(extra_column=True).metadata, engine.dialect)
+        )
+
+
+class TestEnsureSchema:
+
+    def test_first_start_creates_and_stores(self, engine, schema_valid):
+        base = make_base()
+
+        result = ensure_schema(engine, base)
+
+        assert not result.skipped
+        assert result.tables_created == 2
+        assert set(inspect(engine).get_table_names()) >= {"customers", "orders"}
+        assert len(schema_valid) == 1
+        with engine.connect() as conn:
+            assert read_fingerprint(conn) == result.fingerprint
+
+    def test_unchanged_model_skips_ddl_and_validation(self, engine, statements, schema_valid):
+        ensure_schema(engine, make_base())
+        statements.clear()
+        timings = StartupTimings()
+
+        result = ensure_schema(engine, make_base(), timings=timings)
+
+        assert result.skipped
+        assert len(schema_valid) == 1
+        # Lecture de l'empreinte uniquement: aucune introspection des tables ORM
+        assert not [s for s in statements if "customers" in s or "orders" in s]
+        assert len(statements) <= 3
+        assert set(timings.as_dict()) == {"schema_fingerprint", "schema_lock", "total"}
+
+    def test_changed_model_runs_full_check(self, engine, schema_valid):
+        first = ensure_schema(engine, make_base())
+
+        result = ensure_schema(engine, make_base(extra_column=True))
+
+        assert not result.skipped
+        assert result.fingerprint != first.fingerprint
+        assert len(schema_valid) == 2
+
+    def test_full_mode_always_checks(self, engine, schema_valid):
+        ensure_schema(engine, make_base())
+
+        result = ensure_schema(engine, make_base(), mode="full")
+
+        assert not result.skipped
+        assert len(schema_valid) == 2
+
+    def test_invalid_schema_not_stored(self, engine, monkeypatch):
+        monkeypatch.setattr(
+            "app.core.schema_validator.validate_schema_on_startup",
+            lambda engine, base, strict=False: False
+        )
+
+        ensure_schema(engine, make_base())
+
+        with engine.connect() as conn:
+            assert read_fingerprint(conn) is None